@@ -0,0 +1,114 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""
+This gem5 configuation script runs the first 10^6 ticks of the "riscv-hello"
+binary once, with atomic cores, then forks a child simulator for each of
+several variants which continue from that point. This serves as an example of
+using `Simulator.fork_variants` to avoid repeating the shared prefix of a
+simulation (e.g., booting an OS and warming up) in a parameter sweep.
+
+Usage
+-----
+
+```
+scons build/RISCV/gem5.opt
+./build/RISCV/gem5.opt \
+    configs/example/gem5_library/riscv-hello-fork-variants.py
+```
+"""
+
+import m5
+from gem5.isas import ISA
+from gem5.utils.requires import requires
+from gem5.resources.resource import Resource
+from gem5.components.memory import SingleChannelDDR3_1600
+from gem5.components.processors.cpu_types import CPUTypes
+from gem5.components.boards.simple_board import SimpleBoard
+from gem5.components.cachehierarchies.classic.no_cache import NoCache
+from gem5.components.processors.simple_switchable_processor import (
+    SimpleSwitchableProcessor,
+)
+from gem5.simulate.simulator import Simulator
+from gem5.simulate.variant import SimulatorVariant
+
+# This check ensures the gem5 binary is compiled to the RISCV ISA target.
+# If not, an exception will be thrown.
+requires(isa_required=ISA.RISCV)
+
+# `m5.fork()` requires all listeners to be disabled.
+m5.disableAllListeners()
+
+cache_hierarchy = NoCache()
+
+memory = SingleChannelDDR3_1600(size="32MB")
+
+# The shared prefix is run with atomic cores. Variants may switch to timing
+# cores.
+processor = SimpleSwitchableProcessor(
+    starting_core_type=CPUTypes.ATOMIC,
+    switch_core_type=CPUTypes.TIMING,
+    isa=ISA.RISCV,
+    num_cores=1,
+)
+
+board = SimpleBoard(
+    clk_freq="3GHz",
+    processor=processor,
+    memory=memory,
+    cache_hierarchy=cache_hierarchy,
+)
+
+board.set_se_binary_workload(Resource("riscv-hello"))
+
+simulator = Simulator(board=board)
+
+# Run the shared prefix. This exits with a MAX_TICK exit event after 10^6
+# ticks.
+simulator.run(max_ticks=10**6)
+
+results = simulator.fork_variants(
+    [
+        # Continue with atomic cores.
+        SimulatorVariant("atomic"),
+        # Switch to timing cores at the fork.
+        SimulatorVariant("timing", switch_after_ticks=0),
+        # Switch to timing cores 10^6 ticks after the fork.
+        SimulatorVariant("switch-later", switch_after_ticks=10**6),
+    ],
+    max_concurrent=2,
+)
+
+for name, result in results.items():
+    if not result.success:
+        print(f"Variant '{name}' failed: {result.error}")
+        exit(1)
+    print(
+        f"Variant '{name}' exited @ tick {result.tick} because "
+        f"{result.exit_cause}."
+    )
+print("Done running variants.")
@@ -0,0 +1,257 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""
+This gem5 configuation script measures how much detailed warmup is saved by
+functionally warming the caches before switching to detailed cores.
+
+The "x86-print-this" binary is fast-forwarded with KVM cores, which do not
+access the caches. If `--functional-warming` is set, the processor then
+switches to the warming cores (atomic cores for a classic cache hierarchy,
+timing cores for a Ruby cache hierarchy) and warms the caches for
+`--warming-insts` instructions. Finally, the processor switches to O3 cores and
+runs `--intervals` detailed intervals of `--interval-insts` instructions each,
+recording the IPC of each interval.
+
+The detailed warmup needed is the number of instructions simulated in detail
+before the IPC of an interval is within `--tolerance` of the IPC of the final
+interval. Comparing this between runs with and without
+`--functional-warming` shows how much detailed warmup is saved. The results
+are printed and written to `functional-warming.json` in the output directory.
+
+Usage
+-----
+
+```
+scons build/X86/gem5.opt
+./build/X86/gem5.opt \
+    configs/example/gem5_library/x86-functional-warming-benchmark.py
+./build/X86/gem5.opt \
+    configs/example/gem5_library/x86-functional-warming-benchmark.py \
+    --functional-warming
+```
+"""
+
+import argparse
+import json
+import os
+
+import m5
+from gem5.isas import ISA
+from gem5.utils.requires import requires
+from gem5.coherence_protocol import CoherenceProtocol
+from gem5.resources.resource import obtain_resource
+from gem5.components.memory import SingleChannelDDR3_1600
+from gem5.components.processors.cpu_types import CPUTypes
+from gem5.components.boards.simple_board import SimpleBoard
+from gem5.components.cachehierarchies.classic.private_l1_private_l2_cache_hierarchy import (
+    PrivateL1PrivateL2CacheHierarchy,
+)
+from gem5.components.processors.simple_switchable_processor import (
+    SimpleSwitchableProcessor,
+)
+from gem5.simulate.simulator import Simulator
+from gem5.simulate.exit_event import ExitEvent
+from gem5.simulate.sampling import ipc_metric
+
+parser = argparse.ArgumentParser(
+    description="A benchmark of the detailed warmup saved by functional "
+    "cache warming."
+)
+
+parser.add_argument(
+    "--cache-hierarchy",
+    type=str,
+    default="classic",
+    choices=["classic", "ruby"],
+    help="Use a classic (PrivateL1PrivateL2CacheHierarchy) or Ruby "
+    "(MESITwoLevelCacheHierarchy) cache hierarchy.",
+)
+
+parser.add_argument(
+    "--functional-warming",
+    action="store_true",
+    help="Warm the caches before switching to the O3 cores.",
+)
+
+parser.add_argument(
+    "--fast-forward-insts",
+    type=int,
+    default=1_000_000,
+    help="The number of instructions to fast-forward with KVM.",
+)
+
+parser.add_argument(
+    "--warming-insts",
+    type=int,
+    default=1_000_000,
+    help="The number of instructions to warm the caches for.",
+)
+
+parser.add_argument(
+    "--interval-insts",
+    type=int,
+    default=10_000,
+    help="The number of instructions in each detailed interval.",
+)
+
+parser.add_argument(
+    "--intervals",
+    type=int,
+    default=20,
+    help="The number of detailed intervals.",
+)
+
+parser.add_argument(
+    "--tolerance",
+    type=float,
+    default=0.02,
+    help="The relative difference from the IPC of the final interval within "
+    "which an interval is considered warm.",
+)
+
+args = parser.parse_args()
+
+if args.cache_hierarchy == "classic":
+    requires(isa_required=ISA.X86, kvm_required=True)
+    cache_hierarchy = PrivateL1PrivateL2CacheHierarchy(
+        l1d_size="32kB", l1i_size="32kB", l2_size="256kB"
+    )
+else:
+    requires(
+        isa_required=ISA.X86,
+        coherence_protocol_required=CoherenceProtocol.MESI_TWO_LEVEL,
+        kvm_required=True,
+    )
+    from gem5.components.cachehierarchies.ruby.mesi_two_level_cache_hierarchy import (
+        MESITwoLevelCacheHierarchy,
+    )
+
+    cache_hierarchy = MESITwoLevelCacheHierarchy(
+        l1d_size="32kB",
+        l1d_assoc=8,
+        l1i_size="32kB",
+        l1i_assoc=8,
+        l2_size="256kB",
+        l2_assoc=16,
+        num_l2_banks=1,
+    )
+
+memory = SingleChannelDDR3_1600(size="32MB")
+
+processor = SimpleSwitchableProcessor(
+    starting_core_type=CPUTypes.KVM,
+    switch_core_type=CPUTypes.O3,
+    isa=ISA.X86,
+    num_cores=1,
+    functional_warming=args.functional_warming,
+    # Atomic cores do not warm Ruby caches, timing cores do.
+    warming_core_type=(
+        CPUTypes.ATOMIC
+        if cache_hierarchy.supports_functional_warming()
+        else CPUTypes.TIMING
+    ),
+)
+
+board = SimpleBoard(
+    clk_freq="3GHz",
+    processor=processor,
+    memory=memory,
+    cache_hierarchy=cache_hierarchy,
+)
+
+board.set_se_binary_workload(
+    binary=obtain_resource("x86-print-this"),
+    arguments=["print this", 15000],
+)
+
+interval_ipcs = []
+
+
+def max_insts_generator():
+    # The end of the fast-forward.
+    if args.functional_warming:
+        processor.switch_to_warming_cores()
+        simulator.schedule_max_insts(args.warming_insts)
+        yield False
+
+    # The end of the functional warming, if any.
+    processor.switch()
+    for _ in range(args.intervals):
+        m5.stats.reset()
+        simulator.schedule_max_insts(args.interval_insts)
+        yield False
+        interval_ipcs.append(ipc_metric(simulator))
+    yield True
+
+
+simulator = Simulator(
+    board=board,
+    on_exit_event={ExitEvent.MAX_INSTS: max_insts_generator()},
+)
+simulator.schedule_max_insts(args.fast_forward_insts)
+simulator.run()
+
+if len(interval_ipcs) < args.intervals:
+    print(
+        "The workload exited before all the detailed intervals were run. "
+        "Reduce --fast-forward-insts, --warming-insts or --intervals."
+    )
+    exit(1)
+
+# The detailed warmup needed is the number of instructions executed before
+# the first interval whose IPC, and that of all later intervals, is within the
+# tolerance of the IPC of the final interval.
+final_ipc = interval_ipcs[-1]
+warm_interval = len(interval_ipcs) - 1
+while warm_interval > 0 and (
+    abs(interval_ipcs[warm_interval - 1] - final_ipc)
+    <= args.tolerance * final_ipc
+):
+    warm_interval -= 1
+detailed_warmup_insts = warm_interval * args.interval_insts
+
+results = {
+    "cache_hierarchy": args.cache_hierarchy,
+    "functional_warming": args.functional_warming,
+    "warming_insts": args.warming_insts if args.functional_warming else 0,
+    "interval_insts": args.interval_insts,
+    "interval_ipcs": interval_ipcs,
+    "detailed_warmup_insts": detailed_warmup_insts,
+}
+with open(
+    os.path.join(m5.options.outdir, "functional-warming.json"), "w"
+) as f:
+    json.dump(results, f, indent=2)
+
+for i, ipc in enumerate(interval_ipcs):
+    print(f"Interval {i}: IPC {ipc:.4f}")
+print(
+    f"Detailed warmup needed: {detailed_warmup_insts} instructions "
+    f"({'with' if args.functional_warming else 'without'} functional "
+    "warming)."
+)
@@ -0,0 +1,102 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""
+This gem5 configuation script runs the "x86-print-this" binary with
+SMARTS-style systematic sampling. Every 100,000 instructions, the processor
+switches from atomic to O3 cores, warms up for 10,000 instructions, and
+measures 2,000 instructions. The rest of each period is fast-forwarded with
+the atomic cores. The stats are dumped for each sample, and a report of the
+IPC and CPI, with 99.7% confidence intervals, is written to
+`smarts-report.json` in the output directory.
+
+Usage
+-----
+
+```
+scons build/X86/gem5.opt
+./build/X86/gem5.opt configs/example/gem5_library/x86-smarts-sampling.py
+```
+"""
+
+import os
+
+import m5
+from gem5.isas import ISA
+from gem5.utils.requires import requires
+from gem5.resources.resource import obtain_resource
+from gem5.components.memory import SingleChannelDDR3_1600
+from gem5.components.processors.cpu_types import CPUTypes
+from gem5.components.boards.simple_board import SimpleBoard
+from gem5.components.cachehierarchies.classic.private_l1_cache_hierarchy import (
+    PrivateL1CacheHierarchy,
+)
+from gem5.components.processors.simple_switchable_processor import (
+    SimpleSwitchableProcessor,
+)
+from gem5.simulate.simulator import Simulator
+from gem5.simulate.sampling import SmartsSampler
+
+requires(isa_required=ISA.X86)
+
+cache_hierarchy = PrivateL1CacheHierarchy(l1d_size="32kB", l1i_size="32kB")
+
+memory = SingleChannelDDR3_1600(size="32MB")
+
+# The processor fast-forwards with atomic cores, and switches to O3 cores
+# for each sample.
+processor = SimpleSwitchableProcessor(
+    starting_core_type=CPUTypes.ATOMIC,
+    switch_core_type=CPUTypes.O3,
+    isa=ISA.X86,
+    num_cores=1,
+)
+
+board = SimpleBoard(
+    clk_freq="3GHz",
+    processor=processor,
+    memory=memory,
+    cache_hierarchy=cache_hierarchy,
+)
+
+board.set_se_binary_workload(
+    binary=obtain_resource("x86-print-this"),
+    arguments=["print this", 15000],
+)
+
+sampler = SmartsSampler(
+    period=100_000,
+    warmup=10_000,
+    measurement=2_000,
+    report_path=os.path.join(m5.options.outdir, "smarts-report.json"),
+)
+
+simulator = Simulator(board=board)
+sampler.attach(simulator)
+simulator.run()
+
+print(sampler.get_report())
@@ -96,4 +96,23 @@ memUsage()
 #endif
 }
 
+uint64_t
+memResident()
+{
+#ifdef __APPLE__
+    struct task_basic_info t_info;
+    mach_msg_type_number_t t_info_count = TASK_BASIC_INFO_COUNT;
+
+    if (KERN_SUCCESS != task_info(mach_task_self(),
+                                  TASK_BASIC_INFO, (task_info_t)&t_info,
+                                  &t_info_count)) {
+        return 0;
+    }
+
+    return t_info.resident_size / 1024;
+#else
+    return procInfo("/proc/self/status", "VmRSS:");
+#endif
+}
+
 } // namespace gem5
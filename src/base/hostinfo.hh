@@ -41,6 +41,14 @@ namespace gem5
  */
 uint64_t memUsage();
 
+/**
+ * Determine the simulator process' resident set size (i.e., the host
+ * physical memory it is using).
+ *
+ * @return Resident set size in kilobytes
+ */
+uint64_t memResident();
+
 } // namespace gem5
 
 #endif // __HOSTINFO_HH__
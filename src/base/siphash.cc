@@ -0,0 +1,119 @@
+/*
+ * Copyright (c) 2023 The Regents of the University of California.
+ * All rights reserved.
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are
+ * met: redistributions of source code must retain the above copyright
+ * notice, this list of conditions and the following disclaimer;
+ * redistributions in binary form must reproduce the above copyright
+ * notice, this list of conditions and the following disclaimer in the
+ * documentation and/or other materials provided with the distribution;
+ * neither the name of the copyright holders nor the names of its
+ * contributors may be used to endorse or promote products derived from
+ * this software without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+ * "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+ * LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+ * A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+ * OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+ * SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+ * LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+ * DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+ * THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+ * (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+ * OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+ */
+
+#include "base/siphash.hh"
+
+#include <cstring>
+
+namespace gem5
+{
+
+namespace
+{
+
+inline uint64_t
+rotl(uint64_t x, int bits)
+{
+    return (x << bits) | (x >> (64 - bits));
+}
+
+inline uint64_t
+loadLittleEndian(const uint8_t *p)
+{
+    uint64_t word;
+    std::memcpy(&word, p, sizeof(word));
+#if __BYTE_ORDER__ == __ORDER_BIG_ENDIAN__
+    word = __builtin_bswap64(word);
+#endif
+    return word;
+}
+
+struct SipState
+{
+    uint64_t v0, v1, v2, v3;
+
+    void
+    round()
+    {
+        v0 += v1; v1 = rotl(v1, 13); v1 ^= v0; v0 = rotl(v0, 32);
+        v2 += v3; v3 = rotl(v3, 16); v3 ^= v2;
+        v0 += v3; v3 = rotl(v3, 21); v3 ^= v0;
+        v2 += v1; v1 = rotl(v1, 17); v1 ^= v2; v2 = rotl(v2, 32);
+    }
+
+    void
+    compress(uint64_t m)
+    {
+        v3 ^= m;
+        round();
+        round();
+        v0 ^= m;
+    }
+
+    uint64_t
+    finalize(uint8_t constant)
+    {
+        v2 ^= constant;
+        for (int i = 0; i < 4; ++i)
+            round();
+        return v0 ^ v1 ^ v2 ^ v3;
+    }
+};
+
+} // anonymous namespace
+
+SipHash128
+sipHash128(const SipHash128 &key, const void *data, size_t size)
+{
+    SipState s = {
+        key[0] ^ 0x736f6d6570736575ULL,
+        key[1] ^ 0x646f72616e646f6dULL ^ 0xee,
+        key[0] ^ 0x6c7967656e657261ULL,
+        key[1] ^ 0x7465646279746573ULL,
+    };
+
+    const uint8_t *bytes = static_cast<const uint8_t *>(data);
+    const size_t tail = size % sizeof(uint64_t);
+    const uint8_t *end = bytes + size - tail;
+    for (; bytes != end; bytes += sizeof(uint64_t))
+        s.compress(loadLittleEndian(bytes));
+
+    // the last word holds the remaining bytes and the size
+    uint64_t last = uint64_t(size) << 56;
+    for (size_t i = 0; i < tail; ++i)
+        last |= uint64_t(bytes[i]) << (8 * i);
+    s.compress(last);
+
+    SipHash128 digest;
+    digest[0] = s.finalize(0xee);
+    s.v1 ^= 0xdd;
+    digest[1] = s.finalize(0);
+    return digest;
+}
+
+} // namespace gem5
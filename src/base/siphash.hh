@@ -0,0 +1,60 @@
+/*
+ * Copyright (c) 2023 The Regents of the University of California.
+ * All rights reserved.
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are
+ * met: redistributions of source code must retain the above copyright
+ * notice, this list of conditions and the following disclaimer;
+ * redistributions in binary form must reproduce the above copyright
+ * notice, this list of conditions and the following disclaimer in the
+ * documentation and/or other materials provided with the distribution;
+ * neither the name of the copyright holders nor the names of its
+ * contributors may be used to endorse or promote products derived from
+ * this software without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+ * "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+ * LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+ * A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+ * OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+ * SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+ * LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+ * DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+ * THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+ * (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+ * OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+ */
+
+#ifndef __BASE_SIPHASH_HH__
+#define __BASE_SIPHASH_HH__
+
+#include <array>
+#include <cstddef>
+#include <cstdint>
+
+namespace gem5
+{
+
+/** A 128-bit SipHash key or digest, as two little-endian 64-bit words */
+using SipHash128 = std::array<uint64_t, 2>;
+
+/**
+ * Compute the 128-bit SipHash-2-4 of a buffer.
+ *
+ * SipHash is a keyed hash function: without the key, it is infeasible
+ * to find two inputs with the same digest, even for someone who
+ * chooses the inputs (e.g., a simulated guest writing its memory). With
+ * a secret, random key, comparing digests can therefore stand in for
+ * comparing the data itself.
+ *
+ * @param key The key
+ * @param data The start of the buffer
+ * @param size The size of the buffer, in bytes
+ * @return The digest
+ */
+SipHash128 sipHash128(const SipHash128 &key, const void *data, size_t size);
+
+} // namespace gem5
+
+#endif // __BASE_SIPHASH_HH__
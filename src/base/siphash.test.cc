@@ -0,0 +1,77 @@
+/*
+ * Copyright (c) 2023 The Regents of the University of California.
+ * All rights reserved.
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are
+ * met: redistributions of source code must retain the above copyright
+ * notice, this list of conditions and the following disclaimer;
+ * redistributions in binary form must reproduce the above copyright
+ * notice, this list of conditions and the following disclaimer in the
+ * documentation and/or other materials provided with the distribution;
+ * neither the name of the copyright holders nor the names of its
+ * contributors may be used to endorse or promote products derived from
+ * this software without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+ * "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+ * LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+ * A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+ * OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+ * SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+ * LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+ * DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+ * THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+ * (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+ * OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+ */
+
+#include <gtest/gtest.h>
+
+#include <cstdint>
+
+#include "base/siphash.hh"
+
+using namespace gem5;
+
+namespace
+{
+
+// The key of the SipHash reference test vectors, bytes 0x00 to 0x0f
+const SipHash128 key = {0x0706050403020100ULL, 0x0f0e0d0c0b0a0908ULL};
+
+// Hashes the reference test message of the given size, bytes 0 to size - 1
+SipHash128
+hashMessage(size_t size)
+{
+    uint8_t message[64] = {};
+    for (size_t i = 0; i < size; ++i)
+        message[i] = i;
+    return sipHash128(key, message, size);
+}
+
+} // anonymous namespace
+
+/** Tests the digests of the SipHash-2-4-128 reference test vectors. */
+TEST(SipHashTest, ReferenceVectors)
+{
+    EXPECT_EQ(SipHash128({0xe6a825ba047f81a3ULL, 0x930255c71472f66dULL}),
+              hashMessage(0));
+    EXPECT_EQ(SipHash128({0x53c1dbd8beebf1a1ULL, 0x3982f01fa64ab8c0ULL}),
+              hashMessage(7));
+    EXPECT_EQ(SipHash128({0x61f55862baa9623bULL, 0xb49714f364e2830fULL}),
+              hashMessage(8));
+    EXPECT_EQ(SipHash128({0x11a8b03399e99354ULL, 0xd9c3cf970fec087eULL}),
+              hashMessage(15));
+    EXPECT_EQ(SipHash128({0x4a83502f77d15051ULL, 0x7cbd3f979a063e50ULL}),
+              hashMessage(63));
+}
+
+/** Tests that the digest depends on the key. */
+TEST(SipHashTest, Keyed)
+{
+    const SipHash128 other_key = {key[0], key[1] ^ 1};
+    const uint64_t data = 0;
+    EXPECT_NE(sipHash128(key, &data, sizeof(data)),
+              sipHash128(other_key, &data, sizeof(data)));
+}
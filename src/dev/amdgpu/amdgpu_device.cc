@@ -57,7 +57,7 @@ AMDGPUDevice::AMDGPUDevice(const AMDGPUDeviceParams &p)
       pm4PktProc(p.pm4_pkt_proc), cp(p.cp),
       checkpoint_before_mmios(p.checkpoint_before_mmios),
       init_interrupt_count(0), _lastVMID(0),
-      deviceMem(name() + ".deviceMem", p.memories, false, "", false)
+      deviceMem(name() + ".deviceMem", p.memories, false, "", false, 0)
 {
     // Loading the rom binary dumped from hardware.
     std::ifstream romBin;
@@ -38,7 +38,9 @@
 #include "mem/physical.hh"
 
 #include <fcntl.h>
+#include <sched.h>
 #include <sys/mman.h>
+#include <sys/stat.h>
 #include <sys/types.h>
 #include <sys/user.h>
 #include <unistd.h>
@@ -47,10 +49,16 @@
 #include <cerrno>
 #include <climits>
 #include <cstdio>
+#include <cstring>
+#include <filesystem>
+#include <fstream>
 #include <iostream>
+#include <random>
 #include <string>
+#include <thread>
 
 #include "base/intmath.hh"
+#include "base/siphash.hh"
 #include "base/trace.hh"
 #include "debug/AddrRanges.hh"
 #include "debug/Checkpoint.hh"
@@ -76,14 +84,101 @@ namespace gem5
 namespace memory
 {
 
+namespace
+{
+
+// The size of the blocks the memory is compressed in, in parallel,
+// when it is checkpointed
+const uint64_t compressionBlockSize = 64 * 1024 * 1024;
+
+// The number of incremental checkpoints which may be layered on top
+// of a full one before the memory is stored in full again, which
+// bounds the number of checkpoints read on restore
+const unsigned int maxCheckpointChainDepth = 16;
+
+// The size of the buffer each block is compressed through
+const unsigned int compressionBufferSize = 256 * 1024;
+
+/**
+ * Compress a block of memory as a complete gzip member. The block is
+ * compressed through a small buffer, so only as much memory as the
+ * compressed block takes up is allocated.
+ *
+ * @param data The start of the block
+ * @param size The size of the block, at most 4 GiB
+ * @return The gzip member
+ */
+std::vector<uint8_t>
+gzipBlock(const uint8_t *data, uint64_t size)
+{
+    // the same settings as gzopen(..., "wb")
+    z_stream strm{};
+    if (deflateInit2(&strm, Z_DEFAULT_COMPRESSION, Z_DEFLATED, 15 + 16, 8,
+                     Z_DEFAULT_STRATEGY) != Z_OK) {
+        panic("Failed to initialize the memory checkpoint compression\n");
+    }
+
+    std::vector<uint8_t> compressed;
+    std::vector<uint8_t> buffer(compressionBufferSize);
+    strm.next_in = const_cast<uint8_t *>(data);
+    strm.avail_in = size;
+
+    int ret;
+    do {
+        strm.next_out = buffer.data();
+        strm.avail_out = buffer.size();
+        ret = deflate(&strm, Z_FINISH);
+        panic_if(ret != Z_OK && ret != Z_BUF_ERROR && ret != Z_STREAM_END,
+                 "Failed to compress a memory checkpoint block\n");
+        compressed.insert(compressed.end(), buffer.begin(),
+                          buffer.end() - strm.avail_out);
+    } while (ret != Z_STREAM_END);
+    deflateEnd(&strm);
+
+    return compressed;
+}
+
+/**
+ * Get the number of host CPUs this process may run on, which can be
+ * fewer than the CPUs of the host (e.g., in a container or when
+ * pinned with taskset).
+ */
+unsigned int
+availableHostCpus()
+{
+#if defined(__linux__)
+    cpu_set_t cpus;
+    if (sched_getaffinity(0, sizeof(cpus), &cpus) == 0)
+        return std::max(1, CPU_COUNT(&cpus));
+#endif
+    return std::max(1u, std::thread::hardware_concurrency());
+}
+
+/**
+ * Draw a secret, random key for hashing the pages of the memory, so a
+ * simulated guest cannot choose page contents with the same hash.
+ */
+SipHash128
+randomPageHashKey()
+{
+    std::random_device device;
+    std::uniform_int_distribution<uint64_t> dist;
+    return {dist(device), dist(device)};
+}
+
+} // anonymous namespace
+
 PhysicalMemory::PhysicalMemory(const std::string& _name,
                                const std::vector<AbstractMemory*>& _memories,
                                bool mmap_using_noreserve,
                                const std::string& shared_backstore,
-                               bool auto_unlink_shared_backstore) :
+                               bool auto_unlink_shared_backstore,
+                               unsigned int checkpoint_compression_threads) :
     _name(_name), size(0), mmapUsingNoReserve(mmap_using_noreserve),
     sharedBackstore(shared_backstore), sharedBackstoreSize(0),
-    pageSize(sysconf(_SC_PAGE_SIZE))
+    pageSize(sysconf(_SC_PAGE_SIZE)),
+    checkpointCompressionThreads(checkpoint_compression_threads),
+    pageHashKey(randomPageHashKey())
 {
     // Register cleanup callback if requested.
     if (auto_unlink_shared_backstore && !sharedBackstore.empty()) {
@@ -351,12 +446,88 @@ PhysicalMemory::serialize(CheckpointOut &cp) const
     unsigned int nbr_of_stores = backingStore.size();
     SERIALIZE_SCALAR(nbr_of_stores);
 
+    // the pages are only hashed for incremental checkpoints, so a full
+    // checkpoint cannot be the base of the next incremental one
+    if (!CheckpointIn::incremental()) {
+        pageHashes.clear();
+        chainDepths.clear();
+        baseCheckpointDir.clear();
+
+        unsigned int store_id = 0;
+        // store each backing store memory segment in a file
+        for (auto& s : backingStore) {
+            ScopedCheckpointSection sec(cp, csprintf("store%d", store_id));
+            serializeStore(cp, store_id++, s.range, s.pmem);
+        }
+        return;
+    }
+
+    // the parent is stored relative to this checkpoint, so a chain of
+    // checkpoints can be moved as a whole
+    std::string parent_dir;
+    if (baseCheckpointDir.empty()) {
+        warn("No incremental checkpoint of %s has been saved or restored, "
+             "storing the full memory instead of an incremental "
+             "checkpoint.\n", name());
+    } else {
+        std::error_code ec;
+        std::filesystem::path base_dir =
+            std::filesystem::canonical(baseCheckpointDir, ec);
+        if (ec) {
+            warn("The parent checkpoint of %s, '%s', can not be found "
+                 "(%s), storing the full memory instead of an incremental "
+                 "checkpoint.\n", name(), baseCheckpointDir, ec.message());
+        } else {
+            parent_dir = base_dir.lexically_relative(
+                std::filesystem::canonical(CheckpointIn::dir())).string();
+        }
+    }
+
+    pageHashes.resize(backingStore.size());
+    chainDepths.resize(backingStore.size(), 0);
+
     unsigned int store_id = 0;
     // store each backing store memory segment in a file
     for (auto& s : backingStore) {
         ScopedCheckpointSection sec(cp, csprintf("store%d", store_id));
-        serializeStore(cp, store_id++, s.range, s.pmem);
+        std::vector<SipHash128> hashes = hashPages(s.range, s.pmem);
+        unsigned int chain_depth = 0;
+        if (!parent_dir.empty() &&
+            pageHashes[store_id].size() == hashes.size() &&
+            chainDepths[store_id] < maxCheckpointChainDepth) {
+            chain_depth = chainDepths[store_id] + 1;
+            serializeStorePages(cp, store_id, s.range, s.pmem, hashes,
+                                parent_dir);
+        } else {
+            serializeStore(cp, store_id, s.range, s.pmem);
+        }
+        SERIALIZE_SCALAR(chain_depth);
+        chainDepths[store_id] = chain_depth;
+        pageHashes[store_id++] = std::move(hashes);
     }
+
+    baseCheckpointDir = CheckpointIn::dir();
+}
+
+std::vector<SipHash128>
+PhysicalMemory::hashPages(AddrRange range, const uint8_t* pmem) const
+{
+    const uint64_t range_size = range.size();
+    std::vector<SipHash128> hashes(divCeil(range_size, pageSize));
+
+    // An unchanged hash is taken to mean an unchanged page, which is
+    // then left out of the next incremental checkpoint. The hash is
+    // therefore a keyed 128-bit one, for which no two pages with the
+    // same hash can be found without the key. It still runs much
+    // faster than the compression of the pages it saves.
+    for (uint64_t page = 0; page < hashes.size(); ++page) {
+        const uint64_t bytes = std::min<uint64_t>(pageSize,
+                                                  range_size - page * pageSize);
+        hashes[page] = sipHash128(pageHashKey, pmem + page * pageSize,
+                                  bytes);
+    }
+
+    return hashes;
 }
 
 void
@@ -378,32 +549,110 @@ PhysicalMemory::serializeStore(CheckpointOut &cp, unsigned int store_id,
 
     // write memory file
     std::string filepath = CheckpointIn::dir() + "/" + filename.c_str();
+    std::ofstream compressed_mem(filepath, std::ios::binary);
+    if (!compressed_mem)
+        fatal("Can't open physical memory checkpoint file '%s'\n",
+              filename);
+
+    // compress the memory in blocks, in parallel. Each block is a
+    // complete gzip member, and gzread reads a sequence of members as
+    // a single stream, so the file is restored as before.
+    const uint64_t nbr_of_blocks = divCeil(range.size(),
+                                           compressionBlockSize);
+    uint64_t nbr_of_threads = availableHostCpus();
+    if (checkpointCompressionThreads)
+        nbr_of_threads = std::min<uint64_t>(nbr_of_threads,
+                                            checkpointCompressionThreads);
+    nbr_of_threads = std::max<uint64_t>(1,
+        std::min(nbr_of_threads, nbr_of_blocks));
+    std::vector<std::vector<uint8_t>> compressed(nbr_of_threads);
+
+    for (uint64_t first = 0; first < nbr_of_blocks;
+         first += nbr_of_threads) {
+        const uint64_t blocks = std::min(nbr_of_threads,
+                                         nbr_of_blocks - first);
+        std::vector<std::thread> threads;
+        for (uint64_t i = 0; i < blocks; ++i) {
+            const uint64_t offset = (first + i) * compressionBlockSize;
+            const uint64_t size = std::min(compressionBlockSize,
+                                           range.size() - offset);
+            threads.emplace_back([&compressed, i, pmem, offset, size]() {
+                compressed[i] = gzipBlock(pmem + offset, size);
+            });
+        }
+        for (auto &thread : threads)
+            thread.join();
+
+        // the blocks are written in order
+        for (uint64_t i = 0; i < blocks; ++i) {
+            compressed_mem.write((const char *)compressed[i].data(),
+                                 compressed[i].size());
+        }
+        if (!compressed_mem)
+            fatal("Write failed on physical memory checkpoint file '%s'\n",
+                  filename);
+    }
+
+    compressed_mem.close();
+    if (!compressed_mem)
+        fatal("Close failed on physical memory checkpoint file '%s'\n",
+              filename);
+
+}
+
+void
+PhysicalMemory::serializeStorePages(CheckpointOut &cp, unsigned int store_id,
+                                    AddrRange range, uint8_t* pmem,
+                                    const std::vector<SipHash128> &hashes,
+                                    const std::string &parent_dir) const
+{
+    std::string filename =
+        name() + ".store" + std::to_string(store_id) + ".pages";
+    long range_size = range.size();
+    long page_size = pageSize;
+
+    const std::vector<SipHash128> &base_hashes = pageHashes[store_id];
+    uint64_t dirty_pages = 0;
+    for (uint64_t page = 0; page < hashes.size(); ++page) {
+        if (hashes[page] != base_hashes[page])
+            ++dirty_pages;
+    }
+
+    DPRINTF(Checkpoint, "Serializing %d of %d pages of physical memory %s "
+            "on top of %s\n", dirty_pages, hashes.size(), filename,
+            parent_dir);
+
+    SERIALIZE_SCALAR(store_id);
+    SERIALIZE_SCALAR(filename);
+    SERIALIZE_SCALAR(range_size);
+    SERIALIZE_SCALAR(parent_dir);
+    SERIALIZE_SCALAR(page_size);
+    SERIALIZE_SCALAR(dirty_pages);
+
+    // write the dirty pages, each preceded by its index
+    std::string filepath = CheckpointIn::dir() + "/" + filename.c_str();
     gzFile compressed_mem = gzopen(filepath.c_str(), "wb");
     if (compressed_mem == NULL)
         fatal("Can't open physical memory checkpoint file '%s'\n",
               filename);
 
-    uint64_t pass_size = 0;
-
-    // gzwrite fails if (int)len < 0 (gzwrite returns int)
-    for (uint64_t written = 0; written < range.size();
-         written += pass_size) {
-        pass_size = (uint64_t)INT_MAX < (range.size() - written) ?
-            (uint64_t)INT_MAX : (range.size() - written);
+    for (uint64_t page = 0; page < hashes.size(); ++page) {
+        if (hashes[page] == base_hashes[page])
+            continue;
 
-        if (gzwrite(compressed_mem, pmem + written,
-                    (unsigned int) pass_size) != (int) pass_size) {
+        const unsigned int bytes = std::min<uint64_t>(
+            pageSize, range.size() - page * pageSize);
+        if (gzwrite(compressed_mem, &page, sizeof(page)) != sizeof(page) ||
+            gzwrite(compressed_mem, pmem + page * pageSize, bytes) !=
+            (int)bytes) {
             fatal("Write failed on physical memory checkpoint file '%s'\n",
                   filename);
         }
     }
 
-    // close the compressed stream and check that the exit status
-    // is zero
     if (gzclose(compressed_mem))
         fatal("Close failed on physical memory checkpoint file '%s'\n",
               filename);
-
 }
 
 void
@@ -424,11 +673,29 @@ PhysicalMemory::unserialize(CheckpointIn &cp)
     unsigned int nbr_of_stores;
     UNSERIALIZE_SCALAR(nbr_of_stores);
 
+    pageHashes.clear();
+    pageHashes.resize(backingStore.size());
+    chainDepths.assign(backingStore.size(), 0);
+    baseCheckpointDir.clear();
+
     for (unsigned int i = 0; i < nbr_of_stores; ++i) {
         ScopedCheckpointSection sec(cp, csprintf("store%d", i));
         unserializeStore(cp);
-    }
 
+        // record the restored pages of an incremental checkpoint as
+        // the base of the next one. Hashing a mapped store would read
+        // all of it from disk, so its next checkpoint is a full one
+        // instead.
+        unsigned int chain_depth;
+        if (!UNSERIALIZE_OPT_SCALAR(chain_depth))
+            continue;
+        baseCheckpointDir = cp.getCptDir();
+        if (i < mappedStores.size() && mappedStores[i])
+            continue;
+        pageHashes[i] = hashPages(backingStore[i].range,
+                                  backingStore[i].pmem);
+        chainDepths[i] = chain_depth;
+    }
 }
 
 void
@@ -439,10 +706,29 @@ PhysicalMemory::unserializeStore(CheckpointIn &cp)
     unsigned int store_id;
     UNSERIALIZE_SCALAR(store_id);
 
+    std::string parent_dir;
+    if (UNSERIALIZE_OPT_SCALAR(parent_dir)) {
+        unserializeStorePages(cp, store_id, parent_dir);
+        return;
+    }
+
     std::string filename;
     UNSERIALIZE_SCALAR(filename);
     std::string filepath = cp.getCptDir() + "/" + filename;
 
+    // uncompressed stores are mapped rather than read, where possible
+    std::string format;
+    if (UNSERIALIZE_OPT_SCALAR(format) && format == "raw") {
+        long range_size;
+        UNSERIALIZE_SCALAR(range_size);
+        if (range_size != backingStore[store_id].range.size())
+            fatal("Memory range size has changed! Saw %lld, expected %lld\n",
+                  range_size, backingStore[store_id].range.size());
+
+        if (mapStore(store_id, filepath))
+            return;
+    }
+
     // mmap memoryfile
     gzFile compressed_mem = gzopen(filepath.c_str(), "rb");
     if (compressed_mem == NULL)
@@ -491,5 +777,125 @@ PhysicalMemory::unserializeStore(CheckpointIn &cp)
               filename);
 }
 
+bool
+PhysicalMemory::mapStore(unsigned int store_id, const std::string &filepath)
+{
+    uint8_t* pmem = backingStore[store_id].pmem;
+    AddrRange range = backingStore[store_id].range;
+
+    // a shared backing store has to stay shared with the other
+    // processes, so the file is read into it instead
+    if (!sharedBackstore.empty()) {
+        DPRINTF(Checkpoint, "Not mapping %s over the shared backing "
+                "store\n", filepath);
+        return false;
+    }
+
+    int fd = open(filepath.c_str(), O_RDONLY);
+    if (fd == -1)
+        fatal("Can't open physical memory checkpoint file '%s'\n", filepath);
+
+    struct stat st;
+    if (fstat(fd, &st) == -1 || st.st_size < (off_t)range.size())
+        fatal("Physical memory checkpoint file '%s' is smaller than the "
+              "memory range (%lld bytes)\n", filepath, range.size());
+
+    DPRINTF(Checkpoint, "Mapping physical memory %s with size %d\n",
+            filepath, range.size());
+
+    // map the file over the existing backing store, so the memories
+    // and any KVM memory slots can keep using the same host address.
+    // Writes are private to this process.
+    int map_flags = MAP_PRIVATE | MAP_FIXED;
+    if (mmapUsingNoReserve)
+        map_flags |= MAP_NORESERVE;
+    uint8_t* mapped = (uint8_t*) mmap(pmem, range.size(),
+                                      PROT_READ | PROT_WRITE, map_flags,
+                                      fd, 0);
+    if (mapped == (uint8_t*) MAP_FAILED) {
+        perror("mmap");
+        fatal("Could not mmap physical memory checkpoint file '%s'\n",
+              filepath);
+    }
+    assert(mapped == pmem);
+
+    // the mapping holds its own reference to the file
+    close(fd);
+
+    mappedStores.resize(backingStore.size());
+    mappedStores[store_id] = true;
+    return true;
+}
+
+void
+PhysicalMemory::unserializeStorePages(CheckpointIn &cp, unsigned int store_id,
+                                      const std::string &parent_dir)
+{
+    std::filesystem::path parent_path(parent_dir);
+    if (parent_path.is_relative())
+        parent_path = std::filesystem::path(cp.getCptDir()) / parent_path;
+
+    DPRINTF(Checkpoint, "Unserializing physical memory store %d from "
+            "parent checkpoint %s\n", store_id, parent_path.string());
+
+    // restore the parent first, the pages of this checkpoint are then
+    // layered on top of it. The section names are the same in the
+    // parent checkpoint.
+    {
+        CheckpointIn parent_cp(parent_path.string());
+        unserializeStore(parent_cp);
+    }
+    // opening the parent changed the current checkpoint directory
+    CheckpointIn::setDir(cp.getCptDir());
+
+    std::string filename;
+    UNSERIALIZE_SCALAR(filename);
+    std::string filepath = cp.getCptDir() + "/" + filename;
+
+    uint8_t* pmem = backingStore[store_id].pmem;
+    AddrRange range = backingStore[store_id].range;
+
+    long range_size;
+    UNSERIALIZE_SCALAR(range_size);
+    if (range_size != range.size())
+        fatal("Memory range size has changed! Saw %lld, expected %lld\n",
+              range_size, range.size());
+
+    long page_size;
+    UNSERIALIZE_SCALAR(page_size);
+    uint64_t dirty_pages;
+    UNSERIALIZE_SCALAR(dirty_pages);
+
+    DPRINTF(Checkpoint, "Unserializing %d pages of physical memory %s\n",
+            dirty_pages, filename);
+
+    gzFile compressed_mem = gzopen(filepath.c_str(), "rb");
+    if (compressed_mem == NULL)
+        fatal("Can't open physical memory checkpoint file '%s'", filename);
+
+    const uint64_t nbr_of_pages = divCeil(range.size(), page_size);
+    for (uint64_t i = 0; i < dirty_pages; ++i) {
+        uint64_t page;
+        if (gzread(compressed_mem, &page, sizeof(page)) != sizeof(page) ||
+            page >= nbr_of_pages) {
+            fatal("Corrupt physical memory checkpoint file '%s'\n",
+                  filename);
+        }
+
+        // copy the whole page, as it overwrites the parent's contents
+        const unsigned int bytes = std::min<uint64_t>(
+            page_size, range.size() - page * page_size);
+        if (gzread(compressed_mem, pmem + page * page_size, bytes) !=
+            (int)bytes) {
+            fatal("Corrupt physical memory checkpoint file '%s'\n",
+                  filename);
+        }
+    }
+
+    if (gzclose(compressed_mem))
+        fatal("Close failed on physical memory checkpoint file '%s'\n",
+              filename);
+}
+
 } // namespace memory
 } // namespace gem5
@@ -44,6 +44,7 @@
 
 #include "base/addr_range.hh"
 #include "base/addr_range_map.hh"
+#include "base/siphash.hh"
 #include "mem/packet.hh"
 #include "sim/serialize.hh"
 
@@ -158,10 +159,44 @@ class PhysicalMemory : public Serializable
 
     long pageSize;
 
+    // The maximum number of threads compressing the memory when it is
+    // checkpointed, 0 for one per available host CPU
+    const unsigned int checkpointCompressionThreads;
+
+    // The secret key the pages are hashed with, drawn once per process
+    // so the hashes of a restored checkpoint match those taken after
+    const SipHash128 pageHashKey;
+
     // The physical memory used to provide the memory in the simulated
     // system
     std::vector<BackingStoreEntry> backingStore;
 
+    // A hash of each page of each backing store, taken when the last
+    // incremental checkpoint was saved or restored. Incremental
+    // checkpoints only store the pages whose hash has changed since.
+    mutable std::vector<std::vector<SipHash128>> pageHashes;
+
+    // The number of incremental checkpoints each backing store of the
+    // last incremental checkpoint is layered on, 0 if stored in full
+    mutable std::vector<unsigned int> chainDepths;
+
+    // The directory of the checkpoint the page hashes were taken at
+    mutable std::string baseCheckpointDir;
+
+    // Whether each backing store is mapped from a checkpoint, in
+    // which case its pages are only read when they are touched
+    std::vector<bool> mappedStores;
+
+    /**
+     * Hash every page of a backing store.
+     *
+     * @param range The address range of this backing store
+     * @param pmem The host pointer to this backing store
+     * @return The hash of each page of the backing store
+     */
+    std::vector<SipHash128> hashPages(AddrRange range,
+                                      const uint8_t* pmem) const;
+
     // Prevent copying
     PhysicalMemory(const PhysicalMemory&);
 
@@ -191,7 +226,8 @@ class PhysicalMemory : public Serializable
                    const std::vector<AbstractMemory*>& _memories,
                    bool mmap_using_noreserve,
                    const std::string& shared_backstore,
-                   bool auto_unlink_shared_backstore);
+                   bool auto_unlink_shared_backstore,
+                   unsigned int checkpoint_compression_threads);
 
     /**
      * Unmap all the backing store we have used.
@@ -284,6 +320,24 @@ class PhysicalMemory : public Serializable
     void serializeStore(CheckpointOut &cp, unsigned int store_id,
                         AddrRange range, uint8_t* pmem) const;
 
+    /**
+     * Serialize the pages of a specific store that changed since the
+     * last incremental checkpoint saved or restored, together with a
+     * pointer to
+     * that checkpoint.
+     *
+     * @param store_id Unique identifier of this backing store
+     * @param range The address range of this backing store
+     * @param pmem The host pointer to this backing store
+     * @param hashes The current hash of each page of this backing store
+     * @param parent_dir The directory of that checkpoint, relative to
+     *                   the checkpoint being created
+     */
+    void serializeStorePages(CheckpointOut &cp, unsigned int store_id,
+                             AddrRange range, uint8_t* pmem,
+                             const std::vector<SipHash128> &hashes,
+                             const std::string &parent_dir) const;
+
     /**
      * Unserialize the memories in the system. As with the
      * serialization, this action is independent of how the address
@@ -296,6 +350,27 @@ class PhysicalMemory : public Serializable
      */
     void unserializeStore(CheckpointIn &cp);
 
+    /**
+     * Map an uncompressed checkpoint file copy-on-write over a
+     * backing store, so that only the pages actually touched are read
+     * from disk. The host address of the backing store is unchanged.
+     *
+     * @param store_id Unique identifier of this backing store
+     * @param filepath The path of the uncompressed checkpoint file
+     * @return Whether the file could be mapped
+     */
+    bool mapStore(unsigned int store_id, const std::string &filepath);
+
+    /**
+     * Unserialize the pages of a specific backing store stored by an
+     * incremental checkpoint on top of its parent checkpoint(s).
+     *
+     * @param store_id Unique identifier of this backing store
+     * @param parent_dir The directory of the parent checkpoint
+     */
+    void unserializeStorePages(CheckpointIn &cp, unsigned int store_id,
+                               const std::string &parent_dir);
+
 };
 
 } // namespace memory
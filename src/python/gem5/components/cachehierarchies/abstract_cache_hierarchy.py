@@ -71,6 +71,21 @@ class AbstractCacheHierarchy(SubSystem):
         """
         raise NotImplementedError
 
+    def supports_functional_warming(self) -> bool:
+        """
+        Specifies whether the tag and replacement state of the caches in this
+        hierarchy is updated by accesses made in the 'atomic' memory mode.
+
+        If so, running a processor with atomic cores keeps the caches warm,
+        and switching to detailed cores does not start with cold caches. The
+        `SimpleSwitchableProcessor` checks this before warming the caches with
+        atomic cores.
+
+        :returns: True if the caches are functionally warmed by atomic
+        accesses. Otherwise False.
+        """
+        return False
+
     def _post_instantiate(self):
         """Called to set up anything needed after m5.instantiate"""
         pass
@@ -45,6 +45,12 @@ class AbstractClassicCacheHierarchy(AbstractCacheHierarchy):
     def is_ruby(self) -> bool:
         return False
 
+    @overrides(AbstractCacheHierarchy)
+    def supports_functional_warming(self) -> bool:
+        # Classic caches perform tag lookups, allocations and replacement
+        # updates for atomic accesses, in the same way as for timing accesses.
+        return True
+
     @abstractmethod
     def get_mem_side_port(self) -> Port:
         raise NotImplementedError
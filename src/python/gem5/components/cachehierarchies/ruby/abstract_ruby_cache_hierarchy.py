@@ -40,3 +40,10 @@ class AbstractRubyCacheHierarchy(AbstractCacheHierarchy):
     @overrides(AbstractCacheHierarchy)
     def is_ruby(self) -> bool:
         return True
+
+    @overrides(AbstractCacheHierarchy)
+    def supports_functional_warming(self) -> bool:
+        # Ruby only supports atomic accesses in the 'atomic_noncaching' memory
+        # mode, which bypasses the caches. Ruby caches can only be warmed by
+        # timing accesses.
+        return False
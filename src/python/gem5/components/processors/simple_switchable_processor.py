@@ -51,6 +51,8 @@ class SimpleSwitchableProcessor(SwitchableProcessor):
         switch_core_type: CPUTypes,
         num_cores: int,
         isa: Optional[ISA] = None,
+        functional_warming: bool = False,
+        warming_core_type: CPUTypes = CPUTypes.ATOMIC,
     ) -> None:
         """
         :param starting_core_type: The CPU type for each type in the processor
@@ -64,6 +66,20 @@ class SimpleSwitchableProcessor(SwitchableProcessor):
         runtime. **WARNING**: This functionality is deprecated. It is
         recommended you explicitly set your ISA via SimpleSwitchableProcessor
         construction.
+
+        :param functional_warming: If True, the processor can switch from the
+        starting cores to a set of warming cores (see
+        `switch_to_warming_cores`), which keep the cache hierarchy warm while
+        executing without a detailed timing model. This is useful if the
+        starting cores do not access the caches (e.g., KVM cores), so that the
+        switch cores do not start with cold caches. False by default.
+
+        :param warming_core_type: The CPU type of the warming cores. Atomic
+        cores are the fastest, but only warm cache hierarchies which support
+        functional warming (see
+        `AbstractCacheHierarchy.supports_functional_warming`), i.e., classic
+        cache hierarchies. Timing cores also warm Ruby cache hierarchies.
+        Atomic by default. Only used if `functional_warming` is True.
         """
 
         if not isa:
@@ -80,9 +96,12 @@ class SimpleSwitchableProcessor(SwitchableProcessor):
 
         self._start_key = "start"
         self._switch_key = "switch"
+        self._warming_key = "warming"
         self._current_is_start = True
 
         self._mem_mode = get_mem_mode(starting_core_type)
+        self._functional_warming = functional_warming
+        self._warming_core_type = warming_core_type
 
         switchable_cores = {
             self._start_key: [
@@ -95,6 +114,16 @@ class SimpleSwitchableProcessor(SwitchableProcessor):
             ],
         }
 
+        # If the starting cores already warm the caches, no warming cores are
+        # added and `switch_to_warming_cores` does nothing.
+        if functional_warming and self._mem_mode != get_mem_mode(
+            warming_core_type
+        ):
+            switchable_cores[self._warming_key] = [
+                SimpleCore(cpu_type=warming_core_type, core_id=i, isa=isa)
+                for i in range(num_cores)
+            ]
+
         super().__init__(
             switchable_cores=switchable_cores, starting_cores=self._start_key
         )
@@ -115,8 +144,55 @@ class SimpleSwitchableProcessor(SwitchableProcessor):
             self._mem_mode = MemMode.ATOMIC_NONCACHING
         board.set_mem_mode(self._mem_mode)
 
+        if (
+            self._warming_key in self._switchable_cores
+            and self._warming_core_type == CPUTypes.ATOMIC
+            and not board.get_cache_hierarchy().supports_functional_warming()
+        ):
+            raise Exception(
+                "The cache hierarchy does not support functional warming, so "
+                "atomic warming cores would not warm the caches. Construct "
+                "the SimpleSwitchableProcessor with "
+                "`warming_core_type=CPUTypes.TIMING` instead."
+            )
+
+    def is_warming(self) -> bool:
+        """
+        Returns True if the processor is currently running the warming cores.
+        """
+        return self._warming_key in self._switchable_cores and (
+            self._current_cores == self._switchable_cores[self._warming_key]
+        )
+
+    def switch_to_warming_cores(self) -> None:
+        """
+        Switches from the starting cores to the warming cores. A subsequent
+        call to `switch` will switch to the switch cores, which will find the
+        caches warm.
+
+        If the starting cores already warm the caches (e.g., atomic cores with
+        a classic cache hierarchy), this does nothing.
+        """
+        if not self._functional_warming:
+            raise AssertionError(
+                "The processor was not constructed with functional warming "
+                "enabled."
+            )
+
+        if not self._current_is_start or self.is_warming():
+            raise AssertionError(
+                "The processor can only switch to the warming cores from the "
+                "starting cores."
+            )
+
+        if self._warming_key in self._switchable_cores:
+            self.switch_to_processor(self._warming_key)
+
     def switch(self):
-        """Switches to the "switched out" cores."""
+        """
+        Switches to the "switched out" cores. If the processor is running the
+        warming cores, this switches to the switch cores.
+        """
         if self._current_is_start:
             self.switch_to_processor(self._switch_key)
         else:
@@ -0,0 +1,272 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Command line utilities for managing gem5 resources. These are run via gem5's
+`-m` option:
+
+```
+gem5 -m gem5.resources gc --max-size 50G
+gem5 -m gem5.resources prefetch x86-ubuntu-18.04-img x86-linux-kernel-5.4.49
+gem5 -m gem5.resources md5 /path/to/checkpoint --stats
+gem5 -m gem5.resources catalog status
+```
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+from .md5_utils import HashStats, md5
+from .store import collect_garbage, get_resource_store_dir, list_objects
+
+
+def _parse_size(size: str) -> int:
+    """
+    Parses a size in bytes, optionally suffixed with K, M, G, or T (powers of
+    1024). E.g., "50G".
+    """
+    units = {"K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+    size = size.strip().upper().rstrip("IB")
+    try:
+        if size and size[-1] in units:
+            return int(float(size[:-1]) * units[size[-1]])
+        return int(size)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{size}' is not a valid size.")
+
+
+def _get_store_dir(args: argparse.Namespace) -> Path:
+    store_dir = args.store or get_resource_store_dir()
+    if not store_dir:
+        print(
+            "The resource store must be set via `--store` or the "
+            "GEM5_RESOURCE_STORE environment variable.",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+    if not os.path.isdir(store_dir):
+        print(f"Resource store '{store_dir}' does not exist.", file=sys.stderr)
+        sys.exit(1)
+    return Path(store_dir)
+
+
+def _gc(args: argparse.Namespace) -> None:
+    store_dir = _get_store_dir(args)
+    evicted = collect_garbage(store_dir, max_size=args.max_size)
+    for object_path in evicted:
+        print(f"Evicted '{object_path}'.")
+    remaining = sum(size for _, size, _ in list_objects(store_dir))
+    print(
+        f"Evicted {len(evicted)} object(s). The resource store is now "
+        f"{remaining} bytes."
+    )
+
+
+def _prefetch(args: argparse.Namespace) -> None:
+    # Imported here as obtaining resource metadata requires the resources
+    # config to be loaded, which `gc` does not need.
+    from .resource import prefetch_resources
+
+    resource_ids = list(args.resource_ids)
+    if args.file:
+        with open(args.file) as f:
+            resource_ids.extend(
+                line.strip()
+                for line in f
+                if line.strip() and not line.strip().startswith("#")
+            )
+    if not resource_ids:
+        print("No resources to prefetch were given.", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        local_paths = prefetch_resources(
+            resource_ids,
+            resource_directory=args.resource_directory,
+            max_workers=args.max_workers,
+            databases=args.database,
+        )
+    except Exception as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+
+    for resource_id, local_path in local_paths.items():
+        if local_path:
+            print(f"Resource '{resource_id}' is at '{local_path}'.")
+
+
+def _md5(args: argparse.Namespace) -> None:
+    path = Path(args.path)
+    if not path.exists():
+        print(f"'{path}' does not exist.", file=sys.stderr)
+        sys.exit(1)
+
+    stats = HashStats()
+    if path.is_dir():
+        print(md5(path, mode=args.mode, max_workers=args.workers, stats=stats))
+    else:
+        print(md5(path))
+    if args.stats and path.is_dir():
+        print(stats)
+
+
+def _catalog(args: argparse.Namespace) -> None:
+    from .catalog import get_catalog_metrics, refresh_catalog
+    from .downloader import _get_resources_json_uri
+
+    url = args.url or os.getenv(
+        "GEM5_RESOURCE_JSON", _get_resources_json_uri()
+    )
+    if args.action == "refresh":
+        try:
+            metrics = refresh_catalog(url)
+        except Exception as e:
+            print(e, file=sys.stderr)
+            sys.exit(1)
+    else:
+        metrics = get_catalog_metrics(url)
+    print(json.dumps(metrics, indent=4))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="gem5 -m gem5.resources",
+        description="Utilities for managing gem5 resources.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    gc_parser = subparsers.add_parser(
+        "gc",
+        help="Prune the resource store to a size budget, evicting the least "
+        "recently used resources first.",
+    )
+    gc_parser.add_argument(
+        "--store",
+        type=str,
+        help="The resource store directory. Defaults to the value of the "
+        "GEM5_RESOURCE_STORE environment variable.",
+    )
+    gc_parser.add_argument(
+        "--max-size",
+        type=_parse_size,
+        required=True,
+        help="The maximum size of the resource store, in bytes. May be "
+        "suffixed with K, M, G, or T (e.g., '50G').",
+    )
+    gc_parser.set_defaults(func=_gc)
+
+    prefetch_parser = subparsers.add_parser(
+        "prefetch",
+        help="Download resources ahead of their use, concurrently.",
+    )
+    prefetch_parser.add_argument(
+        "resource_ids",
+        nargs="*",
+        help="The IDs of the resources to download.",
+    )
+    prefetch_parser.add_argument(
+        "--file",
+        type=str,
+        help="A file listing further resource IDs, one per line. Lines "
+        "starting with '#' are ignored.",
+    )
+    prefetch_parser.add_argument(
+        "--resource-directory",
+        type=str,
+        help="The directory to store the resources in. Defaults to the "
+        "value of the GEM5_RESOURCE_DIR environment variable, or the default "
+        "gem5 resource directory.",
+    )
+    prefetch_parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=4,
+        help="The maximum number of resources downloaded concurrently.",
+    )
+    prefetch_parser.add_argument(
+        "--database",
+        action="append",
+        default=[],
+        help="A database to obtain the resources from. May be given "
+        "multiple times. All databases are used by default.",
+    )
+    prefetch_parser.set_defaults(func=_prefetch)
+
+    md5_parser = subparsers.add_parser(
+        "md5",
+        help="Compute the md5 value of a file or directory.",
+    )
+    md5_parser.add_argument("path", type=str, help="The file or directory.")
+    md5_parser.add_argument(
+        "--mode",
+        choices=["compatible", "tree"],
+        default="compatible",
+        help="The mode used to hash directories. 'compatible' gives the md5 "
+        "values recorded in the gem5 resources database. 'tree' hashes "
+        "files in parallel, but gives different md5 values.",
+    )
+    md5_parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="The number of threads used to hash a directory.",
+    )
+    md5_parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Report the throughput of hashing a directory.",
+    )
+    md5_parser.set_defaults(func=_md5)
+
+    catalog_parser = subparsers.add_parser(
+        "catalog",
+        help="Report on, or refresh, the local snapshot of a resources "
+        "catalog.",
+    )
+    catalog_parser.add_argument(
+        "action",
+        choices=["status", "refresh"],
+        help="'status' prints the snapshot's age and refresh metrics as "
+        "JSON. 'refresh' refreshes the snapshot regardless of its age.",
+    )
+    catalog_parser.add_argument(
+        "--url",
+        type=str,
+        help="The URL of the catalog. Defaults to the value of the "
+        "GEM5_RESOURCE_JSON environment variable, or the gem5 resources "
+        "JSON.",
+    )
+    catalog_parser.set_defaults(func=_catalog)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__m5_main__":
+    main()
@@ -0,0 +1,557 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Offline-first snapshots of resources catalogs (the resources JSON files
+obtained from a URL).
+
+Each catalog is stored as a snapshot: a JSON file holding the decoded catalog
+(for Google Source URLs, the catalog is served base64-encoded). Snapshots may
+be shared between users, so they are never stored in a format which can run
+code when loaded (e.g., a pickle). Alongside each snapshot a small JSON
+metadata file records the HTTP validators (`ETag` and `Last-Modified`) of the
+catalog and metrics on its age and refreshes.
+
+When a snapshot is older than its maximum age, it is refreshed via a
+conditional request. If the catalog has not changed, the server responds with
+"304 Not Modified" and only the metadata is updated. Only one process
+refreshes a snapshot at a time. Other processes which find the refresh under
+way use the existing snapshot rather than waiting for it, so many short gem5
+jobs starting at once do not all contact the server. If a refresh fails, the
+existing snapshot is used and another refresh is not attempted for
+`_failure_backoff` seconds.
+
+For air-gapped hosts, setting the "GEM5_RESOURCES_OFFLINE" environment
+variable pins the catalogs to their existing snapshots, which are used
+regardless of their age and never refreshed. Snapshots can be prepared on a
+host with network access via `gem5 -m gem5.resources catalog refresh` and
+copied to the directory given by the "GEM5_RESOURCE_CATALOG_DIR" environment
+variable on the air-gapped hosts.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import time
+import warnings
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.error import HTTPError
+
+from .ranged_download import _retry_with_backoff
+from ..utils.filelock import FileLock, FileLockException
+
+# The version of the snapshot format. This must be incremented whenever the
+# format changes so stale snapshots are rebuilt.
+_format_version = 2
+
+# The default maximum age, in seconds, of a snapshot before it is refreshed.
+_default_max_age = 3600
+
+# The time, in seconds, a failed refresh is not retried for.
+_failure_backoff = 300
+
+# Metrics on the most recent load of each catalog by this process.
+_load_metrics = {}
+
+
+def is_offline() -> bool:
+    """
+    Returns True if the catalogs are pinned to their existing snapshots. This
+    is set via the "GEM5_RESOURCES_OFFLINE" environment variable.
+    """
+    return os.getenv("GEM5_RESOURCES_OFFLINE", "").lower() in (
+        "1",
+        "true",
+        "yes",
+        "on",
+    )
+
+
+def get_catalog_dir() -> Path:
+    """
+    Returns the directory the catalog snapshots are stored in. This is set
+    via the "GEM5_RESOURCE_CATALOG_DIR" environment variable. The temporary
+    directory is used by default.
+    """
+    return Path(
+        os.getenv("GEM5_RESOURCE_CATALOG_DIR") or tempfile.gettempdir()
+    )
+
+
+def _is_shared_catalog_dir() -> bool:
+    """
+    Returns True if the snapshots are shared between users, i.e., the
+    "GEM5_RESOURCE_CATALOG_DIR" environment variable is set.
+    """
+    return bool(os.getenv("GEM5_RESOURCE_CATALOG_DIR"))
+
+
+def _get_user_snapshot_path(snapshot_path: Path) -> Path:
+    return snapshot_path.with_name(
+        f"{snapshot_path.stem}-{os.getuid()}{snapshot_path.suffix}"
+    )
+
+
+def get_snapshot_path(url: str) -> Path:
+    """
+    Returns the path of the snapshot of a catalog.
+
+    :param url: The URL of the catalog.
+    """
+    path = (
+        get_catalog_dir()
+        / f"gem5-resources-catalog-{hashlib.md5(url.encode()).hexdigest()}"
+        ".json"
+    )
+    if not _is_shared_catalog_dir():
+        # The temporary directory is shared between users, so each user has
+        # their own snapshots.
+        return _get_user_snapshot_path(path)
+
+    # A user who could not replace the shared snapshot (e.g., it is owned by
+    # another user in a sticky directory) uses their own (see `_refresh`).
+    # Another user could create a file at that path, so it is only used if
+    # it is owned by the current user.
+    user_path = _get_user_snapshot_path(path)
+    try:
+        if user_path.lstat().st_uid == os.getuid():
+            return user_path
+    except OSError:
+        pass
+    return path
+
+
+def _get_metadata_path(snapshot_path: Path) -> Path:
+    return snapshot_path.with_suffix(".meta.json")
+
+
+def _read_metadata(snapshot_path: Path) -> Dict[str, Any]:
+    """
+    Reads the metadata of a snapshot. A missing or corrupt file is treated as
+    empty.
+    """
+    try:
+        with open(_get_metadata_path(snapshot_path)) as f:
+            metadata = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(metadata, dict):
+        return {}
+    return metadata
+
+
+def _read_snapshot(snapshot_path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Reads a snapshot. None is returned if it does not exist or cannot be
+    read.
+
+    The snapshot is only read if it is not writable by anyone other than its
+    owner. Unless the snapshots are in a catalog directory shared between
+    users, it must also be owned by the current user (or root, for snapshots
+    provisioned on air-gapped hosts), as anyone can create files in the
+    temporary directory.
+    """
+    try:
+        fd = os.open(snapshot_path, os.O_RDONLY | os.O_NOFOLLOW)
+    except OSError:
+        return None
+
+    with os.fdopen(fd, "rb") as f:
+        st = os.fstat(fd)
+        if st.st_mode & 0o022:
+            return None
+        if not _is_shared_catalog_dir() and st.st_uid not in (os.getuid(), 0):
+            return None
+        try:
+            snapshot = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    if (
+        not isinstance(snapshot, dict)
+        or snapshot.get("format_version") != _format_version
+    ):
+        return None
+    return snapshot
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        # The snapshots may be shared with other users, so they must be
+        # readable by them (`mkstemp` creates the file as 0600).
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _write_metadata(snapshot_path: Path, metadata: Dict[str, Any]) -> None:
+    _write_atomic(
+        _get_metadata_path(snapshot_path),
+        json.dumps(metadata, indent=4).encode("utf-8"),
+    )
+
+
+def _write_snapshot(snapshot_path: Path, snapshot: Dict[str, Any]) -> None:
+    _write_atomic(
+        snapshot_path,
+        json.dumps(snapshot, separators=(",", ":")).encode("utf-8"),
+    )
+
+
+def _write_state(
+    snapshot_path: Path,
+    metadata: Dict[str, Any],
+    snapshot: Optional[Dict[str, Any]],
+    snapshot_changed: bool,
+) -> None:
+    """
+    Writes the metadata of a snapshot, and the snapshot itself if it changed.
+
+    If the snapshot is in a shared catalog directory but cannot be replaced
+    by the current user (e.g., it is owned by another user in a sticky
+    directory), the snapshot and metadata are written to the current user's
+    own files in the directory instead (see `get_snapshot_path`).
+    """
+    try:
+        if snapshot_changed:
+            _write_snapshot(snapshot_path, snapshot)
+        _write_metadata(snapshot_path, metadata)
+    except OSError:
+        user_path = _get_user_snapshot_path(snapshot_path)
+        if (
+            not _is_shared_catalog_dir()
+            or snapshot is None
+            or snapshot_path.stem.endswith(f"-{os.getuid()}")
+        ):
+            raise
+        _write_snapshot(user_path, snapshot)
+        _write_metadata(user_path, metadata)
+
+
+def _load_state(
+    snapshot_path: Path,
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    Loads the metadata and snapshot of a catalog. The snapshot is None if it
+    does not exist, cannot be read, or does not match its metadata.
+    """
+    metadata = _read_metadata(snapshot_path)
+    snapshot = _read_snapshot(snapshot_path)
+    if snapshot and snapshot["source_md5"] != metadata.get("source_md5"):
+        snapshot = None
+    return metadata, snapshot
+
+
+def _is_fresh(metadata: Dict[str, Any], max_age: float) -> bool:
+    now = time.time()
+    if now - metadata.get("checked_at", 0) <= max_age:
+        return True
+    # Back off after a failed refresh.
+    return now - metadata.get("failed_at", 0) <= _failure_backoff
+
+
+def _parse(raw: bytes) -> Any:
+    try:
+        return json.loads(raw.decode("utf-8"))
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        # This is a bit of a hack. If the URL specified exists in a Google
+        # Source repo (which is the case when on the gem5 develop branch) we
+        # retrieve the JSON in base64 format. This cannot be loaded directly
+        # as text. Conversion is therefore needed.
+        return json.loads(base64.b64decode(raw).decode("utf-8"))
+
+
+def _fetch(
+    url: str, headers: Dict[str, str]
+) -> Tuple[Optional[bytes], Optional[str], Optional[str]]:
+    """
+    Obtains a catalog via a (conditional) request.
+
+    :param url: The URL of the catalog.
+    :param headers: The headers of the request.
+
+    :returns: A tuple of the catalog's contents, ETag, and Last-Modified
+    date. The contents are None if the catalog was not modified.
+    """
+    # Imported here to avoid a circular import.
+    from .downloader import _urlopen
+
+    try:
+        with _urlopen(url, headers=headers) as response:
+            return (
+                response.read(),
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+            )
+    except HTTPError as e:
+        if e.code != 304:
+            raise
+        return None, e.headers.get("ETag"), e.headers.get("Last-Modified")
+
+
+def _refresh(
+    url: str,
+    snapshot_path: Path,
+    metadata: Dict[str, Any],
+    snapshot: Optional[Dict[str, Any]],
+    max_attempts: int,
+) -> Dict[str, Any]:
+    """
+    Refreshes the snapshot of a catalog. This must be called while holding
+    the snapshot's lock.
+
+    :returns: The refreshed snapshot.
+    """
+    headers = {}
+    if snapshot:
+        if metadata.get("etag"):
+            headers["If-None-Match"] = metadata["etag"]
+        if metadata.get("last_modified"):
+            headers["If-Modified-Since"] = metadata["last_modified"]
+
+    metadata = dict(metadata)
+    metadata["url"] = url
+    start = time.monotonic()
+    try:
+        raw, etag, last_modified = _retry_with_backoff(
+            lambda: _fetch(url, headers),
+            url=url,
+            max_attempts=max_attempts,
+        )
+    except Exception as e:
+        if not snapshot:
+            raise
+        warnings.warn(
+            f"Failed to refresh the resources catalog '{url}' ({e}). The "
+            f"snapshot from {time.ctime(metadata.get('checked_at', 0))} "
+            "will be used."
+        )
+        metadata["failed_at"] = time.time()
+        metadata["last_error"] = str(e)
+        metadata["failures"] = metadata.get("failures", 0) + 1
+        _write_state(snapshot_path, metadata, snapshot, False)
+        return snapshot
+
+    source_md5 = hashlib.md5(raw).hexdigest() if raw is not None else None
+    changed = not (
+        raw is None or (snapshot and source_md5 == snapshot["source_md5"])
+    )
+    if not changed:
+        # The catalog has not changed.
+        metadata["not_modified"] = metadata.get("not_modified", 0) + 1
+    else:
+        snapshot = {
+            "format_version": _format_version,
+            "source_md5": source_md5,
+            "catalog": _parse(raw),
+        }
+        metadata["source_md5"] = source_md5
+        metadata["fetched_at"] = time.time()
+        metadata["refreshes"] = metadata.get("refreshes", 0) + 1
+
+    metadata["etag"] = etag or metadata.get("etag")
+    metadata["last_modified"] = last_modified or metadata.get("last_modified")
+    metadata["checked_at"] = time.time()
+    metadata["refresh_seconds"] = time.monotonic() - start
+    metadata.pop("failed_at", None)
+    metadata.pop("last_error", None)
+    _write_state(snapshot_path, metadata, snapshot, changed)
+    return snapshot
+
+
+def _record_load(url: str, outcome: str, start: float) -> None:
+    _load_metrics[url] = {
+        "outcome": outcome,
+        "load_seconds": time.monotonic() - start,
+    }
+
+
+def load_catalog(
+    url: str, max_age: Optional[float] = None, max_attempts: int = 6
+) -> Tuple[Any, str]:
+    """
+    Loads a catalog from its snapshot, refreshing the snapshot if it is older
+    than `max_age`.
+
+    :param url: The URL of the catalog.
+    :param max_age: The maximum age, in seconds, of the snapshot before it is
+    refreshed. `_default_max_age` if None.
+    :param max_attempts: The max number of attempts to obtain the catalog.
+
+    :returns: A tuple of the catalog (the parsed JSON) and the md5 value of
+    its contents.
+    """
+    start = time.monotonic()
+    if max_age is None:
+        max_age = _default_max_age
+    snapshot_path = get_snapshot_path(url)
+
+    # The snapshot is read under a shared lock, so any number of gem5
+    # processes may read it at once, and is only refreshed under an exclusive
+    # lock.
+    try:
+        with FileLock(f"{snapshot_path}.lock", timeout=None, shared=True):
+            metadata, snapshot = _load_state(snapshot_path)
+    except (FileLockException, OSError):
+        # A refresh is under way, or the lock file cannot be opened (e.g.,
+        # in a read-only catalog directory). Snapshots are only replaced
+        # atomically, so they can still be read without waiting.
+        metadata, snapshot = _load_state(snapshot_path)
+
+    if is_offline():
+        if not snapshot:
+            raise Exception(
+                f"No snapshot of the resources catalog '{url}' exists in "
+                f"'{get_catalog_dir()}', and the GEM5_RESOURCES_OFFLINE "
+                "environment variable is set. A snapshot can be created via "
+                "`gem5 -m gem5.resources catalog refresh` on a host with "
+                "network access."
+            )
+        _record_load(url, "offline", start)
+        return snapshot["catalog"], snapshot["source_md5"]
+
+    if snapshot and _is_fresh(metadata, max_age):
+        _record_load(url, "snapshot", start)
+        return snapshot["catalog"], snapshot["source_md5"]
+
+    # If a snapshot exists and another process is refreshing it, the existing
+    # snapshot is used rather than waiting. Otherwise, the timeout gives the
+    # refresh time to run its Truncated Exponential Backoff algorithm.
+    try:
+        lock = FileLock(
+            f"{snapshot_path}.lock",
+            timeout=None if snapshot else 120,
+        )
+        lock.acquire()
+    except (FileLockException, OSError):
+        if not snapshot:
+            raise
+        _record_load(url, "stale", start)
+        return snapshot["catalog"], snapshot["source_md5"]
+
+    try:
+        # Another process may have refreshed the snapshot while this one
+        # waited for the lock.
+        metadata, snapshot = _load_state(snapshot_path)
+        if snapshot and _is_fresh(metadata, max_age):
+            outcome = "snapshot"
+        else:
+            snapshot = _refresh(
+                url, snapshot_path, metadata, snapshot, max_attempts
+            )
+            outcome = "refresh"
+    finally:
+        lock.release()
+
+    _record_load(url, outcome, start)
+    return snapshot["catalog"], snapshot["source_md5"]
+
+
+def refresh_catalog(url: str, max_attempts: int = 6) -> Dict[str, Any]:
+    """
+    Refreshes the snapshot of a catalog, regardless of its age, waiting for
+    any refresh by another process to finish first.
+
+    :param url: The URL of the catalog.
+    :param max_attempts: The max number of attempts to obtain the catalog.
+
+    :returns: The catalog's metrics (see `get_catalog_metrics`).
+    """
+    if is_offline():
+        raise Exception(
+            "Resources catalogs cannot be refreshed when the "
+            "GEM5_RESOURCES_OFFLINE environment variable is set."
+        )
+    snapshot_path = get_snapshot_path(url)
+    with FileLock(f"{snapshot_path}.lock", timeout=120):
+        metadata, snapshot = _load_state(snapshot_path)
+        _refresh(url, snapshot_path, metadata, snapshot, max_attempts)
+    return get_catalog_metrics(url)
+
+
+def get_catalog_metrics(url: str) -> Dict[str, Any]:
+    """
+    Returns metrics on the snapshot of a catalog, for monitoring. These are:
+
+    * "url": The URL of the catalog.
+    * "snapshot": The path of the snapshot.
+    * "exists": Whether the snapshot exists.
+    * "offline": Whether the catalog is pinned to its snapshot.
+    * "age_seconds": The time since the snapshot was last checked against
+      the catalog's URL.
+    * "content_age_seconds": The time since the snapshot's contents were
+      last changed.
+    * "refresh_seconds": The duration of the last successful refresh.
+    * "refreshes": The number of refreshes which changed the snapshot.
+    * "not_modified": The number of refreshes which found the catalog was
+      unchanged.
+    * "failures": The number of failed refreshes.
+    * "last_error": The error of the last refresh, if it failed.
+    * "etag" and "last_modified": The HTTP validators of the snapshot.
+    * "last_load": The outcome ("snapshot", "refresh", "stale", or
+      "offline") and duration, in seconds, of the last load of the catalog by
+      this process, if any.
+
+    Ages are None if the snapshot does not exist.
+
+    :param url: The URL of the catalog.
+    """
+    snapshot_path = get_snapshot_path(url)
+    metadata, snapshot = _load_state(snapshot_path)
+    now = time.time()
+
+    def age(key: str) -> Optional[float]:
+        if not snapshot or key not in metadata:
+            return None
+        return max(0.0, now - metadata[key])
+
+    return {
+        "url": url,
+        "snapshot": str(snapshot_path),
+        "exists": snapshot is not None,
+        "offline": is_offline(),
+        "age_seconds": age("checked_at"),
+        "content_age_seconds": age("fetched_at"),
+        "refresh_seconds": metadata.get("refresh_seconds"),
+        "refreshes": metadata.get("refreshes", 0),
+        "not_modified": metadata.get("not_modified", 0),
+        "failures": metadata.get("failures", 0),
+        "last_error": metadata.get("last_error"),
+        "etag": metadata.get("etag"),
+        "last_modified": metadata.get("last_modified"),
+        "last_load": _load_metrics.get(url),
+    }
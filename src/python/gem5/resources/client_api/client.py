@@ -43,6 +43,52 @@ class AbstractClient(ABC):
         """
         raise NotImplementedError
 
+    def get_sorted_resources_by_id(
+        self, resource_id: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieves all the resources with the given ID, sorted by version in
+        descending order. Clients which can provide the resources pre-sorted
+        may override this.
+        :param resource_id: The ID of the Resource.
+        :return: A list of resources as Python dictionaries.
+        """
+        return self._sort_resources_by_version(
+            self.get_resources_by_id(resource_id)
+        )
+
+    def get_resources_by_ids(
+        self, resource_ids: List[str]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Retrieves all the resources with any of the given IDs. Clients which
+        can retrieve many resources in a single request should override this.
+        :param resource_ids: The IDs of the Resources.
+        :return: A dictionary mapping each ID to a list of the resources with
+        that ID, as Python dictionaries.
+        """
+        return {
+            resource_id: self.get_resources_by_id(resource_id)
+            for resource_id in resource_ids
+        }
+
+    def get_sorted_resources_by_ids(
+        self, resource_ids: List[str]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Retrieves all the resources with any of the given IDs, sorted by
+        version in descending order.
+        :param resource_ids: The IDs of the Resources.
+        :return: A dictionary mapping each ID to a sorted list of the
+        resources with that ID, as Python dictionaries.
+        """
+        return {
+            resource_id: self._sort_resources_by_version(resources)
+            for resource_id, resources in self.get_resources_by_ids(
+                resource_ids
+            ).items()
+        }
+
     def get_resource_json_obj_from_client(
         self, resource_id: str, resource_version: Optional[str] = None
     ) -> dict:
@@ -53,16 +99,50 @@ class AbstractClient(ABC):
         If not given, the latest version compatible with the current
         gem5 version is returned.
         """
-        # getting all the resources with the given id from the dictionary
-        resources = self.get_resources_by_id(resource_id)
+        # getting all the resources with the given id, sorted by version
+        resources = self.get_sorted_resources_by_id(resource_id)
+        return self._select_resource(resources, resource_version)
+
+    def get_resource_json_objs_from_client(
+        self,
+        resource_ids: List[str],
+        resource_versions: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Optional[dict]]:
+        """
+        Retrieves the Resource objects identified by the given resource IDs.
+        The resources are retrieved together (see `get_resources_by_ids`).
+        :param resource_ids: The IDs of the Resources.
+        :param resource_versions: (optional) A dictionary mapping resource IDs
+        to the version of that Resource. For IDs not in this dictionary, the
+        latest version compatible with the current gem5 version is returned.
+        :return: A dictionary mapping each ID to the Resource object, or None
+        if it was not found.
+        """
+        resource_versions = resource_versions or {}
+        sorted_resources = self.get_sorted_resources_by_ids(resource_ids)
+        return {
+            resource_id: self._select_resource(
+                sorted_resources.get(resource_id, []),
+                resource_versions.get(resource_id),
+            )
+            for resource_id in resource_ids
+        }
 
+    def _select_resource(
+        self, resources: List, resource_version: Optional[str] = None
+    ) -> Optional[dict]:
+        """
+        Selects a Resource from the resources with a given ID.
+        :param resources: The resources with the given ID, sorted by version
+        in descending order.
+        :param resource_version: (optional) The version of the Resource.
+        If not given, the latest version compatible with the current
+        gem5 version is returned.
+        """
         # if no resource with the given id is found throw an exception
         if len(resources) == 0:
             return None
 
-        # sorting the resources by version
-        resources = self._sort_resources_by_version(resources)
-
         # if a version is given, search for the resource with the given version
         if resource_version:
             return self._search_version_in_resources(
@@ -24,41 +24,228 @@
 # (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import hashlib
 import json
+import os
+import pickle
+import tempfile
 from pathlib import Path
 
-from urllib import request
 from .client import AbstractClient
-from typing import Optional, Dict, Union, Type, Tuple, List, Any
+from ..catalog import load_catalog
+from typing import Optional, Dict, Union, Type, Tuple, List, Any, Callable
+
+# The version of the persisted index format. This must be incremented
+# whenever the format changes so stale indexes are rebuilt.
+_index_format_version = 2
 
 
 class JSONClient(AbstractClient):
     def __init__(self, path: str):
         """
         Initializes a JSON database.
+
+        Looking up a resource by scanning the whole JSON list is slow when
+        many resources are resolved. An index mapping each resource ID to its
+        resources, sorted by version, is therefore built. This index is
+        persisted (see `_get_index_path`) so later gem5 processes using the
+        same JSON need not rebuild it. The persisted index is rebuilt if the
+        JSON's md5 value changes. A JSON obtained from a URL is loaded from
+        its catalog snapshot (see `catalog.py`).
+
         :param path: The path to the Resource, either URL or local.
         """
         self.path = path
-        self.resources = []
 
         if Path(self.path).is_file():
-            self.resources = json.load(open(self.path))
+            with open(self.path, "rb") as f:
+                raw = f.read()
+            (
+                self._resources,
+                self._index,
+                self._unsorted_ids,
+            ) = self._load_index(
+                hashlib.md5(raw).hexdigest(),
+                lambda: json.loads(raw.decode("utf-8")),
+            )
         elif not self._url_validator(self.path):
             raise Exception(
                 f"Resources location '{self.path}' is not a valid path or URL."
             )
         else:
-            req = request.Request(self.path)
-            response = request.urlopen(req)
-            self.resources = json.loads(response.read().decode("utf-8"))
+            resources, source_md5 = load_catalog(self.path)
+            (
+                self._resources,
+                self._index,
+                self._unsorted_ids,
+            ) = self._load_index(source_md5, lambda: resources)
+
+    @property
+    def resources(self) -> List[Dict[str, Any]]:
+        """
+        All the resources in the JSON database, in the order they appear in
+        the JSON.
+        """
+        return self._resources
 
     def get_resources_by_id(self, resource_id: str) -> List[Dict[str, Any]]:
         """
         :param resource_id: The ID of the Resource.
         :return: A list of all the Resources with the given ID.
         """
-        return [
-            resource
-            for resource in self.resources
-            if resource["id"] == resource_id
-        ]
+        return list(self._index.get(resource_id, []))
+
+    def get_sorted_resources_by_id(
+        self, resource_id: str
+    ) -> List[Dict[str, Any]]:
+        """
+        :param resource_id: The ID of the Resource.
+        :return: A list of all the Resources with the given ID, sorted by
+        version in descending order.
+        """
+        if resource_id in self._unsorted_ids:
+            # The versions of these resources could not be sorted when the
+            # index was built. Sorting them here raises the error for this
+            # resource only.
+            return self._sort_resources_by_version(
+                self.get_resources_by_id(resource_id)
+            )
+        return self.get_resources_by_id(resource_id)
+
+    def get_sorted_resources_by_ids(
+        self, resource_ids: List[str]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        :param resource_ids: The IDs of the Resources.
+        :return: A dictionary mapping each ID to a list of the resources with
+        that ID, sorted by version in descending order.
+        """
+        return {
+            resource_id: self.get_sorted_resources_by_id(resource_id)
+            for resource_id in resource_ids
+        }
+
+    def _get_index_path(self) -> str:
+        """
+        Returns the path of the persisted index for this JSON database. This
+        is stored in the temporary directory alongside the cached resources
+        JSON files (see `downloader.py`).
+        """
+        return os.path.join(
+            tempfile.gettempdir(),
+            f"gem5-resources-index-"
+            f"{hashlib.md5(self.path.encode()).hexdigest()}"
+            f"-{str(os.getuid())}.pickle",
+        )
+
+    def _build_index(
+        self, resources: List[Dict[str, Any]]
+    ) -> Tuple[Dict[str, List[Dict[str, Any]]], List[str]]:
+        """
+        Builds an index mapping each resource ID to the resources with that
+        ID, sorted by version in descending order.
+
+        :param resources: The list of resources in the JSON database.
+        :return: A tuple of the index and a list of the IDs whose resources
+        could not be sorted by version.
+        """
+        index = {}
+        for resource in resources:
+            index.setdefault(resource["id"], []).append(resource)
+
+        unsorted_ids = []
+        for resource_id, id_resources in index.items():
+            try:
+                index[resource_id] = self._sort_resources_by_version(
+                    id_resources
+                )
+            except (ValueError, KeyError):
+                # E.g., a resource has no "resource_version" or it cannot be
+                # parsed. Only lookups of this ID are affected.
+                unsorted_ids.append(resource_id)
+
+        return index, unsorted_ids
+
+    def _load_index(
+        self,
+        source_md5: str,
+        load_resources: Callable[[], List[Dict[str, Any]]],
+    ) -> Tuple[
+        List[Dict[str, Any]], Dict[str, List[Dict[str, Any]]], List[str]
+    ]:
+        """
+        Loads the persisted index for the JSON database, or builds (and
+        persists) it if it does not exist or is out of date.
+
+        :param source_md5: The md5 value of the contents of the JSON database.
+        :param load_resources: A function returning the list of resources in
+        the JSON database. Only called if the index must be built.
+        :return: A tuple of the list of resources, the index, and the IDs
+        whose resources could not be sorted by version.
+        """
+        index_path = self._get_index_path()
+
+        persisted = _read_index(index_path)
+        if (
+            persisted
+            and persisted.get("format_version") == _index_format_version
+            and persisted.get("source_md5") == source_md5
+        ):
+            return (
+                persisted["resources"],
+                persisted["index"],
+                persisted["unsorted_ids"],
+            )
+
+        resources = load_resources()
+        index, unsorted_ids = self._build_index(resources)
+        _write_index(
+            index_path,
+            {
+                "format_version": _index_format_version,
+                "source_md5": source_md5,
+                "resources": resources,
+                "index": index,
+                "unsorted_ids": unsorted_ids,
+            },
+        )
+        return resources, index, unsorted_ids
+
+
+def _read_index(index_path: str) -> Optional[Dict]:
+    """
+    Reads a persisted index. None is returned if it does not exist or cannot
+    be read.
+
+    As the index is unpickled, it is only read if it is owned by the current
+    user and not writable by anyone else.
+    """
+    try:
+        fd = os.open(index_path, os.O_RDONLY | os.O_NOFOLLOW)
+    except OSError:
+        return None
+
+    with os.fdopen(fd, "rb") as f:
+        st = os.fstat(fd)
+        if st.st_uid != os.getuid() or st.st_mode & 0o022:
+            return None
+        try:
+            return pickle.load(f)
+        except Exception:
+            return None
+
+
+def _write_index(index_path: str, index: Dict) -> None:
+    """
+    Atomically writes a persisted index. Failures are ignored, as the index is
+    only an optimization.
+    """
+    try:
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(index_path), suffix=".tmp"
+        )
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, index_path)
+    except OSError:
+        pass
@@ -26,18 +26,36 @@
 
 from .client import AbstractClient
 
+import http.client
+import threading
+import time
 from urllib import request, parse
+from urllib.error import HTTPError
 from typing import Optional, Dict, Union, Type, Tuple, List, Any
 import json
 
+# Access tokens issued by the data API expire after 30 minutes. They are
+# refreshed a little before this.
+_token_lifetime = 25 * 60
+
+# The maximum number of resource IDs queried in a single request.
+_max_ids_per_query = 100
+
 
 class MongoClient(AbstractClient):
-    def __init__(self, config: Dict[str, str]):
+    def __init__(self, config: Dict[str, str], cache_ttl: float = 300):
         """
         Initializes a connection to a MongoDB database.
+
+        The connection to the data API is kept alive and reused across
+        lookups, as is the access token. The resources found for each ID are
+        cached for `cache_ttl` seconds.
+
         :param uri: The URI for connecting to the MongoDB server.
         :param db: The name of the database to connect to.
         :param collection: The name of the collection within the database.
+        :param cache_ttl: The number of seconds the resources found for an ID
+        are cached for. 300 seconds by default. If 0, nothing is cached.
         """
         self.apiKey = config["apiKey"]
         self.url = config["url"]
@@ -45,42 +63,190 @@ class MongoClient(AbstractClient):
         self.database = config["database"]
         self.dataSource = config["dataSource"]
         self.name = config["name"]
-
-    def get_token(self):
-        url = (
+        self.authUrl = config.get(
+            "authUrl",
             "https://realm.mongodb.com/api/client/v2.0/app/"
-            f"{self.name}/auth/providers/api-key/login"
+            f"{self.name}/auth/providers/api-key/login",
         )
-        data = {"key": self.apiKey}
-        data = json.dumps(data).encode("utf-8")
+        self.cache_ttl = cache_ttl
 
-        req = request.Request(
-            url, data=data, headers={"Content-Type": "application/json"}
-        )
-        response = request.urlopen(req)
-        result = json.loads(response.read().decode("utf-8"))
-        token = result["access_token"]
+        self._token = None
+        self._token_time = 0.0
+        # Maps a resource ID to a tuple of the time the resources were
+        # obtained and the resources.
+        self._cache: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
+        # Maps a (scheme, host) pair to an open connection.
+        self._connections: Dict[
+            Tuple[str, str], http.client.HTTPConnection
+        ] = {}
+        self._lock = threading.RLock()
 
-        return token
+    def _post(
+        self, url: str, data: Dict, headers: Dict[str, str] = {}
+    ) -> Dict:
+        """
+        Sends a POST request with a JSON body, returning the JSON response.
 
-    def get_resources_by_id(self, resource_id: str) -> List[Dict[str, Any]]:
+        A connection to each host is kept open and reused for later requests.
+        If a proxy is configured (e.g., via the `https_proxy` environment
+        variable), `urllib.request` is used instead.
+
+        :param url: The URL to send the request to.
+        :param data: The JSON body of the request.
+        :param headers: Additional request headers.
+
+        :raises HTTPError: An exception is raised if the server responds with
+        an error status.
+        """
+        body = json.dumps(data).encode("utf-8")
+        headers = dict(headers, **{"Content-Type": "application/json"})
+
+        parsed = parse.urlparse(url)
+        if parsed.scheme in request.getproxies() and not request.proxy_bypass(
+            parsed.hostname
+        ):
+            req = request.Request(url, data=body, headers=headers)
+            response = request.urlopen(req)
+            return json.loads(response.read().decode("utf-8"))
+
+        path = parsed.path
+        if parsed.query:
+            path += f"?{parsed.query}"
+        key = (parsed.scheme, parsed.netloc)
+
+        with self._lock:
+            # A kept-alive connection may have been closed by the server
+            # since it was last used, in which case the request is retried
+            # once on a new connection.
+            for attempt in range(2):
+                conn = self._connections.get(key)
+                if conn is None:
+                    if parsed.scheme == "https":
+                        conn = http.client.HTTPSConnection(parsed.netloc)
+                    else:
+                        conn = http.client.HTTPConnection(parsed.netloc)
+                    self._connections[key] = conn
+                try:
+                    conn.request("POST", path, body=body, headers=headers)
+                    response = conn.getresponse()
+                    result = response.read()
+                    break
+                except (http.client.HTTPException, ConnectionError):
+                    conn.close()
+                    del self._connections[key]
+                    if attempt == 1:
+                        raise
+
+        if response.status >= 400:
+            raise HTTPError(
+                url, response.status, response.reason, response.headers, None
+            )
+        return json.loads(result.decode("utf-8"))
+
+    def get_token(self):
+        """
+        Returns an access token for the data API. A token is reused until it
+        is close to expiring.
+        """
+        with self._lock:
+            if (
+                self._token is None
+                or time.monotonic() - self._token_time > _token_lifetime
+            ):
+                result = self._post(self.authUrl, {"key": self.apiKey})
+                self._token = result["access_token"]
+                self._token_time = time.monotonic()
+            return self._token
+
+    def _find(self, resource_filter: Dict) -> List[Dict[str, Any]]:
+        """
+        Finds all the resources matching a filter.
+
+        :param resource_filter: The MongoDB query filter.
+        """
         url = f"{self.url}/action/find"
         data = {
             "dataSource": self.dataSource,
             "collection": self.collection,
             "database": self.database,
-            "filter": {"id": resource_id},
+            "filter": resource_filter,
         }
-        data = json.dumps(data).encode("utf-8")
 
-        headers = {
-            "Authorization": f"Bearer {self.get_token()}",
-            "Content-Type": "application/json",
-        }
+        try:
+            result = self._post(
+                url,
+                data,
+                headers={"Authorization": f"Bearer {self.get_token()}"},
+            )
+        except HTTPError as e:
+            if e.code != 401:
+                raise
+            # The access token has been revoked or has expired early.
+            with self._lock:
+                self._token = None
+            result = self._post(
+                url,
+                data,
+                headers={"Authorization": f"Bearer {self.get_token()}"},
+            )
+        return result["documents"]
+
+    def _get_cached(self, resource_id: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Returns the cached resources with the given ID, or None if they are
+        not cached or the entry has expired.
+        """
+        with self._lock:
+            entry = self._cache.get(resource_id)
+        if entry is None or time.monotonic() - entry[0] >= self.cache_ttl:
+            return None
+        return list(entry[1])
 
-        req = request.Request(url, data=data, headers=headers)
-        response = request.urlopen(req)
-        result = json.loads(response.read().decode("utf-8"))
-        resources = result["documents"]
+    def _set_cached(
+        self, resource_id: str, resources: List[Dict[str, Any]]
+    ) -> None:
+        if self.cache_ttl > 0:
+            with self._lock:
+                self._cache[resource_id] = (time.monotonic(), list(resources))
 
+    def get_resources_by_id(self, resource_id: str) -> List[Dict[str, Any]]:
+        resources = self._get_cached(resource_id)
+        if resources is None:
+            resources = self._find({"id": resource_id})
+            self._set_cached(resource_id, resources)
         return resources
+
+    def get_resources_by_ids(
+        self, resource_ids: List[str]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Retrieves all the resources with any of the given IDs. The IDs which
+        are not cached are queried together with a single `$in` query (per
+        `_max_ids_per_query` IDs).
+
+        :param resource_ids: The IDs of the Resources.
+        :return: A dictionary mapping each ID to a list of the resources with
+        that ID, as Python dictionaries.
+        """
+        resources = {}
+        uncached = []
+        for resource_id in dict.fromkeys(resource_ids):
+            cached = self._get_cached(resource_id)
+            if cached is None:
+                uncached.append(resource_id)
+            else:
+                resources[resource_id] = cached
+
+        for i in range(0, len(uncached), _max_ids_per_query):
+            batch = uncached[i : i + _max_ids_per_query]
+            found = {resource_id: [] for resource_id in batch}
+            for resource in self._find({"id": {"$in": batch}}):
+                if resource["id"] in found:
+                    found[resource["id"]].append(resource)
+            for resource_id, id_resources in found.items():
+                self._set_cached(resource_id, id_resources)
+            resources.update(found)
+
+        return {
+            resource_id: resources[resource_id] for resource_id in resource_ids
+        }
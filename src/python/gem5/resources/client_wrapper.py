@@ -104,6 +104,61 @@ def get_resource_json_obj(
         if resource is not None:
             resources.append(resource)
 
+    return _check_single_resource(resource_id, resource_version, resources)
+
+
+def get_resource_json_objs(
+    resource_ids: List[str],
+    resource_versions: Optional[Dict[str, str]] = None,
+    databases: Optional[List[str]] = [],
+) -> Dict[str, Dict]:
+    """
+    This function returns the resource objects for several resources from the
+    corresponding databases. Each database is queried once for all the
+    resources.
+
+    :param resource_ids: resource ids of the resources
+    :optional param resource_versions: a dictionary mapping resource ids to
+    the resource version of that resource
+    :optional param database: database names. If not provided, all the
+    databases in the config file are used
+    :return: a dictionary mapping each resource id to its resource object
+    """
+    resource_versions = resource_versions or {}
+    resources = {resource_id: [] for resource_id in resource_ids}
+    if not databases:
+        databases = list(clients.keys())
+    for database in databases:
+        if database not in clients:
+            raise Exception(f"Database: {database} does not exist")
+        database_resources = clients[
+            database
+        ].get_resource_json_objs_from_client(
+            list(resources.keys()), resource_versions
+        )
+        for resource_id, resource in database_resources.items():
+            if resource is not None:
+                resources[resource_id].append(resource)
+
+    return {
+        resource_id: _check_single_resource(
+            resource_id, resource_versions.get(resource_id), found
+        )
+        for resource_id, found in resources.items()
+    }
+
+
+def _check_single_resource(
+    resource_id: str, resource_version: Optional[str], resources: List[Dict]
+) -> Dict:
+    """
+    Checks exactly one resource object was found across the databases, and
+    returns it.
+
+    :param resource_id: resource id of the resource
+    :param resource_version: resource version of the resource, or None
+    :param resources: the resource objects found in each database
+    """
     if len(resources) == 0:
         if resource_version is None:
             raise Exception(f"Resource with ID '{resource_id}' not found.")
@@ -32,18 +32,23 @@ import os
 import shutil
 import gzip
 import hashlib
-import base64
-import time
-import random
 from pathlib import Path
 import tarfile
-from tempfile import gettempdir
-from urllib.error import HTTPError
 from typing import List, Dict, Set, Optional
 
+from .catalog import load_catalog
 from .client_wrapper import get_resource_json_obj
-from .md5_utils import md5_file, md5_dir
-from ..utils.progress_bar import tqdm, progress_hook
+from .md5_cache import cached_md5, get_md5_cache_path
+from .ranged_download import ranged_download, _retry_with_backoff
+from .sparse import SparseWriter
+from .store import (
+    get_resource_store_dir,
+    get_object_path,
+    mark_used,
+    materialize,
+    seal_object,
+)
+from ..utils.progress_bar import tqdm, SharedProgress
 
 from ..utils.filelock import FileLock
 
@@ -77,12 +82,13 @@ def _get_resources_json_at_path(path: str, use_caching: bool = True) -> Dict:
     Returns a resource JSON, in the form of a Python Dict. The location
     of the JSON must be specified.
 
-    If `use_caching` is True, and a URL is passed, a copy of the JSON will be
-    cached locally, and used for up to an hour after retrieval.
+    If `use_caching` is True, and a URL is passed, a snapshot of the JSON is
+    stored locally and used for up to an hour before being refreshed (see
+    `catalog.py`).
 
     :param path: The URL or local path of the JSON file.
-    :param use_caching: True if a cached file is to be used (up to an hour),
-    otherwise the file will be retrieved from the URL regardless. True by
+    :param use_caching: True if a snapshot is to be used (up to an hour),
+    otherwise the snapshot is refreshed regardless of its age. True by
     default. Only valid in cases where a URL is passed.
     """
 
@@ -97,50 +103,8 @@ def _get_resources_json_at_path(path: str, use_caching: bool = True) -> Dict:
             f"Resources location '{path}' is not a valid path or URL."
         )
 
-    download_path = os.path.join(
-        gettempdir(),
-        f"gem5-resources-{hashlib.md5(path.encode()).hexdigest()}"
-        f"-{str(os.getuid())}.json",
-    )
-
-    # We apply a lock on the resources file for when it's downloaded, or
-    # re-downloaded, and read. This stops a corner-case from occuring where
-    # the file is re-downloaded while being read by another gem5 thread.
-    # Note the timeout is 120 so the `_download` function is given time to run
-    # its Truncated Exponential Backoff algorithm
-    # (maximum of roughly 1 minute). Typically this code will run quickly.
-    with FileLock(f"{download_path}.lock", timeout=120):
-        # The resources.json file can change at any time, but to avoid
-        # excessive retrieval we cache a version locally and use it for up to
-        # an hour before obtaining a fresh copy.
-        #
-        # `time.time()` and `os.path.getmtime(..)` both return an unix epoch
-        # time in seconds. Therefore, the value of "3600" here represents an
-        # hour difference between the two values. `time.time()` gets the
-        # current time, and `os.path.getmtime(<file>)` gets the modification
-        # time of the file. This is the most portable solution as other ideas,
-        # like "file creation time", are  not always the same concept between
-        # operating systems.
-        if (
-            not use_caching
-            or not os.path.exists(download_path)
-            or (time.time() - os.path.getmtime(download_path)) > 3600
-        ):
-            _download(path, download_path)
-
-    with open(download_path) as f:
-        file_contents = f.read()
-
-    try:
-        to_return = json.loads(file_contents)
-    except json.JSONDecodeError:
-        # This is a bit of a hack. If the URL specified exists in a Google
-        # Source repo (which is the case when on the gem5 develop branch) we
-        # retrieve the JSON in base64 format. This cannot be loaded directly as
-        # text. Conversion is therefore needed.
-        to_return = json.loads(base64.b64decode(file_contents).decode("utf-8"))
-
-    return to_return
+    catalog, _ = load_catalog(path, max_age=None if use_caching else 0)
+    return catalog
 
 
 def _get_resources_json() -> Dict:
@@ -176,6 +140,25 @@ def _get_resources_json() -> Dict:
     return to_return
 
 
+def _get_verify_resources_mode() -> str:
+    """
+    Returns how resources already present on the host system are verified.
+    This is set via the gem5 `--verify-resources` command line option.
+
+    * "cached": The md5 value of a resource is only recomputed if the resource
+      has changed since it was last hashed (see `md5_cache.py`).
+    * "full": The md5 value of a resource is always recomputed.
+
+    :returns: The verification mode. "cached" if it is not set.
+    """
+    try:
+        from m5 import options
+
+        return getattr(options, "verify_resources", "cached")
+    except ImportError:
+        return "cached"
+
+
 def _get_url_base() -> str:
     """
     Obtains the "url_base" string from the resources.json file.
@@ -234,7 +217,63 @@ def _get_resources(
     return to_return
 
 
-def _download(url: str, download_to: str, max_attempts: int = 6) -> None:
+def _urlopen(url: str, headers: Optional[Dict[str, str]] = None):
+    """
+    Opens a URL. If the "GEM5_USE_PROXY" environment variable is set, the
+    connection is made via the SOCKS5 proxy it specifies.
+
+    :param url: The URL to open.
+    :param headers: Optional headers to send with the request.
+
+    :returns: The response, as returned by `urllib.request.urlopen`.
+    """
+
+    # check to see if user requests a proxy connection
+    use_proxy = os.getenv("GEM5_USE_PROXY")
+    request = urllib.request.Request(url, headers=headers or {})
+    if not use_proxy:
+        return urllib.request.urlopen(request)
+
+    # If the "use_proxy" variable is specified we setup a socks5
+    # connection.
+    try:
+        import socks
+    except ImportError:
+        raise Exception(
+            "An import error has occurred. This is likely due "
+            "the Python SOCKS client module not being "
+            "installed. It can be installed with "
+            "`pip install PySocks`."
+        )
+    import socket
+    import ssl
+
+    try:
+        IP_ADDR, host_port = use_proxy.split(":")
+        PORT = int(host_port)
+    except ValueError:
+        raise Exception(
+            "Environment variable GEM5_USE_PROXY is set to "
+            f"'{use_proxy}'. The expected form is "
+            "<host>:<port>'."
+        )
+    socks.set_default_proxy(socks.SOCKS5, IP_ADDR, PORT)
+    socket.socket = socks.socksocket
+
+    # base SSL context for https connection
+    ctx = ssl.create_default_context()
+    ctx.check_hostname = False
+    ctx.verify_mode = ssl.CERT_NONE
+
+    return urllib.request.urlopen(request, context=ctx)
+
+
+def _download(
+    url: str,
+    download_to: str,
+    max_attempts: int = 6,
+    progress: Optional[SharedProgress] = None,
+) -> None:
     """
     Downloads a file.
 
@@ -248,91 +287,156 @@ def _download(url: str, download_to: str, max_attempts: int = 6) -> None:
     :param max_attempts: The max number of download attempts before stopping.
     The default is 6. This translates to roughly 1 minute of retrying before
     stopping.
+
+    :param progress: A progress bar shared with other downloads. If given,
+    the progress of this download is reported to it instead of to a progress
+    bar of its own.
     """
 
     # TODO: This whole setup will only work for single files we can get via
     # wget. We also need to support git clones going forward.
 
-    attempt = 0
-    while True:
-        # The loop will be broken on a successful download, via a `return`, or
-        # if an exception is raised. An exception will be raised if the maximum
-        # number of download attempts has been reached or if a HTTP status code
-        # other than 408, 429, or 5xx is received.
-        try:
-            # check to see if user requests a proxy connection
-            use_proxy = os.getenv("GEM5_USE_PROXY")
-            if use_proxy:
-                # If the "use_proxy" variable is specified we setup a socks5
-                # connection.
-
-                import socks
-                import socket
-                import ssl
-
-                IP_ADDR, host_port = use_proxy.split(":")
-                PORT = int(host_port)
-                socks.set_default_proxy(socks.SOCKS5, IP_ADDR, PORT)
-                socket.socket = socks.socksocket
-
-                # base SSL context for https connection
-                ctx = ssl.create_default_context()
-                ctx.check_hostname = False
-                ctx.verify_mode = ssl.CERT_NONE
-
-                # get the file as a bytes blob
-                request = urllib.request.Request(url)
-                with urllib.request.urlopen(request, context=ctx) as fr:
-                    with tqdm.wrapattr(
-                        open(download_to, "wb"),
-                        "write",
-                        miniters=1,
-                        desc="Downloading {download_to}",
-                        total=getattr(fr, "length", None),
-                    ) as fw:
-                        for chunk in fr:
-                            fw.write(chunk)
-            else:
-                with tqdm(
-                    unit="B",
-                    unit_scale=True,
-                    unit_divisor=1024,
+    if os.getenv("GEM5_USE_PROXY"):
+
+        def download():
+            # get the file as a bytes blob
+            with _urlopen(url) as fr:
+                with (progress or tqdm).wrapattr(
+                    open(download_to, "wb"),
+                    "write",
                     miniters=1,
                     desc=f"Downloading {download_to}",
-                ) as t:
-                    urllib.request.urlretrieve(
-                        url, download_to, reporthook=progress_hook(t)
-                    )
-            return
-        except HTTPError as e:
-            # If the error code retrieved is retryable, we retry using a
-            # Truncated Exponential backoff algorithm, truncating after
-            # "max_attempts". We consider HTTP status codes 408, 429, and 5xx
-            # as retryable. If any other is retrieved we raise the error.
-            if e.code in (408, 429) or 500 <= e.code < 600:
-                attempt += 1
-                if attempt >= max_attempts:
-                    raise Exception(
-                        f"After {attempt} attempts, the resource json could "
-                        "not be retrieved. HTTP Status Code retrieved: "
-                        f"{e.code}"
-                    )
-                time.sleep((2**attempt) + random.uniform(0, 1))
-            else:
-                raise e
-        except ValueError as e:
-            raise Exception(
-                "Environment variable GEM5_USE_PROXY is set to "
-                f"'{use_proxy}'. The expected form is "
-                "<host>:<port>'."
-            )
-        except ImportError as e:
-            raise Exception(
-                "An import error has occurred. This is likely due "
-                "the Python SOCKS client module not being "
-                "installed. It can be installed with "
-                "`pip install PySocks`."
-            )
+                    total=getattr(fr, "length", None),
+                ) as fw:
+                    for chunk in fr:
+                        fw.write(chunk)
+
+        _retry_with_backoff(download, url=url, max_attempts=max_attempts)
+    else:
+        # Large files are split into HTTP Range requests downloaded
+        # concurrently. Each request is retried independently and an
+        # interrupted download is resumed on the next attempt.
+        ranged_download(
+            url,
+            download_to=download_to,
+            max_attempts=max_attempts,
+            progress=progress,
+        )
+
+
+def _is_within_directory(directory: str, target: str) -> bool:
+    """
+    Returns True if the path `target` is within `directory`.
+    """
+    abs_directory = os.path.abspath(directory)
+    abs_target = os.path.abspath(target)
+
+    prefix = os.path.commonprefix([abs_directory, abs_target])
+
+    return prefix == abs_directory
+
+
+def _safe_extract_stream(fileobj, path: str) -> None:
+    """
+    Unpacks a tar archive from a file object in a single, sequential pass
+    (i.e., the file object need not be seekable).
+
+    :param fileobj: The file object to read the tar archive from. The archive
+    may be compressed.
+    :param path: The directory to unpack the archive to.
+
+    :raises Exception: An exception is raised if a member of the archive would
+    be unpacked outside of `path`.
+    """
+    with tarfile.open(fileobj=fileobj, mode="r|*") as tar:
+        for member in tar:
+            member_path = os.path.join(path, member.name)
+            if not _is_within_directory(path, member_path):
+                raise Exception("Attempted Path Traversal in Tar File")
+            tar.extract(member, path)
+
+
+def _download_and_extract(
+    url: str,
+    to_path: str,
+    unzip: bool,
+    untar: bool,
+    max_attempts: int = 6,
+    progress: Optional[SharedProgress] = None,
+) -> Optional[str]:
+    """
+    Downloads a resource, decompressing and/or unpacking it as it is received.
+
+    The HTTP response is streamed through a gzip decoder (if `unzip` is True)
+    and then either written to `to_path` or unpacked into the `to_path`
+    directory (if `untar` is True). No intermediate archive is written to
+    disk. The resource is assembled at `<to_path>.partial` and only moved to
+    `to_path` once complete.
+
+    If a retryable error occurs, the download is restarted using a Truncated
+    Exponential Backoff algorithm.
+
+    :param url: The URL of the resource to download.
+    :param to_path: The location the resource is to be stored.
+    :param unzip: If True, the resource is gunzipped.
+    :param untar: If True, the resource is unpacked as a tar archive.
+    :param max_attempts: The max number of download attempts before stopping.
+    :param progress: A progress bar shared with other downloads. If given,
+    the progress of this download is reported to it instead of to a progress
+    bar of its own.
+
+    :returns: The md5 value of the file written to `to_path`, computed as it
+    is written. None if the resource was unpacked to a directory.
+    """
+    partial_path = f"{to_path}.partial"
+
+    def remove_partial():
+        if os.path.isdir(partial_path):
+            shutil.rmtree(partial_path)
+        elif os.path.exists(partial_path):
+            os.remove(partial_path)
+
+    def download_and_extract() -> Optional[str]:
+        remove_partial()
+        with _urlopen(url) as response:
+            with (progress or tqdm).wrapattr(
+                response,
+                "read",
+                miniters=1,
+                desc=f"Downloading {to_path}",
+                total=getattr(response, "length", None),
+            ) as source:
+                if unzip:
+                    source = gzip.GzipFile(fileobj=source, mode="rb")
+
+                if untar:
+                    _safe_extract_stream(source, partial_path)
+                    return None
+
+                # Disk images are mostly zeros. Runs of zeros are written as
+                # holes, saving both the writes and the disk space.
+                md5 = hashlib.md5()
+                with open(partial_path, "wb") as f:
+                    writer = SparseWriter(f)
+                    for chunk in iter(lambda: source.read(1024 * 1024), b""):
+                        md5.update(chunk)
+                        writer.write(chunk)
+                    writer.finish()
+                return md5.hexdigest()
+
+    try:
+        md5 = _retry_with_backoff(
+            download_and_extract,
+            url=url,
+            max_attempts=max_attempts,
+            on_retry=remove_partial,
+        )
+    except BaseException:
+        remove_partial()
+        raise
+
+    os.replace(partial_path, to_path)
+    return md5
 
 
 def list_resources() -> List[str]:
@@ -426,124 +530,292 @@ def get_resource(
     be thrown is a directory is present at `to_path`
     """
 
+    resource_obj = get_resource_json_obj(
+        resource_name,
+        resource_version=resource_version,
+        databases=databases,
+    )
+    _get_resource_locked(
+        resource_name=resource_name,
+        resource_obj=resource_obj,
+        to_path=to_path,
+        unzip=unzip,
+        untar=untar,
+        download_md5_mismatch=download_md5_mismatch,
+    )
+
+
+def _get_resource_locked(
+    resource_name: str,
+    resource_obj: Dict,
+    to_path: str,
+    unzip: bool = True,
+    untar: bool = True,
+    download_md5_mismatch: bool = True,
+    progress: Optional[SharedProgress] = None,
+) -> None:
+    """
+    Obtains a gem5 resource, given its resource object, while holding the
+    lock for `to_path`. See `get_resource`.
+
+    :param resource_name: The resource to be obtained.
+    :param resource_obj: The JSON object of the resource.
+    :param to_path: The location in the file system the resource is to be
+    stored.
+    :param progress: A progress bar shared with other downloads. If given,
+    the progress of the download is reported to it, and no messages are
+    printed.
+    """
+
     # We apply a lock for a specific resource. This is to avoid circumstances
     # where multiple instances of gem5 are running and trying to obtain the
     # same resources at once. The timeout here is somewhat arbitarily put at 15
     # minutes.Most resources should be downloaded and decompressed in this
     # timeframe, even on the most constrained of systems.
+    #
+    # In the common case, the resource is already present. This is checked
+    # under a shared lock so many gem5 processes starting at once do not
+    # queue behind each other. The exclusive lock is only taken if the
+    # resource must be (re-)obtained.
+    with FileLock(f"{to_path}.lock", timeout=900, shared=True):
+        if os.path.exists(to_path) and (
+            cached_md5(
+                Path(to_path),
+                cache_path=get_md5_cache_path(Path(to_path).parent),
+                use_cached_value=_get_verify_resources_mode() != "full",
+            )
+            == resource_obj["md5sum"]
+        ):
+            return
+
     with FileLock(f"{to_path}.lock", timeout=900):
-        resource_obj = get_resource_json_obj(
-            resource_name,
-            resource_version=resource_version,
-            databases=databases,
+        _get_resource(
+            resource_name=resource_name,
+            resource_obj=resource_obj,
+            to_path=to_path,
+            unzip=unzip,
+            untar=untar,
+            download_md5_mismatch=download_md5_mismatch,
+            progress=progress,
         )
 
-        if os.path.exists(to_path):
-            if os.path.isfile(to_path):
-                md5 = md5_file(Path(to_path))
-            else:
-                md5 = md5_dir(Path(to_path))
-
-            if md5 == resource_obj["md5sum"]:
-                # In this case, the file has already been download, no need to
-                # do so again.
-                return
-            elif download_md5_mismatch:
-                if os.path.isfile(to_path):
-                    os.remove(to_path)
-                else:
-                    shutil.rmtree(to_path)
-            else:
-                raise Exception(
-                    "There already a file present at '{}' but "
-                    "its md5 value is invalid.".format(to_path)
-                )
 
-        download_dest = to_path
+def _get_resource(
+    resource_name: str,
+    resource_obj: Dict,
+    to_path: str,
+    unzip: bool = True,
+    untar: bool = True,
+    download_md5_mismatch: bool = True,
+    progress: Optional[SharedProgress] = None,
+) -> None:
+    """
+    Obtains a gem5 resource, given its resource object, and stores it to a
+    specified location. See `get_resource`. The exclusive lock for `to_path`
+    must be held by the caller.
+
+    :param resource_name: The resource to be obtained.
+    :param resource_obj: The JSON object of the resource.
+    :param to_path: The location in the file system the resource is to be
+    stored.
+    :param progress: A progress bar shared with other downloads. If given,
+    the progress of the download is reported to it, and no messages are
+    printed.
+    """
+    if os.path.exists(to_path):
+        # Rehashing large resources is expensive, so the md5 value is
+        # taken from the md5 cache if the resource is unchanged since it
+        # was last hashed, unless `--verify-resources=full` is set.
+        md5 = cached_md5(
+            Path(to_path),
+            cache_path=get_md5_cache_path(Path(to_path).parent),
+            use_cached_value=_get_verify_resources_mode() != "full",
+        )
 
-        # This if-statement is remain backwards compatable with the older,
-        # string-based way of doing things. It can be refactored away over
-        # time:
-        # https://gem5-review.googlesource.com/c/public/gem5-resources/+/51168
-        if isinstance(resource_obj["is_zipped"], str):
-            run_unzip = unzip and resource_obj["is_zipped"].lower() == "true"
-        elif isinstance(resource_obj["is_zipped"], bool):
-            run_unzip = unzip and resource_obj["is_zipped"]
+        if md5 == resource_obj["md5sum"]:
+            # In this case, the file has already been download, no need to
+            # do so again.
+            return
+        elif download_md5_mismatch:
+            _remove_resource(to_path)
         else:
             raise Exception(
-                "The resource.json entry for '{}' has a value for the "
-                "'is_zipped' field which is neither a string or a boolean.".format(
-                    resource_name
-                )
+                "There already a file present at '{}' but "
+                "its md5 value is invalid.".format(to_path)
+            )
+    elif os.path.islink(to_path):
+        # A dangling symlink, e.g., to an object which has since been
+        # evicted from the resource store.
+        os.remove(to_path)
+
+    # This if-statement is remain backwards compatable with the older,
+    # string-based way of doing things. It can be refactored away over
+    # time:
+    # https://gem5-review.googlesource.com/c/public/gem5-resources/+/51168
+    if isinstance(resource_obj["is_zipped"], str):
+        is_zipped = resource_obj["is_zipped"].lower() == "true"
+    elif isinstance(resource_obj["is_zipped"], bool):
+        is_zipped = resource_obj["is_zipped"]
+    else:
+        raise Exception(
+            "The resource.json entry for '{}' has a value for the "
+            "'is_zipped' field which is neither a string or a boolean.".format(
+                resource_name
             )
-
-        run_tar_extract = (
-            untar
-            and "is_tar_archive" in resource_obj
-            and resource_obj["is_tar_archive"]
         )
 
-        tar_extension = ".tar"
-        if run_tar_extract:
-            download_dest += tar_extension
-
-        zip_extension = ".gz"
-        if run_unzip:
-            download_dest += zip_extension
+    run_unzip = unzip and is_zipped
 
-        # TODO: Might be nice to have some kind of download status bar here.
-        # TODO: There might be a case where this should be silenced.
-        print(
-            "Resource '{}' was not found locally. Downloading to '{}'...".format(
-                resource_name, download_dest
+    is_tar_archive = (
+        "is_tar_archive" in resource_obj and resource_obj["is_tar_archive"]
+    )
+    run_tar_extract = untar and is_tar_archive
+
+    store_dir = get_resource_store_dir()
+    if (
+        store_dir
+        and (run_unzip or not is_zipped)
+        and (run_tar_extract or not is_tar_archive)
+    ):
+        # The resource is obtained from the content-addressed resource
+        # store, downloading it to the store if not already present.
+        # This is only possible if the resource is to be stored in the
+        # form its md5 value describes (i.e., decompressed and unpacked).
+        object_path = get_object_path(store_dir, resource_obj["md5sum"])
+        object_path.parent.mkdir(parents=True, exist_ok=True)
+        # Objects already in the store are materialized under a shared lock,
+        # so several processes may do so at once. An exclusive lock is only
+        # taken to download an object. Objects are never modified once
+        # added, and are only removed (see `store.collect_garbage`) under an
+        # exclusive lock.
+        method = None
+        with FileLock(str(object_path), timeout=900, shared=True):
+            if object_path.exists():
+                mark_used(object_path)
+                method = materialize(object_path, Path(to_path))
+
+        if method is None:
+            with FileLock(str(object_path), timeout=900):
+                if not object_path.exists():
+                    md5 = _download_resource(
+                        resource_name=resource_name,
+                        url=resource_obj["url"],
+                        to_path=str(object_path),
+                        md5sum=resource_obj["md5sum"],
+                        unzip=run_unzip,
+                        untar=run_tar_extract,
+                        progress=progress,
+                    )
+                    seal_object(object_path)
+
+                    # Objects in the store are shared, so their contents are
+                    # always verified (if this was not done as they were
+                    # downloaded).
+                    if not md5:
+                        md5 = cached_md5(
+                            object_path,
+                            cache_path=get_md5_cache_path(store_dir),
+                        )
+                    if md5 != resource_obj["md5sum"]:
+                        _remove_resource(str(object_path))
+                        raise Exception(
+                            f"The md5 value of the downloaded resource "
+                            f"'{resource_name}' ('{md5}') does not match the "
+                            f"expected md5 value "
+                            f"('{resource_obj['md5sum']}')."
+                        )
+
+                mark_used(object_path)
+                method = materialize(object_path, Path(to_path))
+        if not progress:
+            print(
+                f"Resource '{resource_name}' obtained from the resource "
+                f"store via a {method} to '{object_path}'."
             )
+    else:
+        _download_resource(
+            resource_name=resource_name,
+            url=resource_obj["url"],
+            to_path=to_path,
+            md5sum=resource_obj["md5sum"],
+            unzip=run_unzip,
+            untar=run_tar_extract,
+            progress=progress,
         )
 
-        # Get the URL.
-        url = resource_obj["url"]
-
-        _download(url=url, download_to=download_dest)
-        print(f"Finished downloading resource '{resource_name}'.")
 
-        if run_unzip:
-            print(
-                f"Decompressing resource '{resource_name}' ('{download_dest}')..."
-            )
-            unzip_to = download_dest[: -len(zip_extension)]
-            with gzip.open(download_dest, "rb") as f:
-                with open(unzip_to, "wb") as o:
-                    shutil.copyfileobj(f, o)
-            os.remove(download_dest)
-            download_dest = unzip_to
-            print(f"Finished decompressing resource '{resource_name}'.")
-
-        if run_tar_extract:
-            print(
-                f"Unpacking the the resource '{resource_name}' "
-                f"('{download_dest}')"
-            )
-            unpack_to = download_dest[: -len(tar_extension)]
-            with tarfile.open(download_dest) as f:
+def _remove_resource(path: str) -> None:
+    """
+    Removes a resource, which may be a file, directory, or symlink.
+    """
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    else:
+        os.remove(path)
 
-                def is_within_directory(directory, target):
-                    abs_directory = os.path.abspath(directory)
-                    abs_target = os.path.abspath(target)
 
-                    prefix = os.path.commonprefix([abs_directory, abs_target])
+def _download_resource(
+    resource_name: str,
+    url: str,
+    to_path: str,
+    md5sum: str,
+    unzip: bool,
+    untar: bool,
+    progress: Optional[SharedProgress] = None,
+) -> Optional[str]:
+    """
+    Downloads a resource to `to_path`, decompressing and/or unpacking it if
+    required.
+
+    :param resource_name: The name of the resource. Used in messages.
+    :param url: The URL of the resource.
+    :param to_path: The location the resource is to be stored.
+    :param md5sum: The expected md5 value of the resource once decompressed
+    and unpacked.
+    :param unzip: If True, the resource is gunzipped.
+    :param untar: If True, the resource is unpacked as a tar archive.
+    :param progress: A progress bar shared with other downloads. If given,
+    the progress of the download is reported to it, and no messages are
+    printed.
+
+    :returns: The md5 value of the resource if it was validated as it was
+    downloaded, otherwise None.
+    """
 
-                    return prefix == abs_directory
+    if not progress:
+        print(
+            f"Resource '{resource_name}' was not found locally. "
+            f"Downloading to '{to_path}'..."
+        )
 
-                def safe_extract(
-                    tar, path=".", members=None, *, numeric_owner=False
-                ):
-                    for member in tar.getmembers():
-                        member_path = os.path.join(path, member.name)
-                        if not is_within_directory(path, member_path):
-                            raise Exception(
-                                "Attempted Path Traversal in Tar File"
-                            )
+    if unzip or untar:
+        # The resource is decompressed and/or unpacked as it is downloaded.
+        # This avoids writing the archive, and any intermediate decompressed
+        # archive, to disk.
+        md5 = _download_and_extract(
+            url=url,
+            to_path=to_path,
+            unzip=unzip,
+            untar=untar,
+            progress=progress,
+        )
 
-                    tar.extractall(path, members, numeric_owner=numeric_owner)
+        # The md5 value of a single decompressed file is computed as it is
+        # written, so it can be validated without reading it back. The md5
+        # value of a directory depends on the sorted order of its contents,
+        # not the order they appear in the tar archive, so it cannot be
+        # computed this way.
+        if md5 and md5 != md5sum:
+            os.remove(to_path)
+            raise Exception(
+                f"The md5 value of the downloaded resource "
+                f"'{resource_name}' ('{md5}') does not match the "
+                f"expected md5 value ('{md5sum}')."
+            )
+    else:
+        md5 = None
+        _download(url=url, download_to=to_path, progress=progress)
 
-                safe_extract(f, unpack_to)
-            os.remove(download_dest)
+    if not progress:
+        print(f"Finished downloading resource '{resource_name}'.")
+    return md5
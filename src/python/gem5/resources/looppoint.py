@@ -274,7 +274,7 @@ class Looppoint:
         if region_id not in self._regions:
             raise Exception(f"Region ID '{region_id}' cannot be found.")
 
-        to_remove = [rid for rid in self._regions if rid is not region_id]
+        to_remove = [rid for rid in self._regions if rid != region_id]
         for rid in to_remove:
             del self._regions[rid]
 
@@ -0,0 +1,217 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+A persistent cache of the md5 values of resources already present on the host
+system.
+
+Hashing a multi-GB disk image or checkpoint directory each time a resource is
+obtained can take minutes. Instead, the md5 value is recorded alongside a
+signature of the resource's `stat` information (inode, size, `mtime_ns`, and
+`ctime_ns`). On subsequent lookups, if the signature is unchanged, the
+recorded md5 value is returned without reading the resource.
+
+The cache is a single JSON file stored in the resource directory. It is
+written atomically (via `os.replace`) while holding a lock, so it is safe to
+share between concurrent gem5 processes.
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .md5_utils import md5
+from ..utils.filelock import FileLock
+
+_cache_file_name = ".gem5-md5-cache.json"
+
+# Filesystem timestamps have a finite granularity. If a resource is modified
+# within the same timestamp "tick" as it was hashed, its signature would not
+# change. Entries are therefore only trusted if the resource was last modified
+# sufficiently long before the hash was computed (this is the same "racily
+# clean" problem git solves for its index). Two seconds covers the coarsest
+# common filesystem timestamp resolution.
+_racy_window_ns = 2 * 10**9
+
+
+def get_md5_cache_path(resource_directory: Path) -> Path:
+    """
+    Returns the path of the md5 cache file for a given resource directory.
+
+    :param resource_directory: The directory the resources are stored in.
+    """
+    return Path(resource_directory) / _cache_file_name
+
+
+def _stat_signature(path: Path) -> List:
+    """
+    Returns the signature of a file or directory. This is a list of the form
+    `[inode, size, mtime_ns, ctime_ns, listing]`.
+
+    For a file, `listing` is an empty string. For a directory, the size is the
+    sum of the sizes of all files within it, `mtime_ns` and `ctime_ns` are the
+    latest found in the directory tree, and `listing` is a digest of the
+    relative path and `stat` information of every entry in the tree. Stat'ing
+    every entry is far cheaper than hashing the contents.
+    """
+    st = path.stat()
+    if not path.is_dir():
+        return [st.st_ino, st.st_size, st.st_mtime_ns, st.st_ctime_ns, ""]
+
+    size = 0
+    mtime_ns = st.st_mtime_ns
+    ctime_ns = st.st_ctime_ns
+    listing = hashlib.md5()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(dirs + files):
+            entry = os.path.join(root, name)
+            entry_st = os.stat(entry)
+            if not os.path.isdir(entry):
+                size += entry_st.st_size
+            mtime_ns = max(mtime_ns, entry_st.st_mtime_ns)
+            ctime_ns = max(ctime_ns, entry_st.st_ctime_ns)
+            listing.update(
+                f"{os.path.relpath(entry, path)}:{entry_st.st_ino}:"
+                f"{entry_st.st_size}:{entry_st.st_mtime_ns}:"
+                f"{entry_st.st_ctime_ns}\n".encode()
+            )
+    return [st.st_ino, size, mtime_ns, ctime_ns, listing.hexdigest()]
+
+
+def _load_cache(cache_path: Path) -> Dict:
+    """
+    Loads the md5 cache. A missing or corrupt cache is treated as empty.
+    """
+    try:
+        with open(cache_path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict):
+        return {}
+    return cache
+
+
+def lookup_md5(path: Path, cache_path: Path) -> Optional[str]:
+    """
+    Returns the cached md5 value of a file or directory, or None if there is
+    no valid entry for it.
+
+    An entry is only valid if the signature of `path` matches the signature
+    recorded when it was hashed, and the path was not modified within
+    `_racy_window_ns` of the hash being computed.
+
+    :param path: The file or directory to look up.
+    :param cache_path: The path of the md5 cache file.
+    """
+    entry = _load_cache(cache_path).get(str(Path(path).resolve()))
+    if not entry:
+        return None
+
+    try:
+        signature = _stat_signature(Path(path))
+    except OSError:
+        return None
+
+    if signature != entry.get("signature"):
+        return None
+
+    last_modified_ns = max(signature[2], signature[3])
+    if last_modified_ns >= entry.get("hashed_ns", 0) - _racy_window_ns:
+        return None
+
+    return entry.get("md5")
+
+
+def record_md5(
+    path: Path, md5_value: str, hashed_ns: int, cache_path: Path
+) -> None:
+    """
+    Records the md5 value of a file or directory in the cache.
+
+    :param path: The file or directory which was hashed.
+    :param md5_value: The md5 value of `path`.
+    :param hashed_ns: The time, in nanoseconds since the epoch (as returned by
+    `time.time_ns()`), at which the hash computation began.
+    :param cache_path: The path of the md5 cache file.
+    """
+    try:
+        signature = _stat_signature(Path(path))
+    except OSError:
+        return
+
+    with FileLock(str(cache_path), timeout=120):
+        cache = _load_cache(cache_path)
+
+        # Drop entries for resources which no longer exist.
+        cache = {
+            key: value for key, value in cache.items() if Path(key).exists()
+        }
+
+        cache[str(Path(path).resolve())] = {
+            "signature": signature,
+            "hashed_ns": hashed_ns,
+            "md5": md5_value,
+        }
+
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, cache_path)
+
+
+def cached_md5(
+    path: Path, cache_path: Path, use_cached_value: bool = True
+) -> str:
+    """
+    Gets the md5 value of a file or directory, using the md5 cache to avoid
+    rehashing it if it has not changed since it was last hashed. If hashing is
+    necessary, the result is recorded in the cache.
+
+    :param path: The file or directory to get the md5 of.
+    :param cache_path: The path of the md5 cache file.
+    :param use_cached_value: If False, the path is always rehashed (and the
+    cache entry refreshed). True by default.
+    """
+    if use_cached_value:
+        md5_value = lookup_md5(path, cache_path)
+        if md5_value:
+            return md5_value
+
+    hashed_ns = time.time_ns()
+    md5_value = md5(Path(path))
+    try:
+        record_md5(path, md5_value, hashed_ns, cache_path)
+    except OSError:
+        # The cache is an optimization. Failing to write it (e.g., in a
+        # read-only resource directory) should not prevent the resource being
+        # used.
+        pass
+    return md5_value
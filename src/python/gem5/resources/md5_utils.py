@@ -26,55 +26,375 @@
 
 from pathlib import Path
 import hashlib
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from _hashlib import HASH as Hash
+from typing import Iterator, List, Optional, Tuple, Union
 
+from .sparse import data_extents
 
-def _md5_update_from_file(filename: Path, hash: Hash) -> Hash:
-    assert filename.is_file()
+"""
+Functions for computing the md5 values of resources.
 
-    if filename.stat().st_size < 1024 * 1024 * 100:
-        from ..utils.progress_bar import FakeTQDM
+The md5 value of a directory is, by default, the md5 of the names and contents
+of every entry in the directory tree, in a fixed order, passed through a
+single hash ("compatible" mode). As md5 is sequential, this cannot be computed
+in parallel. Instead, the files are read ahead concurrently on a thread pool
+while the main thread hashes them, so reading and hashing overlap.
 
-        # if the file is less than 100MB, no need to show a progress bar.
-        tqdm = FakeTQDM()
-    else:
-        from ..utils.progress_bar import tqdm
+In "tree" mode, each file is hashed independently on a thread pool and the
+directory's md5 value is computed from the per-file md5 values, combined in
+the same fixed order. This uses multiple cores but produces different values
+to "compatible" mode, so it cannot be used to verify resources against the md5
+values recorded in the gem5 resources database.
 
-    with tqdm.wrapattr(
-        open(str(filename), "rb"),
-        "read",
-        miniters=1,
-        desc=f"Computing md5sum on {filename}",
-        total=filename.stat().st_size,
-    ) as f:
-        for chunk in iter(lambda: f.read(4096), b""):
+In both modes, the holes in sparse files (e.g., disk images) are not read from
+disk. They are hashed as the zeros they contain.
+"""
+
+# The size of each read. Large reads reduce the per-call overhead and allow
+# `hashlib` to release the GIL while hashing.
+_chunk_size = 8 * 1024 * 1024
+
+# The total number of bytes all the readers together may read ahead of the
+# hashing thread in "compatible" mode.
+_read_ahead_bytes = 4 * _chunk_size
+
+# Files, or directories, larger than this show a progress bar as they are
+# hashed.
+_progress_bar_threshold = 1024 * 1024 * 100
+
+_md5_dir_modes = ("compatible", "tree")
+
+
+class HashStats:
+    """
+    Statistics on the computation of an md5 value, used to determine whether
+    hashing is limited by I/O or by CPU.
+
+    `read_seconds` and `hash_seconds` are summed over all threads.
+    `wait_seconds` is the time the hashing thread spent waiting for data in
+    "compatible" mode. If this is a large fraction of `elapsed_seconds`,
+    hashing is I/O-bound.
+    """
+
+    def __init__(self) -> None:
+        self.files = 0
+        self.bytes = 0
+        self.elapsed_seconds = 0.0
+        self.read_seconds = 0.0
+        self.hash_seconds = 0.0
+        self.wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _add(
+        self,
+        files: int = 0,
+        bytes: int = 0,
+        read_seconds: float = 0.0,
+        hash_seconds: float = 0.0,
+    ) -> None:
+        with self._lock:
+            self.files += files
+            self.bytes += bytes
+            self.read_seconds += read_seconds
+            self.hash_seconds += hash_seconds
+
+    def throughput(self) -> float:
+        """
+        Returns the throughput, in bytes per second.
+        """
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return self.bytes / self.elapsed_seconds
+
+    def __str__(self) -> str:
+        mib = 1024 * 1024
+        return (
+            f"Hashed {self.files} file(s), {self.bytes / mib:.1f} MiB, in "
+            f"{self.elapsed_seconds:.2f}s ({self.throughput() / mib:.1f} "
+            f"MiB/s). Reading: {self.read_seconds:.2f}s, hashing: "
+            f"{self.hash_seconds:.2f}s, waiting for reads: "
+            f"{self.wait_seconds:.2f}s."
+        )
+
+
+def _md5_update_from_file(filename: Path, hash: Hash) -> Hash:
+    assert filename.is_file()
+
+    # if the file is less than 100MB, no need to show a progress bar.
+    with _progress_bar(filename, [filename]) as progress:
+        for chunk in _read_chunks(filename, HashStats()):
             hash.update(chunk)
+            progress.update(len(chunk))
     return hash
 
 
-def _md5_update_from_dir(directory: Path, hash: Hash) -> Hash:
+def _walk_dir(
+    directory: Path, prefix: str = ""
+) -> Iterator[Tuple[str, Optional[Path]]]:
+    """
+    Yields the entries of a directory tree in the order they are hashed. For
+    each entry, a tuple of its path relative to the top directory and, if it
+    is a file, its path, is yielded. Directories are yielded before their
+    contents.
+    """
     assert directory.is_dir()
     for path in sorted(directory.iterdir(), key=lambda p: str(p).lower()):
-        hash.update(path.name.encode())
+        name = f"{prefix}{path.name}"
         if path.is_file():
-            hash = _md5_update_from_file(path, hash)
-        elif path.is_dir():
-            hash = _md5_update_from_dir(path, hash)
+            yield name, path
+        else:
+            yield name, None
+            if path.is_dir():
+                yield from _walk_dir(path, f"{name}/")
+
+
+def _progress_bar(path: Path, files: List[Path]):
+    """
+    Returns a progress bar for hashing `path`, over the total size of
+    `files`, if this is large enough to warrant one.
+    """
+    total = sum(path.stat().st_size for path in files)
+    if total < _progress_bar_threshold:
+        from ..utils.progress_bar import FakeTQDM
+
+        return FakeTQDM()
+
+    from ..utils.progress_bar import tqdm
+
+    return tqdm(
+        unit="B",
+        unit_scale=True,
+        unit_divisor=1024,
+        miniters=1,
+        total=total,
+        desc=f"Computing md5sum on {path}",
+    )
+
+
+def _zero_chunk() -> bytes:
+    global _zero_chunk_bytes
+    if _zero_chunk_bytes is None:
+        _zero_chunk_bytes = bytes(_chunk_size)
+    return _zero_chunk_bytes
+
+
+_zero_chunk_bytes = None
+
+
+def _read_chunks(
+    filename: Path, stats: HashStats
+) -> Iterator[Union[bytes, memoryview]]:
+    """
+    Reads a file in chunks of up to `_chunk_size`, recording the time spent
+    reading.
+
+    Holes in sparse files (see `sparse.data_extents`) are not read. Instead,
+    chunks of zeros are yielded for them, so the md5 value is unaffected.
+    """
+    with open(filename, "rb", buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        for offset, length, is_data in data_extents(f.fileno(), size):
+            end = offset + length
+            if not is_data:
+                zeros = memoryview(_zero_chunk())
+                while offset < end:
+                    chunk = zeros[: min(_chunk_size, end - offset)]
+                    offset += len(chunk)
+                    yield chunk
+                continue
+
+            f.seek(offset)
+            while offset < end:
+                start = time.perf_counter()
+                chunk = f.read(min(_chunk_size, end - offset))
+                stats._add(read_seconds=time.perf_counter() - start)
+                if not chunk:
+                    # The file was truncated while it was read.
+                    return
+                offset += len(chunk)
+                yield chunk
+
+
+def _md5_update_from_dir(
+    directory: Path,
+    hash: Hash,
+    max_workers: Optional[int] = None,
+    stats: Optional[HashStats] = None,
+) -> Hash:
+    """
+    Updates `hash` with the names and contents of every entry in the
+    directory tree ("compatible" mode).
+
+    Up to `max_workers` files are read ahead of the file being hashed. In
+    all, at most `_read_ahead_bytes` are read ahead.
+    """
+    stats = stats or HashStats()
+    max_workers = max_workers or min(8, os.cpu_count() or 1)
+    entries = list(_walk_dir(directory))
+    files = [path for _, path in entries if path]
+
+    abort = threading.Event()
+    sentinel = object()
+
+    # The read-ahead budget is counted in chunks of up to `_chunk_size`
+    # bytes. A reader takes one before reading each chunk, and the hashing
+    # thread returns it once the chunk is hashed. One chunk is always kept
+    # for the reader of the file being hashed (the "head"), so readers of
+    # later files cannot use the whole budget while it waits for one.
+    budget = threading.Condition()
+    available = [max(2, _read_ahead_bytes // _chunk_size)]
+    head = [0]
+
+    def take(index: int) -> bool:
+        with budget:
+            while not abort.is_set():
+                reserve = 0 if index == head[0] else 1
+                if available[0] > reserve:
+                    available[0] -= 1
+                    return True
+                budget.wait()
+            return False
+
+    def give() -> None:
+        with budget:
+            available[0] += 1
+            budget.notify_all()
+
+    def read_ahead(index: int, chunks: queue.Queue) -> None:
+        try:
+            reader = _read_chunks(files[index], stats)
+            while take(index):
+                chunk = next(reader, sentinel)
+                if chunk is sentinel:
+                    give()
+                    break
+                chunks.put(chunk)
+            else:
+                return
+        except BaseException as e:
+            give()
+            chunks.put(e)
+            return
+        chunks.put(sentinel)
+
+    with _progress_bar(directory, files) as progress, ThreadPoolExecutor(
+        max_workers=max_workers
+    ) as executor:
+        pending = []
+
+        def submit_next() -> None:
+            index = len(pending)
+            if index < len(files):
+                # The queue need not be bounded, as the read-ahead budget
+                # bounds the chunks in all the queues.
+                chunks = queue.Queue()
+                executor.submit(read_ahead, index, chunks)
+                pending.append(chunks)
+
+        for _ in range(max_workers):
+            submit_next()
+
+        file_index = 0
+        try:
+            for name, path in entries:
+                hash.update(name.split("/")[-1].encode())
+                if not path:
+                    continue
+
+                chunks = pending[file_index]
+                with budget:
+                    head[0] = file_index
+                    budget.notify_all()
+                file_index += 1
+                while True:
+                    start = time.perf_counter()
+                    chunk = chunks.get()
+                    stats.wait_seconds += time.perf_counter() - start
+                    if chunk is sentinel:
+                        break
+                    if isinstance(chunk, BaseException):
+                        raise chunk
+                    start = time.perf_counter()
+                    hash.update(chunk)
+                    give()
+                    stats._add(
+                        bytes=len(chunk),
+                        hash_seconds=time.perf_counter() - start,
+                    )
+                    progress.update(len(chunk))
+                stats._add(files=1)
+                submit_next()
+        finally:
+            with budget:
+                abort.set()
+                budget.notify_all()
+
+    return hash
+
+
+def _md5_tree_from_dir(
+    directory: Path,
+    max_workers: Optional[int] = None,
+    stats: Optional[HashStats] = None,
+) -> Hash:
+    """
+    Computes the md5 of a directory tree from the md5 values of its files,
+    which are hashed concurrently ("tree" mode).
+
+    For each entry, in the same order as "compatible" mode, the combined hash
+    is updated with the entry's relative path, a NUL byte, and either the
+    file's md5 value or "-" for anything other than a file, followed by a
+    newline.
+    """
+    stats = stats or HashStats()
+    max_workers = max_workers or os.cpu_count() or 1
+    entries = list(_walk_dir(directory))
+
+    progress = _progress_bar(directory, [path for _, path in entries if path])
+
+    def hash_file(path: Path) -> str:
+        file_hash = hashlib.md5()
+        size = 0
+        hash_seconds = 0.0
+        for chunk in _read_chunks(path, stats):
+            start = time.perf_counter()
+            file_hash.update(chunk)
+            hash_seconds += time.perf_counter() - start
+            size += len(chunk)
+            progress.update(len(chunk))
+        stats._add(files=1, bytes=size, hash_seconds=hash_seconds)
+        return file_hash.hexdigest()
+
+    with progress, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        digests = [
+            executor.submit(hash_file, path) if path else None
+            for _, path in entries
+        ]
+        hash = hashlib.md5()
+        for (name, _), digest in zip(entries, digests):
+            value = digest.result() if digest else "-"
+            hash.update(f"{name}\0{value}\n".encode())
     return hash
 
 
-def md5(path: Path) -> str:
+def md5(path: Path, **kwargs) -> str:
     """
     Gets the md5 value of a file or directory. `md5_file` is used if the path
     is a file and `md5_dir` is used if the path is a directory. An exception
     is returned if the path is not a valid file or directory.
 
     :param path: The path to get the md5 of.
+    :param kwargs: Passed to `md5_dir` if the path is a directory.
     """
     if path.is_file():
         return md5_file(Path(path))
     elif path.is_dir():
-        return md5_dir(Path(path))
+        return md5_dir(Path(path), **kwargs)
     else:
         raise Exception(f"Path '{path}' is not a valid file or directory.")
 
@@ -88,7 +408,12 @@ def md5_file(filename: Path) -> str:
     return str(_md5_update_from_file(filename, hashlib.md5()).hexdigest())
 
 
-def md5_dir(directory: Path) -> str:
+def md5_dir(
+    directory: Path,
+    mode: str = "compatible",
+    max_workers: Optional[int] = None,
+    stats: Optional[HashStats] = None,
+) -> str:
     """
     Gives the md5 value of a directory.
 
@@ -96,5 +421,30 @@ def md5_dir(directory: Path) -> str:
 
     Note: The path of files are also hashed so the md5 of the directory changes
     if empty files are included or filenames are changed.
+
+    :param directory: The directory in which the md5 is to be calculated.
+    :param mode: "compatible" (the default) gives the md5 values recorded in
+    the gem5 resources database, reading files concurrently but hashing them
+    sequentially. "tree" hashes the files concurrently, giving different md5
+    values. See the module documentation.
+    :param max_workers: The maximum number of threads used to read or hash
+    files. By default, this is based on the number of CPUs.
+    :param stats: If given, this is updated with statistics on the hashing,
+    such as its throughput.
     """
-    return str(_md5_update_from_dir(directory, hashlib.md5()).hexdigest())
+    if mode not in _md5_dir_modes:
+        raise Exception(
+            f"'{mode}' is not a valid md5 mode. Valid modes are "
+            f"{', '.join(_md5_dir_modes)}."
+        )
+
+    stats = stats if stats is not None else HashStats()
+    start = time.perf_counter()
+    if mode == "tree":
+        hash = _md5_tree_from_dir(directory, max_workers, stats)
+    else:
+        hash = _md5_update_from_dir(
+            directory, hashlib.md5(), max_workers, stats
+        )
+    stats.elapsed_seconds += time.perf_counter() - start
+    return str(hash.hexdigest())
@@ -0,0 +1,458 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+A download engine which fetches large files as a set of HTTP Range requests
+("chunks") over a small pool of threads.
+
+Each chunk is written directly into its place in a preallocated ".part" file
+via `os.pwrite`. Completed chunks are recorded in a sidecar progress journal
+(a JSON file next to the ".part" file), so an interrupted download resumes
+from where it left off rather than from the first byte. Each chunk is retried
+independently using a Truncated Exponential Backoff algorithm.
+
+If the server does not support Range requests, the file is downloaded as a
+single stream.
+"""
+
+import http.client
+import json
+import os
+import random
+import socket
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Optional, Tuple, TypeVar
+from urllib.error import HTTPError, URLError
+
+from .sparse import pwrite_sparse
+from ..utils.progress_bar import tqdm, progress_hook, SharedProgress
+
+# The default size of each HTTP Range request.
+_default_chunk_size = 64 * 1024 * 1024
+
+# The default number of chunks downloaded concurrently.
+_default_max_workers = 4
+
+# The size of each read from an HTTP response.
+_read_size = 1024 * 1024
+
+T = TypeVar("T")
+
+# Records whether the current thread is running inside `_retry_with_backoff`.
+# Only the outermost call retries, so attempts do not multiply when a retried
+# function itself calls a retried function.
+_retry_state = threading.local()
+
+
+class _RemoteFileChangedException(Exception):
+    """
+    Raised when the file being downloaded has changed on the server part-way
+    through a download (i.e., an `If-Range` request was answered with the
+    whole file rather than the requested range).
+    """
+
+    pass
+
+
+def _is_retryable_status(code: int) -> bool:
+    """
+    HTTP status codes 408, 429, and 5xx are considered retryable.
+    """
+    return code in (408, 429) or 500 <= code < 600
+
+
+def _retry_with_backoff(
+    func: Callable[[], T],
+    url: str,
+    max_attempts: int,
+    on_retry: Optional[Callable[[], None]] = None,
+) -> T:
+    """
+    Runs `func`, retrying it using a Truncated Exponential Backoff algorithm
+    if it fails with a retryable HTTP status code or a dropped connection.
+
+    :param func: The function to run.
+    :param url: The URL being retrieved. Used in error messages.
+    :param max_attempts: The max number of attempts before stopping.
+    :param on_retry: An optional function called before each retry.
+    """
+    if getattr(_retry_state, "active", False):
+        # An enclosing call already retries `func`.
+        return func()
+
+    _retry_state.active = True
+    try:
+        return _retry_loop(func, url, max_attempts, on_retry)
+    finally:
+        _retry_state.active = False
+
+
+def _retry_loop(
+    func: Callable[[], T],
+    url: str,
+    max_attempts: int,
+    on_retry: Optional[Callable[[], None]],
+) -> T:
+    """
+    The retry loop of `_retry_with_backoff`.
+    """
+    attempt = 0
+    while True:
+        try:
+            return func()
+        except HTTPError as e:
+            if not _is_retryable_status(e.code):
+                raise e
+            reason = f"HTTP Status Code retrieved: {e.code}"
+        except (
+            URLError,
+            ConnectionError,
+            http.client.HTTPException,
+            socket.timeout,
+        ) as e:
+            reason = f"Error: {e}"
+
+        attempt += 1
+        if attempt >= max_attempts:
+            raise Exception(
+                f"After {attempt} attempts, '{url}' could not be retrieved. "
+                f"{reason}"
+            )
+        if on_retry:
+            on_retry()
+        time.sleep((2**attempt) + random.uniform(0, 1))
+
+
+def _probe(url: str) -> Tuple[Optional[int], Optional[str]]:
+    """
+    Determines whether the server supports Range requests for a URL.
+
+    :returns: A tuple of the size of the file and a validator (the strong
+    `ETag` or, failing that, the `Last-Modified` header) which may be used in
+    an `If-Range` header. The size is None if Range requests are not
+    supported.
+    """
+    request = urllib.request.Request(url, headers={"Range": "bytes=0-0"})
+    with urllib.request.urlopen(request) as response:
+        content_range = response.headers.get("Content-Range")
+        if response.status != 206 or not content_range:
+            return None, None
+
+        # The header takes the form "bytes 0-0/<size>". The size may be "*"
+        # if unknown, in which case we cannot split the file.
+        size = content_range.rsplit("/", 1)[-1].strip()
+        if not size.isdigit():
+            return None, None
+
+        etag = response.headers.get("ETag")
+        if etag and not etag.startswith("W/"):
+            validator = etag
+        else:
+            validator = response.headers.get("Last-Modified")
+
+        return int(size), validator
+
+
+def _load_journal(journal_path: str) -> Optional[Dict]:
+    """
+    Loads the progress journal. Returns None if it does not exist or cannot
+    be read.
+    """
+    try:
+        with open(journal_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_journal(journal_path: str, journal: Dict) -> None:
+    """
+    Atomically writes the progress journal.
+    """
+    tmp_path = f"{journal_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(journal, f)
+    os.replace(tmp_path, journal_path)
+
+
+def _fetch_chunk(
+    url: str,
+    fd: int,
+    start: int,
+    end: int,
+    validator: Optional[str],
+    progress: tqdm,
+    written: list,
+    sparse: bool,
+) -> None:
+    """
+    Downloads the bytes `start` to `end` (inclusive) of a URL and writes them
+    to the same offsets in the file descriptor `fd`.
+
+    :param written: A single-element list used to record the number of bytes
+    written, so progress can be rolled back if the chunk is retried.
+    :param sparse: If True, runs of zeros are not written (see
+    `pwrite_sparse`). This is only correct if the region is known to hold
+    zeros or the same bytes already.
+    """
+    headers = {"Range": f"bytes={start}-{end}"}
+    if validator:
+        headers["If-Range"] = validator
+
+    request = urllib.request.Request(url, headers=headers)
+    with urllib.request.urlopen(request) as response:
+        if response.status != 206:
+            raise _RemoteFileChangedException()
+
+        offset = start
+        while offset <= end:
+            data = response.read(min(_read_size, end + 1 - offset))
+            if not data:
+                raise http.client.IncompleteRead(
+                    b"", expected=end + 1 - offset
+                )
+            if sparse:
+                pwrite_sparse(fd, data, offset)
+            else:
+                os.pwrite(fd, data, offset)
+            offset += len(data)
+            written[0] += len(data)
+            progress.update(len(data))
+
+
+def _ranged_download(
+    url: str,
+    part_path: str,
+    size: int,
+    validator: Optional[str],
+    chunk_size: int,
+    max_workers: int,
+    max_attempts: int,
+    progress: Optional[SharedProgress],
+) -> None:
+    """
+    Downloads a file to `part_path` as a set of concurrent HTTP Range
+    requests, resuming a previous download if a matching progress journal is
+    found.
+    """
+    journal_path = f"{part_path}.json"
+    journal = _load_journal(journal_path)
+    created = False
+
+    if (
+        not journal
+        or journal.get("url") != url
+        or journal.get("size") != size
+        or journal.get("chunk_size") != chunk_size
+        or journal.get("validator") != validator
+        or not os.path.isfile(part_path)
+        or os.path.getsize(part_path) != size
+    ):
+        # No resumable download exists. Preallocate the file and start a new
+        # journal.
+        with open(part_path, "wb") as f:
+            f.truncate(size)
+        created = True
+        journal = {
+            "url": url,
+            "size": size,
+            "chunk_size": chunk_size,
+            "validator": validator,
+            "completed": [],
+        }
+        _write_journal(journal_path, journal)
+
+    completed = set(journal["completed"])
+    num_chunks = (size + chunk_size - 1) // chunk_size
+    pending = [i for i in range(num_chunks) if i not in completed]
+
+    # Chunks which have not yet started are skipped if another chunk has
+    # failed. This avoids waiting on the whole download before an error is
+    # reported.
+    abort = threading.Event()
+
+    # The chunks are downloaded by worker threads. They are only retried if
+    # this download is not already retried as a whole.
+    retried = getattr(_retry_state, "active", False)
+
+    def download_chunk(index: int, bar: tqdm) -> Optional[int]:
+        if abort.is_set():
+            return None
+        _retry_state.active = retried
+        start = index * chunk_size
+        end = min(start + chunk_size, size) - 1
+        written = [0]
+        attempted = [False]
+
+        def fetch() -> None:
+            # Runs of zeros need not be written if the file was just created
+            # as a hole and this is the chunk's first attempt. When resuming,
+            # or retrying, the region may hold bytes from an earlier attempt.
+            # These can only be relied upon if the file is validated as
+            # unchanged (via If-Range).
+            sparse = validator is not None or (created and not attempted[0])
+            attempted[0] = True
+            _fetch_chunk(url, fd, start, end, validator, bar, written, sparse)
+
+        def rollback():
+            bar.update(-written[0])
+            written[0] = 0
+
+        try:
+            _retry_with_backoff(
+                fetch,
+                url=url,
+                max_attempts=max_attempts,
+                on_retry=rollback,
+            )
+        except BaseException:
+            abort.set()
+            raise
+        return index
+
+    fd = os.open(part_path, os.O_WRONLY)
+    try:
+        with (progress or tqdm)(
+            unit="B",
+            unit_scale=True,
+            unit_divisor=1024,
+            miniters=1,
+            total=size,
+            initial=sum(
+                min(chunk_size, size - index * chunk_size)
+                for index in completed
+            ),
+            desc=f"Downloading {part_path}",
+        ) as bar:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [
+                    executor.submit(download_chunk, index, bar)
+                    for index in pending
+                ]
+                for future in as_completed(futures):
+                    index = future.result()
+                    if index is None:
+                        continue
+                    # Ensure the chunk is on disk before it is journaled.
+                    os.fsync(fd)
+                    completed.add(index)
+                    journal["completed"] = sorted(completed)
+                    _write_journal(journal_path, journal)
+    finally:
+        os.close(fd)
+
+    os.remove(journal_path)
+
+
+def _single_stream_download(
+    url: str,
+    part_path: str,
+    max_attempts: int,
+    progress: Optional[SharedProgress],
+) -> None:
+    """
+    Downloads a file to `part_path` as a single stream. This is used when the
+    server does not support Range requests.
+    """
+
+    def download():
+        with (progress or tqdm)(
+            unit="B",
+            unit_scale=True,
+            unit_divisor=1024,
+            miniters=1,
+            desc=f"Downloading {part_path}",
+        ) as t:
+            urllib.request.urlretrieve(
+                url, part_path, reporthook=progress_hook(t)
+            )
+
+    _retry_with_backoff(download, url=url, max_attempts=max_attempts)
+
+
+def ranged_download(
+    url: str,
+    download_to: str,
+    chunk_size: int = _default_chunk_size,
+    max_workers: int = _default_max_workers,
+    max_attempts: int = 6,
+    progress: Optional[SharedProgress] = None,
+) -> None:
+    """
+    Downloads a file using concurrent HTTP Range requests.
+
+    The file is downloaded to `<download_to>.part` and moved to `download_to`
+    once complete. If a download is interrupted, the next call with the same
+    arguments will resume it. If the file changes on the server part-way
+    through, the download is restarted.
+
+    :param url: The URL of the file to download.
+    :param download_to: The location the downloaded file is to be stored.
+    :param chunk_size: The size, in bytes, of each Range request.
+    :param max_workers: The maximum number of concurrent Range requests.
+    :param max_attempts: The max number of attempts for each request before
+    stopping. The default is 6. This translates to roughly 1 minute of
+    retrying before stopping.
+    :param progress: A progress bar shared with other downloads. If given,
+    the progress of this download is reported to it instead of to a progress
+    bar of its own.
+    """
+    part_path = f"{download_to}.part"
+
+    restarted = False
+    while True:
+        size, validator = _retry_with_backoff(
+            lambda: _probe(url), url=url, max_attempts=max_attempts
+        )
+        try:
+            if size is None:
+                _single_stream_download(url, part_path, max_attempts, progress)
+            else:
+                _ranged_download(
+                    url,
+                    part_path,
+                    size=size,
+                    validator=validator,
+                    chunk_size=chunk_size,
+                    max_workers=max_workers,
+                    max_attempts=max_attempts,
+                    progress=progress,
+                )
+            break
+        except _RemoteFileChangedException:
+            if restarted:
+                raise Exception(
+                    f"'{url}' changed on the server while being downloaded."
+                )
+            restarted = True
+            for path in (part_path, f"{part_path}.json"):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    os.replace(part_path, download_to)
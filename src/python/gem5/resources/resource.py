@@ -25,18 +25,20 @@
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 from abc import ABCMeta
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import os
 from pathlib import Path
 from m5.util import warn, fatal
 
-from .downloader import get_resource
+from .downloader import get_resource, _get_resource_locked
+from ..utils.progress_bar import tqdm, SharedProgress
 
 from .looppoint import LooppointCsvLoader, LooppointJsonLoader
 from ..isas import ISA, get_isa_from_str
 
 from typing import Optional, Dict, Union, Type, Tuple, List
 
-from .client_wrapper import get_resource_json_obj
+from .client_wrapper import get_resource_json_obj, get_resource_json_objs
 
 """
 Resources are items needed to run a simulation, such as a disk image, kernel,
@@ -593,31 +595,7 @@ def obtain_resource(
     to_path = None
     # If the "url" field is specified, the resoruce must be downloaded.
     if "url" in resource_obj and resource_obj["url"]:
-        # If the `resource_directory` parameter is not set via this function, we
-        # check the "GEM5_RESOURCE_DIR" environment variable. If this too is not
-        # set we call `_get_default_resource_dir()` to determine where the
-        # resource directory is, or should be, located.
-        if resource_directory == None:
-            resource_directory = os.getenv(
-                "GEM5_RESOURCE_DIR", _get_default_resource_dir()
-            )
-
-        # Small checks here to ensure the resource directory is valid.
-        if os.path.exists(resource_directory):
-            if not os.path.isdir(resource_directory):
-                raise Exception(
-                    "gem5 resource directory, "
-                    "'{}', exists but is not a directory".format(
-                        resource_directory
-                    )
-                )
-        else:
-            # `exist_ok=True` here as, occasionally, if multiple instance of
-            # gem5 are started simultaneously, a race condition can exist to
-            # create the resource directory. Without `exit_ok=True`, threads
-            # which lose this race will thrown a `FileExistsError` exception.
-            # `exit_ok=True` ensures no exception is thrown.
-            os.makedirs(resource_directory, exist_ok=True)
+        resource_directory = _get_resource_directory(resource_directory)
 
         # This is the path to which the resource is to be stored.
         to_path = os.path.join(resource_directory, resource_id)
@@ -658,6 +636,166 @@ def obtain_resource(
     return resource_class(local_path=to_path, **resource_obj)
 
 
+def _get_resource_directory(resource_directory: Optional[str]) -> str:
+    """
+    Obtains the directory resources are to be stored in, creating it if
+    necessary.
+
+    :param resource_directory: The resource directory. If None, the
+    `GEM5_RESOURCE_DIR` environment variable is used. If this is not set, the
+    default returned by `_get_default_resource_dir()` is used.
+
+    :returns: The resource directory.
+    """
+    # If the `resource_directory` parameter is not set via this function, we
+    # check the "GEM5_RESOURCE_DIR" environment variable. If this too is not
+    # set we call `_get_default_resource_dir()` to determine where the
+    # resource directory is, or should be, located.
+    if resource_directory == None:
+        resource_directory = os.getenv(
+            "GEM5_RESOURCE_DIR", _get_default_resource_dir()
+        )
+
+    # Small checks here to ensure the resource directory is valid.
+    if os.path.exists(resource_directory):
+        if not os.path.isdir(resource_directory):
+            raise Exception(
+                "gem5 resource directory, "
+                "'{}', exists but is not a directory".format(
+                    resource_directory
+                )
+            )
+    else:
+        # `exist_ok=True` here as, occasionally, if multiple instance of
+        # gem5 are started simultaneously, a race condition can exist to
+        # create the resource directory. Without `exit_ok=True`, threads
+        # which lose this race will thrown a `FileExistsError` exception.
+        # `exit_ok=True` ensures no exception is thrown.
+        os.makedirs(resource_directory, exist_ok=True)
+
+    return resource_directory
+
+
+def prefetch_resources(
+    resource_ids: List[str],
+    resource_directory: Optional[str] = None,
+    max_workers: int = 4,
+    download_md5_mismatch: bool = True,
+    resource_versions: Optional[Dict[str, str]] = None,
+    databases: Optional[List] = [],
+) -> Dict[str, Optional[str]]:
+    """
+    Obtains many resources at once, ahead of their use via `obtain_resource`.
+    The resources are stored in `resource_directory` exactly as
+    `obtain_resource` would store them, so later calls to `obtain_resource`
+    find them already present.
+
+    The metadata for all the resources is obtained in a single query of each
+    database. The resources are then downloaded, decompressed, and verified
+    concurrently. As with `obtain_resource`, each resource is locked while it
+    is obtained, so it is safe for several processes (e.g., on several nodes
+    sharing the resource directory) to prefetch the same resources at once.
+
+    E.g.:
+
+    ```python
+    prefetch_resources(["x86-ubuntu-18.04-img", "x86-linux-kernel-5.4.49"])
+    ```
+
+    :param resource_ids: The IDs of the resources to obtain.
+    :param resource_directory: The location of the directory in which the
+    resources are to be stored. See `obtain_resource`.
+    :param max_workers: The maximum number of resources obtained
+    concurrently. 4 by default.
+    :param download_md5_mismatch: If a resource is present, but does not
+    have the correct md5 value, the resource will be deleted and
+    re-downloaded if this value is True. True by default.
+    :param resource_versions: A dictionary mapping resource IDs to the
+    version of that resource. For IDs not in this dictionary, the latest
+    compatible version is obtained.
+    :param databases: Databases from where the resource information should
+    be extracted. All databases are used by default.
+
+    :returns: A dictionary mapping each resource ID to the local path of the
+    resource. This is None for resources which need not be downloaded.
+
+    :raises Exception: An exception is raised, once all other resources have
+    been obtained, if any resource could not be obtained.
+    """
+
+    # Duplicate IDs are removed, preserving order.
+    resource_ids = list(dict.fromkeys(resource_ids))
+
+    resource_objs = get_resource_json_objs(
+        resource_ids,
+        resource_versions=resource_versions,
+        databases=databases,
+    )
+
+    local_paths = {resource_id: None for resource_id in resource_ids}
+    to_obtain = [
+        resource_id
+        for resource_id in resource_ids
+        if resource_objs[resource_id].get("url")
+    ]
+    if not to_obtain:
+        return local_paths
+
+    resource_directory = _get_resource_directory(resource_directory)
+
+    def prefetch(resource_id: str, progress: SharedProgress) -> str:
+        to_path = os.path.join(resource_directory, resource_id)
+        _get_resource_locked(
+            resource_name=resource_id,
+            resource_obj=resource_objs[resource_id],
+            to_path=to_path,
+            download_md5_mismatch=download_md5_mismatch,
+            progress=progress,
+        )
+        return to_path
+
+    def description(done: int) -> str:
+        return f"Prefetching resources ({done}/{len(to_obtain)})"
+
+    # The downloads report the bytes they expect and have downloaded to a
+    # single progress bar, rather than each displaying their own.
+    failures = {}
+    done = 0
+    with tqdm(
+        total=0,
+        unit="B",
+        unit_scale=True,
+        unit_divisor=1024,
+        miniters=1,
+        desc=description(done),
+    ) as bar:
+        progress = SharedProgress(bar)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(prefetch, resource_id, progress): resource_id
+                for resource_id in to_obtain
+            }
+            for future in as_completed(futures):
+                resource_id = futures[future]
+                try:
+                    local_paths[resource_id] = future.result()
+                except Exception as e:
+                    failures[resource_id] = e
+                done += 1
+                progress.set_description(description(done))
+
+    if failures:
+        raise Exception(
+            "The following resources could not be obtained:\n"
+            + "\n".join(
+                f"  '{resource_id}': {error}"
+                for resource_id, error in failures.items()
+            )
+        )
+
+    return local_paths
+
+
 def _get_default_resource_dir() -> str:
     """
     Obtain the default gem5 resources directory on the host system. This
@@ -0,0 +1,186 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Utilities for handling sparse files, such as disk images, which are mostly
+zeros.
+
+Runs of zeros are written as holes (by seeking over them rather than writing
+them), so they use no disk space. When a sparse file is read, its holes are
+found via `SEEK_DATA`/`SEEK_HOLE` so they need not be read from disk.
+"""
+
+import errno
+import os
+import shutil
+from typing import Iterator, Tuple, Union
+
+# The granularity at which runs of zeros are detected when writing. This is a
+# multiple of the block size of common filesystems.
+_block_size = 64 * 1024
+
+_zero_block = bytes(_block_size)
+
+
+def _is_zero(data: Union[bytes, memoryview]) -> bool:
+    """
+    Returns True if `data` contains only zeros.
+    """
+    length = len(data)
+    if length <= _block_size:
+        return data == _zero_block[:length]
+    # `bytes.count` is implemented in C, so is far faster than iterating.
+    return bytes(data).count(0) == length
+
+
+def _blocks(
+    data: Union[bytes, memoryview]
+) -> Iterator[Tuple[int, memoryview, bool]]:
+    """
+    Splits `data` into runs of blocks of `_block_size` which are either all
+    zero or not. Yields a tuple of the offset of each run within `data`, the
+    run, and whether it is all zero.
+    """
+    view = memoryview(data)
+    if _is_zero(view):
+        yield 0, view, True
+        return
+
+    start = 0
+    zero = None
+    for offset in range(0, len(view), _block_size):
+        block_zero = _is_zero(view[offset : offset + _block_size])
+        if zero is not None and block_zero != zero:
+            yield start, view[start:offset], zero
+            start = offset
+        zero = block_zero
+    yield start, view[start:], zero
+
+
+class SparseWriter:
+    """
+    Writes a file sequentially, seeking over runs of zeros instead of writing
+    them so they become holes.
+
+    `finish` must be called once all the data is written, so the file is
+    extended over any trailing run of zeros.
+    """
+
+    def __init__(self, f) -> None:
+        """
+        :param f: The file object to write to. It must be seekable and opened
+        for writing in binary mode.
+        """
+        self._f = f
+        self._size = f.tell()
+
+    def write(self, data: Union[bytes, memoryview]) -> int:
+        for offset, run, zero in _blocks(data):
+            if zero:
+                self._f.seek(len(run), os.SEEK_CUR)
+            else:
+                self._f.write(run)
+        self._size += len(data)
+        return len(data)
+
+    def finish(self) -> None:
+        self._f.truncate(self._size)
+
+
+def pwrite_sparse(
+    fd: int, data: Union[bytes, memoryview], offset: int
+) -> None:
+    """
+    Writes `data` to `fd` at `offset`, as `os.pwrite`, but skips runs of
+    zeros. This must only be used where the region being written is known to
+    be zero already (e.g., a newly truncated file), as the runs of zeros are
+    not written.
+    """
+    for run_offset, run, zero in _blocks(data):
+        if not zero:
+            os.pwrite(fd, run, offset + run_offset)
+
+
+def data_extents(fd: int, size: int) -> Iterator[Tuple[int, int, bool]]:
+    """
+    Yields the regions of a file which contain data and the regions which are
+    holes, in order, using `SEEK_DATA` and `SEEK_HOLE`. Yields tuples of
+    `(offset, length, is_data)`.
+
+    If the filesystem or OS does not support finding holes, the whole file is
+    yielded as data.
+
+    :param fd: The file descriptor of the file.
+    :param size: The size of the file.
+    """
+    if not hasattr(os, "SEEK_DATA"):
+        if size:
+            yield 0, size, True
+        return
+
+    offset = 0
+    while offset < size:
+        try:
+            data = os.lseek(fd, offset, os.SEEK_DATA)
+        except OSError as e:
+            if e.errno == errno.ENXIO:
+                # There is no more data, only a trailing hole.
+                data = size
+            else:
+                yield offset, size - offset, True
+                return
+        data = min(data, size)
+        if data > offset:
+            yield offset, data - offset, False
+        if data >= size:
+            return
+
+        hole = min(os.lseek(fd, data, os.SEEK_HOLE), size)
+        yield data, hole - data, True
+        offset = hole
+
+
+def copy_sparse(src: str, dst: str, chunk_size: int = 8 * 1024 * 1024) -> None:
+    """
+    Copies the file `src` to `dst`, preserving the holes in `src` and writing
+    any other runs of zeros as holes. The permissions of `src` are copied.
+    """
+    with open(src, "rb") as s, open(dst, "wb") as d:
+        size = os.fstat(s.fileno()).st_size
+        for offset, length, is_data in data_extents(s.fileno(), size):
+            if not is_data:
+                continue
+            s.seek(offset)
+            position = offset
+            while position < offset + length:
+                chunk = s.read(min(chunk_size, offset + length - position))
+                if not chunk:
+                    break
+                # `dst` is newly created, so is zero where not written.
+                pwrite_sparse(d.fileno(), chunk, position)
+                position += len(chunk)
+        d.truncate(size)
+    shutil.copymode(src, dst)
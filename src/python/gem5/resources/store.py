@@ -0,0 +1,306 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+A content-addressed store of gem5 resources, shared between resource
+directories.
+
+Without the store, each resource directory (e.g., each user's or each job's
+`resource_directory`) holds its own copy of every resource it obtains. With
+the store enabled, each resource is downloaded once into the store, keyed by
+its md5 value, and then "materialized" at the requested location as a
+reflink (a copy-on-write clone, where the filesystem supports it), a
+hardlink, or a symlink.
+
+The store is enabled by setting the "GEM5_RESOURCE_STORE" environment
+variable to the store's directory. The "GEM5_RESOURCE_STORE_LINK" environment
+variable may be set to "reflink", "hardlink", or "symlink" to force a
+materialization method. By default ("auto") each is tried in that order. It
+may also be set to "copy", to make a full (but sparse) private copy.
+
+Objects in the store are made read-only, so a hardlinked or symlinked
+resource cannot be modified in place. Reflinked resources are private copies.
+
+The store can be pruned to a size budget, evicting the least recently used
+objects first, via `collect_garbage` or `gem5 -m gem5.resources gc`.
+"""
+
+import fcntl
+import os
+import re
+import shutil
+import stat
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from .sparse import copy_sparse
+from ..utils.filelock import FileLock, FileLockException
+
+# The Linux `FICLONE` ioctl request number (`_IOW(0x94, 9, int)`).
+_FICLONE = 0x40049409
+
+_materialize_modes = ("reflink", "hardlink", "symlink")
+
+# Modes which may be requested, but are not tried by "auto".
+_explicit_materialize_modes = ("copy",)
+
+_object_name_regex = re.compile(r"^[0-9a-f]{32}$")
+
+
+def get_resource_store_dir() -> Optional[Path]:
+    """
+    Returns the resource store directory, as set by the "GEM5_RESOURCE_STORE"
+    environment variable. Returns None if the store is not enabled.
+    """
+    store_dir = os.getenv("GEM5_RESOURCE_STORE")
+    if not store_dir:
+        return None
+    return Path(store_dir)
+
+
+def get_object_path(store_dir: Path, md5: str) -> Path:
+    """
+    Returns the path of the object with the given md5 value in the store.
+    Objects are spread across subdirectories named after the first two
+    characters of their md5 value.
+
+    :param store_dir: The store directory.
+    :param md5: The md5 value of the resource.
+    """
+    md5 = md5.lower()
+    if not _object_name_regex.match(md5):
+        raise Exception(f"'{md5}' is not a valid md5 value.")
+    return Path(store_dir) / md5[:2] / md5
+
+
+def _last_used_path(object_path: Path) -> Path:
+    return object_path.parent / f"{object_path.name}.last-used"
+
+
+def mark_used(object_path: Path) -> None:
+    """
+    Records that an object has just been used. This is used to determine the
+    least recently used objects when the store is pruned.
+
+    :param object_path: The path of the object in the store.
+    """
+    _last_used_path(object_path).touch()
+
+
+def seal_object(object_path: Path) -> None:
+    """
+    Makes the files of an object read-only.
+
+    :param object_path: The path of the object in the store.
+    """
+    read_only = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+    if object_path.is_dir():
+        for root, _, files in os.walk(object_path):
+            for name in files:
+                os.chmod(os.path.join(root, name), read_only)
+    else:
+        os.chmod(object_path, read_only)
+
+
+def _reflink(src: str, dst: str) -> None:
+    """
+    Creates `dst` as a copy-on-write clone of the file `src` via the FICLONE
+    ioctl. An OSError is raised if the filesystem does not support it.
+    """
+    with open(src, "rb") as s:
+        with open(dst, "wb") as d:
+            try:
+                fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+            except OSError:
+                os.remove(dst)
+                raise
+
+
+def _link_file(src: str, dst: str, mode: str) -> None:
+    if mode == "reflink":
+        _reflink(src, dst)
+    elif mode == "copy":
+        # Disk images are mostly zeros, which are copied as holes.
+        copy_sparse(src, dst)
+        os.chmod(dst, os.stat(dst).st_mode | stat.S_IWUSR)
+    else:
+        assert mode == "hardlink"
+        os.link(src, dst)
+
+
+def _link_tree(src: Path, dst: Path, mode: str) -> None:
+    """
+    Recreates the directory `src` at `dst`, reflinking, hardlinking, or
+    copying each file (directories cannot be hardlinked or reflinked).
+    """
+    os.mkdir(dst)
+    for root, dirs, files in os.walk(src):
+        rel_root = os.path.relpath(root, src)
+        for name in dirs:
+            os.mkdir(os.path.join(dst, rel_root, name))
+        for name in files:
+            _link_file(
+                os.path.join(root, name),
+                os.path.join(dst, rel_root, name),
+                mode,
+            )
+
+
+def _remove(path: Path) -> None:
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path)
+    elif path.is_symlink() or path.exists():
+        os.remove(path)
+
+
+def materialize(
+    object_path: Path, to_path: Path, mode: Optional[str] = None
+) -> str:
+    """
+    Makes the object at `object_path` available at `to_path`, without copying
+    it (unless the "copy" mode is requested).
+
+    :param object_path: The path of the object in the store.
+    :param to_path: The path at which the resource is to be made available.
+    Anything already at this path is replaced.
+    :param mode: One of "reflink", "hardlink", "symlink", "copy", or "auto".
+    If "auto", each of the first three methods is tried in that order. If
+    None, the value of the
+    "GEM5_RESOURCE_STORE_LINK" environment variable is used, defaulting to
+    "auto".
+
+    :returns: The method used.
+    """
+    if mode is None:
+        mode = os.getenv("GEM5_RESOURCE_STORE_LINK", "auto")
+    if mode == "auto":
+        modes = _materialize_modes
+    elif mode in _materialize_modes + _explicit_materialize_modes:
+        modes = (mode,)
+    else:
+        raise Exception(
+            f"Unknown resource store link mode '{mode}'. Expected one of: "
+            "auto, "
+            f"{', '.join(_materialize_modes + _explicit_materialize_modes)}."
+        )
+
+    to_path = Path(to_path)
+    tmp_path = to_path.parent / f"{to_path.name}.materializing"
+    _remove(tmp_path)
+
+    error = None
+    for method in modes:
+        try:
+            if method == "symlink":
+                os.symlink(os.path.abspath(object_path), tmp_path)
+            elif object_path.is_dir():
+                _link_tree(object_path, tmp_path, method)
+            else:
+                _link_file(str(object_path), str(tmp_path), method)
+        except OSError as e:
+            # E.g., EXDEV (the store is on a different filesystem) or
+            # EOPNOTSUPP (the filesystem does not support reflinks).
+            _remove(tmp_path)
+            error = e
+            continue
+
+        _remove(to_path)
+        os.rename(tmp_path, to_path)
+        return method
+
+    raise Exception(
+        f"Could not materialize '{object_path}' at '{to_path}': {error}"
+    )
+
+
+def _get_size(path: Path) -> int:
+    if path.is_dir():
+        return sum(
+            os.lstat(os.path.join(root, name)).st_size
+            for root, _, files in os.walk(path)
+            for name in files
+        )
+    return path.lstat().st_size
+
+
+def list_objects(store_dir: Path) -> List[Tuple[Path, int, float]]:
+    """
+    Lists the objects in the store.
+
+    :param store_dir: The store directory.
+
+    :returns: A list of tuples of each object's path, size in bytes, and the
+    time (in seconds since the epoch) it was last used, sorted from least to
+    most recently used.
+    """
+    objects = []
+    for subdir in Path(store_dir).iterdir():
+        if not subdir.is_dir() or len(subdir.name) != 2:
+            continue
+        for object_path in subdir.iterdir():
+            if not _object_name_regex.match(object_path.name):
+                continue
+            try:
+                last_used = _last_used_path(object_path).stat().st_mtime
+            except FileNotFoundError:
+                last_used = object_path.lstat().st_mtime
+            objects.append((object_path, _get_size(object_path), last_used))
+
+    return sorted(objects, key=lambda obj: obj[2])
+
+
+def collect_garbage(store_dir: Path, max_size: int) -> List[Path]:
+    """
+    Prunes the store to a size budget by evicting the least recently used
+    objects. Objects currently locked (i.e., being downloaded or materialized)
+    are skipped.
+
+    Note: Evicting an object does not free the space used by any hardlinks or
+    reflinks to it. Symlinks to an evicted object are left dangling and are
+    replaced the next time the resource is obtained.
+
+    :param store_dir: The store directory.
+    :param max_size: The maximum total size, in bytes, of the store.
+
+    :returns: The paths of the evicted objects.
+    """
+    objects = list_objects(store_dir)
+    total_size = sum(size for _, size, _ in objects)
+
+    evicted = []
+    for object_path, size, _ in objects:
+        if total_size <= max_size:
+            break
+        try:
+            with FileLock(str(object_path), timeout=None):
+                _remove(object_path)
+                _remove(_last_used_path(object_path))
+        except FileLockException:
+            continue
+        total_size -= size
+        evicted.append(object_path)
+
+    return evicted
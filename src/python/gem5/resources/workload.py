@@ -25,7 +25,7 @@
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 from .resource import obtain_resource
-from .client_wrapper import get_resource_json_obj
+from .client_wrapper import get_resource_json_obj, get_resource_json_objs
 
 from typing import Dict, Any, List, Optional
 
@@ -214,6 +214,12 @@ class Workload(AbstractWorkload):
 
         params = {}
         if "resources" in workload_json:
+            # The metadata of all the workload's resources is obtained in a
+            # single query of each database. Clients which cache their results
+            # (e.g., `MongoClient`) then serve each `obtain_resource` call
+            # below without a further query.
+            get_resource_json_objs(list(workload_json["resources"].values()))
+
             for key in workload_json["resources"].keys():
                 assert isinstance(key, str)
                 value = workload_json["resources"][key]
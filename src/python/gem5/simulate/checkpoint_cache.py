@@ -0,0 +1,429 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+A cache of checkpoints taken at a region of interest (ROI), keyed by a
+fingerprint of the simulated system and its workload.
+
+Many simulations spend most of their time reaching the same point (e.g.,
+booting Linux to the first `WORKBEGIN` exit) before the part of interest. With
+a `CheckpointCache` passed to the `Simulator`, the first run takes a
+checkpoint at the chosen exit event and stores it in the cache. Later runs
+with the same fingerprint restore from it instead of re-simulating.
+
+The fingerprint is a hash of the configuration of every SimObject in the
+system (as returned by `get_config_as_dict()`). Parameters which are paths to
+files (e.g., kernels, disk images and binaries) are replaced with the md5 of
+the file, so the fingerprint depends on the contents of the resources rather
+than where they are stored.
+
+Each entry has a lock. A run which is creating an entry holds it exclusively
+until the checkpoint is saved, so concurrent runs with the same fingerprint
+wait for it rather than duplicating the work. Runs restoring from an entry
+hold it shared, so it is not evicted while in use. The cache may be bounded
+in size, in which case the least recently used entries are evicted.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import m5
+from m5.util import inform, warn
+from m5.util.convert import toMemorySize
+
+from ..resources.md5_cache import cached_md5, get_md5_cache_path
+from ..utils.filelock import FileLock, FileLockException
+
+_metadata_suffix = ".json"
+
+
+def get_default_cache_directory() -> Path:
+    """
+    Returns the default checkpoint cache directory. This is set via the
+    "GEM5_CHECKPOINT_CACHE_DIR" environment variable. By default, it is
+    "~/.cache/gem5/checkpoints".
+    """
+    return Path(
+        os.getenv("GEM5_CHECKPOINT_CACHE_DIR")
+        or os.path.join(Path.home(), ".cache", "gem5", "checkpoints")
+    )
+
+
+def _normalize_config(value: Any, outdir: Optional[str]) -> Any:
+    """
+    Normalizes a configuration dictionary (as returned by
+    `get_config_as_dict()`) for fingerprinting. Paths to files are replaced
+    with the md5 of the file, and the output directory, which differs between
+    runs, is removed from any other strings.
+    """
+    if isinstance(value, dict):
+        return {
+            str(key): _normalize_config(item, outdir)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [_normalize_config(item, outdir) for item in value]
+    if isinstance(value, str):
+        if value and os.path.isfile(value):
+            path = Path(value)
+            return f"md5:{cached_md5(path, get_md5_cache_path(path.parent))}"
+        if outdir:
+            return value.replace(outdir, "<outdir>")
+    return value
+
+
+def get_config_fingerprint(config: Dict, extra: Optional[Dict] = None) -> str:
+    """
+    Returns the fingerprint of a system configuration.
+
+    :param config: The configuration of the system, as returned by
+    `get_config_as_dict()` on its Root.
+    :param extra: Any additional values the fingerprint should depend on
+    (e.g., the exit event the checkpoint is taken at).
+    """
+    outdir = os.path.abspath(m5.options.outdir)
+    normalized = {
+        "config": _normalize_config(config, outdir),
+        "extra": _normalize_config(extra or {}, outdir),
+    }
+    return hashlib.sha256(
+        json.dumps(normalized, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def get_root_fingerprint(root, extra: Optional[Dict] = None) -> str:
+    """
+    Returns the fingerprint of a system, prior to `m5.instantiate`.
+
+    The proxy parameters of the system are resolved first, in the same way as
+    in `m5.instantiate`, so the configuration is the one which will be
+    instantiated.
+
+    :param root: The Root of the system.
+    :param extra: Any additional values the fingerprint should depend on. The
+    gem5 version is always included.
+    """
+    from _m5.core import gem5Version
+
+    for obj in root.descendants():
+        obj.adoptOrphanParams()
+    for obj in root.descendants_list():
+        obj.unproxyParams()
+
+    # Checkpoints are not guaranteed to be compatible between gem5 versions.
+    extra = dict(extra or {}, gem5_version=gem5Version)
+    return get_config_fingerprint(root.get_config_as_dict(), extra)
+
+
+def _directory_size(path: Path) -> int:
+    size = 0
+    for dirpath, _, files in os.walk(path):
+        for name in files:
+            try:
+                size += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return size
+
+
+def _write_json(path: Path, data: Dict) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class CheckpointCache:
+    """
+    A size-bounded cache of ROI checkpoints, shared between gem5 processes.
+
+    The cache is a directory which contains, for each entry, the checkpoint
+    directory `<fingerprint>` and its metadata `<fingerprint>.json`. An entry
+    is only valid once its metadata has been written.
+
+    Example
+    -------
+
+    ```
+    simulator = Simulator(
+        board=board,
+        checkpoint_cache=CheckpointCache(max_size="50GiB"),
+        checkpoint_cache_exit_event=ExitEvent.WORKBEGIN,
+    )
+    ```
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Union[str, Path]] = None,
+        max_size: Optional[Union[int, str]] = None,
+    ) -> None:
+        """
+        :param directory: The directory of the cache. By default, this is
+        given by `get_default_cache_directory()`.
+        :param max_size: The maximum total size of the checkpoints in the
+        cache, in bytes or as a memory size string (e.g., "50GiB"). When a
+        new checkpoint takes the cache over this size, the least recently used
+        entries are evicted. If None, the cache is unbounded.
+        """
+        self._directory = Path(directory or get_default_cache_directory())
+        if isinstance(max_size, str):
+            max_size = toMemorySize(max_size)
+        self._max_size = max_size
+        self._locks = {}
+
+    def get_directory(self) -> Path:
+        """Returns the directory of the cache."""
+        return self._directory
+
+    def get_checkpoint_path(self, fingerprint: str) -> Path:
+        """
+        Returns the path of the checkpoint of an entry. The checkpoint may
+        not exist.
+
+        :param fingerprint: The fingerprint of the entry.
+        """
+        return self._directory / fingerprint
+
+    def _get_metadata_path(self, fingerprint: str) -> Path:
+        return self._directory / f"{fingerprint}{_metadata_suffix}"
+
+    def get_metadata(self, fingerprint: str) -> Optional[Dict]:
+        """
+        Returns the metadata of an entry, or None if there is no valid entry
+        with the fingerprint.
+
+        :param fingerprint: The fingerprint of the entry.
+        """
+        try:
+            with open(self._get_metadata_path(fingerprint)) as f:
+                metadata = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not self.get_checkpoint_path(fingerprint).is_dir():
+            return None
+        return metadata
+
+    def get_fingerprints(self) -> List[str]:
+        """Returns the fingerprints of the valid entries in the cache."""
+        if not self._directory.is_dir():
+            return []
+        return sorted(
+            path.name[: -len(_metadata_suffix)]
+            for path in self._directory.iterdir()
+            if path.name.endswith(_metadata_suffix)
+            and self.get_metadata(path.name[: -len(_metadata_suffix)])
+        )
+
+    def get_size(self) -> int:
+        """
+        Returns the total size, in bytes, of the checkpoints in the cache.
+        """
+        return sum(
+            self.get_metadata(fingerprint).get("size", 0)
+            for fingerprint in self.get_fingerprints()
+        )
+
+    def _lock(self, fingerprint: str, shared: bool, timeout) -> bool:
+        lock = FileLock(
+            str(self._directory / fingerprint), timeout=timeout, shared=shared
+        )
+        try:
+            lock.acquire()
+        except FileLockException:
+            return False
+        self._locks[fingerprint] = lock
+        return True
+
+    def release(self, fingerprint: str) -> None:
+        """
+        Releases the lock held on an entry by `acquire`.
+
+        :param fingerprint: The fingerprint of the entry.
+        """
+        lock = self._locks.pop(fingerprint, None)
+        if lock:
+            lock.release()
+
+    def acquire(self, fingerprint: str) -> Optional[Path]:
+        """
+        Acquires an entry of the cache.
+
+        If the entry exists, its path is returned and it is locked (shared)
+        so that it is not evicted. The lock should be released, via
+        `release`, once the checkpoint has been restored.
+
+        If the entry does not exist, None is returned and the entry is locked
+        exclusively. The caller is then responsible for creating it, via
+        `save`. If the caller exits without creating it, the lock is released
+        and another process may create it.
+
+        If another process is creating the entry, this waits for it to finish.
+
+        :param fingerprint: The fingerprint of the entry.
+        """
+        self._directory.mkdir(parents=True, exist_ok=True)
+        waiting = False
+        while True:
+            if not self._lock(fingerprint, shared=False, timeout=None):
+                # Another process is creating the entry (or restoring from
+                # it). Wait for it to finish.
+                if not waiting:
+                    inform(
+                        "Waiting for another gem5 process to finish with the "
+                        f"cached checkpoint '{fingerprint}'."
+                    )
+                    waiting = True
+                self._lock(fingerprint, shared=True, timeout=float("inf"))
+                if self.get_metadata(fingerprint):
+                    self._touch(fingerprint)
+                    return self.get_checkpoint_path(fingerprint)
+                self.release(fingerprint)
+                continue
+
+            if self.get_metadata(fingerprint):
+                # Downgrade to a shared lock. The entry may be evicted in
+                # between, in which case it is created.
+                self.release(fingerprint)
+                if self._lock(fingerprint, shared=True, timeout=None):
+                    if self.get_metadata(fingerprint):
+                        self._touch(fingerprint)
+                        return self.get_checkpoint_path(fingerprint)
+                    self.release(fingerprint)
+                continue
+
+            # Remove any partial entry left by a process which failed while
+            # creating it.
+            self._remove(fingerprint)
+            return None
+
+    def _touch(self, fingerprint: str) -> None:
+        metadata = self.get_metadata(fingerprint)
+        if metadata is None:
+            return
+        metadata["last_used"] = time.time()
+        try:
+            _write_json(self._get_metadata_path(fingerprint), metadata)
+        except OSError:
+            pass
+
+    def _remove(self, fingerprint: str) -> None:
+        try:
+            os.remove(self._get_metadata_path(fingerprint))
+        except FileNotFoundError:
+            pass
+        shutil.rmtree(
+            self.get_checkpoint_path(fingerprint), ignore_errors=True
+        )
+        for tmp_path in self._directory.glob(f"{fingerprint}.*.tmp"):
+            if tmp_path.is_dir():
+                shutil.rmtree(tmp_path, ignore_errors=True)
+            else:
+                tmp_path.unlink(missing_ok=True)
+
+    def save(
+        self,
+        fingerprint: str,
+        save_checkpoint: Callable[[Path], None],
+        metadata: Optional[Dict] = None,
+    ) -> Path:
+        """
+        Creates an entry. The entry must have been acquired via `acquire`,
+        which returned None. The lock on the entry is released once it has
+        been created, and least recently used entries are evicted if the cache
+        is over its maximum size.
+
+        :param fingerprint: The fingerprint of the entry.
+        :param save_checkpoint: A function which saves a checkpoint to the
+        directory it is given (e.g., `Simulator.save_checkpoint`).
+        :param metadata: Any additional metadata to store with the entry.
+        :returns: The path of the checkpoint.
+        """
+        path = self.get_checkpoint_path(fingerprint)
+        tmp_path = self._directory / f"{fingerprint}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        save_checkpoint(tmp_path)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+
+        now = time.time()
+        entry_metadata = dict(metadata or {})
+        entry_metadata.update(
+            {
+                "fingerprint": fingerprint,
+                "size": _directory_size(path),
+                "created": now,
+                "last_used": now,
+            }
+        )
+        _write_json(self._get_metadata_path(fingerprint), entry_metadata)
+        self.release(fingerprint)
+
+        self.evict(keep=fingerprint)
+        return path
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """
+        Evicts the least recently used entries until the cache is within its
+        maximum size. Entries which are in use by another process are skipped.
+
+        :param keep: The fingerprint of an entry which is not to be evicted.
+        """
+        if self._max_size is None:
+            return
+
+        entries = [
+            (fingerprint, self.get_metadata(fingerprint))
+            for fingerprint in self.get_fingerprints()
+        ]
+        entries = [(f, m) for f, m in entries if m]
+        size = sum(metadata.get("size", 0) for _, metadata in entries)
+        entries.sort(key=lambda entry: entry[1].get("last_used", 0))
+
+        for fingerprint, metadata in entries:
+            if size <= self._max_size:
+                break
+            if fingerprint == keep or fingerprint in self._locks:
+                continue
+            if not self._lock(fingerprint, shared=False, timeout=None):
+                continue
+            try:
+                self._remove(fingerprint)
+            finally:
+                self.release(fingerprint)
+            size -= metadata.get("size", 0)
+            inform(f"Evicted cached checkpoint '{fingerprint}'.")
+
+        if size > self._max_size:
+            warn(
+                f"The checkpoint cache at '{self._directory}' is over its "
+                f"maximum size ({size} > {self._max_size} bytes)."
+            )
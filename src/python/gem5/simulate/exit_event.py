@@ -53,6 +53,7 @@ class ExitEvent(Enum):
     PERF_COUNTER_DISABLE = "performance counter disabled"
     PERF_COUNTER_RESET = "performance counter reset"
     PERF_COUNTER_INTERRUPT = "performance counter interrupt"
+    HOST_BUDGET = "host time budget exceeded"  # A host time budget was met.
 
     @classmethod
     def translate_exit_status(cls, exit_string: str) -> "ExitEvent":
@@ -102,6 +103,8 @@ class ExitEvent(Enum):
             return ExitEvent.PERF_COUNTER_RESET
         elif exit_string == "performance counter interrupt":
             return ExitEvent.PERF_COUNTER_INTERRUPT
+        elif exit_string == "host time budget exceeded":
+            return ExitEvent.HOST_BUDGET
         elif exit_string.endswith("will terminate the simulation.\n"):
             # This is for the traffic generator exit event
             return ExitEvent.EXIT
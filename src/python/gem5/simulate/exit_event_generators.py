@@ -90,22 +90,57 @@ def dump_reset_generator():
         yield False
 
 
-def save_checkpoint_generator(checkpoint_dir: Optional[Path] = None):
+def save_checkpoint_generator(
+    checkpoint_dir: Optional[Path] = None,
+    incremental: bool = False,
+    background: bool = False,
+):
     """
     A generator for taking a checkpoint. It will take a checkpoint with the
     input path and the current simulation Ticks.
     The Simulation run loop will continue after executing the behavior of the
     generator.
+
+    :param checkpoint_dir: where to save the checkpoints. The output directory
+    by default.
+    :param incremental: if True, each checkpoint only stores the memory pages
+    changed since the previous checkpoint (see `m5.checkpoint`). False by
+    default.
+    :param background: if True, each checkpoint is written by a forked child
+    process while the simulation continues (see `m5.checkpoint`). False by
+    default.
     """
     if not checkpoint_dir:
         from m5 import options
 
         checkpoint_dir = Path(options.outdir)
     while True:
-        m5.checkpoint((checkpoint_dir / f"cpt.{str(m5.curTick())}").as_posix())
+        m5.checkpoint(
+            (checkpoint_dir / f"cpt.{str(m5.curTick())}").as_posix(),
+            incremental=incremental,
+            background=background,
+        )
         yield False
 
 
+def host_budget_generator(checkpoint_dir: Optional[Path] = None):
+    """
+    A generator for when a host time budget is exceeded (see
+    `Simulator.run`). It will dump the stats and take a checkpoint with the
+    input path and the current simulation Ticks, so the simulation can be
+    resumed later (e.g., in a batch job's next allocation). The Simulation run
+    loop will then exit.
+    """
+    if not checkpoint_dir:
+        from m5 import options
+
+        checkpoint_dir = Path(options.outdir)
+    while True:
+        m5.stats.dump()
+        m5.checkpoint((checkpoint_dir / f"cpt.{str(m5.curTick())}").as_posix())
+        yield True
+
+
 def reset_stats_generator():
     """
     This generator resets the stats every time it is called. It does not dump
@@ -135,7 +170,7 @@ def skip_generator():
 
 
 def simpoints_save_checkpoint_generator(
-    checkpoint_dir: Path, simpoint: SimpointResource
+    checkpoint_dir: Path, simpoint: SimpointResource, incremental: bool = False
 ):
     """
     A generator for taking multiple checkpoints for SimPoints. It will save the
@@ -143,12 +178,21 @@ def simpoints_save_checkpoint_generator(
     The Simulation run loop will continue after executing the behavior of the
     generator until all the SimPoints in the simpoint_list has taken a
     checkpoint.
+
+    :param checkpoint_dir: where to save the checkpoints
+    :param simpoint: the SimPoint resource used in the configuration script
+    :param incremental: if True, each checkpoint only stores the memory pages
+    changed since the previous checkpoint (see `m5.checkpoint`), so the
+    checkpoints must be kept together. False by default.
     """
     simpoint_list = simpoint.get_simpoint_start_insts()
     count = 0
     last_start = -1
     while True:
-        m5.checkpoint((checkpoint_dir / f"cpt.SimPoint{count}").as_posix())
+        m5.checkpoint(
+            (checkpoint_dir / f"cpt.SimPoint{count}").as_posix(),
+            incremental=incremental,
+        )
         last_start = simpoint_list[count]
         count += 1
         # When the next SimPoint starting instruction is the same as the last
@@ -159,7 +203,10 @@ def simpoints_save_checkpoint_generator(
         while (
             count < len(simpoint_list) and last_start == simpoint_list[count]
         ):
-            m5.checkpoint((checkpoint_dir / f"cpt.SimPoint{count}").as_posix())
+            m5.checkpoint(
+                (checkpoint_dir / f"cpt.SimPoint{count}").as_posix(),
+                incremental=incremental,
+            )
             last_start = simpoint_list[count]
             count += 1
         # When there are remaining SimPoints in the list, let the Simulation
@@ -175,6 +222,7 @@ def looppoint_save_checkpoint_generator(
     looppoint: Looppoint,
     update_relatives: bool = True,
     exit_when_empty: bool = True,
+    incremental: bool = False,
 ):
     """
     A generator for taking a checkpoint for LoopPoint. It will save the
@@ -190,6 +238,9 @@ def looppoint_save_checkpoint_generator(
     :param exit_when_empty: if the generator should exit the simulation loop if
     all PC paris have been discovered, then it should be True. It is default as
     True.
+    :param incremental: if True, each checkpoint only stores the memory pages
+    changed since the previous checkpoint (see `m5.checkpoint`), so the
+    checkpoints must be kept together. It is default as False.
     """
     if exit_when_empty:
         total_pairs = len(looppoint.get_targets())
@@ -206,7 +257,10 @@ def looppoint_save_checkpoint_generator(
         if region:
             if update_relatives:
                 looppoint.update_relatives_counts()
-            m5.checkpoint((checkpoint_dir / f"cpt.Region{region}").as_posix())
+            m5.checkpoint(
+                (checkpoint_dir / f"cpt.Region{region}").as_posix(),
+                incremental=incremental,
+            )
         total_pairs -= 1
         yield False
 
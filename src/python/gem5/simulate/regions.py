@@ -0,0 +1,694 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Drivers which simulate the regions of a sampled workload (SimPoints or
+LoopPoints) in parallel, each restored from its checkpoint in a separate gem5
+process (see `gem5.utils.multiprocessing`), and combine the per-region stats
+into a single weighted SimStat.
+
+The progress of a run is recorded in a ledger in the output directory. If a
+run is interrupted, or some regions fail, running it again only simulates the
+regions which have not completed.
+"""
+
+import json
+import os
+import tempfile
+from multiprocessing.connection import wait
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import m5
+from m5.ext.pystats import jsonloader
+from m5.ext.pystats.simstat import SimStat
+from m5.util import inform, warn
+
+from .exit_event import ExitEvent
+from .simulator import Simulator
+from ..components.boards.abstract_board import AbstractBoard
+from ..resources.looppoint import Looppoint, LooppointRegion
+from ..resources.resource import SimpointResource
+
+# The name of the file each region's stats are written to, in the region's
+# output directory.
+_simstats_file_name = "simstats.json"
+
+
+class RegionLedger:
+    """
+    Records which regions of a run have completed, and where their stats
+    are, so an interrupted or failed run can be resumed.
+
+    The ledger is keyed by a fingerprint of the run's configuration (e.g.,
+    the checkpoints, warmup lengths, and interval lengths). If the
+    configuration changes, the ledger is discarded.
+    """
+
+    def __init__(self, path: Path, fingerprint: Dict[str, Any]) -> None:
+        """
+        :param path: The path of the ledger file.
+        :param fingerprint: The configuration of the run. This must be JSON
+        serializable.
+        """
+        self._path = Path(path)
+        self._fingerprint = json.loads(json.dumps(fingerprint))
+        self._regions = {}
+
+        try:
+            with open(self._path) as f:
+                ledger = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if ledger.get("fingerprint") != self._fingerprint:
+            warn(
+                f"The configuration recorded in '{self._path}' does not "
+                "match this run. All regions will be simulated."
+            )
+            return
+        self._regions = ledger.get("regions", {})
+
+    def get_completed_regions(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns the entries of the regions which have completed, keyed by
+        region. Regions whose stats file no longer exists are not included.
+        """
+        return {
+            region: entry
+            for region, entry in self._regions.items()
+            if entry.get("status") == "done"
+            and Path(entry.get("simstats", "")).is_file()
+        }
+
+    def get_failed_regions(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns the entries of the regions which failed, keyed by region.
+        """
+        return {
+            region: entry
+            for region, entry in self._regions.items()
+            if entry.get("status") == "failed"
+        }
+
+    def record_success(self, region: str, simstats: Path) -> None:
+        """
+        Records that a region has completed.
+
+        :param region: The region.
+        :param simstats: The path of the region's stats.
+        """
+        self._regions[region] = {
+            "status": "done",
+            "simstats": str(Path(simstats).resolve()),
+            "attempts": self._attempts(region) + 1,
+        }
+        self._save()
+
+    def record_failure(self, region: str, error: str) -> None:
+        """
+        Records that a region has failed.
+
+        :param region: The region.
+        :param error: A description of the failure.
+        """
+        self._regions[region] = {
+            "status": "failed",
+            "error": error,
+            "attempts": self._attempts(region) + 1,
+        }
+        self._save()
+
+    def _attempts(self, region: str) -> int:
+        return self._regions.get(region, {}).get("attempts", 0)
+
+    def _save(self) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self._path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(
+                {"fingerprint": self._fingerprint, "regions": self._regions},
+                f,
+                indent=4,
+            )
+        os.replace(tmp_path, self._path)
+
+
+# The stat types whose values are weighted, and the keys of their values.
+_weighted_stat_types = ("Scalar", "Distribution", "Accumulator")
+_weighted_keys = (
+    "value",
+    "sum",
+    "sum_squared",
+    "underflow",
+    "overflow",
+    "logs",
+)
+
+
+def _weighted_sum(values: List[Any], weights: List[float]) -> Any:
+    """
+    Returns the weighted sum of numbers, or the element-wise weighted sum of
+    lists of numbers. If the values cannot be summed, the first is returned.
+    """
+    first = values[0]
+    if isinstance(first, list):
+        if not all(
+            isinstance(value, list) and len(value) == len(first)
+            for value in values
+        ):
+            return first
+        return [_weighted_sum(list(items), weights) for items in zip(*values)]
+    if not all(
+        isinstance(value, (int, float)) and not isinstance(value, bool)
+        for value in values
+    ):
+        return first
+    return sum(value * weight for value, weight in zip(values, weights))
+
+
+def _weighted_json(values: List[Any], weights: List[float]) -> Any:
+    """
+    Combines the JSON form of a group of stats from each region. The values
+    of scalars, and the bins and sums of distributions and accumulators, are
+    weighted. Other values (e.g., units and descriptions) are taken from the
+    first region. Stats not present in every region are omitted.
+    """
+    first = values[0]
+    if isinstance(first, list):
+        if not all(
+            isinstance(value, list) and len(value) == len(first)
+            for value in values
+        ):
+            return first
+        return [_weighted_json(list(items), weights) for items in zip(*values)]
+    if not isinstance(first, dict) or not all(
+        isinstance(value, dict) for value in values
+    ):
+        return first
+
+    is_stat = first.get("type") in _weighted_stat_types
+    to_return = {}
+    for key in first:
+        if not all(key in value for value in values):
+            continue
+        items = [value[key] for value in values]
+        if is_stat and key in _weighted_keys:
+            to_return[key] = _weighted_sum(items, weights)
+        elif is_stat and key in ("min", "max") and None not in items:
+            to_return[key] = min(items) if key == "min" else max(items)
+        elif not is_stat and isinstance(first[key], (dict, list)):
+            to_return[key] = _weighted_json(items, weights)
+        else:
+            to_return[key] = first[key]
+    return to_return
+
+
+def weighted_simstat(simstats: List[SimStat], weights: List[float]) -> SimStat:
+    """
+    Combines the stats of several regions into a single SimStat, in which
+    each stat is the weighted sum of the stat in each region. E.g., given
+    SimPoint weights (which sum to 1), this is the SimPoint estimate of the
+    stat for a single interval of the whole workload.
+
+    Stats which are not present in every region are omitted.
+
+    :param simstats: The stats of each region.
+    :param weights: The weight of each region. `weights[i]` is the weight of
+    `simstats[i]`.
+    """
+    if not simstats:
+        raise ValueError("No stats to combine were given.")
+    if len(simstats) != len(weights):
+        raise ValueError("A weight must be given for each region's stats.")
+
+    combined = _weighted_json(
+        [simstat.to_json() for simstat in simstats], weights
+    )
+    return json.loads(json.dumps(combined), cls=jsonloader.JsonLoader)
+
+
+def _load_simstat(path: Path) -> SimStat:
+    with open(path) as f:
+        return jsonloader.load(f)
+
+
+def _set_up_region_outdir() -> Path:
+    """
+    Returns the output directory of a region's process, creating it if
+    necessary.
+    """
+    outdir = Path(m5.options.outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+    return outdir
+
+
+def _write_region_result(simulator: Simulator) -> None:
+    """
+    Writes the stats of a region's simulation to its output directory.
+    """
+    stats_path = _set_up_region_outdir() / _simstats_file_name
+    tmp_path = f"{stats_path}.tmp"
+    with open(tmp_path, "w") as f:
+        simulator.get_simstats().dump(f)
+    os.replace(tmp_path, stats_path)
+
+
+def _run_regions(
+    jobs: Dict[str, Tuple[Callable[..., None], Tuple]],
+    ledger: RegionLedger,
+    max_processes: Optional[int],
+) -> Dict[str, Path]:
+    """
+    Runs a gem5 process for each region which has not already completed, at
+    most `max_processes` at once.
+
+    :param jobs: A map of each region to the function, and its arguments,
+    which simulates it. The function must write the region's stats via
+    `_write_region_result`.
+    :param ledger: The ledger of the run.
+    :param max_processes: The maximum number of processes run at once. If
+    None, the number of host CPUs is used.
+
+    :returns: The path of the stats of each completed region.
+    """
+    # Imported here as `gem5.utils.multiprocessing` is only usable within a
+    # gem5 process.
+    from ..utils.multiprocessing import Process
+
+    if max_processes is None:
+        max_processes = os.cpu_count() or 1
+    if max_processes < 1:
+        raise ValueError("`max_processes` must be at least 1.")
+
+    completed = {
+        region: Path(entry["simstats"])
+        for region, entry in ledger.get_completed_regions().items()
+        if region in jobs
+    }
+    if completed:
+        inform(
+            f"Resuming: {len(completed)} of {len(jobs)} region(s) have "
+            "already completed."
+        )
+
+    pending = [region for region in jobs if region not in completed]
+    running = {}
+    try:
+        while pending or running:
+            while pending and len(running) < max_processes:
+                region = pending.pop(0)
+                target, args = jobs[region]
+                process = Process(target=target, args=args, name=region)
+                process.start()
+                running[process.sentinel] = (region, process)
+
+            for sentinel in wait(list(running.keys())):
+                region, process = running.pop(sentinel)
+                process.join()
+                stats_path = Path(
+                    m5.options.outdir, region, _simstats_file_name
+                )
+                if process.exitcode == 0 and stats_path.is_file():
+                    ledger.record_success(region, stats_path)
+                    completed[region] = stats_path
+                else:
+                    error = f"The process exited with code {process.exitcode}."
+                    warn(f"Region '{region}' failed. {error}")
+                    ledger.record_failure(region, error)
+    finally:
+        # If the run is interrupted, do not leave processes running.
+        for region, process in running.values():
+            process.kill()
+            process.join()
+
+    return completed
+
+
+def _run_simpoint_region(
+    board_factory: Callable[[Path], AbstractBoard],
+    checkpoint: Path,
+    warmup: int,
+    interval: int,
+) -> None:
+    """
+    Simulates a single SimPoint region in a gem5 process. The stats of the
+    region are written to the process's output directory.
+
+    :param board_factory: Returns the board to simulate, restoring from the
+    given checkpoint.
+    :param checkpoint: The checkpoint of the region.
+    :param warmup: The number of instructions to warm up for.
+    :param interval: The number of instructions in the region.
+    """
+
+    def max_insts_generator():
+        if warmup > 0:
+            # The end of the warmup.
+            simulator.schedule_max_insts(interval)
+            m5.stats.reset()
+            yield False
+        # The end of the region.
+        yield True
+
+    simulator = Simulator(
+        board=board_factory(checkpoint),
+        on_exit_event={ExitEvent.MAX_INSTS: max_insts_generator()},
+    )
+    # The stats are reset when the simulation starts, so if there is no
+    # warmup nothing need be done at the start of the region.
+    simulator.schedule_max_insts(warmup if warmup > 0 else interval)
+    simulator.run()
+    _write_region_result(simulator)
+
+
+def run_simpoint_regions(
+    simpoint: SimpointResource,
+    board_factory: Callable[[Path], AbstractBoard],
+    checkpoint_dir: Union[str, Path],
+    max_processes: Optional[int] = None,
+    ledger_path: Optional[Union[str, Path]] = None,
+) -> SimStat:
+    """
+    Simulates every SimPoint region, each in a separate gem5 process, and
+    combines their stats into a single SimStat weighted by
+    `simpoint.get_weight_list()`.
+
+    Region `i` is restored from `checkpoint_dir/cpt.SimPoint<i>`, as taken
+    by `simpoints_save_checkpoint_generator`. It is warmed up for
+    `simpoint.get_warmup_list()[i]` instructions, after which the stats are
+    reset, then simulated for `simpoint.get_simpoint_interval()`
+    instructions. Each region's output is written to
+    `<outdir>/simpoint-region-<i>` and the weighted stats to
+    `<outdir>/simpoints-weighted-stats.json`.
+
+    As the regions are simulated in separate processes, the `board_factory`
+    must be picklable. I.e., a function defined at the top level of a module
+    other than the configuration script being run (see
+    `gem5.utils.multiprocessing`).
+
+    Example
+    -------
+
+    ```
+    # In `boards.py`:
+    def make_board(checkpoint: Path) -> AbstractBoard:
+        board = SimpleBoard(...)
+        board.set_se_binary_workload(
+            binary=obtain_resource("x86-print-this"),
+            arguments=["print this", 15000],
+            checkpoint=checkpoint,
+        )
+        return board
+
+    # In the configuration script:
+    if __name__ == "__m5_main__":
+        simstat = run_simpoint_regions(
+            simpoint=simpoint,
+            board_factory=boards.make_board,
+            checkpoint_dir="simpoint-checkpoints",
+        )
+    ```
+
+    :param simpoint: The SimPoints of the workload.
+    :param board_factory: A function which returns the board to simulate,
+    with its workload set to restore from the checkpoint passed to it.
+    :param checkpoint_dir: The directory containing the SimPoint
+    checkpoints.
+    :param max_processes: The maximum number of regions simulated at once.
+    If None, the number of host CPUs is used.
+    :param ledger_path: The path of the ledger recording which regions have
+    completed. If a previous run with the same SimPoints and checkpoints was
+    interrupted, or some regions failed, only the incomplete regions are
+    simulated. Defaults to `<outdir>/simpoints-ledger.json`.
+
+    :raises Exception: If any region fails. The regions which completed are
+    recorded in the ledger, so running again resumes the run.
+
+    :returns: The weighted stats of the regions.
+    """
+    checkpoint_dir = Path(checkpoint_dir).resolve()
+    outdir = Path(m5.options.outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+    if ledger_path is None:
+        ledger_path = outdir / "simpoints-ledger.json"
+
+    simpoint_list = simpoint.get_simpoint_list()
+    warmup_list = simpoint.get_warmup_list()
+    weight_list = simpoint.get_weight_list()
+    interval = simpoint.get_simpoint_interval()
+
+    jobs = {}
+    weights = {}
+    for index in range(len(simpoint_list)):
+        checkpoint = checkpoint_dir / f"cpt.SimPoint{index}"
+        if not checkpoint.is_dir():
+            raise Exception(
+                f"The checkpoint for SimPoint {index}, '{checkpoint}', does "
+                "not exist."
+            )
+        region = f"simpoint-region-{index}"
+        jobs[region] = (
+            _run_simpoint_region,
+            (board_factory, checkpoint, warmup_list[index], interval),
+        )
+        weights[region] = weight_list[index]
+
+    ledger = RegionLedger(
+        ledger_path,
+        fingerprint={
+            "checkpoint_dir": str(checkpoint_dir),
+            "simpoint_list": simpoint_list,
+            "warmup_list": warmup_list,
+            "simpoint_interval": interval,
+        },
+    )
+    completed = _run_regions(jobs, ledger, max_processes)
+
+    failed = [region for region in jobs if region not in completed]
+    if failed:
+        raise Exception(
+            f"{len(failed)} of {len(jobs)} SimPoint region(s) failed: "
+            f"{', '.join(failed)}. See '{ledger_path}'. Running again will "
+            "only simulate the incomplete regions."
+        )
+
+    simstat = weighted_simstat(
+        [_load_simstat(completed[region]) for region in jobs],
+        [weights[region] for region in jobs],
+    )
+    with open(outdir / "simpoints-weighted-stats.json", "w") as f:
+        simstat.dump(f)
+    return simstat
+
+
+def _run_looppoint_region(
+    board_factory: Callable[[Union[int, str], Path], AbstractBoard],
+    region_id: Union[int, str],
+    checkpoint: Path,
+) -> None:
+    """
+    Simulates a single LoopPoint region in a gem5 process. The stats of the
+    region are written to the process's output directory.
+
+    :param board_factory: Returns the board to simulate, restoring the given
+    region from the given checkpoint.
+    :param region_id: The ID of the region.
+    :param checkpoint: The checkpoint of the region.
+    """
+    board = board_factory(region_id, checkpoint)
+    looppoint = board.get_looppoint()
+    region = looppoint.get_regions()[region_id]
+    start = region.get_simulation().get_start().get_pc_count_pair()
+    end = region.get_simulation().get_end().get_pc_count_pair()
+    reached_end = False
+
+    def pc_count_generator():
+        nonlocal reached_end
+        while True:
+            current = looppoint.get_current_pair()
+            if current == end:
+                reached_end = True
+                yield True
+                return
+            if region.get_warmup() and current == start:
+                # The end of the warmup.
+                m5.stats.reset()
+            yield False
+
+    simulator = Simulator(
+        board=board,
+        on_exit_event={ExitEvent.SIMPOINT_BEGIN: pc_count_generator()},
+    )
+    simulator.run()
+    if not reached_end:
+        raise Exception(
+            f"LoopPoint region '{region_id}' exited before reaching its end "
+            f"PC count pair, because "
+            f"'{simulator.get_last_exit_event_cause()}'."
+        )
+    _write_region_result(simulator)
+
+
+def _looppoint_region_length(region: LooppointRegion) -> Tuple[bool, int]:
+    """
+    Returns a sort key estimating the length of a LoopPoint region: the number
+    of times the PC marking its end is executed within it. The start and end
+    of a region are marked by different PCs, so their global counts cannot be
+    compared, and regions whose relative count is not known sort below every
+    region whose length is known.
+    """
+    relative = region.get_simulation().get_end().get_relative()
+    if relative is None:
+        return (False, 0)
+    return (True, relative)
+
+
+def run_looppoint_regions(
+    looppoint: Looppoint,
+    board_factory: Callable[[Union[int, str], Path], AbstractBoard],
+    checkpoint_dir: Union[str, Path],
+    max_processes: Optional[int] = None,
+    ledger_path: Optional[Union[str, Path]] = None,
+) -> SimStat:
+    """
+    Simulates every LoopPoint region, each in a separate gem5 process, and
+    extrapolates their stats into whole-program stats. Each stat is the sum
+    of the stat in each region multiplied by the region's
+    `get_multiplier()`.
+
+    Region `<id>` is restored from `checkpoint_dir/cpt.Region<id>`, as taken
+    by `looppoint_save_checkpoint_generator`. If the region has a warmup, the
+    stats are reset at the start of the simulation region. The region ends
+    exactly when its end PC count pair is reached. Regions are started
+    longest first (estimated from the counts in the LoopPoint data), so the
+    run takes little longer than its longest region. Regions whose length
+    cannot be estimated are started last. Each region's output is
+    written to `<outdir>/looppoint-region-<id>` and the extrapolated stats to
+    `<outdir>/looppoint-extrapolated-stats.json`.
+
+    As the regions are simulated in separate processes, the `board_factory`
+    must be picklable. I.e., a function defined at the top level of a module
+    other than the configuration script being run (see
+    `gem5.utils.multiprocessing`).
+
+    Example
+    -------
+
+    ```
+    # In `boards.py`:
+    def make_board(region_id: str, checkpoint: Path) -> AbstractBoard:
+        board = SimpleBoard(...)
+        board.set_se_looppoint_workload(
+            binary=obtain_resource("x86-matrix-multiply-omp"),
+            arguments=[100, 8],
+            looppoint=LooppointJsonLoader("looppoint.json"),
+            checkpoint=checkpoint,
+            region_id=region_id,
+        )
+        return board
+
+    # In the configuration script:
+    if __name__ == "__m5_main__":
+        simstat = run_looppoint_regions(
+            looppoint=LooppointJsonLoader("looppoint.json"),
+            board_factory=boards.make_board,
+            checkpoint_dir="looppoint-checkpoints",
+        )
+    ```
+
+    :param looppoint: The LoopPoint data of the workload, including the
+    regions to simulate.
+    :param board_factory: A function which returns the board to simulate,
+    with its LoopPoint workload set to restore the region with the ID passed
+    to it from the checkpoint passed to it.
+    :param checkpoint_dir: The directory containing the LoopPoint
+    checkpoints.
+    :param max_processes: The maximum number of regions simulated at once.
+    If None, the number of host CPUs is used.
+    :param ledger_path: The path of the ledger recording which regions have
+    completed. If a previous run with the same LoopPoint data and
+    checkpoints was interrupted, or some regions failed, only the incomplete
+    regions are simulated. Defaults to `<outdir>/looppoint-ledger.json`.
+
+    :raises Exception: If any region fails. The regions which completed are
+    recorded in the ledger, so running again resumes the run.
+
+    :returns: The extrapolated whole-program stats.
+    """
+    checkpoint_dir = Path(checkpoint_dir).resolve()
+    outdir = Path(m5.options.outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+    if ledger_path is None:
+        ledger_path = outdir / "looppoint-ledger.json"
+
+    regions = looppoint.get_regions()
+    jobs = {}
+    weights = {}
+    for region_id in sorted(
+        regions,
+        key=lambda region_id: _looppoint_region_length(regions[region_id]),
+        reverse=True,
+    ):
+        checkpoint = checkpoint_dir / f"cpt.Region{region_id}"
+        if not checkpoint.is_dir():
+            raise Exception(
+                f"The checkpoint for LoopPoint region '{region_id}', "
+                f"'{checkpoint}', does not exist."
+            )
+        region = f"looppoint-region-{region_id}"
+        jobs[region] = (
+            _run_looppoint_region,
+            (board_factory, region_id, checkpoint),
+        )
+        weights[region] = regions[region_id].get_multiplier()
+
+    ledger = RegionLedger(
+        ledger_path,
+        fingerprint={
+            "checkpoint_dir": str(checkpoint_dir),
+            "regions": {
+                str(region_id): region.to_json()
+                for region_id, region in regions.items()
+            },
+        },
+    )
+    completed = _run_regions(jobs, ledger, max_processes)
+
+    failed = [region for region in jobs if region not in completed]
+    if failed:
+        raise Exception(
+            f"{len(failed)} of {len(jobs)} LoopPoint region(s) failed: "
+            f"{', '.join(failed)}. See '{ledger_path}'. Running again will "
+            "only simulate the incomplete regions."
+        )
+
+    simstat = weighted_simstat(
+        [_load_simstat(completed[region]) for region in jobs],
+        [weights[region] for region in jobs],
+    )
+    with open(outdir / "looppoint-extrapolated-stats.json", "w") as f:
+        simstat.dump(f)
+    return simstat
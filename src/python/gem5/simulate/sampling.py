@@ -0,0 +1,324 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+SMARTS-style systematic sampling (Wunderlich et al., "SMARTS: Accelerating
+Microarchitecture Simulation via Rigorous Statistical Sampling", ISCA 2003).
+
+The simulation is divided into periods of a fixed number of instructions.
+Most of each period is fast-forwarded with the processor's starting (e.g.,
+atomic) cores. At the end of the period the processor is switched to its
+detailed cores, which are warmed up for a number of instructions, after which
+the stats are reset and a measurement interval is simulated. The stats are
+then dumped, the metrics of the sample recorded, and the processor switched
+back for the next period.
+
+From the samples, each metric is estimated with a confidence interval.
+"""
+
+import json
+import math
+import statistics
+from typing import Callable, Dict, Generator, List, Optional, TYPE_CHECKING
+
+import m5
+from m5.util import inform
+
+from .exit_event import ExitEvent
+
+if TYPE_CHECKING:
+    from .simulator import Simulator
+
+
+def _committed_insts_and_cycles(simulator: "Simulator") -> List[float]:
+    insts = 0
+    cycles = 0
+    for core in simulator._board.get_processor().get_cores():
+        cpu = core.get_simobject()
+        insts += cpu.resolveStat("commitStats0.numInsts").value
+        cycles = max(cycles, cpu.resolveStat("numCycles").value)
+    return [insts, cycles]
+
+
+def ipc_metric(simulator: "Simulator") -> float:
+    """
+    The instructions committed by all cores per cycle of the measurement
+    interval. For a single core, this is the core's IPC.
+
+    :param simulator: The simulator, after the stats of the measurement
+    interval have been dumped.
+    """
+    insts, cycles = _committed_insts_and_cycles(simulator)
+    return insts / cycles if cycles else 0.0
+
+
+def cpi_metric(simulator: "Simulator") -> float:
+    """
+    The inverse of `ipc_metric`.
+
+    :param simulator: The simulator, after the stats of the measurement
+    interval have been dumped.
+    """
+    insts, cycles = _committed_insts_and_cycles(simulator)
+    return cycles / insts if insts else 0.0
+
+
+def summarize(values: List[float], confidence: float) -> Dict[str, float]:
+    """
+    Summarizes the samples of a metric: their mean, and the confidence
+    interval of the mean.
+
+    The interval uses the normal approximation, as SMARTS does, which holds
+    for the large numbers of samples systematic sampling yields.
+
+    :param values: The value of the metric in each sample.
+    :param confidence: The confidence level of the interval (e.g., 0.997).
+
+    :returns: A dictionary with the number of "samples", the "mean", the
+    "stdev" of the samples, the "coefficient_of_variation", the
+    "half_width" of the confidence interval, the "relative_error" (the half
+    width relative to the mean), and the "confidence" level. The spread is
+    0 for fewer than two samples.
+    """
+    if not 0 < confidence < 1:
+        raise ValueError("The confidence level must be between 0 and 1.")
+    if not values:
+        raise ValueError("At least one sample is required.")
+
+    mean = statistics.fmean(values)
+    stdev = statistics.stdev(values) if len(values) > 1 else 0.0
+    z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+    half_width = z * stdev / math.sqrt(len(values))
+    return {
+        "samples": len(values),
+        "mean": mean,
+        "stdev": stdev,
+        "coefficient_of_variation": stdev / mean if mean else 0.0,
+        "half_width": half_width,
+        "relative_error": half_width / abs(mean) if mean else 0.0,
+        "confidence": confidence,
+    }
+
+
+class SamplingReport:
+    """
+    The samples taken by a `SmartsSampler`, and the confidence interval of
+    each metric.
+    """
+
+    def __init__(self, confidence: float) -> None:
+        """
+        :param confidence: The confidence level of the intervals.
+        """
+        self.confidence = confidence
+        self.samples: List[Dict[str, float]] = []
+
+    def get_summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns the summary of each metric (see `summarize`).
+        """
+        if not self.samples:
+            return {}
+        return {
+            metric: summarize(
+                [sample[metric] for sample in self.samples], self.confidence
+            )
+            for metric in self.samples[0]
+        }
+
+    def to_json(self) -> Dict:
+        return {
+            "confidence": self.confidence,
+            "samples": self.samples,
+            "summary": self.get_summary(),
+        }
+
+    def dump(self, path: str) -> None:
+        """
+        Writes the report to a JSON file.
+
+        :param path: The path of the file.
+        """
+        with open(path, "w") as f:
+            json.dump(self.to_json(), f, indent=4)
+
+    def __str__(self) -> str:
+        lines = [
+            f"{len(self.samples)} sample(s), "
+            f"{self.confidence * 100:g}% confidence intervals:"
+        ]
+        for metric, summary in self.get_summary().items():
+            lines.append(
+                f"  {metric}: {summary['mean']:.6g} "
+                f"+/- {summary['half_width']:.6g} "
+                f"({summary['relative_error'] * 100:.3g}%)"
+            )
+        return "\n".join(lines)
+
+
+class SmartsSampler:
+    """
+    Runs a simulation with SMARTS-style systematic sampling. The processor
+    must be a `SwitchableProcessor` (e.g., `SimpleSwitchableProcessor`)
+    starting with its fast-forwarding cores (e.g., atomic or KVM), and
+    switching to its detailed cores (e.g., timing or O3).
+
+    Example
+    -------
+
+    ```
+    sampler = SmartsSampler(
+        period=10_000_000, warmup=20_000, measurement=1_000
+    )
+    simulator = Simulator(board=board)
+    sampler.attach(simulator)
+    simulator.run()
+    print(sampler.get_report())
+    ```
+    """
+
+    def __init__(
+        self,
+        period: int,
+        warmup: int,
+        measurement: int,
+        metrics: Optional[Dict[str, Callable[["Simulator"], float]]] = None,
+        confidence: float = 0.997,
+        offset: int = 0,
+        max_samples: Optional[int] = None,
+        report_path: Optional[str] = None,
+    ) -> None:
+        """
+        :param period: The number of instructions between the starts of
+        consecutive samples.
+        :param warmup: The number of instructions the detailed cores are
+        warmed up for in each sample, before the stats are reset.
+        :param measurement: The number of instructions measured in each
+        sample.
+        :param metrics: The metrics recorded for each sample, keyed by name.
+        Each is a function called with the simulator once the stats of the
+        measurement interval have been dumped. Defaults to `ipc_metric` and
+        `cpi_metric`.
+        :param confidence: The confidence level of the reported intervals.
+        99.7% by default, as used by SMARTS.
+        :param offset: The number of instructions fast-forwarded before the
+        first period (e.g., to skip initialization).
+        :param max_samples: If set, the simulation loop exits after this
+        many samples. Otherwise, sampling continues until the workload ends.
+        :param report_path: If set, the report is written to this path after
+        each sample.
+        """
+        if min(period, warmup, measurement, offset) < 0:
+            raise ValueError("Instruction counts cannot be negative.")
+        if measurement == 0:
+            raise ValueError("The measurement interval cannot be empty.")
+        if period <= warmup + measurement:
+            raise ValueError(
+                "The period must be longer than the warmup and measurement "
+                "intervals."
+            )
+
+        self._period = period
+        self._warmup = warmup
+        self._measurement = measurement
+        self._metrics = metrics or {"ipc": ipc_metric, "cpi": cpi_metric}
+        self._offset = offset
+        self._max_samples = max_samples
+        self._report_path = report_path
+        self._report = SamplingReport(confidence=confidence)
+
+    def get_report(self) -> SamplingReport:
+        """
+        Returns the report of the samples taken so far.
+        """
+        return self._report
+
+    def attach(self, simulator: "Simulator") -> None:
+        """
+        Sets up a simulator to run with sampling. This must be called before
+        the simulation is run. It handles `ExitEvent.MAX_INSTS` exit events,
+        so these cannot be otherwise used.
+
+        :param simulator: The simulator.
+        """
+        processor = simulator._board.get_processor()
+        if not hasattr(processor, "switch"):
+            raise Exception(
+                "SMARTS sampling requires a processor with a `switch()` "
+                "function, such as a `SimpleSwitchableProcessor`."
+            )
+
+        simulator._on_exit_event = dict(simulator._on_exit_event)
+        simulator._on_exit_event[ExitEvent.MAX_INSTS] = self._generator(
+            simulator
+        )
+        simulator.schedule_max_insts(
+            self._fast_forward_length() + self._offset
+        )
+
+    def _fast_forward_length(self) -> int:
+        return self._period - self._warmup - self._measurement
+
+    def _generator(
+        self, simulator: "Simulator"
+    ) -> Generator[Optional[bool], None, None]:
+        processor = simulator._board.get_processor()
+        while True:
+            # The end of the fast-forward.
+            processor.switch()
+            if self._warmup > 0:
+                simulator.schedule_max_insts(self._warmup)
+                yield False
+
+            # The end of the warmup.
+            m5.stats.reset()
+            simulator.schedule_max_insts(self._measurement)
+            yield False
+
+            # The end of the measurement.
+            m5.stats.dump()
+            self._report.samples.append(
+                {
+                    name: float(metric(simulator))
+                    for name, metric in self._metrics.items()
+                }
+            )
+            if self._report_path:
+                self._report.dump(self._report_path)
+            inform(
+                f"SMARTS sample {len(self._report.samples)} taken @ tick "
+                f"{m5.curTick()}."
+            )
+
+            processor.switch()
+            if (
+                self._max_samples is not None
+                and len(self._report.samples) >= self._max_samples
+            ):
+                yield True
+                return
+            simulator.schedule_max_insts(self._fast_forward_length())
+            yield False
@@ -29,10 +29,12 @@ import m5.ticks
 from m5.stats import addStatVisitor
 from m5.ext.pystats.simstat import SimStat
 from m5.objects import Root
-from m5.util import warn
+from m5.util import inform, warn
 
 import os
+import signal
 import sys
+import time
 from pathlib import Path
 from typing import Optional, List, Tuple, Dict, Generator, Union
 
@@ -42,9 +44,19 @@ from .exit_event_generators import (
     switch_generator,
     save_checkpoint_generator,
     reset_stats_generator,
+    host_budget_generator,
     dump_stats_generator,
 )
 from .exit_event import ExitEvent
+from .checkpoint_cache import CheckpointCache, get_root_fingerprint
+from .telemetry import Telemetry
+from .variant import (
+    SimulatorVariant,
+    VariantResult,
+    clear_variant_result,
+    collect_variant_result,
+    run_variant_in_child,
+)
 from ..components.boards.abstract_board import AbstractBoard
 from ..components.processors.switchable_processor import SwitchableProcessor
 
@@ -91,6 +103,9 @@ class Simulator:
         ] = None,
         expected_execution_order: Optional[List[ExitEvent]] = None,
         checkpoint_path: Optional[Path] = None,
+        checkpoint_cache: Optional[CheckpointCache] = None,
+        checkpoint_cache_exit_event: ExitEvent = ExitEvent.WORKBEGIN,
+        telemetry: Optional[Telemetry] = None,
     ) -> None:
         """
         :param board: The board to be simulated.
@@ -111,6 +126,23 @@ class Simulator:
         checkpoint will be loaded. By default, the path is None. **This
         parameter is deprecated. Please set the checkpoint when setting the
         board's workload**.
+        :param checkpoint_cache: An optional cache of checkpoints, shared
+        between runs. If set, and no checkpoint is being restored, the
+        simulation is fingerprinted (see `checkpoint_cache.py`). If the cache
+        has a checkpoint for the fingerprint, it is restored and the
+        simulation continues as if the `checkpoint_cache_exit_event` exit
+        event had just been encountered. Otherwise, a checkpoint is saved to
+        the cache when the exit event is first encountered. Exit events
+        encountered before the checkpoint was taken are not replayed when it
+        is restored.
+        :param checkpoint_cache_exit_event: The exit event at which the
+        checkpoint for the `checkpoint_cache` is taken. The checkpoint is taken
+        before the exit event's generator is run. By default, this is
+        `ExitEvent.WORKBEGIN`.
+        :param telemetry: An optional `Telemetry` object which samples the
+        throughput of the simulation at a fixed host wall-clock interval. The
+        samples are collected at each exit event, and a summary of the
+        throughput is output whenever `run` returns.
 
         `on_exit_event` usage notes
         ---------------------------
@@ -160,6 +192,8 @@ class Simulator:
             * ExitEvent.SCHEDULED_TICK: exit simulation
             * ExitEvent.SIMPOINT_BEGIN: reset stats
             * ExitEvent.MAX_INSTS: exit simulation
+            * ExitEvent.HOST_BUDGET: dump stats, take a checkpoint and exit
+            simulation
 
         These generators can be found in the `exit_event_generator.py` module.
 
@@ -209,6 +243,12 @@ class Simulator:
                 "max instructions",
                 "exiting the simulation",
             )(),
+            ExitEvent.HOST_BUDGET: warn_default_decorator(
+                host_budget_generator,
+                "host time budget",
+                "dumping the stats, taking a checkpoint and exiting the "
+                "simulation",
+            )(),
         }
 
         if on_exit_event:
@@ -237,6 +277,18 @@ class Simulator:
 
         self._checkpoint_path = checkpoint_path
 
+        self._checkpoint_cache = checkpoint_cache
+        self._checkpoint_cache_exit_event = checkpoint_cache_exit_event
+        # The fingerprint of the checkpoint cache entry this simulation is to
+        # create, if any.
+        self._checkpoint_cache_fingerprint = None
+        # The exit event, and its cause, to be handled before the simulation
+        # continues after restoring from the checkpoint cache.
+        self._replay_exit_event = None
+        self._replay_exit_event_cause = None
+
+        self._telemetry = telemetry
+
     def schedule_simpoint(self, simpoint_start_insts: List[int]) -> None:
         """
         Schedule SIMPOINT_BEGIN exit events
@@ -343,6 +395,8 @@ class Simulator:
         """
         Returns the last exit event cause.
         """
+        if self._replay_exit_event_cause is not None:
+            return self._replay_exit_event_cause
         return self._last_exit_event.getCause()
 
     def get_current_tick(self) -> int:
@@ -425,15 +479,70 @@ class Simulator:
             # will be restored.
             if self._board._checkpoint:
                 m5.instantiate(self._board._checkpoint.as_posix())
-            else:
+            elif self._checkpoint_path or not self._checkpoint_cache:
                 m5.instantiate(self._checkpoint_path)
+            else:
+                self._instantiate_from_checkpoint_cache(root)
             self._instantiated = True
 
             # Let the board know that instantiate has been called so it can do
             # any final things.
             self._board._post_instantiate()
 
-    def run(self, max_ticks: int = m5.MaxTick) -> None:
+    def _instantiate_from_checkpoint_cache(self, root: Root) -> None:
+        """
+        Instantiates the board from the checkpoint cache, if it has a
+        checkpoint for this simulation. Otherwise, the board is instantiated
+        without a checkpoint and this simulation will create it.
+        """
+        exit_event = self._checkpoint_cache_exit_event.value
+        fingerprint = get_root_fingerprint(
+            root, extra={"exit_event": exit_event}
+        )
+        checkpoint = self._checkpoint_cache.acquire(fingerprint)
+        if checkpoint is None:
+            inform(
+                f"No cached checkpoint found for '{fingerprint}'. One will be "
+                f"taken at the first '{exit_event}' exit event."
+            )
+            self._checkpoint_cache_fingerprint = fingerprint
+            m5.instantiate(None)
+            return
+
+        inform(f"Restoring from cached checkpoint '{checkpoint}'.")
+        try:
+            metadata = self._checkpoint_cache.get_metadata(fingerprint)
+            m5.instantiate(checkpoint.as_posix())
+        finally:
+            self._checkpoint_cache.release(fingerprint)
+
+        self._replay_exit_event = self._checkpoint_cache_exit_event
+        self._replay_exit_event_cause = metadata.get("exit_event_cause", "")
+        self._exit_event_count = metadata.get("exit_event_count", 0)
+
+    def _save_to_checkpoint_cache(self) -> None:
+        """
+        Saves a checkpoint of the current simulation to the checkpoint cache.
+        """
+        path = self._checkpoint_cache.save(
+            self._checkpoint_cache_fingerprint,
+            self.save_checkpoint,
+            metadata={
+                "exit_event": self._checkpoint_cache_exit_event.value,
+                "exit_event_cause": self.get_last_exit_event_cause(),
+                "exit_event_count": self._exit_event_count,
+                "tick": self.get_current_tick(),
+            },
+        )
+        self._checkpoint_cache_fingerprint = None
+        inform(f"Saved cached checkpoint '{path}'.")
+
+    def run(
+        self,
+        max_ticks: int = m5.MaxTick,
+        max_host_seconds: Optional[float] = None,
+        max_host_cpu_seconds: Optional[float] = None,
+    ) -> None:
         """
         This function will start or continue the simulator run and handle exit
         events accordingly.
@@ -442,6 +551,18 @@ class Simulator:
         run. If this max_ticks value is met, a MAX_TICK exit event is
         received, if another simulation exit event is met the tick count is
         reset. This is the **maximum number of ticks per simulation run**.
+        :param max_host_seconds: An optional budget of host wall-clock seconds
+        for this call. If it is met, a HOST_BUDGET exit event is received.
+        :param max_host_cpu_seconds: An optional budget of host CPU seconds,
+        used by the gem5 process, for this call. If it is met, a HOST_BUDGET
+        exit event is received.
+
+        The host time budgets are checked periodically by an event in the
+        simulation, so the exit happens shortly after the budget is met. By
+        default, the HOST_BUDGET exit event dumps the stats, takes a
+        checkpoint in the output directory and exits the run loop, so the
+        simulation can be resumed from the checkpoint (e.g., in a batch job's
+        next allocation). The budgets are cleared when this function returns.
         """
 
         # Check to ensure no banned module has been imported.
@@ -456,15 +577,58 @@ class Simulator:
         # We instantiate the board if it has not already been instantiated.
         self._instantiate()
 
+        if self._telemetry and not self._telemetry.is_started():
+            self._telemetry.start()
+
+        if max_host_seconds or max_host_cpu_seconds:
+            from _m5 import host_budget
+
+            host_budget.set(
+                wall_seconds=max_host_seconds or 0,
+                cpu_seconds=max_host_cpu_seconds or 0,
+            )
+            try:
+                self._run_loop(max_ticks)
+            finally:
+                host_budget.clear()
+        else:
+            self._run_loop(max_ticks)
+
+    def _run_loop(self, max_ticks: int) -> None:
+        """
+        Runs the simulation, handling exit events, until an exit event
+        generator yields True.
+
+        :param max_ticks: The maximum number of ticks to execute per
+        simulation run.
+        """
+
         # This while loop will continue until an a generator yields True.
         while True:
 
-            self._last_exit_event = m5.simulate(max_ticks)
+            if self._replay_exit_event:
+                # The simulation has been restored from the checkpoint cache.
+                # The exit event the checkpoint was taken at is handled as if
+                # it had just been encountered.
+                exit_enum = self._replay_exit_event
+                self._replay_exit_event = None
+            else:
+                self._replay_exit_event_cause = None
+                self._last_exit_event = m5.simulate(max_ticks)
 
-            # Translate the exit event cause to the exit event enum.
-            exit_enum = ExitEvent.translate_exit_status(
-                self.get_last_exit_event_cause()
-            )
+                if self._telemetry:
+                    self._telemetry.poll()
+
+                # Translate the exit event cause to the exit event enum.
+                exit_enum = ExitEvent.translate_exit_status(
+                    self.get_last_exit_event_cause()
+                )
+
+                if (
+                    self._checkpoint_cache_fingerprint
+                    and exit_enum == self._checkpoint_cache_exit_event
+                ):
+                    self._save_to_checkpoint_cache()
 
             # Check to see the run is corresponding to the expected execution
             # order (assuming this check is demanded by the user).
@@ -508,13 +672,148 @@ class Simulator:
             # If the generator returned True we will return from the Simulator
             # run loop.
             if exit_on_completion:
+                if self._telemetry:
+                    inform(f"Telemetry: {self._telemetry.get_summary()}")
                 return
 
-    def save_checkpoint(self, checkpoint_dir: Path) -> None:
+    def save_checkpoint(
+        self,
+        checkpoint_dir: Path,
+        incremental: bool = False,
+        background: bool = False,
+    ) -> None:
         """
         This function will save the checkpoint to the specified directory.
 
         :param checkpoint_dir: The path to the directory where the checkpoint
         will be saved.
+        :param incremental: If True, only the memory pages changed since the
+        last incremental checkpoint saved or restored are stored, along with
+        a pointer to that checkpoint in `m5.cpt`. Restoring the checkpoint
+        layers these pages on top of its parent, so the parent checkpoint must
+        be kept. If there is no such checkpoint, a full checkpoint is taken
+        (see `m5.checkpoint`). False by default.
+        :param background: If True, the checkpoint is written by a forked
+        child process from a copy-on-write snapshot of the simulation, so the
+        simulation can be continued as soon as this function returns. Only one
+        checkpoint is written in the background at a time, and gem5 waits for
+        it before exiting. See `m5.checkpoint` for the restrictions. False by
+        default.
+        """
+        m5.checkpoint(
+            str(checkpoint_dir), incremental=incremental, background=background
+        )
+
+    def fork_variants(
+        self,
+        variants: List[SimulatorVariant],
+        max_concurrent: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, VariantResult]:
         """
-        m5.checkpoint(str(checkpoint_dir))
+        Forks a child simulator for each variant, continuing the simulation
+        from its current state. This allows a shared prefix of a simulation
+        (e.g., booting an OS and warming up) to be run once, via `run()`,
+        with each variant continuing from the end of it.
+
+        Each child runs in its own output directory, named
+        `variant-<name>` within the parent's output directory. The parent's
+        simulation is not advanced, so it may continue to be run after the
+        children have finished.
+
+        As required by `m5.fork()`, all listeners (e.g., for GDB or the
+        terminal) must be disabled before the simulation is instantiated.
+        This is done via `m5.disableAllListeners()`.
+
+        Example
+        -------
+
+        ```
+        m5.disableAllListeners()
+        simulator = Simulator(board=board, on_exit_event=...)
+        simulator.run()  # Run until the end of the warmup.
+        results = simulator.fork_variants(
+            [
+                SimulatorVariant("timing", switch_after_ticks=0),
+                SimulatorVariant("short", max_ticks=10**9),
+            ],
+            max_concurrent=2,
+        )
+        ```
+
+        :param variants: The variants to run.
+        :param max_concurrent: The maximum number of children run at once.
+        If None, the number of host CPUs is used.
+        :param timeout: An optional time, in seconds, after which a child is
+        killed.
+
+        :returns: A dictionary mapping the name of each variant to its
+        result. A child which crashes, or is killed, gives a result
+        describing the failure rather than raising an exception.
+        """
+        if not self._instantiated:
+            raise Exception(
+                "The simulation must be run, via `run()`, before variants "
+                "can be forked from it."
+            )
+        if not m5.listenersDisabled():
+            raise Exception(
+                "Variants cannot be forked while listeners are enabled. "
+                "Please call `m5.disableAllListeners()` before running the "
+                "simulation."
+            )
+        names = [variant.name for variant in variants]
+        if len(set(names)) != len(names):
+            raise Exception("The names of the variants must be unique.")
+        if max_concurrent is None:
+            max_concurrent = os.cpu_count() or 1
+        if max_concurrent < 1:
+            raise ValueError("`max_concurrent` must be at least 1.")
+
+        pending = list(variants)
+        running = {}
+        results = {}
+        try:
+            while pending or running:
+                while pending and len(running) < max_concurrent:
+                    variant = pending.pop(0)
+                    outdir = os.path.join(
+                        m5.options.outdir, f"variant-{variant.name}"
+                    )
+                    clear_variant_result(outdir)
+                    pid = m5.fork(simout=outdir.replace("%", "%%"))
+                    if pid == 0:
+                        run_variant_in_child(self, variant)
+                    running[pid] = (variant, outdir, time.monotonic())
+
+                time.sleep(0.05)
+                for pid, (variant, outdir, start) in list(running.items()):
+                    waited_pid, status = os.waitpid(pid, os.WNOHANG)
+                    if waited_pid == 0:
+                        # The child is still running.
+                        if timeout is None or (
+                            time.monotonic() - start < timeout
+                        ):
+                            continue
+                        os.kill(pid, signal.SIGKILL)
+                        os.waitpid(pid, 0)
+                        status = None
+                    del running[pid]
+                    results[variant.name] = collect_variant_result(
+                        variant, pid, outdir, status
+                    )
+                    if not results[variant.name].success:
+                        warn(
+                            f"Variant '{variant.name}' failed: "
+                            f"{results[variant.name].error}"
+                        )
+        finally:
+            # If the parent is interrupted, do not leave children running.
+            for pid in running:
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                    os.waitpid(pid, 0)
+                except OSError:
+                    pass
+
+        return {name: results[name] for name in names if name in results}
@@ -0,0 +1,323 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Host-side simulation throughput telemetry.
+
+A `Telemetry` object, passed to the `Simulator`, samples the simulation's
+progress at a fixed host wall-clock interval: the simulated ticks, the
+instructions committed by all CPUs, the host's resident memory and the host
+wall-clock and CPU seconds. The samples are taken by an event in C++ (see
+`src/sim/telemetry.hh`), which neither dumps the stats nor calls into Python.
+They can be written as JSON Lines to a file as they are taken, and are
+collected from C++ in batches, at each exit event, for the callback and the
+summary of the throughput trend.
+
+The host seconds the simulation is paused for by each checkpoint (its
+time-to-resume, see `m5.checkpoint`) are also collected for the summary.
+
+This makes it cheap to monitor many long-running simulations, e.g., to find
+those which have stalled or are running much slower than expected.
+"""
+
+import json
+import statistics
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+
+class TelemetrySummary:
+    """
+    Summarizes the trend of a series of telemetry samples.
+
+    The throughput of each interval between consecutive samples is measured
+    in thousands of committed instructions per host second (KIPS).
+    """
+
+    # The ratio between the throughput of the last and first quarters of the
+    # intervals below (above) which the simulation is considered to be
+    # slowing down (speeding up).
+    _trend_threshold = 0.5
+
+    def __init__(self) -> None:
+        self._first = None
+        self._last = None
+        self._num_samples = 0
+        self._kips = []
+        self._peak_rss_bytes = 0
+        self._stall_seconds = 0.0
+        self._longest_stall_seconds = 0.0
+        self._checkpoint_resume_seconds = []
+
+    def add(self, samples: List[Dict]) -> None:
+        """
+        Adds samples, in the order they were taken, to the summary.
+
+        :param samples: The samples, as returned by `Telemetry.poll`.
+        """
+        for sample in samples:
+            if self._last is not None:
+                host_seconds = (
+                    sample["host_seconds"] - self._last["host_seconds"]
+                )
+                insts = sample["insts"] - self._last["insts"]
+                if host_seconds > 0:
+                    self._kips.append(insts / host_seconds / 1000)
+                if insts == 0:
+                    self._stall_seconds += host_seconds
+                    self._longest_stall_seconds = max(
+                        self._longest_stall_seconds, self._stall_seconds
+                    )
+                else:
+                    self._stall_seconds = 0.0
+            else:
+                self._first = sample
+            self._last = sample
+            self._num_samples += 1
+            self._peak_rss_bytes = max(
+                self._peak_rss_bytes, sample["rss_bytes"]
+            )
+
+    def add_checkpoints(self, resume_seconds: List[float]) -> None:
+        """
+        Adds checkpoints to the summary.
+
+        :param resume_seconds: The host seconds the simulation was paused for
+        by each checkpoint.
+        """
+        self._checkpoint_resume_seconds.extend(resume_seconds)
+
+    def get_summary(self) -> Dict:
+        """
+        Returns the summary as a dictionary. The throughput values are None if
+        there are fewer than two samples.
+        """
+        summary = {
+            "samples": self._num_samples,
+            "host_seconds": None,
+            "host_cpu_seconds": None,
+            "ticks": None,
+            "insts": None,
+            "mean_kips": None,
+            "min_kips": None,
+            "max_kips": None,
+            "first_quarter_kips": None,
+            "last_quarter_kips": None,
+            "trend": None,
+            "longest_stall_seconds": self._longest_stall_seconds,
+            "peak_rss_bytes": self._peak_rss_bytes,
+            "checkpoints": len(self._checkpoint_resume_seconds),
+            "checkpoint_resume_seconds": sum(self._checkpoint_resume_seconds),
+            "max_checkpoint_resume_seconds": max(
+                self._checkpoint_resume_seconds, default=0.0
+            ),
+        }
+        if not self._kips:
+            return summary
+
+        host_seconds = self._last["host_seconds"] - self._first["host_seconds"]
+        insts = self._last["insts"] - self._first["insts"]
+        quarter = max(1, len(self._kips) // 4)
+        first_quarter_kips = statistics.mean(self._kips[:quarter])
+        last_quarter_kips = statistics.mean(self._kips[-quarter:])
+
+        if first_quarter_kips > 0:
+            ratio = last_quarter_kips / first_quarter_kips
+        else:
+            ratio = float("inf") if last_quarter_kips > 0 else 1.0
+        if ratio < self._trend_threshold:
+            trend = "slowing down"
+        elif ratio > 1 / self._trend_threshold:
+            trend = "speeding up"
+        else:
+            trend = "steady"
+
+        summary.update(
+            {
+                "host_seconds": host_seconds,
+                "host_cpu_seconds": self._last["host_cpu_seconds"]
+                - self._first["host_cpu_seconds"],
+                "ticks": self._last["tick"] - self._first["tick"],
+                "insts": insts,
+                "mean_kips": insts / host_seconds / 1000,
+                "min_kips": min(self._kips),
+                "max_kips": max(self._kips),
+                "first_quarter_kips": first_quarter_kips,
+                "last_quarter_kips": last_quarter_kips,
+                "trend": trend,
+            }
+        )
+        return summary
+
+    def __str__(self) -> str:
+        summary = self.get_summary()
+        checkpoints = ""
+        if summary["checkpoints"]:
+            checkpoints = (
+                f" {summary['checkpoints']} checkpoint(s) paused the "
+                f"simulation for {summary['checkpoint_resume_seconds']:.1f} "
+                f"seconds (at most "
+                f"{summary['max_checkpoint_resume_seconds']:.1f} seconds)."
+            )
+        if summary["mean_kips"] is None:
+            return (
+                f"{summary['samples']} telemetry sample(s) taken."
+                + checkpoints
+            )
+        return (
+            f"{summary['samples']} telemetry samples over "
+            f"{summary['host_seconds']:.1f} host seconds: "
+            f"{summary['mean_kips']:.1f} KIPS mean "
+            f"({summary['min_kips']:.1f} min, {summary['max_kips']:.1f} max), "
+            f"{summary['trend']} ({summary['first_quarter_kips']:.1f} KIPS in "
+            f"the first quarter, {summary['last_quarter_kips']:.1f} KIPS in "
+            f"the last), longest stall {summary['longest_stall_seconds']:.1f} "
+            f"seconds, peak RSS {summary['peak_rss_bytes'] / 2**20:.1f} MiB."
+            + checkpoints
+        )
+
+
+class Telemetry:
+    """
+    Samples the throughput of a simulation at a fixed host wall-clock
+    interval.
+
+    Example
+    -------
+
+    ```
+    simulator = Simulator(
+        board=board,
+        telemetry=Telemetry(
+            interval=10,
+            path=os.path.join(m5.options.outdir, "telemetry.jsonl"),
+        ),
+    )
+    simulator.run()
+    ```
+    """
+
+    def __init__(
+        self,
+        interval: float = 1.0,
+        path: Optional[Union[str, Path]] = None,
+        callback: Optional[Callable[[List[Dict]], None]] = None,
+    ) -> None:
+        """
+        :param interval: The host wall-clock seconds between samples.
+        :param path: An optional file to append the samples to, as JSON Lines,
+        as they are taken.
+        :param callback: An optional function which is passed each batch of
+        samples when they are collected. Samples are collected at each exit
+        event and when the simulation run ends, not as they are taken.
+        """
+        if interval <= 0:
+            raise ValueError(
+                f"The telemetry interval must be positive (got {interval})."
+            )
+        self._interval = interval
+        self._path = path
+        self._callback = callback
+        self._summary = TelemetrySummary()
+        self._started = False
+
+    def is_started(self) -> bool:
+        """Returns True if the telemetry has been started."""
+        return self._started
+
+    def start(self) -> None:
+        """
+        Starts taking samples. This must be called after `m5.instantiate`. The
+        `Simulator` calls this when it is first run.
+        """
+        from _m5 import telemetry
+
+        telemetry.enable(
+            interval=self._interval,
+            path=str(self._path) if self._path else "",
+        )
+        self._started = True
+
+    def stop(self) -> None:
+        """Stops taking samples, and collects any outstanding samples."""
+        from _m5 import telemetry
+
+        self.poll()
+        telemetry.disable()
+        self._started = False
+
+    def poll(self) -> List[Dict]:
+        """
+        Collects the samples taken since the last call, adds them to the
+        summary and passes them to the callback (if any).
+
+        The host time is checked by an event whose period adapts to the
+        simulation rate. Since the rate can change abruptly between exit
+        events (e.g., when switching CPUs), the adaptation is restarted.
+
+        :returns: The samples taken since the last call.
+        """
+        from _m5 import telemetry
+
+        samples = telemetry.takeSamples()
+        telemetry.resync()
+        self._summary.add(samples)
+        self._collect_checkpoints()
+        if samples and self._callback:
+            self._callback(samples)
+        return samples
+
+    def get_summary(self) -> TelemetrySummary:
+        """
+        Returns the summary of the samples collected so far, and of the
+        checkpoints taken so far.
+        """
+        if self._started:
+            self._collect_checkpoints()
+        return self._summary
+
+    def _collect_checkpoints(self) -> None:
+        import m5
+
+        self._summary.add_checkpoints(m5.takeCheckpointResumeTimes())
+
+    def get_dropped_samples(self) -> int:
+        """
+        Returns the number of samples which were dropped because too many
+        were taken between collections.
+        """
+        from _m5 import telemetry
+
+        return telemetry.droppedSamples()
+
+    def dump_summary(self, path: Union[str, Path]) -> None:
+        """
+        Writes the summary to a JSON file.
+
+        :param path: The path of the file.
+        """
+        with open(path, "w") as f:
+            json.dump(self._summary.get_summary(), f, indent=2)
@@ -0,0 +1,300 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Variants of a simulation which are run in forked child simulators (see
+`Simulator.fork_variants`). This allows a shared prefix of a simulation (e.g.,
+booting an OS and warming up) to be run once, with each variant continuing
+from the end of it.
+"""
+
+import json
+import os
+import signal
+import traceback
+from typing import Callable, Dict, Generator, Optional, TYPE_CHECKING
+
+import m5
+from m5.ext.pystats import jsonloader
+from m5.ext.pystats.simstat import SimStat
+
+from .exit_event import ExitEvent
+
+if TYPE_CHECKING:
+    from .simulator import Simulator
+
+# The names of the files each child writes its results to, in its output
+# directory.
+_result_file_name = "variant.json"
+_simstats_file_name = "variant_simstats.json"
+
+
+class SimulatorVariant:
+    """
+    A variant of a simulation, run in a forked child simulator. A variant may
+    replace the exit event generators, switch the processor's cores, limit
+    the length of the run, or apply any other change via `setup`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        on_exit_event: Optional[
+            Dict[ExitEvent, Generator[Optional[bool], None, None]]
+        ] = None,
+        max_ticks: Optional[int] = None,
+        switch_after_ticks: Optional[int] = None,
+        setup: Optional[Callable[["Simulator"], None]] = None,
+        reset_stats: bool = True,
+    ) -> None:
+        """
+        :param name: The name of the variant. This must be unique among the
+        variants forked together, and is used to name the child's output
+        directory.
+        :param on_exit_event: An optional map of the generator to execute on
+        each exit event, replacing those of the parent (see `Simulator`).
+        :param max_ticks: An optional number of ticks, from the fork, after
+        which the run exits with an `ExitEvent.MAX_TICK` exit event.
+        :param switch_after_ticks: An optional number of ticks, from the fork,
+        after which the processor's cores are switched. The processor must be
+        a `SwitchableProcessor`. If 0, the cores are switched at the fork.
+        :param setup: An optional function called with the child's Simulator
+        before the run, after the other parameters are applied.
+        :param reset_stats: If True, the stats are reset at the fork so the
+        child's stats only cover the variant. True by default.
+        """
+        self.name = name
+        self.on_exit_event = on_exit_event
+        self.max_ticks = max_ticks
+        self.switch_after_ticks = switch_after_ticks
+        self.setup = setup
+        self.reset_stats = reset_stats
+
+    def apply(self, simulator: "Simulator") -> None:
+        """
+        Applies the variant to a simulator. This is called in the child.
+
+        :param simulator: The child's simulator.
+        """
+        if self.on_exit_event:
+            simulator._on_exit_event = dict(self.on_exit_event)
+
+        if self.switch_after_ticks == 0:
+            simulator._board.get_processor().switch()
+        elif self.switch_after_ticks is not None:
+            on_exit_event = dict(simulator._on_exit_event)
+            on_exit_event[ExitEvent.SCHEDULED_TICK] = self._switch_generator(
+                simulator,
+                after=on_exit_event.get(
+                    ExitEvent.SCHEDULED_TICK,
+                    simulator._default_on_exit_dict[ExitEvent.SCHEDULED_TICK],
+                ),
+            )
+            simulator._on_exit_event = on_exit_event
+            m5.scheduleTickExitFromCurrent(self.switch_after_ticks)
+
+        if self.max_ticks is not None:
+            m5.setMaxTick(m5.curTick() + self.max_ticks)
+
+        if self.setup:
+            self.setup(simulator)
+
+        if self.reset_stats:
+            m5.stats.reset()
+
+    def _switch_generator(
+        self,
+        simulator: "Simulator",
+        after: Generator[Optional[bool], None, None],
+    ) -> Generator[Optional[bool], None, None]:
+        """
+        Switches the processor's cores on the scheduled tick exit, then
+        handles any later scheduled tick exits with `after`.
+        """
+        simulator._board.get_processor().switch()
+        yield False
+        yield from after
+
+
+class VariantResult:
+    """
+    The result of a variant run in a forked child simulator.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        pid: int,
+        outdir: str,
+        exit_code: Optional[int] = None,
+        signal: Optional[int] = None,
+        exit_cause: Optional[str] = None,
+        tick: Optional[int] = None,
+        simstats: Optional[SimStat] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        """
+        :param name: The name of the variant.
+        :param pid: The PID of the child.
+        :param outdir: The output directory of the child.
+        :param exit_code: The exit code of the child. None if it was killed
+        by a signal.
+        :param signal: The signal which killed the child, if any.
+        :param exit_cause: The cause of the last exit event of the child's
+        run.
+        :param tick: The tick at the end of the child's run.
+        :param simstats: The stats at the end of the child's run.
+        :param error: A description of why the child failed, if it did.
+        """
+        self.name = name
+        self.pid = pid
+        self.outdir = outdir
+        self.exit_code = exit_code
+        self.signal = signal
+        self.exit_cause = exit_cause
+        self.tick = tick
+        self.simstats = simstats
+        self.error = error
+
+    @property
+    def success(self) -> bool:
+        """
+        True if the child's run completed.
+        """
+        return self.exit_code == 0 and self.error is None
+
+    def __repr__(self) -> str:
+        if self.success:
+            return (
+                f"VariantResult({self.name}: exited @ tick {self.tick} "
+                f"because {self.exit_cause})"
+            )
+        return f"VariantResult({self.name}: failed: {self.error})"
+
+
+def clear_variant_result(outdir: str) -> None:
+    """
+    Removes any result left in a child's output directory by an earlier
+    simulation, so it is not mistaken for the child's.
+
+    :param outdir: The output directory of the child.
+    """
+    for file_name in (_result_file_name, _simstats_file_name):
+        try:
+            os.remove(os.path.join(outdir, file_name))
+        except FileNotFoundError:
+            pass
+
+
+def run_variant_in_child(simulator: "Simulator", variant: SimulatorVariant):
+    """
+    Runs a variant in a forked child and exits the child. The results are
+    written to the child's output directory for the parent to collect (see
+    `collect_variant_result`). This function never returns.
+
+    :param simulator: The child's simulator.
+    :param variant: The variant to run.
+    """
+    exit_code = 0
+    result = {"name": variant.name}
+    try:
+        variant.apply(simulator)
+        simulator.run()
+        result["exit_cause"] = simulator.get_last_exit_event_cause()
+        result["tick"] = simulator.get_current_tick()
+        with open(
+            os.path.join(m5.options.outdir, _simstats_file_name), "w"
+        ) as f:
+            simulator.get_simstats().dump(f)
+    except BaseException:
+        result["error"] = traceback.format_exc()
+        exit_code = 1
+    finally:
+        # The child exits via `os._exit` so it does not return into the
+        # parent's stack. The exit handlers gem5 would otherwise run (see
+        # `m5.simulate`) are therefore run here.
+        try:
+            with open(
+                os.path.join(m5.options.outdir, _result_file_name), "w"
+            ) as f:
+                json.dump(result, f)
+            m5.stats.dump()
+            from _m5 import core
+
+            core.doExitCleanup()
+        finally:
+            os._exit(exit_code)
+
+
+def collect_variant_result(
+    variant: SimulatorVariant, pid: int, outdir: str, status: Optional[int]
+) -> VariantResult:
+    """
+    Collects the result of a variant from a child which has exited.
+
+    :param variant: The variant the child ran.
+    :param pid: The PID of the child.
+    :param outdir: The output directory of the child.
+    :param status: The exit status of the child, as returned by
+    `os.waitpid`. None if the child was killed for exceeding its timeout.
+    """
+    result = VariantResult(name=variant.name, pid=pid, outdir=outdir)
+    if status is None:
+        result.signal = signal.SIGKILL
+        result.error = "The child exceeded its timeout and was killed."
+        return result
+
+    if os.WIFSIGNALED(status):
+        result.signal = os.WTERMSIG(status)
+        result.error = (
+            "The child was killed by signal "
+            f"{signal.Signals(result.signal).name}."
+        )
+        return result
+    result.exit_code = os.WEXITSTATUS(status)
+
+    try:
+        with open(os.path.join(outdir, _result_file_name)) as f:
+            child_result = json.load(f)
+    except (OSError, ValueError):
+        result.error = (
+            f"The child exited with code {result.exit_code} without "
+            "recording a result."
+        )
+        return result
+
+    result.exit_cause = child_result.get("exit_cause")
+    result.tick = child_result.get("tick")
+    result.error = child_result.get("error")
+    if result.exit_code != 0 and result.error is None:
+        result.error = f"The child exited with code {result.exit_code}."
+
+    try:
+        with open(os.path.join(outdir, _simstats_file_name)) as f:
+            result.simstats = jsonloader.load(f)
+    except (OSError, ValueError):
+        pass
+    return result
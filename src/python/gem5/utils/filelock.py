@@ -23,81 +23,252 @@
 # (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF
 # THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import fcntl
 import os
+import threading
 import time
-import errno
+from typing import Dict, Optional
 
 
 class FileLockException(Exception):
     pass
 
 
+class _ProcessLock(object):
+    """A reader-writer lock, shared by all the FileLocks on the same file
+    within this process.
+
+    Depending on the filesystem (e.g., NFS), `flock` locks may be emulated
+    with POSIX record locks, which do not conflict between the threads of a
+    process. Threads therefore coordinate through this lock before taking the
+    `flock` lock.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.readers = 0
+        self.writer = False
+        self.users = 0
+
+    def acquire(self, shared: bool, timeout: Optional[float]) -> bool:
+        """Acquires the lock, waiting at most `timeout` seconds (forever if
+        None). Returns False if the lock could not be acquired in time.
+        """
+
+        def available():
+            return not self.writer and (shared or self.readers == 0)
+
+        with self.condition:
+            if not self.condition.wait_for(available, timeout=timeout):
+                return False
+            if shared:
+                self.readers += 1
+            else:
+                self.writer = True
+            return True
+
+    def release(self, shared: bool) -> None:
+        with self.condition:
+            if shared:
+                self.readers -= 1
+            else:
+                self.writer = False
+            self.condition.notify_all()
+
+
+_process_locks: Dict[str, _ProcessLock] = {}
+_process_locks_lock = threading.Lock()
+
+
+def _get_process_lock(lockfile: str) -> _ProcessLock:
+    with _process_locks_lock:
+        process_lock = _process_locks.setdefault(lockfile, _ProcessLock())
+        process_lock.users += 1
+        return process_lock
+
+
+def _put_process_lock(lockfile: str) -> None:
+    with _process_locks_lock:
+        process_lock = _process_locks[lockfile]
+        process_lock.users -= 1
+        if process_lock.users == 0:
+            del _process_locks[lockfile]
+
+
+def _flock(fd: int, operation: int, timeout: Optional[float]) -> bool:
+    """Applies a `flock` lock to `fd`, waiting at most `timeout` seconds
+    (forever if None). The wait blocks in the kernel rather than polling.
+
+    Returns False if the lock could not be acquired in time. In this case
+    `fd` is closed (possibly later, by a background thread) and must not be
+    used by the caller.
+    """
+    try:
+        fcntl.flock(fd, operation | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        pass
+
+    if timeout is None:
+        fcntl.flock(fd, operation)
+        return True
+    if timeout <= 0:
+        os.close(fd)
+        return False
+
+    # `flock` cannot be given a timeout, so the blocking call is made on a
+    # background thread. If the wait times out, the thread is left to
+    # release the lock, if it is ever acquired, and close `fd`.
+    state = {"locked": False, "cancelled": False, "error": None}
+    condition = threading.Condition()
+
+    def wait():
+        try:
+            fcntl.flock(fd, operation)
+            error = None
+        except OSError as e:
+            error = e
+        with condition:
+            if state["cancelled"]:
+                os.close(fd)
+                return
+            state["locked"] = error is None
+            state["error"] = error
+            condition.notify()
+
+    with condition:
+        threading.Thread(target=wait, daemon=True).start()
+        condition.wait_for(
+            lambda: state["locked"] or state["error"], timeout=timeout
+        )
+        if state["error"]:
+            os.close(fd)
+            raise state["error"]
+        if not state["locked"]:
+            state["cancelled"] = True
+            return False
+    return True
+
+
 class FileLock(object):
     """A file locking mechanism that has context-manager support so
-    you can use it in a with statement. This should be relatively cross
-    compatible as it doesn't rely on msvcrt or fcntl for the locking.
+    you can use it in a with statement.
+
+    The lock is an advisory `flock` lock on the file `<file_name>.lock`, so
+    it is released by the kernel if the process holding it dies, and waiting
+    for it blocks rather than polls. The lock may be exclusive (the default)
+    or shared, in which case any number of shared holders may hold it at once.
+    The lock file is removed when the last holder releases the lock.
     """
 
-    def __init__(self, file_name, timeout=10, delay=0.05):
+    def __init__(self, file_name, timeout=10, delay=0.05, shared=False):
         """Prepare the file locker. Specify the file to lock and optionally
-        the maximum timeout and the delay between each attempt to lock.
+        the maximum timeout.
+
+        :param file_name: The file to lock.
+        :param timeout: The maximum number of seconds to wait for the lock.
+        If None, an exception is raised immediately if the lock is held.
+        `float("inf")` waits for as long as is necessary.
+        :param delay: Unused. Kept for backwards compatibility.
+        :param shared: If True, a shared lock is taken, which only excludes
+        exclusive holders. False by default.
         """
-        if timeout is not None and delay is None:
-            raise ValueError(
-                "If timeout is not None, then delay must not be None."
-            )
         self.is_locked = False
         self.lockfile = os.path.join(os.getcwd(), f"{file_name}.lock")
         self.file_name = file_name
         self.timeout = timeout
         self.delay = delay
+        self.shared = shared
 
     def acquire(self):
-        """Acquire the lock, if possible. If the lock is in use, it check again
-        every `wait` seconds. It does this until it either gets the lock or
-        exceeds `timeout` number of seconds, in which case it throws
-        an exception.
+        """Acquire the lock, if possible. If the lock is in use, this waits
+        until either the lock is released or `timeout` seconds have passed,
+        in which case an exception is thrown.
         """
-        start_time = time.time()
-        while True:
-            try:
-                self.fd = os.open(
-                    self.lockfile, os.O_CREAT | os.O_EXCL | os.O_RDWR
-                )
-                self.is_locked = True  # moved to ensure tag only when locked
-                break
-            except OSError as e:
-                if e.errno != errno.EEXIST:
-                    raise
-                solution_message = (
-                    "This is likely due to the existence"
-                    " of the lock file '{}'. If there's no other process"
-                    " the lock file, you can manually delete the lock file and"
-                    " rerun the script.".format(self.lockfile)
-                )
-                if self.timeout is None:
-                    raise FileLockException(
-                        "Could not acquire lock on {}. {}".format(
-                            self.file_name, solution_message
-                        )
-                    )
-                if (time.time() - start_time) >= self.timeout:
-                    raise FileLockException(
-                        f"Timeout occured. {solution_message}"
-                    )
-                time.sleep(self.delay)
-
-    #        self.is_locked = True
+        if self.timeout is None:
+            deadline = time.monotonic()
+        elif self.timeout == float("inf"):
+            deadline = None
+        else:
+            deadline = time.monotonic() + self.timeout
+
+        def remaining() -> Optional[float]:
+            if deadline is None:
+                return None
+            return max(0.0, deadline - time.monotonic())
+
+        process_lock = _get_process_lock(self.lockfile)
+        if not process_lock.acquire(self.shared, remaining()):
+            _put_process_lock(self.lockfile)
+            self._raise_not_acquired()
+
+        operation = fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX
+        try:
+            while True:
+                fd = os.open(self.lockfile, os.O_CREAT | os.O_RDWR, 0o666)
+                if not _flock(fd, operation, remaining()):
+                    self._raise_not_acquired()
+
+                # The lock file may have been removed by its previous holder
+                # (see `release`) while this process waited on it. If so,
+                # the lock is on an unlinked file, and the new lock file must
+                # be locked instead.
+                try:
+                    st = os.stat(self.lockfile)
+                    fd_st = os.fstat(fd)
+                    if (st.st_dev, st.st_ino) == (fd_st.st_dev, fd_st.st_ino):
+                        break
+                except FileNotFoundError:
+                    pass
+                os.close(fd)
+        except BaseException:
+            process_lock.release(self.shared)
+            _put_process_lock(self.lockfile)
+            raise
+
+        self.fd = fd
+        self.is_locked = True
+
+    def _raise_not_acquired(self):
+        if self.timeout is None:
+            raise FileLockException(
+                f"Could not acquire lock on {self.file_name}, as it is held "
+                "by another process."
+            )
+        raise FileLockException(
+            f"Timeout occured waiting for the lock on {self.file_name}."
+        )
 
     def release(self):
-        """Get rid of the lock by deleting the lockfile.
-        When working in a `with` statement, this gets automatically
-        called at the end.
+        """Release the lock. When working in a `with` statement, this gets
+        automatically called at the end.
+
+        If no other process holds or is waiting for the lock, the lock file is
+        removed.
         """
         if self.is_locked:
-            os.close(self.fd)
-            os.unlink(self.lockfile)
-            self.is_locked = False
+            try:
+                if self.shared:
+                    # The lock file may only be removed if there are no other
+                    # holders.
+                    try:
+                        fcntl.flock(self.fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        remove = True
+                    except BlockingIOError:
+                        remove = False
+                else:
+                    remove = True
+                if remove:
+                    try:
+                        os.unlink(self.lockfile)
+                    except FileNotFoundError:
+                        pass
+            finally:
+                # Closing the file releases the lock.
+                os.close(self.fd)
+                self.is_locked = False
+                _process_locks[self.lockfile].release(self.shared)
+                _put_process_lock(self.lockfile)
 
     def __enter__(self):
         """Activated when used in the with statement.
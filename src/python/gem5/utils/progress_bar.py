@@ -25,6 +25,9 @@
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 
+import threading
+
+
 class FakeTQDM:
     """This is a fake wrapper so that the tqdm calls work whether or not it
     has been installed.
@@ -40,9 +43,12 @@ class FakeTQDM:
             return args[0]
         return kwargs.get("iterable", None)
 
-    def __enter__(self):
+    def update(self, *args, **kwargs):
         pass
 
+    def __enter__(self):
+        return self
+
     def __exit__(self, exc_type, exc_val, exc_tb):
         pass
 
@@ -61,16 +67,133 @@ def progress_hook(t):
         # Takes 3 arguments
         return lambda a, b, c: None
 
-    last_b = [0]
+    last_done = [0]
 
     def update_to(b=1, bsize=1, tsize=None):
+        done = b * bsize
         if tsize not in (None, -1):
             t.total = tsize
-        displayed = t.update((b - last_b[0]) * bsize)
-        last_b[0] = b
+            # The last block is usually only partially filled.
+            done = min(done, tsize)
+        displayed = t.update(done - last_done[0])
+        last_done[0] = done
         return displayed
 
     return update_to
 
 
-__all__ = [tqdm, progress_hook, FakeTQDM]
+class SharedProgress:
+    """
+    A single progress bar shared by several concurrent tasks, such as
+    downloads. Each task reports the bytes it expects and has processed to
+    this bar rather than displaying its own.
+
+    Calling a `SharedProgress` object, or its `wrapattr` method, returns an
+    object which can be used as a task's progress bar in place of `tqdm` or
+    `tqdm.wrapattr` respectively.
+    """
+
+    def __init__(self, bar):
+        """
+        :param bar: The progress bar of the tasks, e.g., as returned by
+        `tqdm(unit="B", total=0)`.
+        """
+        self._bar = bar
+        self._lock = threading.Lock()
+
+    def add_total(self, n: int) -> None:
+        """
+        Adds `n` to the total of the bar, e.g., once the size of a download
+        is known.
+        """
+        if not _have_tqdm:
+            return
+        with self._lock:
+            self._bar.total = (self._bar.total or 0) + n
+            self._bar.refresh()
+
+    def update(self, n: int) -> None:
+        with self._lock:
+            self._bar.update(n)
+
+    def set_description(self, desc: str) -> None:
+        if not _have_tqdm:
+            return
+        with self._lock:
+            self._bar.set_description(desc)
+
+    def __call__(self, total=None, initial=0, **kwargs):
+        return _SharedProgressTask(self, total, initial)
+
+    def wrapattr(self, stream, method, total=None, **kwargs):
+        return _SharedProgressWrapper(
+            _SharedProgressTask(self, total, 0), stream, method
+        )
+
+
+class _SharedProgressTask:
+    """
+    The progress bar of a single task of a `SharedProgress`.
+    """
+
+    def __init__(self, shared, total, initial):
+        self._shared = shared
+        self._total = None
+        self.total = total
+        self.update(initial)
+
+    @property
+    def total(self):
+        return self._total
+
+    @total.setter
+    def total(self, total):
+        if total is not None and total != self._total:
+            self._shared.add_total(total - (self._total or 0))
+            self._total = total
+
+    def update(self, n=1):
+        if n:
+            self._shared.update(n)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+class _SharedProgressWrapper:
+    """
+    Wraps a stream so that the bytes read or written by `method` are
+    reported to a `_SharedProgressTask`, like `tqdm.wrapattr`.
+    """
+
+    def __init__(self, task, stream, method):
+        self._task = task
+        self._stream = stream
+        self._method = method
+
+    def __getattr__(self, name):
+        attr = getattr(self._stream, name)
+        if name != self._method:
+            return attr
+
+        def wrapped(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if name == "write":
+                self._task.update(len(args[0]))
+            else:
+                self._task.update(len(result))
+            return result
+
+        return wrapped
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+__all__ = [tqdm, progress_hook, FakeTQDM, SharedProgress]
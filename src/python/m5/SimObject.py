@@ -200,6 +200,9 @@ class MetaSimObject(type):
         # class-only attributes
         cls._params = multidict()  # param descriptions
         cls._ports = multidict()  # port descriptions
+        # Names of the params whose type is a subclass of a given type, for
+        # Parent.any and Parent.all. Dict[type, Tuple[str]]
+        cls._param_types = {}
 
         # Parameter names that are deprecated. Dict[str, DeprecatedParam]
         # The key is the "old_name" so that when the old_name is used in
@@ -306,9 +309,17 @@ class MetaSimObject(type):
         assert not hasattr(pdesc, "name")
         pdesc.name = name
         cls._params[name] = pdesc
+        cls._clear_param_types()
         if hasattr(pdesc, "default"):
             cls._set_param(name, pdesc.default, pdesc)
 
+    def _clear_param_types(cls):
+        # Subclasses inherit the new param through the params multidict, so
+        # their cached names are stale too.
+        cls._param_types.clear()
+        for subclass in cls.__subclasses__():
+            subclass._clear_param_types()
+
     def _set_param(cls, name, value, param):
         assert param.name == name
         try:
@@ -733,6 +744,11 @@ class SimObject(object, metaclass=MetaSimObject):
         self._ccParams = None
         self._instantiated = False  # really "cloned"
         self._init_called = True  # Checked so subclasses don't forget __init__
+        # Lazily built indexes used to resolve Parent.any and Parent.all
+        # proxies, cleared whenever a child is added or removed in the
+        # subtree. See find_any and find_all.
+        self._child_types = {}
+        self._subtree_types = {}
 
         # Clone children specified at class level.  No need for a
         # multidict here since we will be cloning everything.
@@ -952,6 +968,7 @@ class SimObject(object, metaclass=MetaSimObject):
         child = self._children[name]
         child.clear_parent(self)
         del self._children[name]
+        self._clear_type_index()
 
     # Add a new child to this object.
     def add_child(self, name, child):
@@ -972,6 +989,17 @@ class SimObject(object, metaclass=MetaSimObject):
         if not isNullPointer(child):
             child.set_parent(self, name)
             self._children[name] = child
+            self._clear_type_index()
+
+    # The type indexes of this object and of all its ancestors cover the
+    # children of this object, so they all go stale when they change. Also
+    # implemented by SimObjectVector.
+    def _clear_type_index(self):
+        obj = self
+        while isinstance(obj, SimObject):
+            obj._child_types.clear()
+            obj._subtree_types.clear()
+            obj = obj._parent
 
     # Take SimObject-valued parameters that haven't been explicitly
     # assigned as children and make them children of the object that
@@ -1016,17 +1044,73 @@ class SimObject(object, metaclass=MetaSimObject):
     def ini_str(self):
         return self.path()
 
+    # Names of the params of this object whose type is a subclass of ptype
+    def _params_of_type(self, ptype):
+        names = self._param_types.get(ptype)
+        if names is None:
+            names = tuple(
+                pname
+                for pname, pdesc in self._params.items()
+                if issubclass(pdesc.ptype, ptype)
+            )
+            self._param_types[ptype] = names
+        return names
+
+    # Children of this object that are instances of ptype, in order
+    def _children_of_type(self, ptype):
+        children = self._child_types.get(ptype)
+        if children is None:
+            children = tuple(
+                child
+                for child in self._children.values()
+                if isinstance(child, ptype)
+            )
+            self._child_types[ptype] = children
+        return children
+
+    # Objects in the subtree below this object that are instances of ptype,
+    # and the (object, param name) slots in the subtree, including this
+    # object, holding params of type ptype. The values of the params are
+    # only read when looking them up as unproxying them changes them.
+    def _subtree_of_type(self, ptype):
+        index = self._subtree_types.get(ptype)
+        if index is None:
+            objs = []
+            slots = [(self, pname) for pname in self._params_of_type(ptype)]
+            for child in self._children.values():
+                # a child could be a list, so ensure we visit each item
+                if isinstance(child, list):
+                    children = child
+                else:
+                    children = [child]
+
+                for child in children:
+                    if (
+                        isinstance(child, ptype)
+                        and not isproxy(child)
+                        and not isNullPointer(child)
+                    ):
+                        objs.append(child)
+                    if isSimObject(child):
+                        # also add results from the child itself
+                        child_objs, child_slots = child._subtree_of_type(ptype)
+                        objs.extend(child_objs)
+                        slots.extend(child_slots)
+            index = (tuple(objs), tuple(slots))
+            self._subtree_types[ptype] = index
+        return index
+
     def find_any(self, ptype):
         if isinstance(self, ptype):
             return self, True
 
         found_obj = None
-        for child in self._children.values():
+        for child in self._children_of_type(ptype):
             visited = False
             if hasattr(child, "_visited"):
                 visited = getattr(child, "_visited")
 
-            if isinstance(child, ptype) and not visited:
+            if not visited:
                 if found_obj != None and child != found_obj:
                     raise AttributeError(
                         "parent.any matched more than one: %s %s"
@@ -1034,44 +1118,24 @@ class SimObject(object, metaclass=MetaSimObject):
                     )
                 found_obj = child
         # search param space
-        for pname, pdesc in self._params.items():
-            if issubclass(pdesc.ptype, ptype):
-                match_obj = self._values[pname]
-                if found_obj != None and found_obj != match_obj:
-                    raise AttributeError(
-                        "parent.any matched more than one: %s and %s"
-                        % (found_obj.path, match_obj.path)
-                    )
-                found_obj = match_obj
+        for pname in self._params_of_type(ptype):
+            match_obj = self._values[pname]
+            if found_obj != None and found_obj != match_obj:
+                raise AttributeError(
+                    "parent.any matched more than one: %s and %s"
+                    % (found_obj.path, match_obj.path)
+                )
+            found_obj = match_obj
         return found_obj, found_obj != None
 
     def find_all(self, ptype):
-        all = {}
-        # search children
-        for child in self._children.values():
-            # a child could be a list, so ensure we visit each item
-            if isinstance(child, list):
-                children = child
-            else:
-                children = [child]
-
-            for child in children:
-                if (
-                    isinstance(child, ptype)
-                    and not isproxy(child)
-                    and not isNullPointer(child)
-                ):
-                    all[child] = True
-                if isSimObject(child):
-                    # also add results from the child itself
-                    child_all, done = child.find_all(ptype)
-                    all.update(dict(zip(child_all, [done] * len(child_all))))
+        objs, slots = self._subtree_of_type(ptype)
+        all = dict.fromkeys(objs, True)
         # search param space
-        for pname, pdesc in self._params.items():
-            if issubclass(pdesc.ptype, ptype):
-                match_obj = self._values[pname]
-                if not isproxy(match_obj) and not isNullPointer(match_obj):
-                    all[match_obj] = True
+        for obj, pname in slots:
+            match_obj = obj._values[pname]
+            if not isproxy(match_obj) and not isNullPointer(match_obj):
+                all[match_obj] = True
         # Also make sure to sort the keys based on the objects' path to
         # ensure that the order is the same on all hosts
         return sorted(all.keys(), key=lambda o: o.path()), True
@@ -1252,6 +1316,34 @@ class SimObject(object, metaclass=MetaSimObject):
             for obj in child.descendants():
                 yield obj
 
+    # Return a list of this object and all its descendants, in the same
+    # order as descendants(). Building the list directly avoids
+    # resuming a chain of nested generators (one per level of the
+    # hierarchy) for every object, so it is much faster for large
+    # hierarchies. Unlike descendants(), it does not see children
+    # added while it is being built.
+    def descendants_list(self):
+        objs = []
+
+        def visit(obj):
+            objs.append(obj)
+            children = obj._children
+            for name in sorted(children):
+                child = children[name]
+                if isinstance(child, SimObject):
+                    visit(child)
+                elif isinstance(child, SimObjectVector):
+                    for v in child:
+                        if isinstance(v, SimObject):
+                            visit(v)
+                        else:
+                            objs.extend(v.descendants())
+                else:
+                    objs.extend(child.descendants())
+
+        visit(self)
+        return objs
+
     # Call C++ to create C++ object corresponding to this object
     def createCCObject(self):
         if self.abstract:
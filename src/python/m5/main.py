@@ -192,6 +192,15 @@ def parse_options():
         action="callback",
         callback=collect_args,
     )
+    option(
+        "-m",
+        type=str,
+        help="run library module as a script (terminates option list)",
+        default="",
+        metavar="mod",
+        action="callback",
+        callback=collect_args,
+    )
 
     # Statistics options
     group("Statistics Options")
@@ -235,6 +244,26 @@ def parse_options():
         help="Create DOT & pdf outputs of the DVFS configuration"
         + " [Default: %default]",
     )
+    option(
+        "--startup-profile",
+        metavar="FILE",
+        default=None,
+        help="Profile the time and memory taken by each phase of the startup "
+        "(up to the first tick), per SimObject type, and write the report to "
+        "a JSON file [Default: %default]",
+    )
+
+    # gem5 Resources options
+    group("Resources Options")
+    option(
+        "--verify-resources",
+        metavar="{cached,full}",
+        choices=("cached", "full"),
+        default="cached",
+        help="How resources already present on the host are verified "
+        "(cached: only rehash a resource if it has changed since it was last "
+        "hashed, full: always rehash) [Default: %default]",
+    )
 
     # Debugging options
     group("Debugging Options")
@@ -496,7 +525,11 @@ def main():
         print()
 
     # check to make sure we can find the listed script
-    if not options.c and (not arguments or not os.path.isfile(arguments[0])):
+    if (
+        not options.c
+        and not options.m
+        and (not arguments or not os.path.isfile(arguments[0]))
+    ):
         if arguments and not os.path.isfile(arguments[0]):
             print(f"Script {arguments[0]} not found")
 
@@ -505,6 +538,13 @@ def main():
     # tell C++ about output directory
     core.setOutputDir(options.outdir)
 
+    if options.startup_profile:
+        from . import startup_profile
+
+        startup_profile.enable(
+            os.path.join(options.outdir, options.startup_profile)
+        )
+
     # update the system path with elements from the -p option
     sys.path[0:0] = options.path
 
@@ -579,6 +619,25 @@ def main():
         filecode = compile(filedata, "<string>", "exec")
         sys.argv = ["-c"] + options.c[1]
         scope = {"__name__": "__m5_main__"}
+    elif options.m:
+        import importlib.util
+
+        # As with `python -m`, the module is located and its code run as the
+        # main script. If the module is a package, its `__main__` submodule
+        # is run. The remaining arguments are passed to it.
+        mod_spec = importlib.util.find_spec(options.m[0])
+        if mod_spec and mod_spec.submodule_search_locations is not None:
+            mod_spec = importlib.util.find_spec(f"{options.m[0]}.__main__")
+        if mod_spec is None:
+            print(f"No module named {options.m[0]}", file=sys.stderr)
+            sys.exit(1)
+        filecode = mod_spec.loader.get_code(mod_spec.name)
+        sys.argv = [mod_spec.origin or options.m[0]] + options.m[1]
+        scope = {
+            "__name__": "__m5_main__",
+            "__spec__": mod_spec,
+            "__package__": mod_spec.parent,
+        }
     else:
         sys.path = [os.path.dirname(sys.argv[0])] + sys.path
         filename = sys.argv[0]
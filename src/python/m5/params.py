@@ -320,8 +320,62 @@ class SimObjectVector(VectorParamValue):
                 + " that is being overwritten by a SimObjectVector"
             )
         value.set_parent(val.get_parent(), val._name)
+        self._clear_type_index()
         super().__setitem__(key, value)
 
+    # The type indexes of the parent of the vector, and of its ancestors,
+    # cover the elements of the vector, so they all go stale when it is
+    # changed in place. Also implemented by SimObject.
+    def _clear_type_index(self):
+        parents = {id(v._parent): v._parent for v in self if isSimObject(v)}
+        for parent in parents.values():
+            if isSimObject(parent):
+                parent._clear_type_index()
+
+    def __delitem__(self, key):
+        self._clear_type_index()
+        super().__delitem__(key)
+
+    def __iadd__(self, other):
+        self._clear_type_index()
+        return super().__iadd__(other)
+
+    def __imul__(self, n):
+        self._clear_type_index()
+        return super().__imul__(n)
+
+    def append(self, value):
+        self._clear_type_index()
+        super().append(value)
+
+    def extend(self, values):
+        self._clear_type_index()
+        super().extend(values)
+
+    def insert(self, index, value):
+        self._clear_type_index()
+        super().insert(index, value)
+
+    def pop(self, index=-1):
+        self._clear_type_index()
+        return super().pop(index)
+
+    def remove(self, value):
+        self._clear_type_index()
+        super().remove(value)
+
+    def clear(self):
+        self._clear_type_index()
+        super().clear()
+
+    def sort(self, *args, **kwargs):
+        self._clear_type_index()
+        super().sort(*args, **kwargs)
+
+    def reverse(self):
+        self._clear_type_index()
+        super().reverse()
+
     # Enumerate the params of each member of the SimObject vector. Creates
     # strings that will allow indexing into the vector by the python code and
     # allow it to be specified on the command line.
@@ -40,6 +40,8 @@
 import atexit
 import os
 import sys
+import time
+import traceback
 
 # import the wrapped C++ functions
 import _m5.drain
@@ -51,6 +53,7 @@ from . import SimObject
 from . import ticks
 from . import objects
 from . import params
+from . import startup_profile
 from m5.util.dot_writer import do_dot, do_dvfs_dot
 from m5.util.dot_writer_ruby import do_ruby_dot
 
@@ -64,10 +67,32 @@ _drain_manager = _m5.drain.DrainManager.instance()
 
 _instantiated = False  # Has m5.instantiate() been called?
 
+# The SimObjects in the configuration hierarchy, in the order of
+# Root.descendants(). The hierarchy is final once the orphan parameters have
+# been adopted, so instantiate() lists it once and every later pass over it
+# reuses the list.
+_objects = ()
+
+
+def getSimObjects():
+    """Return the SimObjects in the instantiated configuration hierarchy,
+    in the order of Root.descendants().
+    """
+    return _objects
+
+
+def _descendants(root):
+    # The list of instantiated objects only covers the whole hierarchy.
+    if _objects and root is _objects[0]:
+        return _objects
+    return root.descendants()
+
+
 # The final call to instantiate the SimObject graph and initialize the
 # system.
 def instantiate(ckpt_dir=None):
     global _instantiated
+    global _objects
     from m5 import options
 
     if _instantiated:
@@ -84,80 +109,68 @@ def instantiate(ckpt_dir=None):
     ticks.fixGlobalFrequency()
 
     # Make sure SimObject-valued params are in the configuration
-    # hierarchy so we catch them with future descendants() walks
-    for obj in root.descendants():
+    # hierarchy so we catch them with future descendants() walks. This
+    # has to walk the hierarchy as it grows.
+    for obj in startup_profile.each("adoptOrphanParams", root.descendants()):
         obj.adoptOrphanParams()
 
+    # The hierarchy is now final
+    _objects = tuple(root.descendants_list())
+
     # Unproxy in sorted order for determinism
-    for obj in root.descendants():
+    for obj in startup_profile.each("unproxyParams", _objects):
         obj.unproxyParams()
 
-    if options.dump_config:
-        ini_file = open(os.path.join(options.outdir, options.dump_config), "w")
-        # Print ini sections in sorted order for easier diffing
-        for obj in sorted(root.descendants(), key=lambda o: o.path()):
-            obj.print_ini(ini_file)
-        ini_file.close()
-
-    if options.json_config:
-        try:
-            import json
-
-            json_file = open(
-                os.path.join(options.outdir, options.json_config), "w"
-            )
-            d = root.get_config_as_dict()
-            json.dump(d, json_file, indent=4)
-            json_file.close()
-        except ImportError:
-            pass
-
-    if options.dot_config:
-        do_dot(root, options.outdir, options.dot_config)
-        do_ruby_dot(root, options.outdir, options.dot_config)
+    with startup_profile.phase("dumpConfig"):
+        _dump_config(root)
 
     # Initialize the global statistics
-    stats.initSimStats()
+    with startup_profile.phase("initSimStats"):
+        stats.initSimStats()
 
     # Create the C++ sim objects and connect ports
-    for obj in root.descendants():
+    for obj in startup_profile.each("createCCObject", _objects):
         obj.createCCObject()
-    for obj in root.descendants():
+    for obj in startup_profile.each("connectPorts", _objects):
         obj.connectPorts()
 
     # Do a second pass to finish initializing the sim objects
-    for obj in root.descendants():
+    for obj in startup_profile.each("init", _objects):
         obj.init()
 
     # Do a third pass to initialize statistics
-    stats._bindStatHierarchy(root)
-    root.regStats()
+    with startup_profile.phase("regStats"):
+        stats._bindStatHierarchy(root, _objects)
+        root.regStats()
 
     # Do a fourth pass to initialize probe points
-    for obj in root.descendants():
+    for obj in startup_profile.each("regProbePoints", _objects):
         obj.regProbePoints()
 
     # Do a fifth pass to connect probe listeners
-    for obj in root.descendants():
+    for obj in startup_profile.each("regProbeListeners", _objects):
         obj.regProbeListeners()
 
     # We want to generate the DVFS diagram for the system. This can only be
     # done once all of the CPP objects have been created and initialised so
     # that we are able to figure out which object belongs to which domain.
     if options.dot_dvfs_config:
-        do_dvfs_dot(root, options.outdir, options.dot_dvfs_config)
+        with startup_profile.phase("dumpConfig"):
+            do_dvfs_dot(root, options.outdir, options.dot_dvfs_config)
 
     # We're done registering statistics.  Enable the stats package now.
-    stats.enable()
+    with startup_profile.phase("enableStats"):
+        stats.enable()
 
     # Restore checkpoint (if any)
     if ckpt_dir:
-        _drain_manager.preCheckpointRestore()
-        ckpt = _m5.core.getCheckpoint(ckpt_dir)
-        for obj in root.descendants():
+        with startup_profile.phase("getCheckpoint"):
+            _drain_manager.preCheckpointRestore()
+            ckpt = _m5.core.getCheckpoint(ckpt_dir)
+        for obj in startup_profile.each("loadState", _objects):
             obj.loadState(ckpt)
     else:
-        for obj in root.descendants():
+        for obj in startup_profile.each("initState", _objects):
             obj.initState()
 
     # Check to see if any of the stat events are in the past after resuming from
@@ -165,6 +178,34 @@ def instantiate(ckpt_dir=None):
     updateStatEvents()
 
 
+def _dump_config(root):
+    from m5 import options
+
+    if options.dump_config:
+        ini_file = open(os.path.join(options.outdir, options.dump_config), "w")
+        # Print ini sections in sorted order for easier diffing
+        for obj in sorted(_objects, key=lambda o: o.path()):
+            obj.print_ini(ini_file)
+        ini_file.close()
+
+    if options.json_config:
+        try:
+            import json
+
+            json_file = open(
+                os.path.join(options.outdir, options.json_config), "w"
+            )
+            d = root.get_config_as_dict()
+            json.dump(d, json_file, indent=4)
+            json_file.close()
+        except ImportError:
+            pass
+
+    if options.dot_config:
+        do_dot(root, options.outdir, options.dot_config)
+        do_ruby_dot(root, options.outdir, options.dot_config)
+
+
 need_startup = True
 
 
@@ -176,8 +217,7 @@ def simulate(*args, **kwargs):
         fatal("m5.instantiate() must be called before m5.simulate().")
 
     if need_startup:
-        root = objects.Root.getInstance()
-        for obj in root.descendants():
+        for obj in startup_profile.each("startup", _objects):
             obj.startup()
         need_startup = False
 
@@ -191,6 +231,9 @@ def simulate(*args, **kwargs):
         # Reset to put the stats in a consistent state.
         stats.reset()
 
+        # The simulation is about to start
+        startup_profile.finish()
+
     if _drain_manager.isDrained():
         _drain_manager.resume()
 
@@ -299,24 +342,135 @@ def drain():
 
 
 def memWriteback(root):
-    for obj in root.descendants():
+    for obj in _descendants(root):
         obj.memWriteback()
 
 
 def memInvalidate(root):
-    for obj in root.descendants():
+    for obj in _descendants(root):
         obj.memInvalidate()
 
 
-def checkpoint(dir):
+# The pid and directory of the checkpoint being written in the background, if
+# any.
+_background_checkpoint = None
+
+# The host seconds the simulation was paused for by each checkpoint taken since
+# takeCheckpointResumeTimes was last called.
+_checkpoint_resume_times = []
+
+
+def checkpoint(dir, incremental=False, background=False):
+    """Write a checkpoint of the simulation to a directory.
+
+    If incremental is True, objects which support it (e.g., the physical
+    memory) only store the state which changed since the last incremental
+    checkpoint they saved or restored, together with a pointer to that
+    checkpoint. That checkpoint must therefore be kept for the incremental
+    checkpoint to be restored. The first incremental checkpoint, one whose
+    parent can no longer be found, and one taken after a chain of 16
+    incremental checkpoints store the full state instead, and start a new
+    chain. Checkpoints taken without incremental are not the parent of any
+    incremental checkpoint.
+
+    If background is True, the checkpoint is written by a forked child
+    process, i.e., from a copy-on-write snapshot of the simulator, so the
+    simulation can continue as soon as the simulator is forked. Only one
+    checkpoint is written in the background at a time, and gem5 waits for
+    it to be written before exiting (see waitForCheckpoint). The checkpoint
+    is written in the foreground if the simulator cannot be forked (i.e.,
+    with listeners enabled or a shared backing store). An incremental
+    checkpoint written in the background is not used as the parent of
+    later incremental checkpoints.
+    """
+    global _background_checkpoint
+
+    start = time.monotonic()
     root = objects.Root.getInstance()
     if not isinstance(root, objects.Root):
         raise TypeError("Checkpoint must be called on a root object.")
 
+    if background and not _can_fork_checkpoint(root):
+        warn(
+            "Can not write a checkpoint in the background with listeners "
+            "enabled or a shared backing store. Writing it in the "
+            "foreground."
+        )
+        background = False
+
+    # Keep at most one copy-on-write snapshot of the simulator.
+    waitForCheckpoint()
+
     drain()
     memWriteback(root)
     print("Writing checkpoint")
-    _m5.core.serializeAll(dir)
+
+    if background:
+        # Terminate helper threads that service parallel event queues.
+        _m5.event.terminateEventQueueThreads()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _write_checkpoint(dir, incremental)
+            except BaseException:
+                traceback.print_exc()
+                os._exit(1)
+            os._exit(0)
+        _background_checkpoint = (pid, dir)
+    else:
+        _write_checkpoint(dir, incremental)
+
+    _checkpoint_resume_times.append(time.monotonic() - start)
+
+
+def _write_checkpoint(dir, incremental):
+    _m5.core.setIncrementalCheckpoint(incremental)
+    try:
+        _m5.core.serializeAll(dir)
+    finally:
+        _m5.core.setIncrementalCheckpoint(False)
+
+
+def _can_fork_checkpoint(root):
+    if not _m5.core.listenersDisabled():
+        return False
+    for obj in _descendants(root):
+        if isinstance(obj, objects.System) and obj.shared_backstore:
+            return False
+    return True
+
+
+def waitForCheckpoint():
+    """Wait for the checkpoint being written in the background, if any.
+
+    Raises a RuntimeError if the checkpoint could not be written.
+    """
+    global _background_checkpoint
+
+    if _background_checkpoint is None:
+        return
+    pid, dir = _background_checkpoint
+    _background_checkpoint = None
+    _, status = os.waitpid(pid, 0)
+    if not os.WIFEXITED(status) or os.WEXITSTATUS(status) != 0:
+        raise RuntimeError(
+            f"Failed to write the checkpoint '{dir}' in the background."
+        )
+
+
+# Don't exit before the checkpoint being written in the background is.
+atexit.register(waitForCheckpoint)
+
+
+def takeCheckpointResumeTimes():
+    """Return the host seconds the simulation was paused for by each
+    checkpoint taken since the last call.
+    """
+    global _checkpoint_resume_times
+
+    times = _checkpoint_resume_times
+    _checkpoint_resume_times = []
+    return times
 
 
 def _changeMemoryMode(system, mode):
@@ -411,7 +565,7 @@ def switchCpus(system, cpuList, verbose=True):
 
 
 def notifyFork(root):
-    for obj in root.descendants():
+    for obj in _descendants(root):
         obj.notifyFork()
 
 
@@ -442,6 +596,7 @@ def fork(simout="%(parent)s.f%(fork_seq)i"):
     from m5 import options
 
     global fork_count
+    global _background_checkpoint
 
     if not _m5.core.listenersDisabled():
         raise RuntimeError("Can not fork a simulator with listeners enabled")
@@ -457,6 +612,9 @@ def fork(simout="%(parent)s.f%(fork_seq)i"):
         raise e
 
     if pid == 0:
+        # The checkpoint being written in the background, if any, is a
+        # child of the parent process, which waits for it.
+        _background_checkpoint = None
         # In child, notify objects of the fork
         root = objects.Root.getInstance()
         notifyFork(root)
@@ -0,0 +1,231 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Profiling of the simulator's startup.
+
+When enabled, the time from enabling the profile (e.g., at the start of
+gem5, with --startup-profile) to the first tick is split into phases:
+the Python configuration script, then each pass m5.instantiate() makes
+over the SimObjects (unproxyParams, createCCObject, connectPorts, init,
+regStats, loadState/initState, etc.) and the startup on the first call
+of m5.simulate(). For each phase, the host wall-clock seconds, the
+change in the host resident memory and the change in the number of
+memory blocks allocated by Python are recorded. For the passes over the
+SimObjects, the seconds and Python allocations are also recorded per
+SimObject type, so the report tells which types dominate the startup.
+
+The report is a dictionary (see report()), which can be written as JSON
+with dump(). If a path is given to enable(), the report is written to it
+once the startup is complete.
+"""
+
+import contextlib
+import json
+import os
+import sys
+import time
+
+_enabled = False
+_path = None
+_start = None
+_phases = []
+_types = {}
+_last_phase_end = None
+
+# Gaps between phases shorter than this are not recorded, so that the report
+# is not cluttered by the code between consecutive phases.
+_min_gap_seconds = 0.001
+
+
+def _rss_bytes():
+    # Reading /proc is cheap, and is only done once per phase.
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def enable(path=None):
+    """Start profiling the startup.
+
+    Arguments:
+      path -- An optional file to write the report to, as JSON, once the
+              startup is complete.
+    """
+    global _enabled, _path, _start, _phases, _types, _last_phase_end
+
+    _enabled = True
+    _path = path
+    _start = time.perf_counter()
+    _phases = []
+    _types = {}
+    _last_phase_end = (_start, _rss_bytes(), sys.getallocatedblocks())
+
+
+def disable():
+    """Stop profiling the startup."""
+    global _enabled
+
+    _enabled = False
+
+
+def isEnabled():
+    """Return whether the startup is being profiled."""
+    return _enabled
+
+
+def _add_phase(name, start, end):
+    _phases.append(
+        {
+            "phase": name,
+            "seconds": end[0] - start[0],
+            "rss_bytes": end[1] - start[1],
+            "py_blocks": end[2] - start[2],
+        }
+    )
+
+
+def _mark():
+    return (time.perf_counter(), _rss_bytes(), sys.getallocatedblocks())
+
+
+def _add_gap(name, start):
+    # Time spent outside of the profiled phases (e.g., in the configuration
+    # script before m5.instantiate()) is recorded as a phase of its own.
+    if _last_phase_end and start[0] - _last_phase_end[0] > _min_gap_seconds:
+        _add_phase(name, _last_phase_end, start)
+
+
+@contextlib.contextmanager
+def phase(name, gap="python"):
+    """Profile a phase of the startup.
+
+    Arguments:
+      name -- The name of the phase.
+      gap -- The name to record the time since the previous phase under.
+    """
+    global _last_phase_end
+
+    if not _enabled:
+        yield
+        return
+
+    start = _mark()
+    _add_gap(gap, start)
+    try:
+        yield
+    finally:
+        end = _mark()
+        _add_phase(name, start, end)
+        _last_phase_end = end
+
+
+def each(name, objs):
+    """Profile a pass over SimObjects, per SimObject type.
+
+    The time between an object being returned and the next one being
+    requested (i.e., the body of the loop over the objects) is recorded
+    against the type of the object.
+
+    Arguments:
+      name -- The name of the phase.
+      objs -- The SimObjects.
+
+    Return Value:
+      An iterable over the objects.
+    """
+    if not _enabled:
+        return objs
+    return _each(name, objs)
+
+
+def _each(name, objs):
+    with phase(name):
+        for obj in objs:
+            stats = _types.setdefault(type(obj).__name__, {}).setdefault(
+                name, [0, 0.0, 0]
+            )
+            blocks = sys.getallocatedblocks()
+            start = time.perf_counter()
+            yield obj
+            stats[1] += time.perf_counter() - start
+            stats[2] += sys.getallocatedblocks() - blocks
+            stats[0] += 1
+
+
+def report():
+    """Return the startup profile.
+
+    Return Value:
+      A dictionary with:
+        seconds -- The total seconds profiled.
+        phases -- The phases, in the order they ran.
+        types -- The SimObject types, in decreasing order of the seconds
+                 spent in passes over them, with a breakdown per phase.
+    """
+    types = []
+    for type_name, type_phases in _types.items():
+        phases = {
+            name: {"objects": count, "seconds": seconds, "py_blocks": blocks}
+            for name, (count, seconds, blocks) in type_phases.items()
+        }
+        types.append(
+            {
+                "type": type_name,
+                "objects": max(p["objects"] for p in phases.values()),
+                "seconds": sum(p["seconds"] for p in phases.values()),
+                "py_blocks": sum(p["py_blocks"] for p in phases.values()),
+                "phases": phases,
+            }
+        )
+    types.sort(key=lambda t: (-t["seconds"], t["type"]))
+
+    return {
+        "seconds": sum(p["seconds"] for p in _phases),
+        "phases": list(_phases),
+        "types": types,
+    }
+
+
+def dump(path):
+    """Write the startup profile to a file as JSON."""
+    with open(path, "w") as f:
+        json.dump(report(), f, indent=2)
+
+
+def finish():
+    """Complete the startup profile, once the simulation is about to start.
+
+    This writes the report to the path given to enable(), if any, and stops
+    profiling.
+    """
+    if not _enabled:
+        return
+    disable()
+    if _path:
+        dump(_path)
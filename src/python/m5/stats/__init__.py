@@ -269,34 +269,46 @@ def _visit_stats(visitor, root=None):
     _visit_groups(for_each_stat, root=root)
 
 
-def _bindStatHierarchy(root):
-    def _bind_obj(name, obj):
+def _bindStatHierarchy(root, objs=None):
+    """Add the stat groups of the SimObjects in a hierarchy to the stat
+    group of their closest ancestor which has one.
+
+    Arguments:
+      root -- The root of the hierarchy.
+      objs -- Optionally, the list of the objects in the hierarchy (see
+              SimObject.descendants_list()), to avoid walking it again.
+    """
+
+    def _bind_obj(parent, name, obj):
         if isNullPointer(obj):
             return
         if m5.SimObject.isSimObjectVector(obj):
             if len(obj) == 1:
-                _bind_obj(name, obj[0])
+                _bind_obj(parent, name, obj[0])
             else:
                 for idx, obj in enumerate(obj):
-                    _bind_obj(f"{name}{idx}", obj)
+                    _bind_obj(parent, f"{name}{idx}", obj)
         else:
             # We need this check because not all obj.getCCObject() is an
             # instance of Stat::Group. For example, sc_core::sc_module, the C++
             # class of SystemC_ScModule, is not a subclass of Stat::Group. So
             # it will cause a type error if obj is a SystemC_ScModule when
             # calling addStatGroup().
-            if isinstance(obj.getCCObject(), _m5.stats.Group):
-                parent = root
+            cc_obj = obj.getCCObject()
+            if isinstance(cc_obj, _m5.stats.Group):
                 while parent:
                     if hasattr(parent, "addStatGroup"):
-                        parent.addStatGroup(name, obj.getCCObject())
+                        parent.addStatGroup(name, cc_obj)
                         break
                     parent = parent.get_parent()
 
-            _bindStatHierarchy(obj)
-
-    for name, obj in root._children.items():
-        _bind_obj(name, obj)
+    # Each object in the hierarchy binds its children. A group's
+    # subgroups are kept sorted by name, so the order is not important.
+    if objs is None:
+        objs = root.descendants_list()
+    for parent in objs:
+        for name, obj in parent._children.items():
+            _bind_obj(parent, name, obj)
 
 
 names = []
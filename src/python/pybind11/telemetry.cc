@@ -0,0 +1,74 @@
+/*
+ * Copyright (c) 2023 The Regents of the University of California.
+ * All rights reserved.
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are
+ * met: redistributions of source code must retain the above copyright
+ * notice, this list of conditions and the following disclaimer;
+ * redistributions in binary form must reproduce the above copyright
+ * notice, this list of conditions and the following disclaimer in the
+ * documentation and/or other materials provided with the distribution;
+ * neither the name of the copyright holders nor the names of its
+ * contributors may be used to endorse or promote products derived from
+ * this software without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+ * "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+ * LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+ * A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+ * OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+ * SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+ * LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+ * DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+ * THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+ * (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+ * OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+ */
+
+#include "pybind11/pybind11.h"
+#include "pybind11/stl.h"
+
+#include "sim/init.hh"
+#include "sim/telemetry.hh"
+
+namespace py = pybind11;
+
+namespace gem5
+{
+
+namespace
+{
+
+void
+telemetry_pybind(py::module_ &m_internal)
+{
+    py::module_ m = m_internal.def_submodule("telemetry");
+
+    m.def("enable", &telemetry::enable,
+          py::arg("interval"), py::arg("path") = "");
+    m.def("disable", &telemetry::disable);
+    m.def("enabled", &telemetry::enabled);
+    m.def("resync", &telemetry::resync);
+    m.def("droppedSamples", &telemetry::droppedSamples);
+
+    // Samples are returned as dictionaries, with the same keys as the JSON
+    // Lines output.
+    m.def("takeSamples", []() {
+            py::list samples;
+            for (const auto &sample : telemetry::takeSamples()) {
+                py::dict d;
+                d["host_seconds"] = sample.hostSeconds;
+                d["host_cpu_seconds"] = sample.hostCpuSeconds;
+                d["tick"] = sample.tick;
+                d["insts"] = sample.insts;
+                d["rss_bytes"] = sample.rssBytes;
+                samples.append(d);
+            }
+            return samples;
+        });
+}
+EmbeddedPyBind embed_("telemetry", &telemetry_pybind);
+
+} // anonymous namespace
+} // namespace gem5
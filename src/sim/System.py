@@ -105,6 +105,13 @@ class System(SimObject):
         "shared_backstore is non-empty.",
     )
 
+    checkpoint_compression_threads = Param.Unsigned(
+        0,
+        "Maximum number of host threads compressing the memory when it "
+        "is checkpointed. Leave this 0 to use one per host CPU the "
+        "simulator may run on.",
+    )
+
     cache_line_size = Param.Unsigned(64, "Cache line size in bytes")
 
     redirect_paths = VectorParam.RedirectPath([], "Path redirections")
@@ -0,0 +1,144 @@
+/*
+ * Copyright (c) 2023 The Regents of the University of California.
+ * All rights reserved.
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are
+ * met: redistributions of source code must retain the above copyright
+ * notice, this list of conditions and the following disclaimer;
+ * redistributions in binary form must reproduce the above copyright
+ * notice, this list of conditions and the following disclaimer in the
+ * documentation and/or other materials provided with the distribution;
+ * neither the name of the copyright holders nor the names of its
+ * contributors may be used to endorse or promote products derived from
+ * this software without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+ * "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+ * LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+ * A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+ * OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+ * SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+ * LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+ * DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+ * THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+ * (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+ * OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+ */
+
+#include "sim/host_budget.hh"
+
+#include <algorithm>
+
+#include "base/logging.hh"
+#include "sim/cur_tick.hh"
+#include "sim/eventq.hh"
+#include "sim/host_clock.hh"
+#include "sim/sim_exit.hh"
+
+namespace gem5
+{
+
+namespace host_budget
+{
+
+const std::string exitCause = "host time budget exceeded";
+
+namespace
+{
+
+/**
+ * The minimum number of times the host time is checked within the smaller
+ * budget. The host time is also checked at least once per host second.
+ */
+const double checksPerBudget = 4;
+
+class BudgetEvent : public Event
+{
+  private:
+    const HostClock::time_point wallDeadline;
+    const double cpuDeadline;
+    const bool hasWallBudget;
+    const bool hasCpuBudget;
+    HostCheckPeriod period;
+
+  public:
+    BudgetEvent(double wall_seconds, double cpu_seconds, double interval)
+        : Event(Sim_Exit_Pri),
+          wallDeadline(HostClock::now() +
+                       std::chrono::duration_cast<HostClock::duration>(
+                           std::chrono::duration<double>(wall_seconds))),
+          cpuDeadline(hostCpuSeconds() + cpu_seconds),
+          hasWallBudget(wall_seconds > 0), hasCpuBudget(cpu_seconds > 0),
+          period(interval, 1)
+    {
+    }
+
+    bool
+    exceeded(HostClock::time_point now) const
+    {
+        return (hasWallBudget && now >= wallDeadline) ||
+            (hasCpuBudget && hostCpuSeconds() >= cpuDeadline);
+    }
+
+    void
+    process() override
+    {
+        HostClock::time_point now = HostClock::now();
+        if (exceeded(now)) {
+            exitSimLoop(exitCause);
+            return;
+        }
+
+        mainEventQueue[0]->schedule(this, curTick() + period.update(now));
+    }
+
+    const char *description() const override { return "HostBudget"; }
+};
+
+BudgetEvent *budgetEvent = nullptr;
+
+} // anonymous namespace
+
+void
+set(double wall_seconds, double cpu_seconds)
+{
+    fatal_if(wall_seconds < 0 || cpu_seconds < 0,
+             "Host time budgets must not be negative.");
+
+    clear();
+    if (wall_seconds == 0 && cpu_seconds == 0)
+        return;
+
+    double smallest = wall_seconds;
+    if (smallest == 0 || (cpu_seconds > 0 && cpu_seconds < smallest))
+        smallest = cpu_seconds;
+    double interval = std::min(1.0, smallest / checksPerBudget);
+
+    EventQueue *eq = mainEventQueue[0];
+    budgetEvent = new BudgetEvent(wall_seconds, cpu_seconds, interval);
+    eq->schedule(budgetEvent,
+                 eq->getCurTick() + HostCheckPeriod::minPeriod());
+}
+
+void
+clear()
+{
+    if (!budgetEvent)
+        return;
+
+    if (budgetEvent->scheduled())
+        mainEventQueue[0]->deschedule(budgetEvent);
+
+    delete budgetEvent;
+    budgetEvent = nullptr;
+}
+
+bool
+active()
+{
+    return budgetEvent && budgetEvent->scheduled();
+}
+
+} // namespace host_budget
+} // namespace gem5
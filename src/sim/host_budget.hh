@@ -0,0 +1,73 @@
+/*
+ * Copyright (c) 2023 The Regents of the University of California.
+ * All rights reserved.
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are
+ * met: redistributions of source code must retain the above copyright
+ * notice, this list of conditions and the following disclaimer;
+ * redistributions in binary form must reproduce the above copyright
+ * notice, this list of conditions and the following disclaimer in the
+ * documentation and/or other materials provided with the distribution;
+ * neither the name of the copyright holders nor the names of its
+ * contributors may be used to endorse or promote products derived from
+ * this software without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+ * "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+ * LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+ * A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+ * OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+ * SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+ * LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+ * DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+ * THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+ * (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+ * OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+ */
+
+#ifndef __SIM_HOST_BUDGET_HH__
+#define __SIM_HOST_BUDGET_HH__
+
+#include <string>
+
+namespace gem5
+{
+
+/**
+ * Host time budgets for a simulation.
+ *
+ * When a budget is set, an event periodically checks the host wall-clock
+ * time and the host CPU time used by the process. Once either exceeds its
+ * budget, the simulation loop is exited with the cause
+ * `host_budget::exitCause`. This allows a simulation to be stopped cleanly
+ * (e.g., to take a checkpoint) before a batch job's allocation ends.
+ *
+ * The event is scheduled in simulated time. Its period is adapted to the
+ * observed simulation rate (see HostCheckPeriod).
+ */
+namespace host_budget
+{
+
+/** The cause of the exit event when a budget is exceeded. */
+extern const std::string exitCause;
+
+/**
+ * Set the budgets, relative to the current host time and the CPU time
+ * used so far. Any previously set budgets are replaced.
+ *
+ * @param wallSeconds The host wall-clock seconds budget. 0 for no budget.
+ * @param cpuSeconds The host CPU seconds budget. 0 for no budget.
+ */
+void set(double wallSeconds, double cpuSeconds);
+
+/** Clear the budgets. */
+void clear();
+
+/** Returns true if a budget is set and has not yet been exceeded. */
+bool active();
+
+} // namespace host_budget
+} // namespace gem5
+
+#endif // __SIM_HOST_BUDGET_HH__
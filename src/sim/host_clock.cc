@@ -0,0 +1,98 @@
+/*
+ * Copyright (c) 2023 The Regents of the University of California.
+ * All rights reserved.
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are
+ * met: redistributions of source code must retain the above copyright
+ * notice, this list of conditions and the following disclaimer;
+ * redistributions in binary form must reproduce the above copyright
+ * notice, this list of conditions and the following disclaimer in the
+ * documentation and/or other materials provided with the distribution;
+ * neither the name of the copyright holders nor the names of its
+ * contributors may be used to endorse or promote products derived from
+ * this software without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+ * "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+ * LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+ * A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+ * OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+ * SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+ * LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+ * DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+ * THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+ * (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+ * OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+ */
+
+#include "sim/host_clock.hh"
+
+#include <sys/resource.h>
+
+#include <algorithm>
+
+#include "sim/core.hh"
+#include "sim/cur_tick.hh"
+
+namespace gem5
+{
+
+double
+hostSeconds(HostClock::duration duration)
+{
+    return std::chrono::duration<double>(duration).count();
+}
+
+double
+hostCpuSeconds()
+{
+    struct rusage usage;
+    if (getrusage(RUSAGE_SELF, &usage) != 0)
+        return 0;
+    return usage.ru_utime.tv_sec + usage.ru_utime.tv_usec * 1e-6 +
+        usage.ru_stime.tv_sec + usage.ru_stime.tv_usec * 1e-6;
+}
+
+HostCheckPeriod::HostCheckPeriod(double _interval, double _checks)
+    : interval(_interval), checks(_checks)
+{
+    reset();
+}
+
+Tick
+HostCheckPeriod::minPeriod()
+{
+    return sim_clock::as_int::us;
+}
+
+Tick
+HostCheckPeriod::maxPeriod()
+{
+    return sim_clock::as_int::s;
+}
+
+Tick
+HostCheckPeriod::update(HostClock::time_point now)
+{
+    double host_seconds = hostSeconds(now - lastCheck);
+    Tick ticks = curTick() - lastCheckTick;
+    if (host_seconds > 0 && ticks > 0) {
+        double target = ticks / host_seconds * interval / checks;
+        target = std::min(target, 2.0 * _period);
+        _period = std::clamp<Tick>((Tick)target, minPeriod(), maxPeriod());
+    }
+    lastCheck = now;
+    lastCheckTick = curTick();
+    return _period;
+}
+
+void
+HostCheckPeriod::reset()
+{
+    _period = minPeriod();
+    lastCheck = HostClock::now();
+    lastCheckTick = curTick();
+}
+
+} // namespace gem5
@@ -0,0 +1,95 @@
+/*
+ * Copyright (c) 2023 The Regents of the University of California.
+ * All rights reserved.
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are
+ * met: redistributions of source code must retain the above copyright
+ * notice, this list of conditions and the following disclaimer;
+ * redistributions in binary form must reproduce the above copyright
+ * notice, this list of conditions and the following disclaimer in the
+ * documentation and/or other materials provided with the distribution;
+ * neither the name of the copyright holders nor the names of its
+ * contributors may be used to endorse or promote products derived from
+ * this software without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+ * "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+ * LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+ * A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+ * OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+ * SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+ * LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+ * DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+ * THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+ * (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+ * OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+ */
+
+#ifndef __SIM_HOST_CLOCK_HH__
+#define __SIM_HOST_CLOCK_HH__
+
+#include <chrono>
+
+#include "base/types.hh"
+
+namespace gem5
+{
+
+/** The host clock used to measure host wall-clock time. */
+using HostClock = std::chrono::steady_clock;
+
+/** Returns the number of seconds in a host clock duration. */
+double hostSeconds(HostClock::duration duration);
+
+/** Returns the host CPU (user and system) seconds used by the process. */
+double hostCpuSeconds();
+
+/**
+ * The period of an event which checks the host time. Events are scheduled in
+ * simulated time, so the period, in ticks, is adapted to the simulation rate
+ * such that the host time is checked about `checks` times per `interval`
+ * host seconds.
+ */
+class HostCheckPeriod
+{
+  private:
+    const double interval;
+    const double checks;
+
+    HostClock::time_point lastCheck;
+    Tick lastCheckTick;
+    Tick _period;
+
+  public:
+    HostCheckPeriod(double interval, double checks);
+
+    /** The bounds of the period. */
+    static Tick minPeriod();
+    static Tick maxPeriod();
+
+    /** The current period, in ticks. */
+    Tick period() const { return _period; }
+
+    /**
+     * Updates the period based on the simulation rate since the last check.
+     * The period at most doubles per check, to smooth out short bursts of
+     * fast simulation.
+     *
+     * @param now The host time of this check.
+     * @return The new period.
+     */
+    Tick update(HostClock::time_point now);
+
+    /**
+     * Restarts the adaptation from the minimum period. This should be used
+     * when the simulation rate may have changed abruptly (e.g., after
+     * switching from KVM to detailed CPUs), as otherwise the next check may
+     * be delayed by a period sized for the faster rate.
+     */
+    void reset();
+};
+
+} // namespace gem5
+
+#endif // __SIM_HOST_CLOCK_HH__
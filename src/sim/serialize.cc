@@ -156,6 +156,20 @@ CheckpointIn::dir()
     return currentDirectory;
 }
 
+bool CheckpointIn::incrementalCheckpoint = false;
+
+void
+CheckpointIn::setIncremental(bool incremental)
+{
+    incrementalCheckpoint = incremental;
+}
+
+bool
+CheckpointIn::incremental()
+{
+    return incrementalCheckpoint;
+}
+
 CheckpointIn::CheckpointIn(const std::string &cpt_dir)
     : db(), _cptDir(setDir(cpt_dir))
 {
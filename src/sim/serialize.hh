@@ -128,8 +128,32 @@ class CheckpointIn
      */
     static std::string dir();
 
+    /**
+     * Request that the next checkpoint is incremental
+     *
+     * Objects with large state (e.g., the physical memory) may then
+     * only store the state which changed since the last checkpoint
+     * they saved or restored, together with a pointer to that
+     * checkpoint. Objects without incremental support always store
+     * their full state.
+     *
+     * @ingroup api_serialize
+     */
+    static void setIncremental(bool incremental);
+
+    /**
+     * Whether the checkpoint being created is incremental
+     *
+     * @ingroup api_serialize
+     */
+    static bool incremental();
+
     // Filename for base checkpoint file within directory.
     static const char *baseFilename;
+
+  private:
+    // whether the checkpoint being created is incremental.
+    static bool incrementalCheckpoint;
 };
 
 /**
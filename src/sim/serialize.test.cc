@@ -168,6 +168,16 @@ TEST(CheckpointInTest, SetGetDirTick)
     ASSERT_EQ(CheckpointIn::dir(), "ti0ck/");
 }
 
+/** Tests that checkpoints are full unless requested to be incremental. */
+TEST(CheckpointInTest, SetGetIncremental)
+{
+    ASSERT_FALSE(CheckpointIn::incremental());
+    CheckpointIn::setIncremental(true);
+    ASSERT_TRUE(CheckpointIn::incremental());
+    CheckpointIn::setIncremental(false);
+    ASSERT_FALSE(CheckpointIn::incremental());
+}
+
 /**
  * Test constructor failure by requesting the creation of a checkpoint in
  * a non-existent dir.
@@ -0,0 +1,183 @@
+/*
+ * Copyright (c) 2023 The Regents of the University of California.
+ * All rights reserved.
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are
+ * met: redistributions of source code must retain the above copyright
+ * notice, this list of conditions and the following disclaimer;
+ * redistributions in binary form must reproduce the above copyright
+ * notice, this list of conditions and the following disclaimer in the
+ * documentation and/or other materials provided with the distribution;
+ * neither the name of the copyright holders nor the names of its
+ * contributors may be used to endorse or promote products derived from
+ * this software without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+ * "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+ * LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+ * A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+ * OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+ * SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+ * LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+ * DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+ * THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+ * (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+ * OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+ */
+
+#include "sim/telemetry.hh"
+
+#include <deque>
+#include <fstream>
+#include <iomanip>
+
+#include "base/hostinfo.hh"
+#include "base/logging.hh"
+#include "cpu/base.hh"
+#include "sim/cur_tick.hh"
+#include "sim/eventq.hh"
+#include "sim/host_clock.hh"
+
+namespace gem5
+{
+
+namespace telemetry
+{
+
+namespace
+{
+
+/** The number of times the host time is checked per sampling interval. */
+const double checksPerInterval = 8;
+
+/** The samples which have not yet been collected. */
+std::deque<Sample> buffer;
+uint64_t dropped = 0;
+
+class TelemetryEvent : public Event
+{
+  private:
+    const double interval;
+    std::ofstream out;
+
+    const HostClock::time_point start;
+    HostClock::time_point lastSample;
+
+  public:
+    HostCheckPeriod period;
+
+    TelemetryEvent(double _interval, const std::string &path)
+        : Event(Stat_Event_Pri), interval(_interval),
+          start(HostClock::now()), lastSample(start),
+          period(_interval, checksPerInterval)
+    {
+        if (!path.empty()) {
+            out.open(path, std::ios::app);
+            warn_if(!out, "Could not open the telemetry file '%s'.", path);
+            out << std::fixed;
+        }
+    }
+
+    void
+    sample(HostClock::time_point now)
+    {
+        Sample s;
+        s.hostSeconds = hostSeconds(now - start);
+        s.hostCpuSeconds = hostCpuSeconds();
+        s.tick = curTick();
+        s.insts = BaseCPU::numSimulatedInsts();
+        s.rssBytes = memResident() * 1024;
+
+        if (out.is_open()) {
+            out << "{\"host_seconds\": " << std::setprecision(6)
+                << s.hostSeconds
+                << ", \"host_cpu_seconds\": " << s.hostCpuSeconds
+                << ", \"tick\": " << s.tick
+                << ", \"insts\": " << s.insts
+                << ", \"rss_bytes\": " << s.rssBytes << "}\n";
+            out.flush();
+        }
+
+        buffer.push_back(s);
+        if (buffer.size() > maxBuffered) {
+            buffer.pop_front();
+            dropped++;
+        }
+    }
+
+    void
+    process() override
+    {
+        HostClock::time_point now = HostClock::now();
+        if (hostSeconds(now - lastSample) >= interval) {
+            sample(now);
+            lastSample = now;
+        }
+
+        mainEventQueue[0]->schedule(this, curTick() + period.update(now));
+    }
+
+    const char *description() const override { return "Telemetry"; }
+};
+
+TelemetryEvent *telemetryEvent = nullptr;
+
+} // anonymous namespace
+
+void
+enable(double interval, const std::string &path)
+{
+    fatal_if(interval <= 0,
+             "The telemetry interval must be positive (got %f).", interval);
+
+    disable();
+
+    EventQueue *eq = mainEventQueue[0];
+    telemetryEvent = new TelemetryEvent(interval, path);
+    eq->schedule(telemetryEvent,
+                 eq->getCurTick() + HostCheckPeriod::minPeriod());
+}
+
+void
+disable()
+{
+    if (!telemetryEvent)
+        return;
+
+    if (telemetryEvent->scheduled())
+        mainEventQueue[0]->deschedule(telemetryEvent);
+
+    delete telemetryEvent;
+    telemetryEvent = nullptr;
+}
+
+bool
+enabled()
+{
+    return telemetryEvent != nullptr;
+}
+
+void
+resync()
+{
+    if (telemetryEvent)
+        telemetryEvent->period.reset();
+}
+
+std::vector<Sample>
+takeSamples()
+{
+    std::vector<Sample> samples(buffer.begin(), buffer.end());
+    buffer.clear();
+    return samples;
+}
+
+uint64_t
+droppedSamples()
+{
+    return dropped;
+}
+
+} // namespace telemetry
+} // namespace gem5
@@ -0,0 +1,113 @@
+/*
+ * Copyright (c) 2023 The Regents of the University of California.
+ * All rights reserved.
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are
+ * met: redistributions of source code must retain the above copyright
+ * notice, this list of conditions and the following disclaimer;
+ * redistributions in binary form must reproduce the above copyright
+ * notice, this list of conditions and the following disclaimer in the
+ * documentation and/or other materials provided with the distribution;
+ * neither the name of the copyright holders nor the names of its
+ * contributors may be used to endorse or promote products derived from
+ * this software without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+ * "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+ * LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+ * A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+ * OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+ * SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+ * LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+ * DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+ * THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+ * (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+ * OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+ */
+
+#ifndef __SIM_TELEMETRY_HH__
+#define __SIM_TELEMETRY_HH__
+
+#include <cstdint>
+#include <string>
+#include <vector>
+
+#include "base/types.hh"
+
+namespace gem5
+{
+
+/**
+ * Host-side simulation throughput telemetry.
+ *
+ * When enabled, an event periodically checks the host wall-clock time and,
+ * every `interval` host seconds, records a sample of the simulation's
+ * progress: the current tick, the number of instructions committed by all
+ * CPUs, the host's resident memory usage, and the host wall-clock and CPU
+ * time. Samples are written as JSON Lines to a file (if one is given) and
+ * buffered so they can be collected from Python in batches.
+ *
+ * The event is scheduled in simulated time. Its period is adapted to the
+ * observed simulation rate so that the host time is checked a few times per
+ * interval, and taking a sample neither dumps the stats nor calls into
+ * Python.
+ */
+namespace telemetry
+{
+
+struct Sample
+{
+    /** The host wall-clock seconds since telemetry was enabled. */
+    double hostSeconds;
+    /** The host CPU (user and system) seconds used by the process. */
+    double hostCpuSeconds;
+    /** The current tick. */
+    Tick tick;
+    /** The number of instructions committed by all CPUs. */
+    Counter insts;
+    /** The host resident set size, in bytes. */
+    uint64_t rssBytes;
+};
+
+/**
+ * Enable telemetry. If telemetry is already enabled, it is restarted with
+ * the new settings.
+ *
+ * @param interval The host wall-clock seconds between samples.
+ * @param path The file to append the samples to as JSON Lines. If empty,
+ *        the samples are only buffered.
+ */
+void enable(double interval, const std::string &path);
+
+/** Disable telemetry. Buffered samples may still be collected. */
+void disable();
+
+/** Returns true if telemetry is enabled. */
+bool enabled();
+
+/**
+ * Restart the adaptation of the period at which the host time is checked.
+ * This should be called when the simulation rate may have changed abruptly
+ * (e.g., after switching from KVM to detailed CPUs), as otherwise the next
+ * check may be delayed by a period sized for the faster rate.
+ */
+void resync();
+
+/**
+ * Returns, and removes, the buffered samples. At most `maxBuffered` samples
+ * are buffered. If more samples are taken between collections, the oldest
+ * are dropped.
+ */
+std::vector<Sample> takeSamples();
+
+/** Returns the number of buffered samples that have been dropped. */
+uint64_t droppedSamples();
+
+/** The maximum number of buffered samples. */
+const size_t maxBuffered = 1 << 16;
+
+} // namespace telemetry
+} // namespace gem5
+
+#endif // __SIM_TELEMETRY_HH__
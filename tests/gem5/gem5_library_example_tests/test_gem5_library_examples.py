@@ -55,6 +55,23 @@ gem5_verify_config(
     length=constants.quick_tag,
 )
 
+gem5_verify_config(
+    name="test-gem5-library-riscv-hello-fork-variants",
+    fixtures=(),
+    verifiers=(verifier.MatchRegex(re.compile(r"Done running variants.")),),
+    config=joinpath(
+        config.base_dir,
+        "configs",
+        "example",
+        "gem5_library",
+        "riscv-hello-fork-variants.py",
+    ),
+    config_args=[],
+    valid_isas=(constants.all_compiled_tag,),
+    valid_hosts=constants.supported_hosts,
+    length=constants.quick_tag,
+)
+
 gem5_verify_config(
     name="test-gem5-library-riscv-hello-save-checkpoint",
     fixtures=(),
@@ -222,6 +239,29 @@ if os.access("/dev/kvm", mode=os.R_OK | os.W_OK):
         uses_kvm=True,
     )
 
+if os.access("/dev/kvm", mode=os.R_OK | os.W_OK):
+    # The x86-functional-warming-benchmark uses KVM cores, this test will
+    # therefore only be run on systems that support KVM.
+    gem5_verify_config(
+        name="test-gem5-library-example-x86-functional-warming-benchmark",
+        fixtures=(),
+        verifiers=(
+            verifier.MatchRegex(re.compile(r"Detailed warmup needed: ")),
+        ),
+        config=joinpath(
+            config.base_dir,
+            "configs",
+            "example",
+            "gem5_library",
+            "x86-functional-warming-benchmark.py",
+        ),
+        config_args=["--functional-warming"],
+        valid_isas=(constants.all_compiled_tag,),
+        valid_hosts=(constants.host_x86_64_tag,),
+        length=constants.long_tag,
+        uses_kvm=True,
+    )
+
 if os.access("/dev/kvm", mode=os.R_OK | os.W_OK):
     # The x86-gapbs-benchmarks uses KVM cores, this test will therefore only
     # be run on systems that support KVM.
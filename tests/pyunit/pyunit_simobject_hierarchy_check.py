@@ -0,0 +1,61 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import unittest
+
+from m5.objects import SubSystem
+
+
+def _hierarchy(fanout: int, depth: int) -> SubSystem:
+    """
+    Builds a synthetic SimObject hierarchy. Each object in the first `depth`
+    levels has a vector of `fanout` children and one single child, like a
+    system with many cores (and their caches) and a few shared objects.
+    """
+    root = SubSystem()
+    level = [root]
+    for _ in range(depth):
+        next_level = []
+        for obj in level:
+            obj.nodes = [SubSystem() for _ in range(fanout)]
+            obj.leaf = SubSystem()
+            next_level.extend(obj.nodes)
+        level = next_level
+    return root
+
+
+class SimObjectHierarchyTestSuite(unittest.TestCase):
+    """Tests for SimObject.descendants_list."""
+
+    def test_same_order_as_descendants(self) -> None:
+        # A fanout of more than ten checks the vector elements are sorted as
+        # the vector (cpu2 before cpu10), not by their names.
+        root = _hierarchy(fanout=12, depth=2)
+        objs = root.descendants_list()
+
+        self.assertEqual(list(root.descendants()), objs)
+        self.assertEqual(1 + 13 + 12 * 13, len(objs))
@@ -0,0 +1,167 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import unittest
+
+from m5.objects import SubSystem, ThermalDomain, ThermalNode
+from m5.params import isNullPointer
+from m5.proxy import isproxy
+
+
+def _hierarchy(fanout: int, depth: int) -> SubSystem:
+    """
+    Builds a synthetic SimObject hierarchy with a thermal node and a thermal
+    domain at the root, like a system. Every object refers to the domain
+    through its `thermal_domain` param.
+    """
+    root = SubSystem()
+    root.node = ThermalNode()
+    root.domain = ThermalDomain()
+    root.thermal_domain = root.domain
+    level = [root]
+    for _ in range(depth):
+        next_level = []
+        for obj in level:
+            obj.nodes = [SubSystem() for _ in range(fanout)]
+            for node in obj.nodes:
+                node.thermal_domain = root.domain
+            next_level.extend(obj.nodes)
+        level = next_level
+    return root
+
+
+def _find_any(obj, ptype):
+    """SimObject.find_any, scanning the children and params every time."""
+    if isinstance(obj, ptype):
+        return obj, True
+    found_obj = None
+    for child in obj._children.values():
+        if isinstance(child, ptype) and not getattr(child, "_visited", False):
+            assert found_obj is None or child == found_obj
+            found_obj = child
+    for pname, pdesc in obj._params.items():
+        if issubclass(pdesc.ptype, ptype):
+            match_obj = obj._values[pname]
+            assert found_obj is None or found_obj == match_obj
+            found_obj = match_obj
+    return found_obj, found_obj != None
+
+
+def _find_all(obj, ptype):
+    """SimObject.find_all, walking the whole subtree every time."""
+    all = {}
+    for child in obj._children.values():
+        children = child if isinstance(child, list) else [child]
+        for child in children:
+            if isinstance(child, ptype) and not isNullPointer(child):
+                all[child] = True
+            all.update(dict.fromkeys(_find_all(child, ptype)[0], True))
+    for pname, pdesc in obj._params.items():
+        if issubclass(pdesc.ptype, ptype):
+            match_obj = obj._values[pname]
+            if not isproxy(match_obj) and not isNullPointer(match_obj):
+                all[match_obj] = True
+    return sorted(all.keys(), key=lambda o: o.path()), True
+
+
+def _resolve(obj, find):
+    """Resolves a proxy for the thermal node the way BaseProxy.unproxy does."""
+    done = False
+    while not done:
+        obj = obj._parent
+        result, done = find(obj, ThermalNode)
+    return result
+
+
+class SimObjectProxyTestSuite(unittest.TestCase):
+    """Tests for the type indexes behind SimObject.find_any and find_all."""
+
+    def test_same_results(self) -> None:
+        root = _hierarchy(fanout=4, depth=3)
+        for obj in root.descendants_list():
+            for ptype in (SubSystem, ThermalDomain, ThermalNode):
+                self.assertEqual(_find_any(obj, ptype), obj.find_any(ptype))
+                self.assertEqual(_find_all(obj, ptype), obj.find_all(ptype))
+
+    def test_add_and_clear_child(self) -> None:
+        root = _hierarchy(fanout=2, depth=3)
+        leaf = root.nodes[1].nodes[0].nodes[1]
+        self.assertEqual(14, len(root.find_all(SubSystem)[0]))
+        self.assertEqual((None, False), leaf.find_any(ThermalNode))
+
+        leaf.node = ThermalNode()
+        self.assertEqual((leaf.node, True), leaf.find_any(ThermalNode))
+        self.assertIn(leaf.node, root.find_all(ThermalNode)[0])
+        self.assertEqual(
+            _find_all(root, ThermalNode), root.find_all(ThermalNode)
+        )
+
+        leaf.clear_child("node")
+        self.assertEqual((None, False), leaf.find_any(ThermalNode))
+        self.assertEqual([root.node], root.find_all(ThermalNode)[0])
+
+    def test_param_value_changes(self) -> None:
+        # The indexes keep which params to read, not their values, so
+        # setting a param (e.g. to its unproxied value) needs no update.
+        root = _hierarchy(fanout=2, depth=1)
+        self.assertEqual([root.domain], root.find_all(ThermalDomain)[0])
+
+        other = ThermalDomain()
+        root.nodes[0].other = other
+        root.nodes[1].thermal_domain = other
+        self.assertEqual(
+            sorted([root.domain, other], key=lambda o: o.path()),
+            root.find_all(ThermalDomain)[0],
+        )
+
+    def test_vector_changes(self) -> None:
+        root = _hierarchy(fanout=3, depth=1)
+        self.assertEqual([root.node], root.find_all(ThermalNode)[0])
+
+        new = SubSystem()
+        new.node = ThermalNode()
+        root.nodes[1] = new
+        self.assertEqual((new.node, True), new.find_any(ThermalNode))
+        self.assertEqual(
+            _find_all(root, ThermalNode), root.find_all(ThermalNode)
+        )
+        self.assertIn(new.node, root.find_all(ThermalNode)[0])
+
+        del root.nodes[1]
+        self.assertEqual(
+            _find_all(root, ThermalNode), root.find_all(ThermalNode)
+        )
+        self.assertEqual([root.node], root.find_all(ThermalNode)[0])
+
+        root.nodes.append(new)
+        self.assertEqual(
+            _find_all(root, ThermalNode), root.find_all(ThermalNode)
+        )
+        self.assertIn(new.node, root.find_all(ThermalNode)[0])
+
+        root.nodes.pop()
+        self.assertEqual([root.node], root.find_all(ThermalNode)[0])
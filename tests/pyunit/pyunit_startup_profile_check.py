@@ -0,0 +1,106 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from m5 import startup_profile
+
+
+class CPU:
+    pass
+
+
+class Cache:
+    pass
+
+
+class StartupProfileTestSuite(unittest.TestCase):
+    """Tests for m5.startup_profile."""
+
+    def tearDown(self) -> None:
+        startup_profile.disable()
+
+    def test_disabled(self) -> None:
+        objs = [CPU(), Cache()]
+        self.assertIs(objs, startup_profile.each("init", objs))
+        with startup_profile.phase("regStats"):
+            pass
+        self.assertFalse(startup_profile.isEnabled())
+
+    def test_report(self) -> None:
+        startup_profile.enable()
+        # The configuration script.
+        time.sleep(0.01)
+        objs = [CPU(), Cache(), Cache()]
+
+        for obj in startup_profile.each("createCCObject", objs):
+            if isinstance(obj, CPU):
+                # Make the CPU the most expensive type.
+                sum(range(200_000))
+        with startup_profile.phase("regStats"):
+            pass
+        for obj in startup_profile.each("init", objs):
+            pass
+
+        report = startup_profile.report()
+        phases = [phase["phase"] for phase in report["phases"]]
+        self.assertEqual("python", phases[0])
+        # A pause of the test process between two phases is reported as a
+        # "python" gap, so only the order of the other phases is checked.
+        self.assertEqual(
+            ["createCCObject", "regStats", "init"],
+            [phase for phase in phases if phase != "python"],
+        )
+        self.assertAlmostEqual(
+            sum(phase["seconds"] for phase in report["phases"]),
+            report["seconds"],
+        )
+
+        types = report["types"]
+        self.assertEqual(["CPU", "Cache"], [t["type"] for t in types])
+        self.assertEqual(2, types[1]["objects"])
+        self.assertEqual(
+            {"createCCObject", "init"}, set(types[1]["phases"].keys())
+        )
+        self.assertEqual(2, types[1]["phases"]["init"]["objects"])
+
+    def test_finish_dumps(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "startup.json")
+            startup_profile.enable(path)
+            for obj in startup_profile.each("startup", [CPU()]):
+                pass
+            startup_profile.finish()
+
+            self.assertFalse(startup_profile.isEnabled())
+            with open(path) as f:
+                report = json.load(f)
+            self.assertEqual("CPU", report["types"][0]["type"])
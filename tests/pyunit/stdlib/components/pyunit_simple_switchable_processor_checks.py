@@ -0,0 +1,98 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import unittest
+from unittest.mock import patch
+
+from m5.objects import X86EmuLinux
+
+from gem5.components.boards.simple_board import SimpleBoard
+from gem5.components.cachehierarchies.classic.no_cache import NoCache
+from gem5.components.memory.single_channel import SingleChannelDDR3_1600
+from gem5.components.processors.cpu_types import CPUTypes
+from gem5.components.processors.simple_switchable_processor import (
+    SimpleSwitchableProcessor,
+)
+from gem5.isas import ISA
+from gem5.resources.resource import BinaryResource
+
+
+def _se_board(processor: SimpleSwitchableProcessor) -> SimpleBoard:
+    """
+    Builds a board running an SE workload on a processor, and connects its
+    components as done before `m5.instantiate`.
+    """
+    board = SimpleBoard(
+        clk_freq="1GHz",
+        processor=processor,
+        memory=SingleChannelDDR3_1600(size="32MiB"),
+        cache_hierarchy=NoCache(),
+    )
+    # The binary is only read to find its ISA, until the simulation is
+    # instantiated.
+    with patch(
+        "gem5.components.boards.se_binary_workload.SEWorkload"
+    ) as se_workload:
+        se_workload.init_compatible.return_value = X86EmuLinux()
+        board.set_se_binary_workload(BinaryResource(local_path="/bin/true"))
+    board._pre_instantiate()
+    return board
+
+
+class SimpleSwitchableProcessorTestSuite(unittest.TestCase):
+    """Tests for gem5.components.processors.simple_switchable_processor."""
+
+    def test_warming_cores_run_the_workload(self) -> None:
+        processor = SimpleSwitchableProcessor(
+            starting_core_type=CPUTypes.TIMING,
+            switch_core_type=CPUTypes.O3,
+            num_cores=2,
+            isa=ISA.X86,
+            functional_warming=True,
+        )
+        _se_board(processor)
+
+        cores = list(processor._all_cores())
+        self.assertEqual(6, len(cores))
+        self.assertEqual(CPUTypes.ATOMIC, processor.warming[0].get_type())
+        process = processor.start[0].get_simobject().workload
+        for core in cores:
+            self.assertEqual(process, core.get_simobject().workload)
+
+    def test_no_warming_cores_for_atomic_starting_cores(self) -> None:
+        # Atomic cores already warm a classic cache hierarchy.
+        processor = SimpleSwitchableProcessor(
+            starting_core_type=CPUTypes.ATOMIC,
+            switch_core_type=CPUTypes.O3,
+            num_cores=2,
+            isa=ISA.X86,
+            functional_warming=True,
+        )
+        _se_board(processor)
+
+        self.assertEqual(4, len(list(processor._all_cores())))
+        self.assertFalse(processor.is_warming())
@@ -598,3 +598,17 @@ class LooppointJsonLoaderTestSuite(unittest.TestCase):
 
         region_warmup = region.get_warmup()
         self.assertIsNone(region_warmup)
+
+    def test_load_region_id_by_value(self):
+        # The region ID need only be equal to the key in the JSON file, not
+        # the same object.
+        looppoint = LooppointJsonLoader(
+            looppoint_file=os.path.join(
+                os.path.realpath(os.path.dirname(__file__)),
+                "refs",
+                "output.json",
+            ),
+            region_id="".join(["1"]),
+        )
+
+        self.assertEquals(["1"], list(looppoint.get_regions()))
@@ -0,0 +1,243 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from gem5.resources import catalog
+from gem5.resources.catalog import (
+    get_catalog_metrics,
+    get_snapshot_path,
+    load_catalog,
+    refresh_catalog,
+)
+
+
+class _CatalogHandler(BaseHTTPRequestHandler):
+    """
+    Serves `server.body` with an ETag, honoring `If-None-Match`. Responds
+    with `server.status` instead if it is set.
+    """
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self.server.requests.append(dict(self.headers))
+        if self.server.status:
+            self.send_error(self.server.status)
+            return
+
+        etag = f'"{hashlib.md5(self.server.body).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(self.server.body)))
+        self.end_headers()
+        self.wfile.write(self.server.body)
+
+
+class CatalogTestSuite(unittest.TestCase):
+    """Tests for gem5.resources.catalog."""
+
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(("localhost", 0), _CatalogHandler)
+        self.server.body = json.dumps({"version": "1"}).encode("utf-8")
+        self.server.status = None
+        self.server.requests = []
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.url = f"http://localhost:{self.server.server_port}/r.json"
+
+        self.catalog_dir = tempfile.TemporaryDirectory()
+        self.env = patch.dict(
+            os.environ, {"GEM5_RESOURCE_CATALOG_DIR": self.catalog_dir.name}
+        )
+        self.env.start()
+        os.environ.pop("GEM5_RESOURCES_OFFLINE", None)
+        os.environ.pop("GEM5_USE_PROXY", None)
+
+    def tearDown(self) -> None:
+        self.env.stop()
+        self.catalog_dir.cleanup()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def test_snapshot_reused(self) -> None:
+        catalog, source_md5 = load_catalog(self.url)
+        self.assertEqual({"version": "1"}, catalog)
+        self.assertEqual(hashlib.md5(self.server.body).hexdigest(), source_md5)
+        self.assertTrue(get_snapshot_path(self.url).exists())
+
+        self.assertEqual({"version": "1"}, load_catalog(self.url)[0])
+        self.assertEqual(1, len(self.server.requests))
+        self.assertEqual(
+            "snapshot", get_catalog_metrics(self.url)["last_load"]["outcome"]
+        )
+
+    def test_conditional_refresh(self) -> None:
+        load_catalog(self.url)
+        self.assertEqual(
+            {"version": "1"}, load_catalog(self.url, max_age=0)[0]
+        )
+
+        self.assertEqual(2, len(self.server.requests))
+        self.assertIn("If-None-Match", self.server.requests[1])
+        metrics = get_catalog_metrics(self.url)
+        self.assertEqual(1, metrics["refreshes"])
+        self.assertEqual(1, metrics["not_modified"])
+        self.assertEqual("refresh", metrics["last_load"]["outcome"])
+        self.assertIsNotNone(metrics["refresh_seconds"])
+        self.assertLess(metrics["age_seconds"], 60)
+
+    def test_modified_refresh(self) -> None:
+        load_catalog(self.url)
+        self.server.body = json.dumps({"version": "2"}).encode("utf-8")
+        self.assertEqual(
+            {"version": "2"}, load_catalog(self.url, max_age=0)[0]
+        )
+        self.assertEqual(2, get_catalog_metrics(self.url)["refreshes"])
+
+    def test_base64(self) -> None:
+        self.server.body = base64.b64encode(b'{"version": "b64"}')
+        self.assertEqual({"version": "b64"}, load_catalog(self.url)[0])
+
+    def test_failed_refresh(self) -> None:
+        load_catalog(self.url)
+        self.server.status = 404
+        with self.assertWarns(Warning):
+            catalog, _ = load_catalog(self.url, max_age=0)
+        self.assertEqual({"version": "1"}, catalog)
+
+        metrics = get_catalog_metrics(self.url)
+        self.assertEqual(1, metrics["failures"])
+        self.assertIsNotNone(metrics["last_error"])
+
+        # The failed refresh is not retried immediately.
+        load_catalog(self.url, max_age=0)
+        self.assertEqual(2, len(self.server.requests))
+
+    def test_failed_refresh_without_snapshot(self) -> None:
+        self.server.status = 404
+        with self.assertRaises(Exception):
+            load_catalog(self.url)
+        self.assertFalse(get_catalog_metrics(self.url)["exists"])
+
+    def test_offline(self) -> None:
+        with patch.dict(os.environ, {"GEM5_RESOURCES_OFFLINE": "1"}):
+            with self.assertRaises(Exception):
+                load_catalog(self.url)
+            with self.assertRaises(Exception):
+                refresh_catalog(self.url)
+        self.assertEqual(0, len(self.server.requests))
+
+        load_catalog(self.url)
+        self.server.body = json.dumps({"version": "2"}).encode("utf-8")
+        with patch.dict(os.environ, {"GEM5_RESOURCES_OFFLINE": "1"}):
+            self.assertEqual(
+                {"version": "1"}, load_catalog(self.url, max_age=0)[0]
+            )
+            self.assertTrue(get_catalog_metrics(self.url)["offline"])
+        self.assertEqual(1, len(self.server.requests))
+
+    def test_shared_snapshot(self) -> None:
+        # Snapshots in a shared catalog directory can be read by other users,
+        # who trust them as long as only their owner can write them.
+        load_catalog(self.url)
+        snapshot_path = get_snapshot_path(self.url)
+        self.assertEqual(0o644, os.stat(snapshot_path).st_mode & 0o777)
+        self.assertEqual(
+            0o644,
+            os.stat(snapshot_path.with_suffix(".meta.json")).st_mode & 0o777,
+        )
+
+        other_uid = os.getuid() + 1000
+        with patch.object(catalog.os, "getuid", return_value=other_uid):
+            with patch.dict(os.environ, {"GEM5_RESOURCES_OFFLINE": "1"}):
+                self.assertEqual({"version": "1"}, load_catalog(self.url)[0])
+
+        os.chmod(snapshot_path, 0o664)
+        self.assertIsNone(catalog._read_snapshot(snapshot_path))
+
+    def test_snapshot_is_json(self) -> None:
+        # Snapshots may be written by other users, so they must not be in a
+        # format which runs code when loaded.
+        load_catalog(self.url)
+        with open(get_snapshot_path(self.url)) as f:
+            self.assertEqual({"version": "1"}, json.load(f)["catalog"])
+
+    @unittest.skipUnless(os.getuid() == 0, "changing owners requires root")
+    def test_planted_user_snapshot(self) -> None:
+        # Another user could create the current user's own snapshot in the
+        # shared directory, so it is only used if the user owns it.
+        load_catalog(self.url)
+        shared_path = get_snapshot_path(self.url)
+        user_path = catalog._get_user_snapshot_path(shared_path)
+        user_path.write_text("{}")
+        os.chown(user_path, os.getuid() + 1000, -1)
+        self.assertEqual(shared_path, get_snapshot_path(self.url))
+
+    def test_shared_snapshot_not_replaceable(self) -> None:
+        # If the shared snapshot cannot be replaced (e.g., it is owned by
+        # another user in a sticky directory), the user's own one is used.
+        load_catalog(self.url)
+        shared_path = get_snapshot_path(self.url)
+        self.server.body = json.dumps({"version": "2"}).encode("utf-8")
+
+        replace = os.replace
+
+        def replace_not_permitted(src, dst):
+            if dst in (shared_path, shared_path.with_suffix(".meta.json")):
+                raise PermissionError(1, "Operation not permitted", dst)
+            replace(src, dst)
+
+        with patch.object(catalog.os, "replace", replace_not_permitted):
+            self.assertEqual(
+                {"version": "2"}, load_catalog(self.url, max_age=0)[0]
+            )
+        self.assertNotEqual(shared_path, get_snapshot_path(self.url))
+        self.assertEqual({"version": "2"}, load_catalog(self.url)[0])
+        self.assertEqual(2, len(self.server.requests))
+
+    def test_refresh_catalog(self) -> None:
+        load_catalog(self.url)
+        metrics = refresh_catalog(self.url)
+        self.assertEqual(2, len(self.server.requests))
+        self.assertEqual(1, metrics["not_modified"])
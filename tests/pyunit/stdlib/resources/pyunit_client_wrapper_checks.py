@@ -28,6 +28,7 @@ import unittest
 from gem5.isas import ISA
 from gem5.resources.client_wrapper import (
     get_resource_json_obj,
+    get_resource_json_objs,
     create_clients,
 )
 from typing import Dict
@@ -84,36 +85,15 @@ with open("tests/pyunit/stdlib/resources/refs/mongo_mock.json", "r") as f:
     mock_json = json.load(f)
 
 
-def mocked_requests_post(*args, **kwargs):
-    # mokcing urllib.request.urlopen
-    class MockResponse:
-        def __init__(self, json_data, status_code):
-            self.json_data = json_data
-            self.status_code = status_code
-
-        def read(self):
-            return json.dumps(self.json_data).encode("utf-8")
-
-    data = json.loads(args[0].data)
-    if "/api-key/login" in args[0].full_url:
-        return MockResponse({"access_token": "test-token"}, 200)
-    if "/action/find" in args[0].full_url:
-        if data:
-            if data["filter"]["id"] == "invalid-id":
-                return MockResponse(
-                    {
-                        "documents": [],
-                    },
-                    200,
-                )
-        return MockResponse(
-            {
-                "documents": mock_json,
-            },
-            200,
-        )
-
-    return MockResponse(None, 404)
+def mocked_post(url, data, headers={}):
+    # mocking the data API's responses to MongoClient._post
+    if "/api-key/login" in url:
+        return {"access_token": "test-token"}
+    if "/action/find" in url:
+        if data["filter"]["id"] == "invalid-id":
+            return {"documents": []}
+        return {"documents": mock_json}
+    raise Exception(f"Unexpected URL {url}")
 
 
 class ClientWrapperTestSuite(unittest.TestCase):
@@ -175,12 +155,50 @@ class ClientWrapperTestSuite(unittest.TestCase):
         )
         self.assertEqual(resource["architecture"], "X86")
 
+    @patch("gem5.resources.client_wrapper.config", mock_config_json)
+    @patch(
+        "gem5.resources.client_wrapper.clients",
+        create_clients(mock_config_json),
+    )
+    def test_get_resource_json_objs(self):
+        # Test that several resource objects are correctly returned together
+        resources = get_resource_json_objs(
+            ["this-is-a-test-resource", "x86-ubuntu-18.04-img"],
+            resource_versions={"this-is-a-test-resource": "1.0.0"},
+        )
+        self.assertEqual(
+            ["this-is-a-test-resource", "x86-ubuntu-18.04-img"],
+            list(resources),
+        )
+        self.assertEqual(
+            resources["this-is-a-test-resource"]["resource_version"], "1.0.0"
+        )
+        self.assertEqual(
+            resources["x86-ubuntu-18.04-img"]["resource_version"], "2.0.0"
+        )
+
+    @patch("gem5.resources.client_wrapper.config", mock_config_json)
+    @patch(
+        "gem5.resources.client_wrapper.clients",
+        create_clients(mock_config_json),
+    )
+    def test_get_resource_json_objs_invalid_id(self):
+        with self.assertRaises(Exception) as context:
+            get_resource_json_objs(["this-is-a-test-resource", "invalid-id"])
+        self.assertTrue(
+            "Resource with ID 'invalid-id' not found."
+            in str(context.exception)
+        )
+
     @patch("gem5.resources.client_wrapper.config", mock_config_mongo)
     @patch(
         "gem5.resources.client_wrapper.clients",
         create_clients(mock_config_mongo),
     )
-    @patch("urllib.request.urlopen", side_effect=mocked_requests_post)
+    @patch(
+        "gem5.resources.client_api.mongoclient.MongoClient._post",
+        side_effect=mocked_post,
+    )
     def test_get_resource_json_obj(self, mock_get):
         resource = "x86-ubuntu-18.04-img"
         resource = get_resource_json_obj(
@@ -204,7 +222,10 @@ class ClientWrapperTestSuite(unittest.TestCase):
         "gem5.resources.client_wrapper.clients",
         create_clients(mock_config_mongo),
     )
-    @patch("urllib.request.urlopen", side_effect=mocked_requests_post)
+    @patch(
+        "gem5.resources.client_api.mongoclient.MongoClient._post",
+        side_effect=mocked_post,
+    )
     def test_get_resource_json_obj_with_version_mongodb(self, mock_get):
         # Test that the resource object is correctly returned
         resource_id = "x86-ubuntu-18.04-img"
@@ -229,7 +250,10 @@ class ClientWrapperTestSuite(unittest.TestCase):
         "gem5.resources.client_wrapper.clients",
         create_clients(mock_config_mongo),
     )
-    @patch("urllib.request.urlopen", side_effect=mocked_requests_post)
+    @patch(
+        "gem5.resources.client_api.mongoclient.MongoClient._post",
+        side_effect=mocked_post,
+    )
     def test_get_resource_json_obj_with_id_invalid_mongodb(self, mock_get):
         resource_id = "invalid-id"
         with self.assertRaises(Exception) as context:
@@ -244,7 +268,10 @@ class ClientWrapperTestSuite(unittest.TestCase):
         "gem5.resources.client_wrapper.clients",
         create_clients(mock_config_mongo),
     )
-    @patch("urllib.request.urlopen", side_effect=mocked_requests_post)
+    @patch(
+        "gem5.resources.client_api.mongoclient.MongoClient._post",
+        side_effect=mocked_post,
+    )
     def test_get_resource_json_obj_with_version_invalid_mongodb(
         self, mock_get
     ):
@@ -288,7 +315,10 @@ class ClientWrapperTestSuite(unittest.TestCase):
         "gem5.resources.client_wrapper.clients",
         create_clients(mock_config_combined),
     )
-    @patch("urllib.request.urlopen", side_effect=mocked_requests_post)
+    @patch(
+        "gem5.resources.client_api.mongoclient.MongoClient._post",
+        side_effect=mocked_post,
+    )
     def test_get_resource_json_obj_combine(self, mock_get):
         resource_id_mongo = "x86-ubuntu-18.04-img"
         resource_version_mongo = "1.0.0"
@@ -27,14 +27,26 @@
 import unittest
 import tempfile
 import os
+import io
+import gzip
+import shutil
+import tarfile
+import threading
+import functools
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
 from typing import Dict
+from unittest.mock import patch
 import json
 
 from gem5.resources.downloader import (
     _get_resources_json_at_path,
     _get_resources_json,
     _resources_json_version_required,
+    _download_and_extract,
+    get_resource,
 )
+from gem5.resources.md5_utils import md5_file, md5_dir
 
 
 class ResourceDownloaderTestSuite(unittest.TestCase):
@@ -196,3 +208,167 @@ class ResourceDownloaderTestSuite(unittest.TestCase):
 
         # Set back to the old path
         os.environ["GEM5_RESOURCE_JSON"] = self.file_path
+
+
+class _QuietHTTPRequestHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class DownloadAndExtractTestSuite(unittest.TestCase):
+    """Test cases for gem5.resources.downloader._download_and_extract"""
+
+    def setUp(self) -> None:
+        self.serve_dir = tempfile.mkdtemp()
+        self.dest_dir = tempfile.mkdtemp()
+        self.server = ThreadingHTTPServer(
+            ("localhost", 0),
+            functools.partial(
+                _QuietHTTPRequestHandler, directory=self.serve_dir
+            ),
+        )
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.url_base = f"http://localhost:{self.server.server_address[1]}"
+
+        self.data = os.urandom(3 * 1024 * 1024)
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        shutil.rmtree(self.serve_dir)
+        shutil.rmtree(self.dest_dir)
+
+    def _create_tar(self, name: str, member_names, compress: bool) -> None:
+        mode = "w:gz" if compress else "w"
+        with tarfile.open(os.path.join(self.serve_dir, name), mode) as tar:
+            for member_name in member_names:
+                info = tarfile.TarInfo(member_name)
+                info.size = len(self.data)
+                tar.addfile(info, io.BytesIO(self.data))
+
+    def test_unzip(self) -> None:
+        with gzip.open(os.path.join(self.serve_dir, "file.gz"), "wb") as f:
+            f.write(self.data)
+        to_path = os.path.join(self.dest_dir, "file")
+
+        md5 = _download_and_extract(
+            f"{self.url_base}/file.gz", to_path, unzip=True, untar=False
+        )
+
+        with open(to_path, "rb") as f:
+            self.assertEqual(self.data, f.read())
+        self.assertEqual(md5_file(Path(to_path)), md5)
+        # No intermediate files are left behind.
+        self.assertEqual(["file"], os.listdir(self.dest_dir))
+
+    def test_unzipAndUntar(self) -> None:
+        self._create_tar(
+            "dir.tar.gz", ["file1", "subdir/file2"], compress=True
+        )
+        to_path = os.path.join(self.dest_dir, "dir")
+
+        md5 = _download_and_extract(
+            f"{self.url_base}/dir.tar.gz", to_path, unzip=True, untar=True
+        )
+
+        self.assertIsNone(md5)
+        self.assertEqual(["dir"], os.listdir(self.dest_dir))
+        for name in ("file1", os.path.join("subdir", "file2")):
+            with open(os.path.join(to_path, name), "rb") as f:
+                self.assertEqual(self.data, f.read())
+
+    def test_untar(self) -> None:
+        self._create_tar("dir.tar", ["file1"], compress=False)
+        to_path = os.path.join(self.dest_dir, "dir")
+
+        _download_and_extract(
+            f"{self.url_base}/dir.tar", to_path, unzip=False, untar=True
+        )
+
+        with open(os.path.join(to_path, "file1"), "rb") as f:
+            self.assertEqual(self.data, f.read())
+
+    def test_pathTraversal(self) -> None:
+        self._create_tar("evil.tar", ["../evil"], compress=False)
+        to_path = os.path.join(self.dest_dir, "dir")
+
+        with self.assertRaises(Exception) as context:
+            _download_and_extract(
+                f"{self.url_base}/evil.tar", to_path, unzip=False, untar=True
+            )
+
+        self.assertIn("Path Traversal", str(context.exception))
+        self.assertEqual([], os.listdir(self.dest_dir))
+
+
+class ResourceStoreTestSuite(unittest.TestCase):
+    """
+    Test cases for gem5.resources.downloader.get_resource when the resource
+    store is enabled.
+    """
+
+    def setUp(self) -> None:
+        self.serve_dir = tempfile.mkdtemp()
+        self.store_dir = tempfile.mkdtemp()
+        self.resource_dirs = [tempfile.mkdtemp(), tempfile.mkdtemp()]
+
+        self.server = ThreadingHTTPServer(
+            ("localhost", 0),
+            functools.partial(
+                _QuietHTTPRequestHandler, directory=self.serve_dir
+            ),
+        )
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+        data = os.urandom(1024 * 1024)
+        with gzip.open(os.path.join(self.serve_dir, "file.gz"), "wb") as f:
+            f.write(data)
+        with open(os.path.join(self.serve_dir, "file"), "wb") as f:
+            f.write(data)
+
+        self.resource_obj = {
+            "id": "test-resource",
+            "is_zipped": True,
+            "md5sum": md5_file(Path(os.path.join(self.serve_dir, "file"))),
+            "url": f"http://localhost:{self.server.server_address[1]}"
+            "/file.gz",
+        }
+        os.environ["GEM5_RESOURCE_STORE"] = self.store_dir
+
+    def tearDown(self) -> None:
+        del os.environ["GEM5_RESOURCE_STORE"]
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        for directory in [self.serve_dir] + self.resource_dirs:
+            shutil.rmtree(directory)
+        # Objects in the store are read-only.
+        for root, _, files in os.walk(self.store_dir):
+            for name in files:
+                os.chmod(os.path.join(root, name), 0o644)
+        shutil.rmtree(self.store_dir)
+
+    def test_resourceSharedViaStore(self) -> None:
+        with patch(
+            "gem5.resources.downloader.get_resource_json_obj",
+            return_value=self.resource_obj,
+        ), patch(
+            "gem5.resources.downloader._download_and_extract",
+            wraps=_download_and_extract,
+        ) as download:
+            for resource_dir in self.resource_dirs:
+                get_resource(
+                    "test-resource",
+                    to_path=os.path.join(resource_dir, "test-resource"),
+                )
+
+        # The resource is only downloaded once.
+        self.assertEqual(1, download.call_count)
+        for resource_dir in self.resource_dirs:
+            self.assertEqual(
+                self.resource_obj["md5sum"],
+                md5_file(Path(os.path.join(resource_dir, "test-resource"))),
+            )
@@ -0,0 +1,166 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from gem5.resources.client_api import jsonclient
+from gem5.resources.client_api.jsonclient import JSONClient
+
+
+def _resource(resource_id: str, version: str) -> dict:
+    return {
+        "category": "binary",
+        "id": resource_id,
+        "resource_version": version,
+        "gem5_versions": ["23.0"],
+    }
+
+
+class JSONClientIndexTestSuite(unittest.TestCase):
+    """Tests for the persisted resource index of the JSONClient."""
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.index_dir = Path(self.tmp_dir.name) / "index"
+        self.index_dir.mkdir()
+        self.json_path = Path(self.tmp_dir.name) / "resources.json"
+        self._write_json(
+            [
+                _resource("resource-a", "1.0.0"),
+                _resource("resource-b", "1.0.0"),
+                _resource("resource-a", "2.0.0"),
+                _resource("resource-a", "1.1.0"),
+            ]
+        )
+
+        patcher = patch.object(
+            jsonclient.tempfile,
+            "gettempdir",
+            return_value=str(self.index_dir),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _write_json(self, resources: list) -> None:
+        with open(self.json_path, "w") as f:
+            json.dump(resources, f)
+
+    def _index_path(self) -> Path:
+        return Path(JSONClient(str(self.json_path))._get_index_path())
+
+    def test_get_resources_by_id(self) -> None:
+        client = JSONClient(str(self.json_path))
+        self.assertEqual(
+            ["2.0.0", "1.1.0", "1.0.0"],
+            [
+                r["resource_version"]
+                for r in client.get_sorted_resources_by_id("resource-a")
+            ],
+        )
+        self.assertEqual(3, len(client.get_resources_by_id("resource-a")))
+        self.assertEqual([], client.get_resources_by_id("resource-c"))
+        self.assertEqual(4, len(client.resources))
+
+    def test_resources_in_json_order(self) -> None:
+        client = JSONClient(str(self.json_path))
+        self.assertEqual(
+            [
+                ("resource-a", "1.0.0"),
+                ("resource-b", "1.0.0"),
+                ("resource-a", "2.0.0"),
+                ("resource-a", "1.1.0"),
+            ],
+            [(r["id"], r["resource_version"]) for r in client.resources],
+        )
+
+    def test_resource_without_version(self) -> None:
+        resources = [
+            _resource("resource-a", "1.0.0"),
+            _resource("resource-b", "1.0.0"),
+            _resource("resource-b", "2.0.0"),
+        ]
+        del resources[2]["resource_version"]
+        self._write_json(resources)
+
+        # Only the lookups of the resource without a version are affected.
+        client = JSONClient(str(self.json_path))
+        self.assertEqual(
+            "1.0.0",
+            client.get_resource_json_obj_from_client("resource-a")[
+                "resource_version"
+            ],
+        )
+        with self.assertRaises(KeyError):
+            client.get_sorted_resources_by_id("resource-b")
+
+    def test_get_resource_json_obj_from_client(self) -> None:
+        client = JSONClient(str(self.json_path))
+        self.assertEqual(
+            "2.0.0",
+            client.get_resource_json_obj_from_client("resource-a")[
+                "resource_version"
+            ],
+        )
+        self.assertEqual(
+            "1.1.0",
+            client.get_resource_json_obj_from_client("resource-a", "1.1.0")[
+                "resource_version"
+            ],
+        )
+
+    def test_index_is_persisted(self) -> None:
+        self.assertTrue(self._index_path().is_file())
+
+        with patch.object(
+            JSONClient, "_build_index", side_effect=AssertionError
+        ):
+            client = JSONClient(str(self.json_path))
+        self.assertEqual(3, len(client.get_resources_by_id("resource-a")))
+
+    def test_index_invalidated_on_change(self) -> None:
+        JSONClient(str(self.json_path))
+        self._write_json([_resource("resource-c", "1.0.0")])
+
+        client = JSONClient(str(self.json_path))
+        self.assertEqual([], client.get_resources_by_id("resource-a"))
+        self.assertEqual(1, len(client.get_resources_by_id("resource-c")))
+
+    def test_insecure_index_ignored(self) -> None:
+        index_path = self._index_path()
+        os.chmod(index_path, 0o666)
+        self.assertIsNone(jsonclient._read_index(str(index_path)))
+
+        # The index is rebuilt and replaced by one only the owner can write.
+        JSONClient(str(self.json_path))
+        self.assertEqual(0, os.stat(index_path).st_mode & 0o022)
@@ -0,0 +1,134 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+import tempfile
+import os
+import json
+import shutil
+import time
+from pathlib import Path
+
+from gem5.resources.md5_cache import (
+    cached_md5,
+    get_md5_cache_path,
+    lookup_md5,
+    record_md5,
+)
+from gem5.resources.md5_utils import md5_file, md5_dir
+
+
+class MD5CacheTestSuite(unittest.TestCase):
+    """Test cases for gem5.resources.md5_cache"""
+
+    def setUp(self) -> None:
+        self.resource_dir = Path(tempfile.mkdtemp())
+        self.cache_path = get_md5_cache_path(self.resource_dir)
+
+        self.file = self.resource_dir / "file"
+        with open(self.file, "w") as f:
+            f.write("This is a test string, to be put in a temp file")
+
+        self.dir = self.resource_dir / "dir"
+        os.mkdir(self.dir)
+        with open(self.dir / "file1", "w") as f:
+            f.write("Some test data here")
+        os.mkdir(self.dir / "dir2")
+        with open(self.dir / "dir2" / "file1", "w") as f:
+            f.write("Yet more data")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.resource_dir)
+
+    def _record_in_the_future(self, path: Path) -> None:
+        # Entries for recently modified paths are not trusted (see
+        # `_racy_window_ns`). Recording the hash as if computed well after the
+        # path was modified avoids sleeping in these tests.
+        record_md5(
+            path,
+            md5_value="cached-value",
+            hashed_ns=time.time_ns() + 10 * 10**9,
+            cache_path=self.cache_path,
+        )
+
+    def test_cachedMd5MatchesMd5(self) -> None:
+        self.assertEqual(
+            md5_file(self.file), cached_md5(self.file, self.cache_path)
+        )
+        self.assertEqual(
+            md5_dir(self.dir), cached_md5(self.dir, self.cache_path)
+        )
+        self.assertTrue(self.cache_path.exists())
+
+    def test_unchangedFileUsesCache(self) -> None:
+        self._record_in_the_future(self.file)
+        self.assertEqual(
+            "cached-value", cached_md5(self.file, self.cache_path)
+        )
+
+    def test_fullVerificationIgnoresCache(self) -> None:
+        self._record_in_the_future(self.file)
+        self.assertEqual(
+            md5_file(self.file),
+            cached_md5(self.file, self.cache_path, use_cached_value=False),
+        )
+
+    def test_modifiedFileInvalidatesCache(self) -> None:
+        self._record_in_the_future(self.file)
+        with open(self.file, "a") as f:
+            f.write("More data")
+        self.assertIsNone(lookup_md5(self.file, self.cache_path))
+        self.assertEqual(
+            md5_file(self.file), cached_md5(self.file, self.cache_path)
+        )
+
+    def test_modifiedNestedFileInvalidatesCache(self) -> None:
+        self._record_in_the_future(self.dir)
+        self.assertEqual("cached-value", lookup_md5(self.dir, self.cache_path))
+        with open(self.dir / "dir2" / "file1", "a") as f:
+            f.write("More data")
+        self.assertIsNone(lookup_md5(self.dir, self.cache_path))
+
+    def test_racyEntryNotTrusted(self) -> None:
+        # The file was modified at (almost) the same time it was hashed, so a
+        # later modification may not change its signature.
+        record_md5(
+            self.file,
+            md5_value="cached-value",
+            hashed_ns=time.time_ns(),
+            cache_path=self.cache_path,
+        )
+        self.assertIsNone(lookup_md5(self.file, self.cache_path))
+
+    def test_corruptCacheIgnored(self) -> None:
+        with open(self.cache_path, "w") as f:
+            f.write("{ this is not json")
+        self.assertIsNone(lookup_md5(self.file, self.cache_path))
+        self.assertEqual(
+            md5_file(self.file), cached_md5(self.file, self.cache_path)
+        )
+        with open(self.cache_path) as f:
+            self.assertIn(str(self.file.resolve()), json.load(f))
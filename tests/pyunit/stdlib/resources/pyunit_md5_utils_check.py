@@ -28,9 +28,13 @@ import unittest
 import tempfile
 import os
 import shutil
+import hashlib
+import threading
 from pathlib import Path
+from unittest.mock import patch
 
-from gem5.resources.md5_utils import md5_file, md5_dir
+from gem5.resources import md5_utils
+from gem5.resources.md5_utils import md5_file, md5_dir, HashStats
 
 
 class MD5FileTestSuite(unittest.TestCase):
@@ -113,3 +117,124 @@ class MD5DirTestSuite(unittest.TestCase):
         shutil.rmtree(dir2)
 
         self.assertEquals(first_md5, second_md5)
+
+    def _legacy_md5_dir(self, directory: Path, hash=None) -> str:
+        # The original, sequential, implementation of `md5_dir`.
+        hash = hash or hashlib.md5()
+        for path in sorted(directory.iterdir(), key=lambda p: str(p).lower()):
+            hash.update(path.name.encode())
+            if path.is_file():
+                with open(path, "rb") as f:
+                    for chunk in iter(lambda: f.read(4096), b""):
+                        hash.update(chunk)
+            elif path.is_dir():
+                self._legacy_md5_dir(path, hash)
+        return hash.hexdigest()
+
+    def _create_large_temp_directory(self) -> Path:
+        dir = self._create_temp_directory()
+        os.mkdir(os.path.join(dir, "Dir3"))
+        os.mkdir(os.path.join(dir, "dir2", "empty-dir"))
+        open(os.path.join(dir, "dir2", "empty-file"), "w").close()
+        for name in ("Dir3/pmem", "dir2/pmem", "a-pmem"):
+            with open(os.path.join(dir, name), "wb") as f:
+                f.write(os.urandom(100 * 1024 + 7))
+        return dir
+
+    def test_md5DirCompatibleMatchesLegacy(self) -> None:
+        # This test ensures the concurrent reads in "compatible" mode give
+        # exactly the same md5 value as hashing sequentially. A small chunk
+        # size is used so each file is read in many chunks.
+
+        dir = self._create_large_temp_directory()
+        try:
+            with patch("gem5.resources.md5_utils._chunk_size", 4096), patch(
+                "gem5.resources.md5_utils._read_ahead_bytes", 2 * 4096
+            ):
+                for max_workers in (1, 2, 8):
+                    self.assertEqual(
+                        self._legacy_md5_dir(dir),
+                        md5_dir(dir, max_workers=max_workers),
+                    )
+        finally:
+            shutil.rmtree(dir)
+
+    def test_md5DirReadAheadIsBounded(self) -> None:
+        # This test ensures that, however many files are read ahead, the
+        # chunks read but not yet hashed fit in `_read_ahead_bytes`.
+
+        dir = self._create_large_temp_directory()
+        read_chunks = md5_utils._read_chunks
+        lock = threading.Lock()
+        outstanding = set()
+        max_outstanding = [0]
+
+        def counted_read_chunks(*args):
+            for chunk in read_chunks(*args):
+                with lock:
+                    outstanding.add(id(chunk))
+                    max_outstanding[0] = max(
+                        max_outstanding[0], len(outstanding)
+                    )
+                yield chunk
+
+        class CountingHash:
+            def __init__(self):
+                self._hash = hashlib.md5()
+
+            def update(self, data):
+                with lock:
+                    outstanding.discard(id(data))
+                self._hash.update(data)
+
+        try:
+            with patch.object(md5_utils, "_chunk_size", 4096), patch.object(
+                md5_utils, "_read_ahead_bytes", 3 * 4096
+            ), patch.object(md5_utils, "_read_chunks", counted_read_chunks):
+                hash = CountingHash()
+                md5_utils._md5_update_from_dir(Path(dir), hash, max_workers=8)
+            self.assertEqual(self._legacy_md5_dir(dir), hash._hash.hexdigest())
+            self.assertLessEqual(max_outstanding[0], 3)
+        finally:
+            shutil.rmtree(dir)
+
+    def test_md5DirTreeMode(self) -> None:
+        # This test ensures "tree" mode is deterministic regardless of the
+        # number of threads, and that it detects changes to file contents.
+
+        dir = self._create_large_temp_directory()
+        try:
+            tree_md5 = md5_dir(dir, mode="tree", max_workers=1)
+            self.assertEqual(
+                tree_md5, md5_dir(dir, mode="tree", max_workers=4)
+            )
+            self.assertNotEqual(md5_dir(dir), tree_md5)
+
+            with open(os.path.join(dir, "dir2", "empty-file"), "w") as f:
+                f.write("Not empty")
+            self.assertNotEqual(tree_md5, md5_dir(dir, mode="tree"))
+        finally:
+            shutil.rmtree(dir)
+
+    def test_md5DirStats(self) -> None:
+        # This test ensures the throughput statistics are recorded.
+
+        dir = self._create_large_temp_directory()
+        try:
+            for mode in ("compatible", "tree"):
+                stats = HashStats()
+                md5_dir(dir, mode=mode, stats=stats)
+                self.assertEqual(7, stats.files)
+                self.assertEqual(3 * (100 * 1024 + 7) + 51, stats.bytes)
+                self.assertGreater(stats.elapsed_seconds, 0)
+                self.assertIn("MiB/s", str(stats))
+        finally:
+            shutil.rmtree(dir)
+
+    def test_md5DirInvalidMode(self) -> None:
+        dir = self._create_temp_directory()
+        try:
+            with self.assertRaises(Exception):
+                md5_dir(dir, mode="invalid")
+        finally:
+            shutil.rmtree(dir)
@@ -0,0 +1,225 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from gem5.resources.client_api.mongoclient import MongoClient
+
+
+def _resource(resource_id: str, version: str) -> dict:
+    return {
+        "category": "binary",
+        "id": resource_id,
+        "resource_version": version,
+        "gem5_versions": ["23.0"],
+    }
+
+
+_documents = [
+    _resource("resource-a", "1.0.0"),
+    _resource("resource-a", "2.0.0"),
+    _resource("resource-b", "1.0.0"),
+]
+
+
+class _DataAPIHandler(BaseHTTPRequestHandler):
+    """
+    A stand-in for the MongoDB data API. It supports the API key login and
+    `find` actions, with filters of the form `{"id": <id>}` and
+    `{"id": {"$in": [<id>, ...]}}`.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.connections += 1
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _respond(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self) -> None:
+        length = int(self.headers["Content-Length"])
+        request = json.loads(self.rfile.read(length))
+        self.server.requests.append((self.path, request))
+
+        if self.path == "/login":
+            self.server.tokens_issued += 1
+            self._respond(
+                200, {"access_token": f"token-{self.server.tokens_issued}"}
+            )
+            return
+
+        if self.headers["Authorization"] in self.server.revoked_tokens:
+            self._respond(401, {"error": "invalid session"})
+            return
+
+        id_filter = request["filter"]["id"]
+        if isinstance(id_filter, dict):
+            ids = id_filter["$in"]
+        else:
+            ids = [id_filter]
+        self._respond(
+            200,
+            {
+                "documents": [
+                    document
+                    for document in _documents
+                    if document["id"] in ids
+                ]
+            },
+        )
+
+
+class MongoClientTestSuite(unittest.TestCase):
+    """Tests for gem5.resources.client_api.mongoclient.MongoClient."""
+
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(("localhost", 0), _DataAPIHandler)
+        self.server.connections = 0
+        self.server.requests = []
+        self.server.tokens_issued = 0
+        self.server.revoked_tokens = set()
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+        url = f"http://localhost:{self.server.server_address[1]}"
+        self.config = {
+            "dataSource": "gem5-vision",
+            "database": "gem5-vision",
+            "collection": "resources",
+            "url": f"{url}/data",
+            "authUrl": f"{url}/login",
+            "name": "data-test",
+            "apiKey": "test-key",
+            "isMongo": True,
+        }
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def _find_requests(self) -> list:
+        return [
+            request
+            for path, request in self.server.requests
+            if path == "/data/action/find"
+        ]
+
+    def test_get_resources_by_ids_single_query(self) -> None:
+        client = MongoClient(self.config)
+        resources = client.get_resources_by_ids(
+            ["resource-a", "resource-b", "resource-c"]
+        )
+
+        self.assertEqual(
+            ["resource-a", "resource-b", "resource-c"], list(resources)
+        )
+        self.assertEqual(2, len(resources["resource-a"]))
+        self.assertEqual(1, len(resources["resource-b"]))
+        self.assertEqual([], resources["resource-c"])
+
+        find_requests = self._find_requests()
+        self.assertEqual(1, len(find_requests))
+        self.assertEqual(
+            {"id": {"$in": ["resource-a", "resource-b", "resource-c"]}},
+            find_requests[0]["filter"],
+        )
+
+    def test_get_resource_json_objs_from_client(self) -> None:
+        client = MongoClient(self.config)
+        resources = client.get_resource_json_objs_from_client(
+            ["resource-a", "resource-b"],
+            resource_versions={"resource-a": "1.0.0"},
+        )
+        self.assertEqual("1.0.0", resources["resource-a"]["resource_version"])
+        self.assertEqual("1.0.0", resources["resource-b"]["resource_version"])
+        self.assertEqual(1, len(self._find_requests()))
+
+    def test_results_cached(self) -> None:
+        client = MongoClient(self.config)
+        client.get_resources_by_ids(["resource-a"])
+        self.assertEqual(2, len(client.get_resources_by_id("resource-a")))
+        client.get_resources_by_ids(["resource-a", "resource-b"])
+
+        # Only "resource-b" is queried a second time.
+        find_requests = self._find_requests()
+        self.assertEqual(2, len(find_requests))
+        self.assertEqual(
+            {"id": {"$in": ["resource-b"]}}, find_requests[1]["filter"]
+        )
+
+    def test_cache_expires(self) -> None:
+        client = MongoClient(self.config, cache_ttl=10)
+        with patch(
+            "gem5.resources.client_api.mongoclient.time.monotonic",
+            return_value=1000.0,
+        ):
+            client.get_resources_by_id("resource-a")
+            client.get_resources_by_id("resource-a")
+        self.assertEqual(1, len(self._find_requests()))
+
+        with patch(
+            "gem5.resources.client_api.mongoclient.time.monotonic",
+            return_value=1010.0,
+        ):
+            client.get_resources_by_id("resource-a")
+        self.assertEqual(2, len(self._find_requests()))
+
+    def test_no_cache(self) -> None:
+        client = MongoClient(self.config, cache_ttl=0)
+        client.get_resources_by_id("resource-a")
+        client.get_resources_by_id("resource-a")
+        self.assertEqual(2, len(self._find_requests()))
+
+    def test_connection_and_token_reused(self) -> None:
+        client = MongoClient(self.config, cache_ttl=0)
+        for _ in range(3):
+            client.get_resources_by_id("resource-a")
+
+        self.assertEqual(1, self.server.tokens_issued)
+        self.assertEqual(1, self.server.connections)
+
+    def test_revoked_token_refreshed(self) -> None:
+        client = MongoClient(self.config, cache_ttl=0)
+        client.get_resources_by_id("resource-a")
+        self.server.revoked_tokens.add("Bearer token-1")
+
+        self.assertEqual(2, len(client.get_resources_by_id("resource-a")))
+        self.assertEqual(2, self.server.tokens_issued)
@@ -192,3 +192,33 @@ class TestObtainResourcesCheck(unittest.TestCase):
             f"https://gem5vision.github.io/gem5-resources-website/resources/test-binary-resource/versions"
             in str(context.exception)
         )
+
+    def test_prefetch_resources(self):
+        local_paths = prefetch_resources(
+            resource_ids=["test-binary-resource", "test-binary-resource"],
+            resource_directory=self.get_resource_dir(),
+            max_workers=2,
+            resource_versions={"test-binary-resource": "1.7.0"},
+        )
+        self.assertEquals(["test-binary-resource"], list(local_paths))
+        self.assertTrue(os.path.isfile(local_paths["test-binary-resource"]))
+
+        resource = obtain_resource(
+            resource_id="test-binary-resource",
+            resource_directory=self.get_resource_dir(),
+            resource_version="1.7.0",
+        )
+        self.assertEquals(
+            local_paths["test-binary-resource"], resource.get_local_path()
+        )
+
+    def test_prefetch_resources_invalid_id(self):
+        with self.assertRaises(Exception) as context:
+            prefetch_resources(
+                resource_ids=["test-binary-resource", "invalid-id"],
+                resource_directory=self.get_resource_dir(),
+            )
+        self.assertTrue(
+            "Resource with ID 'invalid-id' not found."
+            in str(context.exception)
+        )
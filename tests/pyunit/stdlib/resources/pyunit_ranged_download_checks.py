@@ -0,0 +1,244 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+import tempfile
+import os
+import shutil
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+from urllib.error import HTTPError
+
+from gem5.resources.ranged_download import (
+    ranged_download,
+    _retry_with_backoff,
+)
+from gem5.utils.progress_bar import SharedProgress
+
+
+class _RangeRequestHandler(BaseHTTPRequestHandler):
+    """
+    A minimal stand-in for a file server. It serves `server.data`, optionally
+    honoring Range requests, and can be told to fail requests for specific
+    ranges.
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        data = server.data
+        range_header = self.headers.get("Range")
+        with server.lock:
+            server.requests.append(range_header)
+
+        if not server.supports_range or range_header is None:
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+
+        start, end = range_header[len("bytes=") :].split("-")
+        start, end = int(start), min(int(end), len(data) - 1)
+
+        with server.lock:
+            status = server.failures.get(start)
+            if status and status != 404:
+                # Transient failures only occur once.
+                del server.failures[start]
+        if status:
+            self.send_error(status)
+            return
+
+        self.send_response(206)
+        if server.etag:
+            self.send_header("ETag", server.etag)
+        self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        self.wfile.write(data[start : end + 1])
+
+
+class RangedDownloadTestSuite(unittest.TestCase):
+    """Test cases for gem5.resources.ranged_download"""
+
+    chunk_size = 1024
+
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(
+            ("localhost", 0), _RangeRequestHandler
+        )
+        self.server.data = os.urandom(10 * self.chunk_size + 123)
+        self.server.supports_range = True
+        self.server.etag = '"test-etag"'
+        self.server.failures = {}
+        self.server.requests = []
+        self.server.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.url = f"http://localhost:{self.server.server_address[1]}/file"
+
+        self.dir = tempfile.mkdtemp()
+        self.download_to = os.path.join(self.dir, "file")
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        shutil.rmtree(self.dir)
+
+    def _download(self, max_workers: int = 4) -> None:
+        ranged_download(
+            self.url,
+            self.download_to,
+            chunk_size=self.chunk_size,
+            max_workers=max_workers,
+            max_attempts=3,
+        )
+
+    def _downloaded_data(self) -> bytes:
+        with open(self.download_to, "rb") as f:
+            return f.read()
+
+    def test_rangedDownload(self) -> None:
+        self._download()
+        self.assertEqual(self.server.data, self._downloaded_data())
+        # One probe request plus one request per chunk.
+        self.assertEqual(12, len(self.server.requests))
+        self.assertEqual(
+            [os.path.basename(self.download_to)], os.listdir(self.dir)
+        )
+
+    @patch("gem5.utils.progress_bar._have_tqdm", True)
+    def test_sharedProgress(self) -> None:
+        bar = MagicMock(total=0)
+        progress = SharedProgress(bar)
+        ranged_download(
+            self.url,
+            self.download_to,
+            chunk_size=self.chunk_size,
+            progress=progress,
+        )
+        self.server.supports_range = False
+        ranged_download(
+            self.url,
+            f"{self.download_to}.2",
+            chunk_size=self.chunk_size,
+            progress=progress,
+        )
+        size = len(self.server.data)
+        self.assertEqual(2 * size, bar.total)
+        self.assertEqual(
+            2 * size, sum(call.args[0] for call in bar.update.call_args_list)
+        )
+
+    def test_fallbackWithoutRangeSupport(self) -> None:
+        self.server.supports_range = False
+        self._download()
+        self.assertEqual(self.server.data, self._downloaded_data())
+
+    @patch("gem5.resources.ranged_download.time.sleep", lambda _: None)
+    def test_transientFailureIsRetried(self) -> None:
+        self.server.failures[3 * self.chunk_size] = 503
+        self._download()
+        self.assertEqual(self.server.data, self._downloaded_data())
+        self.assertEqual(13, len(self.server.requests))
+
+    @patch("gem5.resources.ranged_download.time.sleep", lambda _: None)
+    def test_nestedRetriesDoNotMultiply(self) -> None:
+        calls = []
+
+        def inner():
+            calls.append(None)
+            raise HTTPError(self.url, 503, "Service Unavailable", {}, None)
+
+        def outer():
+            return _retry_with_backoff(inner, url=self.url, max_attempts=3)
+
+        with self.assertRaises(Exception):
+            _retry_with_backoff(outer, url=self.url, max_attempts=3)
+        self.assertEqual(3, len(calls))
+
+    @patch("gem5.resources.ranged_download.time.sleep", lambda _: None)
+    def test_retriedDownloadIsRetriedOnce(self) -> None:
+        # When the whole download is retried, a failed chunk fails the
+        # download, which then resumes from the chunks already completed.
+        self.server.failures[3 * self.chunk_size] = 503
+        _retry_with_backoff(
+            lambda: self._download(max_workers=1),
+            url=self.url,
+            max_attempts=3,
+        )
+        self.assertEqual(self.server.data, self._downloaded_data())
+        # Two probes, the chunks, and the failed request for the fourth one.
+        self.assertEqual(14, len(self.server.requests))
+
+    def test_unvalidatedResumeWritesZeros(self) -> None:
+        # Without a validator, the bytes left by an interrupted download
+        # cannot be trusted, so runs of zeros are written when resuming.
+        self.server.etag = None
+        data = bytearray(self.server.data)
+        data[5 * self.chunk_size : 6 * self.chunk_size] = bytes(
+            self.chunk_size
+        )
+        self.server.data = bytes(data)
+
+        self.server.failures[3 * self.chunk_size] = 404
+        with self.assertRaises(Exception):
+            self._download(max_workers=1)
+        with open(f"{self.download_to}.part", "r+b") as f:
+            f.seek(5 * self.chunk_size)
+            f.write(b"stale" * 100)
+
+        del self.server.failures[3 * self.chunk_size]
+        self._download()
+        self.assertEqual(self.server.data, self._downloaded_data())
+
+    def test_interruptedDownloadResumes(self) -> None:
+        # A single worker is used so the chunks before the failing chunk are
+        # guaranteed to have completed.
+        self.server.failures[3 * self.chunk_size] = 404
+        with self.assertRaises(Exception):
+            self._download(max_workers=1)
+        self.assertFalse(os.path.exists(self.download_to))
+        self.assertTrue(os.path.exists(f"{self.download_to}.part.json"))
+
+        del self.server.failures[3 * self.chunk_size]
+        self.server.requests.clear()
+        self._download()
+        self.assertEqual(self.server.data, self._downloaded_data())
+        self.assertFalse(os.path.exists(f"{self.download_to}.part.json"))
+
+        # Only the probe and the chunks not completed by the first attempt
+        # are requested.
+        self.assertEqual(9, len(self.server.requests))
+        self.assertIn(
+            f"bytes={3 * self.chunk_size}-{4 * self.chunk_size - 1}",
+            self.server.requests,
+        )
@@ -0,0 +1,180 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from gem5.resources.md5_utils import md5_file, md5_dir
+from gem5.resources.sparse import (
+    SparseWriter,
+    copy_sparse,
+    data_extents,
+    pwrite_sparse,
+)
+
+_mib = 1024 * 1024
+
+
+def _image_data() -> bytes:
+    # A "disk image" with data at the start, in the middle, and at the end,
+    # separated by runs of zeros.
+    return (
+        os.urandom(_mib)
+        + bytes(4 * _mib)
+        + os.urandom(100)
+        + bytes(3 * _mib)
+        + os.urandom(_mib + 3)
+        + bytes(2 * _mib)
+    )
+
+
+class SparseTestSuite(unittest.TestCase):
+    """Test cases for gem5.resources.sparse and sparse-aware hashing."""
+
+    def setUp(self) -> None:
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.data = _image_data()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_dir)
+
+    def _allocated(self, path: Path) -> int:
+        return os.stat(path).st_blocks * 512
+
+    def _write_sparse(self, path: Path) -> None:
+        with open(path, "wb") as f:
+            writer = SparseWriter(f)
+            for offset in range(0, len(self.data), _mib // 2):
+                writer.write(self.data[offset : offset + _mib // 2])
+            writer.finish()
+
+    def _supports_holes(self) -> bool:
+        path = self.tmp_dir / "probe"
+        with open(path, "wb") as f:
+            f.truncate(4 * _mib)
+        return self._allocated(path) < 4 * _mib
+
+    def test_sparseWriter(self) -> None:
+        path = self.tmp_dir / "image"
+        self._write_sparse(path)
+
+        self.assertEqual(self.data, path.read_bytes())
+        if self._supports_holes():
+            self.assertLess(self._allocated(path), 4 * _mib)
+
+    def test_pwriteSparse(self) -> None:
+        path = self.tmp_dir / "image"
+        with open(path, "wb") as f:
+            f.truncate(len(self.data))
+        fd = os.open(path, os.O_WRONLY)
+        try:
+            # Written out of order, as by concurrent ranged downloads.
+            for offset in reversed(range(0, len(self.data), 3 * _mib)):
+                pwrite_sparse(
+                    fd, self.data[offset : offset + 3 * _mib], offset
+                )
+        finally:
+            os.close(fd)
+
+        self.assertEqual(self.data, path.read_bytes())
+        if self._supports_holes():
+            self.assertLess(self._allocated(path), 4 * _mib)
+
+    def test_dataExtents(self) -> None:
+        path = self.tmp_dir / "image"
+        self._write_sparse(path)
+
+        extents = []
+        with open(path, "rb") as f:
+            extents = list(data_extents(f.fileno(), len(self.data)))
+
+        # The extents cover the file, in order, without gaps.
+        offset = 0
+        for start, length, is_data in extents:
+            self.assertEqual(offset, start)
+            self.assertGreater(length, 0)
+            offset += length
+        self.assertEqual(len(self.data), offset)
+
+        # Holes are only reported where the file is zero.
+        for start, length, is_data in extents:
+            if not is_data:
+                self.assertEqual(
+                    bytes(length), self.data[start : start + length]
+                )
+
+    def test_dataExtentsUnsupported(self) -> None:
+        path = self.tmp_dir / "image"
+        self._write_sparse(path)
+
+        # If the filesystem does not support SEEK_DATA, the whole file is
+        # treated as data.
+        with open(path, "rb") as f, patch(
+            "gem5.resources.sparse.os.lseek",
+            side_effect=OSError(22, "Invalid argument"),
+        ):
+            self.assertEqual(
+                [(0, len(self.data), True)],
+                list(data_extents(f.fileno(), len(self.data))),
+            )
+
+    def test_copySparse(self) -> None:
+        src = self.tmp_dir / "image"
+        dst = self.tmp_dir / "copy"
+        self._write_sparse(src)
+        copy_sparse(str(src), str(dst))
+
+        self.assertEqual(self.data, dst.read_bytes())
+        if self._supports_holes():
+            self.assertLess(self._allocated(dst), 4 * _mib)
+
+    def test_md5OfSparseFileIdentical(self) -> None:
+        sparse = self.tmp_dir / "dir" / "sparse"
+        dense = self.tmp_dir / "dense"
+        sparse.parent.mkdir()
+        self._write_sparse(sparse)
+        dense.write_bytes(self.data)
+
+        expected = hashlib.md5(self.data).hexdigest()
+        self.assertEqual(expected, md5_file(sparse))
+        self.assertEqual(expected, md5_file(dense))
+
+        # A small chunk size ensures holes span several chunks.
+        with patch("gem5.resources.md5_utils._chunk_size", 64 * 1024):
+            self.assertEqual(expected, md5_file(sparse))
+            for mode in ("compatible", "tree"):
+                dense_dir = self.tmp_dir / f"dense-{mode}"
+                dense_dir.mkdir()
+                shutil.copy(dense, dense_dir / "sparse")
+                self.assertEqual(
+                    md5_dir(dense_dir, mode=mode),
+                    md5_dir(sparse.parent, mode=mode),
+                )
@@ -0,0 +1,180 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+import tempfile
+import os
+import shutil
+import stat
+import time
+from pathlib import Path
+
+from gem5.resources.store import (
+    collect_garbage,
+    get_object_path,
+    list_objects,
+    mark_used,
+    materialize,
+    seal_object,
+)
+from gem5.resources.md5_utils import md5_file, md5_dir
+from gem5.utils.filelock import FileLock
+
+
+class ResourceStoreTestSuite(unittest.TestCase):
+    """Test cases for gem5.resources.store"""
+
+    def setUp(self) -> None:
+        self.store_dir = Path(tempfile.mkdtemp())
+        self.resource_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.store_dir)
+        shutil.rmtree(self.resource_dir)
+
+    def _add_file_object(self, contents: str) -> Path:
+        tmp = self.store_dir / "tmp"
+        with open(tmp, "w") as f:
+            f.write(contents)
+        object_path = get_object_path(self.store_dir, md5_file(tmp))
+        object_path.parent.mkdir(parents=True, exist_ok=True)
+        os.rename(tmp, object_path)
+        seal_object(object_path)
+        return object_path
+
+    def _add_dir_object(self) -> Path:
+        tmp = self.store_dir / "tmp"
+        os.makedirs(tmp / "subdir")
+        with open(tmp / "file1", "w") as f:
+            f.write("Some test data here")
+        with open(tmp / "subdir" / "file2", "w") as f:
+            f.write("Some more test data")
+        object_path = get_object_path(self.store_dir, md5_dir(tmp))
+        object_path.parent.mkdir(parents=True, exist_ok=True)
+        os.rename(tmp, object_path)
+        seal_object(object_path)
+        return object_path
+
+    def test_invalidMd5(self) -> None:
+        with self.assertRaises(Exception):
+            get_object_path(self.store_dir, "../../etc/passwd")
+
+    def test_sealedObjectIsReadOnly(self) -> None:
+        object_path = self._add_file_object("data")
+        self.assertFalse(os.stat(object_path).st_mode & 0o222)
+
+    def test_materializeHardlink(self) -> None:
+        object_path = self._add_file_object("data")
+        to_path = self.resource_dir / "resource"
+
+        self.assertEqual(
+            "hardlink", materialize(object_path, to_path, "hardlink")
+        )
+        self.assertTrue(os.path.samefile(object_path, to_path))
+
+    def test_materializeSymlink(self) -> None:
+        object_path = self._add_file_object("data")
+        to_path = self.resource_dir / "resource"
+
+        self.assertEqual(
+            "symlink", materialize(object_path, to_path, "symlink")
+        )
+        self.assertTrue(to_path.is_symlink())
+        self.assertEqual(md5_file(object_path), md5_file(to_path))
+
+    def test_materializeCopy(self) -> None:
+        object_path = self._add_file_object("data")
+        to_path = self.resource_dir / "resource"
+
+        self.assertEqual("copy", materialize(object_path, to_path, "copy"))
+        self.assertFalse(to_path.is_symlink())
+        self.assertFalse(os.path.samefile(object_path, to_path))
+        self.assertEqual(md5_file(object_path), md5_file(to_path))
+        # The copy is private, so may be modified.
+        self.assertTrue(os.stat(to_path).st_mode & stat.S_IWUSR)
+
+    def test_materializeAuto(self) -> None:
+        object_path = self._add_file_object("data")
+        to_path = self.resource_dir / "resource"
+
+        # Which method is used depends on the host filesystem, but the
+        # resource must be identical whichever is used.
+        self.assertIn(
+            materialize(object_path, to_path, "auto"),
+            ("reflink", "hardlink", "symlink"),
+        )
+        self.assertEqual(md5_file(object_path), md5_file(to_path))
+
+    def test_materializeDirectory(self) -> None:
+        object_path = self._add_dir_object()
+        to_path = self.resource_dir / "resource"
+
+        materialize(object_path, to_path, "hardlink")
+        self.assertFalse(to_path.is_symlink())
+        self.assertEqual(md5_dir(object_path), md5_dir(to_path))
+        self.assertTrue(
+            os.path.samefile(
+                object_path / "subdir" / "file2", to_path / "subdir" / "file2"
+            )
+        )
+
+    def test_materializeReplacesExisting(self) -> None:
+        object_path = self._add_file_object("data")
+        to_path = self.resource_dir / "resource"
+        with open(to_path, "w") as f:
+            f.write("old data")
+
+        materialize(object_path, to_path, "symlink")
+        self.assertEqual(md5_file(object_path), md5_file(to_path))
+        self.assertEqual(["resource"], os.listdir(self.resource_dir))
+
+    def test_collectGarbageEvictsLeastRecentlyUsed(self) -> None:
+        objects = [self._add_file_object("x" * 100 + str(i)) for i in range(3)]
+        now = time.time()
+        for i, object_path in enumerate(objects):
+            mark_used(object_path)
+            last_used = object_path.parent / f"{object_path.name}.last-used"
+            os.utime(last_used, (now + i, now + i))
+
+        evicted = collect_garbage(self.store_dir, max_size=250)
+
+        self.assertEqual([objects[0]], evicted)
+        self.assertFalse(objects[0].exists())
+        self.assertEqual(
+            [objects[1], objects[2]],
+            [obj for obj, _, _ in list_objects(self.store_dir)],
+        )
+
+    def test_collectGarbageSkipsLockedObjects(self) -> None:
+        object_path = self._add_file_object("data")
+
+        with FileLock(str(object_path)):
+            self.assertEqual([], collect_garbage(self.store_dir, max_size=0))
+        self.assertTrue(object_path.exists())
+
+        self.assertEqual(
+            [object_path], collect_garbage(self.store_dir, max_size=0)
+        )
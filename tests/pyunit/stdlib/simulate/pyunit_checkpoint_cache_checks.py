@@ -0,0 +1,193 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from gem5.simulate.checkpoint_cache import (
+    CheckpointCache,
+    get_config_fingerprint,
+)
+
+
+def _save_function(size: int):
+    def save(path: Path) -> None:
+        path.mkdir()
+        with open(path / "m5.cpt", "wb") as f:
+            f.write(b"x" * size)
+
+    return save
+
+
+def _create_entry(directory: str, fingerprint: str, delay: float) -> None:
+    cache = CheckpointCache(directory=directory)
+    assert cache.acquire(fingerprint) is None
+    time.sleep(delay)
+    cache.save(fingerprint, _save_function(10))
+
+
+class ConfigFingerprintTestSuite(unittest.TestCase):
+    """Tests for gem5.simulate.checkpoint_cache.get_config_fingerprint."""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def _write(self, name: str, contents: str) -> str:
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w") as f:
+            f.write(contents)
+        return path
+
+    def test_same_config(self) -> None:
+        config = {"type": "Root", "board": {"clk": 1000, "cores": [1, 2]}}
+        self.assertEqual(
+            get_config_fingerprint(config), get_config_fingerprint(config)
+        )
+
+    def test_different_config(self) -> None:
+        self.assertNotEqual(
+            get_config_fingerprint({"board": {"clk": 1000}}),
+            get_config_fingerprint({"board": {"clk": 2000}}),
+        )
+
+    def test_extra(self) -> None:
+        config = {"board": {"clk": 1000}}
+        self.assertNotEqual(
+            get_config_fingerprint(config, {"exit_event": "workbegin"}),
+            get_config_fingerprint(config, {"exit_event": "workend"}),
+        )
+
+    def test_file_contents_not_path(self) -> None:
+        # The same resource stored in different places has the same
+        # fingerprint.
+        kernel_a = self._write("kernel-a", "kernel")
+        kernel_b = self._write("kernel-b", "kernel")
+        self.assertEqual(
+            get_config_fingerprint({"object_file": kernel_a}),
+            get_config_fingerprint({"object_file": kernel_b}),
+        )
+
+    def test_file_contents_changed(self) -> None:
+        kernel_a = self._write("kernel-a", "kernel")
+        kernel_b = self._write("kernel-b", "another kernel")
+        self.assertNotEqual(
+            get_config_fingerprint({"object_file": kernel_a}),
+            get_config_fingerprint({"object_file": kernel_b}),
+        )
+
+
+class CheckpointCacheTestSuite(unittest.TestCase):
+    """Tests for gem5.simulate.checkpoint_cache.CheckpointCache."""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_miss_then_hit(self) -> None:
+        cache = CheckpointCache(directory=self.directory.name)
+        self.assertIsNone(cache.acquire("a"))
+        path = cache.save("a", _save_function(10), metadata={"tick": 5})
+
+        self.assertTrue((path / "m5.cpt").is_file())
+        metadata = cache.get_metadata("a")
+        self.assertEqual(5, metadata["tick"])
+        self.assertEqual(10, metadata["size"])
+
+        self.assertEqual(path, cache.acquire("a"))
+        cache.release("a")
+        self.assertEqual(["a"], cache.get_fingerprints())
+
+    def test_partial_entry_ignored(self) -> None:
+        # A checkpoint without metadata (e.g., the process creating it failed)
+        # is not a valid entry.
+        cache = CheckpointCache(directory=self.directory.name)
+        cache.get_checkpoint_path("a").mkdir()
+        self.assertIsNone(cache.get_metadata("a"))
+        self.assertIsNone(cache.acquire("a"))
+        self.assertFalse(cache.get_checkpoint_path("a").exists())
+        cache.release("a")
+
+    def test_lru_eviction(self) -> None:
+        cache = CheckpointCache(directory=self.directory.name, max_size=25)
+        for fingerprint in ["a", "b"]:
+            self.assertIsNone(cache.acquire(fingerprint))
+            cache.save(fingerprint, _save_function(10))
+
+        # Use "a", so that "b" is the least recently used.
+        time.sleep(0.01)
+        self.assertIsNotNone(cache.acquire("a"))
+        cache.release("a")
+
+        self.assertIsNone(cache.acquire("c"))
+        cache.save("c", _save_function(10))
+
+        self.assertEqual(["a", "c"], cache.get_fingerprints())
+        self.assertEqual(20, cache.get_size())
+
+    def test_entry_in_use_not_evicted(self) -> None:
+        cache = CheckpointCache(directory=self.directory.name, max_size=15)
+        self.assertIsNone(cache.acquire("a"))
+        cache.save("a", _save_function(10))
+
+        # Another process is restoring from "a".
+        reader = CheckpointCache(directory=self.directory.name)
+        self.assertIsNotNone(reader.acquire("a"))
+
+        self.assertIsNone(cache.acquire("b"))
+        cache.save("b", _save_function(10))
+        self.assertEqual(["a", "b"], cache.get_fingerprints())
+        reader.release("a")
+
+    def test_memory_size_string(self) -> None:
+        cache = CheckpointCache(directory=self.directory.name, max_size="1KiB")
+        self.assertEqual(1024, cache._max_size)
+
+    def test_concurrent_creation(self) -> None:
+        # A run with the same fingerprint as a run creating an entry waits for
+        # it, rather than creating the entry itself.
+        process = multiprocessing.get_context("fork").Process(
+            target=_create_entry, args=(self.directory.name, "a", 1.0)
+        )
+        process.start()
+        cache = CheckpointCache(directory=self.directory.name)
+        while not cache.get_directory().is_dir() or not any(
+            path.name.endswith(".lock")
+            for path in cache.get_directory().iterdir()
+        ):
+            time.sleep(0.01)
+
+        path = cache.acquire("a")
+        process.join()
+        self.assertEqual(0, process.exitcode)
+        self.assertEqual(cache.get_checkpoint_path("a"), path)
+        cache.release("a")
@@ -0,0 +1,169 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from m5.ext.pystats.group import Group
+from m5.ext.pystats.simstat import SimStat
+from m5.ext.pystats.statistic import Distribution, Scalar
+
+from gem5.resources.looppoint import LooppointJsonLoader
+from gem5.simulate.regions import (
+    RegionLedger,
+    _looppoint_region_length,
+    weighted_simstat,
+)
+
+
+def _simstat(insts: int, cycles: int, bins: list) -> SimStat:
+    return SimStat(
+        simulated_begin_time=0,
+        simulated_end_time=10,
+        board=Group(
+            insts=Scalar(value=insts, unit="Count"),
+            cycles=Scalar(value=cycles, unit="Cycle"),
+            latency=Distribution(
+                value=bins,
+                min=min(bins),
+                max=max(bins),
+                num_bins=len(bins),
+                bin_size=1,
+                sum=sum(bins),
+            ),
+        ),
+    )
+
+
+class WeightedSimStatTestSuite(unittest.TestCase):
+    """Tests for gem5.simulate.regions.weighted_simstat."""
+
+    def test_weighted_scalars(self) -> None:
+        simstat = weighted_simstat(
+            [_simstat(100, 200, [1, 2]), _simstat(300, 400, [3, 4])],
+            [0.25, 0.75],
+        )
+        self.assertEqual(250, simstat.board.insts.value)
+        self.assertEqual(350, simstat.board.cycles.value)
+        self.assertEqual("Count", simstat.board.insts.unit)
+        self.assertEqual(10, simstat.simulated_end_time)
+
+    def test_weighted_distribution(self) -> None:
+        simstat = weighted_simstat(
+            [_simstat(1, 1, [1, 2]), _simstat(1, 1, [3, 6])],
+            [0.5, 0.5],
+        )
+        self.assertEqual([2, 4], simstat.board.latency.value)
+        self.assertEqual(6, simstat.board.latency.sum)
+        self.assertEqual(1, simstat.board.latency.min)
+        self.assertEqual(6, simstat.board.latency.max)
+
+    def test_missing_stat_omitted(self) -> None:
+        other = _simstat(1, 1, [1])
+        del other.board.cycles
+        simstat = weighted_simstat([_simstat(1, 1, [1]), other], [0.5, 0.5])
+        self.assertFalse(hasattr(simstat.board, "cycles"))
+        self.assertTrue(hasattr(simstat.board, "insts"))
+
+    def test_weights_mismatch(self) -> None:
+        with self.assertRaises(ValueError):
+            weighted_simstat([_simstat(1, 1, [1])], [0.5, 0.5])
+
+
+class RegionLedgerTestSuite(unittest.TestCase):
+    """Tests for gem5.simulate.regions.RegionLedger."""
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.dir.name) / "ledger.json"
+        self.stats = Path(self.dir.name) / "simstats.json"
+        self.stats.write_text("{}")
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test_resume(self) -> None:
+        ledger = RegionLedger(self.path, {"regions": [0, 1]})
+        ledger.record_success("region-0", self.stats)
+        ledger.record_failure("region-1", "crashed")
+
+        ledger = RegionLedger(self.path, {"regions": [0, 1]})
+        self.assertEqual(["region-0"], list(ledger.get_completed_regions()))
+        self.assertEqual(["region-1"], list(ledger.get_failed_regions()))
+        self.assertEqual(
+            1, ledger.get_failed_regions()["region-1"]["attempts"]
+        )
+
+    def test_missing_stats_not_completed(self) -> None:
+        ledger = RegionLedger(self.path, {})
+        ledger.record_success("region-0", self.stats)
+        self.stats.unlink()
+        self.assertEqual(
+            {}, RegionLedger(self.path, {}).get_completed_regions()
+        )
+
+    def test_fingerprint_mismatch(self) -> None:
+        RegionLedger(self.path, {"interval": 1}).record_success(
+            "region-0", self.stats
+        )
+        ledger = RegionLedger(self.path, {"interval": 2})
+        self.assertEqual({}, ledger.get_completed_regions())
+        self.assertEqual(
+            {"interval": 1}, json.loads(self.path.read_text())["fingerprint"]
+        )
+
+
+class LooppointRegionLengthTestSuite(unittest.TestCase):
+    """Tests for gem5.simulate.regions._looppoint_region_length."""
+
+    def test_region_length(self) -> None:
+        looppoint = LooppointJsonLoader(
+            looppoint_file=os.path.join(
+                os.path.realpath(os.path.dirname(__file__)),
+                "..",
+                "refs",
+                "output.json",
+            )
+        )
+        regions = looppoint.get_regions()
+
+        # Region 1 has a relative count for its end, region 2 does not.
+        self.assertEqual(
+            (True, 23310252), _looppoint_region_length(regions["1"])
+        )
+        self.assertEqual((False, 0), _looppoint_region_length(regions["2"]))
+
+        # Regions of unknown length are started after all the others.
+        order = sorted(
+            regions,
+            key=lambda region_id: _looppoint_region_length(regions[region_id]),
+            reverse=True,
+        )
+        self.assertEqual("2", order[-1])
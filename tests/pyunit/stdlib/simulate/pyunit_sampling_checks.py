@@ -0,0 +1,95 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import json
+import os
+import tempfile
+import unittest
+
+from gem5.simulate.sampling import SamplingReport, SmartsSampler, summarize
+
+
+class SummarizeTestSuite(unittest.TestCase):
+    """Tests for gem5.simulate.sampling.summarize."""
+
+    def test_summary(self) -> None:
+        summary = summarize([1.0, 2.0, 3.0, 4.0], confidence=0.95)
+        self.assertEqual(4, summary["samples"])
+        self.assertAlmostEqual(2.5, summary["mean"])
+        self.assertAlmostEqual(1.2909944, summary["stdev"], places=6)
+        # 1.959964 * 1.2909944 / sqrt(4)
+        self.assertAlmostEqual(1.2651513, summary["half_width"], places=6)
+        self.assertAlmostEqual(
+            summary["half_width"] / 2.5, summary["relative_error"]
+        )
+
+    def test_higher_confidence_is_wider(self) -> None:
+        values = [1.0, 1.5, 0.5, 1.2]
+        self.assertGreater(
+            summarize(values, confidence=0.997)["half_width"],
+            summarize(values, confidence=0.95)["half_width"],
+        )
+
+    def test_single_sample(self) -> None:
+        summary = summarize([2.0], confidence=0.997)
+        self.assertEqual(2.0, summary["mean"])
+        self.assertEqual(0.0, summary["half_width"])
+
+    def test_invalid(self) -> None:
+        with self.assertRaises(ValueError):
+            summarize([], confidence=0.997)
+        with self.assertRaises(ValueError):
+            summarize([1.0], confidence=1.0)
+
+
+class SamplingReportTestSuite(unittest.TestCase):
+    """Tests for gem5.simulate.sampling.SamplingReport."""
+
+    def test_report(self) -> None:
+        report = SamplingReport(confidence=0.95)
+        self.assertEqual({}, report.get_summary())
+        report.samples = [{"ipc": 1.0, "cpi": 1.0}, {"ipc": 2.0, "cpi": 0.5}]
+        self.assertEqual({"ipc", "cpi"}, set(report.get_summary()))
+        self.assertAlmostEqual(1.5, report.get_summary()["ipc"]["mean"])
+        self.assertIn("ipc", str(report))
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "report.json")
+            report.dump(path)
+            with open(path) as f:
+                self.assertEqual(2, len(json.load(f)["samples"]))
+
+
+class SmartsSamplerTestSuite(unittest.TestCase):
+    """Tests for gem5.simulate.sampling.SmartsSampler."""
+
+    def test_invalid_intervals(self) -> None:
+        with self.assertRaises(ValueError):
+            SmartsSampler(period=100, warmup=50, measurement=50)
+        with self.assertRaises(ValueError):
+            SmartsSampler(period=100, warmup=10, measurement=0)
+        SmartsSampler(period=101, warmup=50, measurement=50)
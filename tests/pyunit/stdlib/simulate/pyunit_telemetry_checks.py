@@ -0,0 +1,137 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import unittest
+
+from gem5.simulate.telemetry import Telemetry, TelemetrySummary
+
+
+def _samples(insts: list, interval: float = 1.0) -> list:
+    return [
+        {
+            "host_seconds": i * interval,
+            "host_cpu_seconds": i * interval * 0.9,
+            "tick": i * 1000,
+            "insts": count,
+            "rss_bytes": 2**20 * (i + 1),
+        }
+        for i, count in enumerate(insts)
+    ]
+
+
+class TelemetrySummaryTestSuite(unittest.TestCase):
+    """Tests for gem5.simulate.telemetry.TelemetrySummary."""
+
+    def test_no_samples(self) -> None:
+        summary = TelemetrySummary().get_summary()
+        self.assertEqual(0, summary["samples"])
+        self.assertIsNone(summary["mean_kips"])
+        self.assertIsNone(summary["trend"])
+
+    def test_steady(self) -> None:
+        summary = TelemetrySummary()
+        summary.add(_samples([i * 1_000_000 for i in range(9)]))
+        result = summary.get_summary()
+
+        self.assertEqual(9, result["samples"])
+        self.assertEqual(8.0, result["host_seconds"])
+        self.assertAlmostEqual(7.2, result["host_cpu_seconds"])
+        self.assertEqual(8000, result["ticks"])
+        self.assertEqual(8_000_000, result["insts"])
+        self.assertEqual(1000.0, result["mean_kips"])
+        self.assertEqual(1000.0, result["min_kips"])
+        self.assertEqual(1000.0, result["max_kips"])
+        self.assertEqual("steady", result["trend"])
+        self.assertEqual(0.0, result["longest_stall_seconds"])
+        self.assertEqual(9 * 2**20, result["peak_rss_bytes"])
+
+    def test_checkpoints(self) -> None:
+        summary = TelemetrySummary()
+        self.assertEqual(0, summary.get_summary()["checkpoints"])
+        self.assertEqual(
+            0.0, summary.get_summary()["max_checkpoint_resume_seconds"]
+        )
+
+        summary.add_checkpoints([0.5, 2.0])
+        summary.add_checkpoints([1.5])
+        result = summary.get_summary()
+
+        self.assertEqual(3, result["checkpoints"])
+        self.assertEqual(4.0, result["checkpoint_resume_seconds"])
+        self.assertEqual(2.0, result["max_checkpoint_resume_seconds"])
+        self.assertIn("3 checkpoint(s)", str(summary))
+
+    def test_slowing_down(self) -> None:
+        # 1 MIPS for four intervals, then 10 KIPS for four intervals.
+        insts = [0, 1_000_000, 2_000_000, 3_000_000, 4_000_000]
+        insts += [4_000_000 + i * 10_000 for i in range(1, 5)]
+        summary = TelemetrySummary()
+        summary.add(_samples(insts))
+        result = summary.get_summary()
+
+        self.assertEqual("slowing down", result["trend"])
+        self.assertEqual(1000.0, result["first_quarter_kips"])
+        self.assertEqual(10.0, result["last_quarter_kips"])
+        self.assertEqual(10.0, result["min_kips"])
+
+    def test_speeding_up(self) -> None:
+        insts = [0, 10_000, 20_000, 1_020_000, 2_020_000]
+        summary = TelemetrySummary()
+        summary.add(_samples(insts))
+        self.assertEqual("speeding up", summary.get_summary()["trend"])
+
+    def test_stall(self) -> None:
+        # No progress for three intervals in a row.
+        insts = [0, 100, 100, 100, 100, 200, 200]
+        summary = TelemetrySummary()
+        summary.add(_samples(insts, interval=2.0))
+        self.assertEqual(6.0, summary.get_summary()["longest_stall_seconds"])
+
+    def test_batches(self) -> None:
+        # Adding samples in batches gives the same summary as all at once.
+        samples = _samples([i * i * 1000 for i in range(10)])
+        all_at_once = TelemetrySummary()
+        all_at_once.add(samples)
+        batched = TelemetrySummary()
+        batched.add(samples[:3])
+        batched.add(samples[3:7])
+        batched.add(samples[7:])
+        self.assertEqual(all_at_once.get_summary(), batched.get_summary())
+
+    def test_str(self) -> None:
+        summary = TelemetrySummary()
+        summary.add(_samples([i * 1_000_000 for i in range(5)]))
+        self.assertIn("1000.0 KIPS mean", str(summary))
+        self.assertIn("steady", str(summary))
+
+
+class TelemetryTestSuite(unittest.TestCase):
+    """Tests for gem5.simulate.telemetry.Telemetry."""
+
+    def test_invalid_interval(self) -> None:
+        with self.assertRaises(ValueError):
+            Telemetry(interval=0)
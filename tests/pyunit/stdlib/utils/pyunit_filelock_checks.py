@@ -0,0 +1,152 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import os
+import shutil
+import signal
+import tempfile
+import threading
+import time
+import unittest
+
+from gem5.utils.filelock import FileLock, FileLockException
+
+
+class FileLockTestSuite(unittest.TestCase):
+    """Test cases for gem5.utils.filelock.FileLock."""
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.tmp_dir, "resource")
+        self.processes = []
+
+    def tearDown(self) -> None:
+        for pid in list(self.processes):
+            self._kill(pid)
+        shutil.rmtree(self.tmp_dir)
+
+    def _hold_lock_in_process(self, shared: bool = False) -> int:
+        """
+        Forks a process which takes the lock and holds it until killed.
+        Returns the process's PID once it holds the lock.
+        """
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                os.close(read_fd)
+                lock = FileLock(self.file_name, shared=shared)
+                lock.acquire()
+                os.write(write_fd, b"locked")
+                time.sleep(600)
+            finally:
+                os._exit(0)
+
+        os.close(write_fd)
+        self.processes.append(pid)
+        self.assertEqual(b"locked", os.read(read_fd, 6))
+        os.close(read_fd)
+        return pid
+
+    def _kill(self, pid: int) -> None:
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+        self.processes.remove(pid)
+
+    def test_lockFileRemovedOnRelease(self) -> None:
+        lock = FileLock(self.file_name)
+        with lock:
+            self.assertTrue(os.path.exists(lock.lockfile))
+        self.assertFalse(os.path.exists(lock.lockfile))
+
+    def test_exclusiveBetweenThreads(self) -> None:
+        events = []
+        first = FileLock(self.file_name)
+        first.acquire()
+
+        def take_lock():
+            with FileLock(self.file_name, timeout=10):
+                events.append("second")
+
+        thread = threading.Thread(target=take_lock)
+        thread.start()
+        time.sleep(0.2)
+        events.append("first")
+        first.release()
+        thread.join()
+
+        self.assertEqual(["first", "second"], events)
+
+    def test_sharedLocksCoexist(self) -> None:
+        with FileLock(self.file_name, shared=True):
+            with FileLock(self.file_name, timeout=None, shared=True):
+                with self.assertRaises(FileLockException):
+                    FileLock(self.file_name, timeout=None).acquire()
+        with FileLock(self.file_name, timeout=None):
+            pass
+
+    def test_timeoutNoneFailsImmediately(self) -> None:
+        with FileLock(self.file_name):
+            start = time.monotonic()
+            with self.assertRaises(FileLockException):
+                FileLock(self.file_name, timeout=None).acquire()
+            self.assertLess(time.monotonic() - start, 1)
+
+    def test_timeoutBetweenProcesses(self) -> None:
+        self._hold_lock_in_process()
+
+        start = time.monotonic()
+        with self.assertRaises(FileLockException):
+            FileLock(self.file_name, timeout=0.5).acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.5)
+
+        # A shared lock held by another process does not exclude a shared
+        # lock in this one.
+        self.tearDown()
+        self.setUp()
+        self._hold_lock_in_process(shared=True)
+        with FileLock(self.file_name, timeout=None, shared=True):
+            pass
+
+    def test_waitForReleaseBetweenProcesses(self) -> None:
+        pid = self._hold_lock_in_process()
+        timer = threading.Timer(0.5, self._kill, args=(pid,))
+        timer.start()
+
+        start = time.monotonic()
+        with FileLock(self.file_name, timeout=10):
+            self.assertGreaterEqual(time.monotonic() - start, 0.4)
+        timer.join()
+
+    def test_releasedWhenOwnerDies(self) -> None:
+        self._kill(self._hold_lock_in_process())
+
+        # The lock file is left behind, but the lock is not held.
+        lock = FileLock(self.file_name, timeout=None)
+        self.assertTrue(os.path.exists(lock.lockfile))
+        with lock:
+            pass
+        self.assertFalse(os.path.exists(lock.lockfile))
@@ -0,0 +1,108 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import io
+import threading
+import unittest
+from unittest.mock import patch
+
+from gem5.utils import progress_bar
+from gem5.utils.progress_bar import SharedProgress, progress_hook
+
+
+class _Bar:
+    """A stand-in for a tqdm progress bar."""
+
+    def __init__(self):
+        self.total = 0
+        self.n = 0
+        self.desc = None
+
+    def update(self, n):
+        self.n += n
+
+    def refresh(self):
+        pass
+
+    def set_description(self, desc):
+        self.desc = desc
+
+
+@patch.object(progress_bar, "_have_tqdm", True)
+class SharedProgressTestSuite(unittest.TestCase):
+    """Test cases for gem5.utils.progress_bar.SharedProgress."""
+
+    def setUp(self) -> None:
+        self.bar = _Bar()
+        self.progress = SharedProgress(self.bar)
+
+    def test_tasks(self) -> None:
+        with self.progress(total=100, initial=10) as first:
+            first.update(40)
+        with self.progress(total=50) as second:
+            second.update(50)
+        self.assertEqual(150, self.bar.total)
+        self.assertEqual(100, self.bar.n)
+
+    def test_concurrent_tasks(self) -> None:
+        def task():
+            with self.progress(total=1000) as t:
+                for _ in range(1000):
+                    t.update(1)
+
+        threads = [threading.Thread(target=task) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(8000, self.bar.total)
+        self.assertEqual(8000, self.bar.n)
+
+    def test_progress_hook(self) -> None:
+        # The total reported by the hook is only added to the bar once.
+        with self.progress() as t:
+            hook = progress_hook(t)
+            for block in range(1, 5):
+                hook(block, 10, 40)
+        self.assertEqual(40, self.bar.total)
+        self.assertEqual(40, self.bar.n)
+
+    def test_wrapattr(self) -> None:
+        source = io.BytesIO(b"x" * 100)
+        with self.progress.wrapattr(source, "read", total=100) as f:
+            self.assertEqual(60, len(f.read(60)))
+            f.read()
+        sink = io.BytesIO()
+        with self.progress.wrapattr(sink, "write") as f:
+            f.write(b"y" * 20)
+        self.assertEqual(b"y" * 20, sink.getvalue())
+        self.assertEqual(100, self.bar.total)
+        self.assertEqual(120, self.bar.n)
+
+    def test_set_description(self) -> None:
+        self.progress.set_description("Prefetching resources (1/2)")
+        self.assertEqual("Prefetching resources (1/2)", self.bar.desc)
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+# This script converts the physical memory stores of gem5 checkpoints between
+# the default gzip-compressed format and an uncompressed, page-aligned ("raw")
+# format.
+#
+# When a checkpoint with raw stores is restored, gem5 maps each store file
+# copy-on-write over the simulated memory instead of reading and
+# decompressing it, so only the pages actually touched by the simulation are
+# read from disk. Restoring is then proportional to the working set of the
+# simulation rather than the size of the memory, which suits short SimPoint or
+# LoopPoint regions. Raw stores are written as sparse files, so unused memory
+# takes no disk space on filesystems which support them.
+#
+# Stores of incremental checkpoints (which only hold the pages changed since
+# their parent checkpoint) are left as they are. Their parent checkpoints can
+# be converted instead.
+
+import argparse
+import configparser
+import gzip
+import os
+import os.path as osp
+import sys
+
+# The size of the chunks copied at a time. This is a multiple of any host page
+# size, so zero chunks can be skipped to create a sparse file.
+_chunk_size = 1 << 20
+
+_gzip_magic = b"\x1f\x8b"
+
+
+def _read_checkpoint(cpt_file):
+    cpt = configparser.ConfigParser(interpolation=None)
+    cpt.optionxform = str
+    cpt.read(cpt_file)
+    return cpt
+
+
+def _write_checkpoint(cpt, cpt_file):
+    tmp_file = f"{cpt_file}.tmp"
+    with open(tmp_file, "w") as f:
+        cpt.write(f, space_around_delimiters=False)
+    os.replace(tmp_file, cpt_file)
+
+
+def _store_sections(cpt):
+    """
+    Returns the sections of the physical memory stores which hold the full
+    contents of the store.
+    """
+    return [
+        sec
+        for sec in cpt.sections()
+        if cpt.has_option(sec, "store_id")
+        and cpt.has_option(sec, "filename")
+        and cpt.has_option(sec, "range_size")
+        and not cpt.has_option(sec, "parent_dir")
+    ]
+
+
+def _open_store(path):
+    """
+    Opens a store file for reading. Stores are gzip-compressed by default, but
+    gem5 also reads uncompressed stores (e.g., as written by
+    checkpoint_aggregator.py).
+    """
+    with open(path, "rb") as f:
+        magic = f.read(len(_gzip_magic))
+    if magic == _gzip_magic:
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def to_raw(cpt_dir, cpt, section):
+    filename = cpt.get(section, "filename")
+    range_size = cpt.getint(section, "range_size")
+    if filename.endswith(".pmem"):
+        raw_filename = filename[: -len(".pmem")] + ".raw"
+    else:
+        raw_filename = filename + ".raw"
+
+    src = osp.join(cpt_dir, filename)
+    dst = osp.join(cpt_dir, raw_filename)
+    with _open_store(src) as fin, open(f"{dst}.tmp", "wb") as fout:
+        while True:
+            chunk = fin.read(_chunk_size)
+            if not chunk:
+                break
+            if chunk.count(0) == len(chunk):
+                fout.seek(len(chunk), os.SEEK_CUR)
+            else:
+                fout.write(chunk)
+        # gem5 maps the whole memory range, so the file must cover it.
+        fout.truncate(range_size)
+    os.replace(f"{dst}.tmp", dst)
+
+    cpt.set(section, "filename", raw_filename)
+    cpt.set(section, "format", "raw")
+    return src
+
+
+def to_gzip(cpt_dir, cpt, section):
+    filename = cpt.get(section, "filename")
+    if filename.endswith(".raw"):
+        gz_filename = filename[: -len(".raw")] + ".pmem"
+    else:
+        gz_filename = filename + ".pmem"
+
+    src = osp.join(cpt_dir, filename)
+    dst = osp.join(cpt_dir, gz_filename)
+    with open(src, "rb") as fin, gzip.open(f"{dst}.tmp", "wb") as fout:
+        while True:
+            chunk = fin.read(_chunk_size)
+            if not chunk:
+                break
+            fout.write(chunk)
+    os.replace(f"{dst}.tmp", dst)
+
+    cpt.set(section, "filename", gz_filename)
+    cpt.remove_option(section, "format")
+    return src
+
+
+def convert(cpt_dir, to="raw", keep=False):
+    """
+    Converts the physical memory stores of a checkpoint.
+
+    :param cpt_dir: The checkpoint directory, containing an m5.cpt file.
+    :param to: The format to convert to, "raw" or "gzip".
+    :param keep: Whether to keep the original store files.
+    """
+    cpt_file = osp.join(cpt_dir, "m5.cpt")
+    cpt = _read_checkpoint(cpt_file)
+
+    converted = []
+    for section in _store_sections(cpt):
+        is_raw = cpt.get(section, "format", fallback="gzip") == "raw"
+        if (to == "raw") == is_raw:
+            continue
+        print(f"Converting {section} in {cpt_dir} to {to}")
+        if to == "raw":
+            converted.append(to_raw(cpt_dir, cpt, section))
+        else:
+            converted.append(to_gzip(cpt_dir, cpt, section))
+
+    # Only update the checkpoint once all the new store files are written,
+    # so an interrupted conversion leaves a usable checkpoint.
+    if converted:
+        _write_checkpoint(cpt, cpt_file)
+        if not keep:
+            for path in converted:
+                os.remove(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Converts the physical memory stores of gem5 "
+        "checkpoints to an uncompressed format which gem5 maps lazily on "
+        "restore, or back to the default gzip-compressed format."
+    )
+    parser.add_argument(
+        "checkpoints",
+        nargs="+",
+        help="Checkpoint directories (containing an m5.cpt file)",
+    )
+    parser.add_argument(
+        "--to",
+        choices=["raw", "gzip"],
+        default="raw",
+        help="The format to convert the stores to (default: raw)",
+    )
+    parser.add_argument(
+        "--keep",
+        action="store_true",
+        help="Keep the original store files",
+    )
+    args = parser.parse_args()
+
+    for cpt_dir in args.checkpoints:
+        cpt_dir = osp.expandvars(osp.expanduser(cpt_dir))
+        if not osp.isfile(osp.join(cpt_dir, "m5.cpt")):
+            print(f"Error: checkpoint file not found in {cpt_dir}")
+            sys.exit(1)
+        convert(cpt_dir, to=args.to, keep=args.keep)
+    sys.exit(0)
@@ -0,0 +1,189 @@
+# Copyright (c) 2023 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+# This script times passes over a large synthetic SimObject hierarchy, to
+# measure the Python overhead of instantiating a large simulated system. It
+# only builds SimObjects in Python, so it runs with any gem5 binary and does
+# not instantiate or simulate anything, e.g.:
+#
+#   build/ALL/gem5.opt util/simobject_benchmark.py --fanout 24 --depth 3
+#
+# `m5.instantiate` and the first `m5.simulate` pass over the whole hierarchy
+# about ten times. The script compares walking it with
+# `SimObject.descendants()` each time to listing it once with
+# `SimObject.descendants_list()`.
+#
+# It also resolves a Parent.any and a Parent.all proxy from every object, like
+# `unproxyParams` does for `system = Param.System(Parent.any)`, and compares
+# scanning the children and params of each object every time to the type
+# indexes behind `SimObject.find_any` and `SimObject.find_all`.
+
+import argparse
+import time
+
+from m5.objects import SubSystem, ThermalDomain, ThermalNode
+from m5.params import isNullPointer
+from m5.proxy import isproxy
+
+
+def hierarchy(fanout: int, depth: int) -> SubSystem:
+    """
+    Builds a synthetic SimObject hierarchy. Each object in the first `depth`
+    levels has a vector of `fanout` children and one single child, like a
+    system with many cores (and their caches) and a few shared objects. The
+    root also has a thermal node and a thermal domain, which every vector
+    element refers to through its `thermal_domain` param.
+    """
+    root = SubSystem()
+    root.node = ThermalNode()
+    root.domain = ThermalDomain()
+    root.thermal_domain = root.domain
+    level = [root]
+    for _ in range(depth):
+        next_level = []
+        for obj in level:
+            obj.nodes = [SubSystem() for _ in range(fanout)]
+            for node in obj.nodes:
+                node.thermal_domain = root.domain
+            obj.leaf = SubSystem()
+            next_level.extend(obj.nodes)
+        level = next_level
+    return root
+
+
+def time_descendants(root: SubSystem, passes: int) -> None:
+    start = time.perf_counter()
+    for _ in range(passes):
+        for obj in root.descendants():
+            pass
+    generator_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    objs = tuple(root.descendants_list())
+    for _ in range(passes):
+        for obj in objs:
+            pass
+    list_seconds = time.perf_counter() - start
+
+    print(
+        f"{len(objs)} SimObjects, {passes} passes: "
+        f"{generator_seconds:.3f}s with descendants(), "
+        f"{list_seconds:.3f}s with descendants_list()"
+    )
+
+
+def find_any(obj, ptype):
+    """SimObject.find_any, scanning the children and params every time."""
+    if isinstance(obj, ptype):
+        return obj, True
+    found_obj = None
+    for child in obj._children.values():
+        if isinstance(child, ptype) and not getattr(child, "_visited", False):
+            assert found_obj is None or child == found_obj
+            found_obj = child
+    for pname, pdesc in obj._params.items():
+        if issubclass(pdesc.ptype, ptype):
+            match_obj = obj._values[pname]
+            assert found_obj is None or found_obj == match_obj
+            found_obj = match_obj
+    return found_obj, found_obj != None
+
+
+def find_all(obj, ptype):
+    """SimObject.find_all, walking the whole subtree every time."""
+    all = {}
+    for child in obj._children.values():
+        children = child if isinstance(child, list) else [child]
+        for child in children:
+            if isinstance(child, ptype) and not isNullPointer(child):
+                all[child] = True
+            all.update(dict.fromkeys(find_all(child, ptype)[0], True))
+    for pname, pdesc in obj._params.items():
+        if issubclass(pdesc.ptype, ptype):
+            match_obj = obj._values[pname]
+            if not isproxy(match_obj) and not isNullPointer(match_obj):
+                all[match_obj] = True
+    return sorted(all.keys(), key=lambda o: o.path()), True
+
+
+def resolve(obj, find):
+    """Resolves a proxy for the thermal node the way BaseProxy.unproxy does."""
+    done = False
+    while not done:
+        obj = obj._parent
+        result, done = find(obj, ThermalNode)
+    return result
+
+
+def time_proxies(root: SubSystem) -> None:
+    objs = root.descendants_list()[1:]
+
+    start = time.perf_counter()
+    for obj in objs:
+        resolve(obj, find_any)
+        resolve(obj, find_all)
+    scan_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for obj in objs:
+        resolve(obj, lambda o, ptype: o.find_any(ptype))
+        resolve(obj, lambda o, ptype: o.find_all(ptype))
+    index_seconds = time.perf_counter() - start
+
+    print(
+        f"{len(objs) + 1} SimObjects, resolving Parent.any and Parent.all "
+        f"from each: {scan_seconds:.3f}s scanning, {index_seconds:.3f}s "
+        "with the type indexes"
+    )
+
+
+parser = argparse.ArgumentParser(
+    description="Time passes over a synthetic SimObject hierarchy."
+)
+parser.add_argument(
+    "--fanout",
+    type=int,
+    default=24,
+    help="The number of children in each vector of children.",
+)
+parser.add_argument(
+    "--depth",
+    type=int,
+    default=3,
+    help="The number of levels with vectors of children.",
+)
+parser.add_argument(
+    "--passes",
+    type=int,
+    default=10,
+    help="The number of passes over the hierarchy.",
+)
+args = parser.parse_args()
+
+root = hierarchy(args.fanout, args.depth)
+time_descendants(root, args.passes)
+time_proxies(root)